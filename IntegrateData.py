@@ -8,6 +8,9 @@ import numpy as np
 from collections import Counter
 import json
 
+from models.derived import add_derived_columns
+from models.normalize import align_columns
+
 class GraduateDataProcessor:
     """
     Processes graduate survey data for the analytics dashboard
@@ -16,65 +19,12 @@ class GraduateDataProcessor:
     
     def __init__(self, excel_file_path):
         """Initialize with the path to your questionnaire Excel file"""
-        self.df = pd.read_excel(excel_file_path)
+        self.df = align_columns(pd.read_excel(excel_file_path))
         self.processed_data = {}
         
-        # Apply your existing data categorizations
-        self._categorize_institutions()
-        self._group_fields_of_study()
-        
-    def _categorize_institutions(self):
-        """Apply the same institution categorization from your code"""
-        def categorize_institution(cell):
-            if pd.isnull(cell):
-                return None
-            if 'Universiti Poly-Tech Malaysia (UPTM)' in cell:
-                return 'Universiti Poly-Tech Malaysia (UPTM)'
-            elif 'Kolej Poly-Tech MARA' in cell:
-                return 'Kolej Poly-Tech MARA'
-            else:
-                return 'Other'
-        
-        self.df['Institution_Category'] = self.df['Institusi pendidikan MARA yang anda hadiri? '].apply(categorize_institution)
-    
-    def _group_fields_of_study(self):
-        """Apply the same field of study grouping from your code"""
-        field_of_study_mapping = {
-            'Kejuruteraan & Teknologi': 'Engineering Environment',
-            'Teknologi Elektrik, Elektronik & Pembinaan': 'Engineering Environment',
-            'Sains Komputer & Kecerdasan Buatan': 'IT & Computer Science',
-            'Sains Data & Analitik': 'IT & Computer Science',
-            'Fizik, Kimia & Bioteknologi': 'Natural Science Medical Science / Specialist',
-            'Perubatan, Farmasi & Sains Kesihatan': 'Natural Science Medical Science / Specialist',
-            'Pemakanan, Dietetik & Fisioterapi': 'Natural Science Medical Science / Specialist',
-            'Kewangan, Perbankan & Perakaunan': 'Accounting & Finance',
-            'Matematik & Sains Aktuari': 'Accounting & Finance',
-            'Pemasaran & Pengurusan Sumber Manusia': 'Economy, Business & Management',
-            'Pengurusan Perniagaan & Keusahawanan': 'Economy, Business & Management',
-            'Logistik, Pengangkutan & Rantaian Bekalan': 'Economy, Business & Management',
-            'Komunikasi, Media & Hubungan Antarabangsa': 'Economy, Business & Management',
-            'Psikologi, Sosiologi & Kajian Kemanusiaan': 'Economy, Business & Management',
-            'Pelancongan, Hospitaliti & Pengurusan Acara': 'Economy, Business & Management',
-            'Seni Kulinari & Pengurusan Perkhidmatan Makanan': 'Economy, Business & Management',
-            'Undang-Undang & Pengajian Perundangan': 'Economy, Business & Management',
-            'Pengajian Islam & Syariah': 'Economy, Business & Management',
-            'Teknologi Automotif & Mekatronik': 'Transport - Vehicle Design & Engineering',
-            'Kimpalan, Fabrikasi & Pembuatan': 'Transport - Vehicle Design & Engineering',
-            'Senibina & Reka Bentuk': 'Build Professionals',
-            'Animasi, Multimedia & Kreativiti Digital': 'Creative Design',
-            'Pendidikan & Latihan': 'Other',
-            'Information Security': 'IT & Computer Science',
-            'Cyber Security': 'IT & Computer Science',
-            'Information Security (IT)': 'IT & Computer Science'
-        }
+        # Apply your existing data categorizations (shared derived-column registry)
+        add_derived_columns(self.df, ['institution_category', 'field_group', 'job_factors_grouped'])
         
-        def group_field_of_study(cell):
-            if pd.isnull(cell):
-                return None
-            return field_of_study_mapping.get(cell, 'Other')
-        
-        self.df['Bidang pengajian'] = self.df['Bidang pengajian utama anda? '].apply(group_field_of_study)
-    
     def get_demographic_data(self, filters=None):
         """
         Extract demographic data as expected by the dashboard
@@ -83,10 +33,10 @@ class GraduateDataProcessor:
         df = self._apply_filters(self.df.copy(), filters)
         
         # Gender distribution (from your pie chart code)
-        gender_counts = df['Jantina anda? '].value_counts().to_dict()
+        gender_counts = df['Jantina anda?'].value_counts().to_dict()
         
         # Age by graduation year (from your stacked bar chart code)
-        age_by_graduation = df.groupby(['Tahun graduasi anda? ', 'Umur anda? ']).size().unstack(fill_value=0)
+        age_by_graduation = df.groupby(['Tahun graduasi anda?', 'Umur anda?']).size().unstack(fill_value=0)
         age_by_graduation_dict = {}
         for year in age_by_graduation.index:
             age_by_graduation_dict[year] = age_by_graduation.loc[year].to_dict()
@@ -194,26 +144,6 @@ class GraduateDataProcessor:
         if factors_column not in df.columns:
             return {}
         
-        job_factor_grouping = {
-            'Permohonan terus kepada syarikat (JobStreet, LinkedIn, laman web syarikat)': 'Saluran Rasmi',
-            'Program kerajaan (contoh: MySTEP, Protege, SL1M)': 'Saluran Rasmi',
-            'Melalui pameran kerjaya atau job fair': 'Saluran Rasmi',
-            'Rangkaian peribadi / kenalan (pensyarah, alumni, keluarga, rakan)': 'Saluran Informal / Sosial',
-            'Dihubungi oleh perekrut atau headhunter': 'Saluran Informal / Sosial',
-            'Melalui latihan industri / praktikal': 'Laluan Berasaskan Institusi Pendidikan',
-            'Tawaran daripada syarikat sebelum tamat pengajian': 'Laluan Berasaskan Institusi Pendidikan',
-            'Memulakan perniagaan sendiri / bekerja dalam ekonomi gig': 'Laluan Kendiri / Keusahawanan'
-        }
-        
-        def group_job_factors(cell):
-            if pd.isnull(cell):
-                return ''
-            raw_factors = [x.strip() for x in cell.split(';')]
-            mapped = [job_factor_grouping.get(factor, factor) for factor in raw_factors]
-            return '; '.join(dict.fromkeys(mapped))
-        
-        df['Faktor_Pekerjaan_Grouped'] = df[factors_column].apply(group_job_factors)
-        
         # Count factors (your Counter logic)
         split_factors = df['Faktor_Pekerjaan_Grouped'].dropna().apply(lambda x: [i.strip() for i in x.split(';')])
         all_factors = [item for sublist in split_factors for item in sublist if item]
@@ -230,8 +160,8 @@ class GraduateDataProcessor:
         
         # Apply filters based on the filter structure
         filter_mapping = {
-            'graduation_year': 'Tahun graduasi anda? ',
-            'gender': 'Jantina anda? ',
+            'graduation_year': 'Tahun graduasi anda?',
+            'gender': 'Jantina anda?',
             'institution': 'Institution_Category',
             'income_range': 'Pendapatan isi rumah bulanan keluarga anda?',
             'financing': 'Bagaimana anda membiayai pendidikan anda?',
@@ -265,7 +195,7 @@ class GraduateDataProcessor:
         df = self._apply_filters(self.df.copy(), filters)
         
         if chart_type == 'gender_distribution':
-            data = df['Jantina anda? '].value_counts()
+            data = df['Jantina anda?'].value_counts()
             total = data.sum()
             return {
                 'headers': ['Gender', 'Count', 'Percentage'],
@@ -335,7 +265,7 @@ class GraduateDataProcessor:
             })
         
         # Gender balance insight
-        gender_data = df['Jantina anda? '].value_counts()
+        gender_data = df['Jantina anda?'].value_counts()
         if 'Perempuan' in gender_data and 'Lelaki' in gender_data:
             female_pct = gender_data['Perempuan'] / gender_data.sum() * 100
             if 45 <= female_pct <= 55:
@@ -385,7 +315,7 @@ class GraduateDataProcessor:
         df = self._apply_filters(self.df.copy(), filters)
         
         if data_type == 'demographic':
-            export_df = df[['Jantina anda? ', 'Tahun graduasi anda? ', 'Umur anda? ', 
+            export_df = df[['Jantina anda?', 'Tahun graduasi anda?', 'Umur anda?', 
                            'Institution_Category', 'Bidang pengajian']].copy()
         elif data_type == 'socioeconomic':
             export_df = df[['Pendapatan isi rumah bulanan keluarga anda?', 'Pekerjaan bapa anda', 
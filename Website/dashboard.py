@@ -5,9 +5,14 @@ from collections import Counter
 import json
 import logging
 from flask_cors import CORS
+from models.likert import LIKERT_DTYPE
+from models.normalize import YEAR_DTYPE, normalize_dataset, year_mask
+from models.schema import COLUMN_MAPPING, SchemaResolver
+from models.trace import init_app as init_trace, trace
 
 app = Flask(__name__, template_folder='Website/templates', static_folder='Website/static')
 CORS(app)  # Enable CORS for all routes
+init_trace(app)  # Per-request debug traces (X-Debug-Trace header or ?_trace=1)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -185,12 +190,19 @@ except FileNotFoundError:
 
 def clean_data():
     global df
-    df = df.fillna('Tidak Dinyatakan')
+    # Graduation year and the 1-5 scales become nullable integer columns;
+    # every other column keeps the placeholder text for missing answers
+    df = normalize_dataset(df)
+    other_columns = [col for col in df.columns if str(df[col].dtype) not in (YEAR_DTYPE, LIKERT_DTYPE)]
+    df[other_columns] = df[other_columns].fillna('Tidak Dinyatakan')
     logger.info(f"✅ Data processed successfully. Shape: {df.shape}")
     return df
 
 clean_data()
 
+# Logical key -> column name, resolved once for the loaded headers
+schema = SchemaResolver(df.columns)
+
 def convert_numpy_types(obj):
     """Convert numpy types to Python native types for JSON serialization"""
     if isinstance(obj, dict):
@@ -225,133 +237,69 @@ def safe_api_response(data, success=True):
             'error': str(e)
         })
 
-def find_column_fuzzy(df, target_columns):
-    """Find column using fuzzy matching"""
-    for target in target_columns:
-        for col in df.columns:
-            if target.lower() in col.lower() or col.lower() in target.lower():
-                return col
-    return None
-
-# Enhanced column mapping with multiple possible column names
-COLUMN_MAPPING = {
-    'employment_status': ['Adakah anda kini bekerja?'],
-    'job_type': ['Apakah jenis pekerjaan anda sekarang'],
-    'time_to_employment': ['Jika bekerja, berapa lama selepas tamat pengajian anda mendapat pekerjaan pertama?'],
-    'field_of_study': ['Bidang pengajian utama anda?'],
-    'graduation_year': ['Tahun graduasi anda?'],
-    'current_salary': ['Berapakah julat gaji bulanan anda sekarang?'],
-    'expected_salary': ['Apakah jangkaan gaji permulaan yang anda anggap sesuai dengan kelulusan anda?'],
-    'out_of_field_reason': ['Apakah sebab utama jika anda tidak bekerja dalam bidang pengajian?'],
-    'academic_skills_needed': ['Jika anda bekerja di luar bidang pengajian, adakah pekerjaan tersebut masih memerlukan kemahiran akademik anda?'],
-    'job_challenges': ['Apakah cabaran utama yang anda hadapi dalam mendapatkan pekerjaan?'],
-    'success_factors': ['Apakah faktor utama yang membantu anda mendapat pekerjaan tersebut?'],
-    'employment_sectors': ['Apakah sektor pekerjaan anda?'],
-    'professional_cert': ['Adakah anda memiliki sijil profesional tambahan selain ijazah/diploma?'],
-    'internship': ['Adakah anda menjalani internship/praktikal sebelum tamat pengajian?'],
-    'university_preparation': ['Sejauh mana anda bersetuju bahawa universiti telah menyediakan anda untuk pasaran kerja?'],
-    'gig_economy': ['Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?'],
-    'support_needed': ['Apakah bantuan atau sokongan yang anda rasa perlu untuk berjaya dalam keusahawanan dan ekonomi gig?'],
-    'gender': ['Jantina anda?'],
-    'age': ['Umur anda?'],
-    'institution': ['Institusi pendidikan MARA yang anda hadiri?']
-}
-
 def get_column(key):
     """Get column name from mapping"""
     possible_names = COLUMN_MAPPING.get(key, [])
     return possible_names[0] if possible_names else None
 
-def find_column_smart(df, possible_keys):
-    """Smart column finder that uses both mapping and fuzzy matching"""
-    # First try exact matches from mapping
-    for key in possible_keys:
-        possible_names = COLUMN_MAPPING.get(key, [])
-        for col_name in possible_names:
-            if col_name in df.columns:
-                return col_name
-    
-    # Then try fuzzy matching
-    all_possible_names = []
-    for key in possible_keys:
-        if key in COLUMN_MAPPING:
-            all_possible_names.extend(COLUMN_MAPPING[key])
-        all_possible_names.append(key.replace('_', ' ').title())
-        all_possible_names.append(key)
-    
-    return find_column_fuzzy(df, all_possible_names)
-
 def apply_filters(data_df, filters):
     """Enhanced filter application with array support and proper column mapping"""
     filtered_df = data_df.copy()
     initial_count = len(filtered_df)
     
     try:
-        logger.info(f"Starting filter application with {initial_count} rows")
-        logger.info(f"Filters received: {filters}")
-        logger.info(f"Available columns: {list(filtered_df.columns)}")
+        trace('starting filter application', rows=initial_count, filters=filters,
+              columns=lambda: list(filtered_df.columns))
         
         # Handle year filter (array) - check both short and full column names
         year_filters = filters.get('year', []) + filters.get('Tahun graduasi anda?', [])
         if year_filters and len(year_filters) > 0:
-            year_col = find_column_smart(filtered_df, ['graduation_year'])
-            logger.info(f"Year filter - Column found: {year_col}")
+            year_col = schema.get('graduation_year')
+            trace('year filter column', column=year_col)
             if year_col and year_col in filtered_df.columns:
-                unique_years = filtered_df[year_col].unique()
-                logger.info(f"Available years: {sorted(unique_years)}")
-                logger.info(f"Filtering for years: {year_filters}")
-                
-                # Create mask for multiple years
-                year_mask = pd.Series([False] * len(filtered_df))
-                for year_filter in year_filters:
-                    mask = (filtered_df[year_col].astype(str) == str(year_filter))
-                    try:
-                        numeric_year = int(year_filter)
-                        mask |= (pd.to_numeric(filtered_df[year_col], errors='coerce') == numeric_year)
-                    except (ValueError, TypeError):
-                        pass
-                    year_mask |= mask
+                trace('filtering years', values=year_filters,
+                      available=lambda: sorted(filtered_df[year_col].unique()))
                 
-                filtered_df = filtered_df[year_mask]
-                logger.info(f"Year filter applied: {len(filtered_df)} rows remaining")
+                filtered_df = filtered_df[year_mask(filtered_df[year_col], year_filters)]
+                trace('year filter applied', rows=len(filtered_df))
         
         # Handle field filter (array) - check both short and full column names
         field_filters = filters.get('field', []) + filters.get('Bidang pengajian utama anda?', [])
         if field_filters and len(field_filters) > 0:
-            field_col = find_column_smart(filtered_df, ['field_of_study'])
-            logger.info(f"Field filter - Column found: {field_col}")
+            field_col = schema.get('field_of_study')
+            trace('field filter column', column=field_col)
             if field_col and field_col in filtered_df.columns:
                 filtered_df = filtered_df[filtered_df[field_col].isin(field_filters)]
-                logger.info(f"Field filter applied: {len(filtered_df)} rows remaining")
+                trace('field filter applied', rows=len(filtered_df))
         
         # Handle employment filter (array) - check both short and full column names
         emp_filters = filters.get('employment', []) + filters.get('Adakah anda kini bekerja?', [])
         if emp_filters and len(emp_filters) > 0:
-            emp_col = find_column_smart(filtered_df, ['employment_status'])
-            logger.info(f"Employment filter - Column found: {emp_col}")
+            emp_col = schema.get('employment_status')
+            trace('employment filter column', column=emp_col)
             if emp_col and emp_col in filtered_df.columns:
                 filtered_df = filtered_df[filtered_df[emp_col].isin(emp_filters)]
-                logger.info(f"Employment filter applied: {len(filtered_df)} rows remaining")
+                trace('employment filter applied', rows=len(filtered_df))
         
         # Handle gender filter (array) - check both short and full column names
         gender_filters = filters.get('gender', []) + filters.get('Jantina anda?', [])
         if gender_filters and len(gender_filters) > 0:
-            gender_col = find_column_smart(filtered_df, ['gender'])
-            logger.info(f"Gender filter - Column found: {gender_col}")
+            gender_col = schema.get('gender')
+            trace('gender filter column', column=gender_col)
             if gender_col and gender_col in filtered_df.columns:
                 filtered_df = filtered_df[filtered_df[gender_col].isin(gender_filters)]
-                logger.info(f"Gender filter applied: {len(filtered_df)} rows remaining")
+                trace('gender filter applied', rows=len(filtered_df))
         
         # Handle institution filter (array) - check both short and full column names
         inst_filters = filters.get('institution', []) + filters.get('Institusi pendidikan MARA yang anda hadiri?', [])
         if inst_filters and len(inst_filters) > 0:
-            inst_col = find_column_smart(filtered_df, ['institution'])
-            logger.info(f"Institution filter - Column found: {inst_col}")
+            inst_col = schema.get('institution')
+            trace('institution filter column', column=inst_col)
             if inst_col and inst_col in filtered_df.columns:
                 filtered_df = filtered_df[filtered_df[inst_col].isin(inst_filters)]
-                logger.info(f"Institution filter applied: {len(filtered_df)} rows remaining")
+                trace('institution filter applied', rows=len(filtered_df))
         
-        logger.info(f"Total filtering: {initial_count} -> {len(filtered_df)} rows")
+        trace('filters done', rows_before=initial_count, rows_after=len(filtered_df))
         return filtered_df
         
     except Exception as e:
@@ -452,7 +400,7 @@ def employment_status():
         }
         
         filtered_df = apply_filters(df, filters)
-        employment_col = find_column_smart(filtered_df, ['employment_status'])
+        employment_col = schema.get('employment_status')
         
         if employment_col is None:
             logger.error(f"Employment status column not found")
@@ -518,7 +466,7 @@ def job_types():
         }
         
         filtered_df = apply_filters(df, filters)
-        job_type_col = find_column_smart(filtered_df, ['job_type'])
+        job_type_col = schema.get('job_type')
         
         if job_type_col is None:
             return safe_api_response('Job type column not found', False)
@@ -562,7 +510,7 @@ def time_to_employment():
         }
         
         filtered_df = apply_filters(df, filters)
-        time_col = find_column_smart(filtered_df, ['time_to_employment'])
+        time_col = schema.get('time_to_employment')
         
         if time_col is None:
             return safe_api_response('Time to employment column not found', False)
@@ -610,8 +558,8 @@ def graduates_by_field_year():
         temp_filters['year'] = None
         filtered_df = apply_filters(df, temp_filters)
         
-        field_col = find_column_smart(filtered_df, ['field_of_study'])
-        year_col = find_column_smart(filtered_df, ['graduation_year'])
+        field_col = schema.get('field_of_study')
+        year_col = schema.get('graduation_year')
         
         if field_col is None or year_col is None:
             return safe_api_response('Required columns not found', False)
@@ -688,8 +636,8 @@ def current_salary_by_field():
         
         filtered_df = apply_filters(df, filters)
         
-        salary_col = find_column_smart(filtered_df, ['current_salary'])
-        field_col = find_column_smart(filtered_df, ['field_of_study'])
+        salary_col = schema.get('current_salary')
+        field_col = schema.get('field_of_study')
         
         if salary_col is None or field_col is None:
             return safe_api_response('Required columns not found', False)
@@ -761,8 +709,8 @@ def salary_comparison():
         
         filtered_df = apply_filters(df, filters)
         
-        current_salary_col = find_column_smart(filtered_df, ['current_salary'])
-        expected_salary_col = find_column_smart(filtered_df, ['expected_salary'])
+        current_salary_col = schema.get('current_salary')
+        expected_salary_col = schema.get('expected_salary')
         
         if not current_salary_col or not expected_salary_col:
             return safe_api_response('Salary comparison columns not found', False)
@@ -837,9 +785,9 @@ def out_of_field_analysis():
         
         filtered_df = apply_filters(df, filters)
         
-        job_type_col = find_column_smart(filtered_df, ['job_type'])
-        reason_col = find_column_smart(filtered_df, ['out_of_field_reason'])
-        academic_skills_col = find_column_smart(filtered_df, ['academic_skills_needed'])
+        job_type_col = schema.get('job_type')
+        reason_col = schema.get('out_of_field_reason')
+        academic_skills_col = schema.get('academic_skills_needed')
         
         if not job_type_col:
             return safe_api_response('Job type column not found', False)
@@ -923,7 +871,7 @@ def job_challenges():
         }
         
         filtered_df = apply_filters(df, filters)
-        challenges_col = find_column_smart(filtered_df, ['job_challenges'])
+        challenges_col = schema.get('job_challenges')
         
         if challenges_col is None:
             return safe_api_response('Challenges column not found', False)
@@ -998,7 +946,7 @@ def success_factors():
         }
         
         filtered_df = apply_filters(df, filters)
-        success_col = find_column_smart(filtered_df, ['success_factors'])
+        success_col = schema.get('success_factors')
         
         if success_col is None:
             return safe_api_response('Success factors column not found', False)
@@ -1068,7 +1016,7 @@ def employment_sectors():
         }
         
         filtered_df = apply_filters(df, filters)
-        sectors_col = find_column_smart(filtered_df, ['employment_sectors'])
+        sectors_col = schema.get('employment_sectors')
         
         if sectors_col is None:
             return safe_api_response('Employment sectors column not found', False)
@@ -1119,7 +1067,7 @@ def support_needed():
         filtered_df = apply_filters(df, filters)
         print(f'📊 Filtered dataframe shape: {filtered_df.shape}')
         
-        support_col = find_column_smart(filtered_df, ['support_needed'])
+        support_col = schema.get('support_needed')
         
         if support_col is None:
             print('❌ Support needed column not found')
@@ -1271,7 +1219,7 @@ def summary_stats():
         logger.info(f"Summary stats - Total graduates after filtering: {total_graduates}")
         
         # Employment rate calculation
-        employment_col = find_column_smart(filtered_df, ['employment_status'])
+        employment_col = schema.get('employment_status')
         logger.info(f"Employment column found: {employment_col}")
         
         employed = 0
@@ -1284,10 +1232,10 @@ def summary_stats():
         employment_rate = (employed / total_graduates * 100) if total_graduates > 0 else 0
         
         # Other statistics
-        field_col = find_column_smart(filtered_df, ['field_of_study'])
+        field_col = schema.get('field_of_study')
         fields_count = len(filtered_df[field_col].unique()) if field_col else 0
         
-        year_col = find_column_smart(filtered_df, ['graduation_year'])
+        year_col = schema.get('graduation_year')
         year_range = "N/A"
         if year_col:
             try:
@@ -1304,8 +1252,8 @@ def summary_stats():
             'employment_rate': round(employment_rate, 1),
             'fields_of_study_count': fields_count,
             'year_range': year_range,
-            'total_institutions': len(filtered_df[find_column_smart(filtered_df, ['institution'])].unique()) if find_column_smart(filtered_df, ['institution']) else 0,
-            'gender_distribution': dict(filtered_df[find_column_smart(filtered_df, ['gender'])].value_counts()) if find_column_smart(filtered_df, ['gender']) else {},
+            'total_institutions': len(filtered_df[schema.get('institution')].unique()) if schema.get('institution') else 0,
+            'gender_distribution': dict(filtered_df[schema.get('gender')].value_counts()) if schema.get('gender') else {},
             'filter_applied': any(v for v in filters.values() if v)
         }
         
@@ -1320,10 +1268,10 @@ def summary_stats():
 def filter_options():
     """Get available filter options"""
     try:
-        field_col = find_column_smart(df, ['field_of_study'])
-        year_col = find_column_smart(df, ['graduation_year'])
-        employment_col = find_column_smart(df, ['employment_status'])
-        institution_col = find_column_smart(df, ['institution'])
+        field_col = schema.get('field_of_study')
+        year_col = schema.get('graduation_year')
+        employment_col = schema.get('employment_status')
+        institution_col = schema.get('institution')
         
         options = {
             'fields': sorted(df[field_col].unique().tolist()) if field_col else [],
@@ -1362,7 +1310,7 @@ def kpi_statistics():
     """Get KPI statistics for dashboard"""
     try:
         # Calculate employment rate
-        employment_col = find_column_smart(df, ['employment_status'])
+        employment_col = schema.get('employment_status')
         employed = 0
         total_graduates = len(df)
         
@@ -1375,11 +1323,11 @@ def kpi_statistics():
         employment_rate = (employed / total_graduates * 100) if total_graduates > 0 else 0
         
         # Calculate average salary (simplified)
-        salary_col = find_column_smart(df, ['current_salary'])
+        salary_col = schema.get('current_salary')
         avg_salary = 'RM3,450'  # Default value
         
         # Calculate field alignment
-        job_type_col = find_column_smart(df, ['job_type'])
+        job_type_col = schema.get('job_type')
         field_aligned = 0
         if job_type_col:
             for job_type in df[job_type_col].dropna():
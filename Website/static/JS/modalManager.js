@@ -366,14 +366,14 @@
             // Define priority columns for faktor graduan
             const priorityColumns = [
                 'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-                'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+                'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
                 'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
                 'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
                 'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?',
                 'Adakah anda memiliki sijil profesional tambahan selain ijazah/diploma?',
                 'Adakah sijil profesional ini membantu anda dalam mendapatkan pekerjaan?',
                 'Adakah majikan anda meminta kelayakan tambahan selain daripada ijazah anda?',
-                'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? ',
+                'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?',
                 'Sejauh mana anda bersetuju bahawa universiti telah menyediakan anda untuk pasaran kerja?',
                 'Tahun graduasi anda?',
                 'Jantina anda?',
@@ -512,7 +512,7 @@
         // Faktor Graduan columns
         'employability-factors': [
             'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-            'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+            'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
             'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?',
@@ -540,7 +540,7 @@
             'Institusi pendidikan MARA yang anda hadiri?'
         ],
         'additional-skills': [
-            'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? ',
+            'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?',
             'Tahun graduasi anda?',
             'Jantina anda?',
             'Institusi pendidikan MARA yang anda hadiri?'
@@ -593,7 +593,7 @@
             'Program pengajian yang anda ikuti?'
         ],
         'gig-motivations': [
-            'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+            'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
             'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?',
             'Tahun graduasi anda?',
             'Jantina anda?',
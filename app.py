@@ -1,22 +1,42 @@
 from flask import Flask, render_template
+import importlib
 import os
+import time
 from config.settings import Config
-from blueprints.sosioekonomi import sosioekonomi_bp
-from blueprints.demografi import demografi_bp
-from blueprints.analytics import analytics_bp
-from blueprints.industri_gaji import sektor_gaji_bp
-from blueprints.graduanluar import graduanluar_bp
-from blueprints.intern import intern_bp
-from blueprints.gig_economy import gig_economy_bp
-from blueprints.faktor_graduan import faktor_graduan_bp
-from blueprints.statuspekerjaan import status_pekerjaan_bp
-from blueprints.graduanbidang import graduan_bidang_bp
-from blueprints.dashboard import dashboard_bp
-from blueprints.alldata import alldata_bp
-
-def create_app():
+from models.cache import init_app as init_response_cache
+from models.dataset import DEFAULT_DATASET_PATH, get_store
+from models.dedupe import init_app as init_dedupe
+from models.query_backends import init_app as init_query_backend
+from models.registry import init_app as init_datasets
+from models.trace import init_app as init_trace
+from models.validation import init_app as init_validation
+from models.warmup import init_app as init_warm_up
+
+# (module, blueprint attribute, url prefix) - imported inside create_app so
+# each import can be timed for the startup report
+BLUEPRINTS = [
+    ('blueprints.sosioekonomi', 'sosioekonomi_bp', '/sosioekonomi'),
+    ('blueprints.demografi', 'demografi_bp', '/demografi'),
+    ('blueprints.industri_gaji', 'sektor_gaji_bp', '/sektor-gaji'),
+    ('blueprints.graduanluar', 'graduanluar_bp', '/graduan-luar'),
+    ('blueprints.intern', 'intern_bp', '/intern'),
+    ('blueprints.gig_economy', 'gig_economy_bp', '/gig-economy'),
+    ('blueprints.faktor_graduan', 'faktor_graduan_bp', '/faktor-graduan'),
+    ('blueprints.statuspekerjaan', 'status_pekerjaan_bp', '/status-pekerjaan'),
+    ('blueprints.graduanbidang', 'graduan_bidang_bp', '/graduan-bidang'),
+    ('blueprints.dashboard', 'dashboard_bp', '/dashboard'),
+    ('blueprints.analytics', 'analytics_bp', '/api'),
+    ('blueprints.alldata', 'alldata_bp', '/alldata'),
+]
+
+def create_app(warm_up=True):
+    started = time.perf_counter()
     app = Flask(__name__, template_folder='Website/templates', static_folder='Website/static')
     app.config.from_object(Config)
+    init_trace(app)
+    init_datasets(app)
+    init_dedupe(app)
+    init_validation(app)
     
     # Initialize static files - ensure they exist
     static_js_path = os.path.join(app.static_folder, 'JS')
@@ -31,19 +51,17 @@ def create_app():
         if not os.path.exists(file_path):
             print(f"WARNING: Missing static file: {file_path}")
     
-    # Register blueprints
-    app.register_blueprint(sosioekonomi_bp, url_prefix='/sosioekonomi')
-    app.register_blueprint(demografi_bp, url_prefix='/demografi')
-    app.register_blueprint(sektor_gaji_bp, url_prefix='/sektor-gaji')
-    app.register_blueprint(graduanluar_bp, url_prefix='/graduan-luar')
-    app.register_blueprint(intern_bp, url_prefix='/intern')
-    app.register_blueprint(gig_economy_bp, url_prefix='/gig-economy')
-    app.register_blueprint(faktor_graduan_bp, url_prefix='/faktor-graduan')
-    app.register_blueprint(status_pekerjaan_bp, url_prefix='/status-pekerjaan')
-    app.register_blueprint(graduan_bidang_bp, url_prefix='/graduan-bidang')  
-    app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
-    app.register_blueprint(analytics_bp, url_prefix='/api')
-    app.register_blueprint(alldata_bp, url_prefix='/alldata')
+    # Register blueprints (data is loaded lazily by models.dataset, not at import)
+    timings = []
+    for module_name, attr, url_prefix in BLUEPRINTS:
+        step_started = time.perf_counter()
+        blueprint = getattr(importlib.import_module(module_name), attr)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+        timings.append({
+            'blueprint': blueprint.name,
+            'url_prefix': url_prefix,
+            'ms': round((time.perf_counter() - step_started) * 1000, 1)
+        })
 
     @app.route('/')
     def dashboard():
@@ -52,10 +70,35 @@ def create_app():
     @app.route('/main-dashboard')
     def main_dashboard():
         return render_template('dashboard.html')
+
+    # Cache chart responses per dataset version and precompute the unfiltered
+    # payloads after every dataset load
+    init_query_backend(app)
+    init_response_cache(app)
+    init_warm_up(app)
+
+    app.extensions['startup_report'] = {
+        'blueprints': timings,
+        'total_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    print_startup_report(app.extensions['startup_report'])
+
+    # Read the survey file in the background so the worker is ready immediately;
+    # the warm-up starts as soon as it is loaded
+    if warm_up:
+        get_store(DEFAULT_DATASET_PATH).load_async()
     
     return app
 
+def print_startup_report(report):
+    print("=" * 50)
+    print("Startup timing report")
+    for row in report['blueprints']:
+        print(f"  {row['blueprint']:<20} {row['url_prefix']:<20} {row['ms']:>8.1f} ms")
+    print(f"  {'total':<41} {report['total_ms']:>8.1f} ms")
+    print("=" * 50)
+
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
 import io
 import os
 import pandas as pd
@@ -8,10 +8,9 @@ import json
 
 alldata_bp = Blueprint('alldata', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 def clean_nan_values(obj):
     """Recursively clean NaN values from nested dictionaries and lists for JSON serialization"""
@@ -35,8 +34,8 @@ def api_test():
     return jsonify({
         'status': 'success',
         'message': 'All Data API is working',
-        'available_columns': list(df.columns) if not df.empty else [],
-        'total_records': len(df)
+        'available_columns': list(data_processor.df.columns) if not data_processor.df.empty else [],
+        'total_records': len(data_processor.df)
     })
 
 @alldata_bp.route('/api/summary')
@@ -151,14 +150,14 @@ def api_sections():
                 'name': 'Faktor Mempengaruhi Kebolehpasaran Graduan',
                 'columns': [
                     'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-                    'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+                    'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
                     'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
                     'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
                     'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?',
                     'Adakah anda memiliki sijil profesional tambahan selain ijazah/diploma?',
                     'Adakah sijil profesional ini membantu anda dalam mendapatkan pekerjaan?',
                     'Adakah majikan anda meminta kelayakan tambahan selain daripada ijazah anda?',
-                    'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? ',
+                    'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?',
                     'Sejauh mana anda bersetuju bahawa universiti telah menyediakan anda untuk pasaran kerja?'
                 ],
                 'description': 'Faktor-faktor yang mempengaruhi kebolehpasaran graduan'
@@ -197,7 +196,7 @@ def api_sections():
                     'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?',
                     'Adakah universiti anda menawarkan kursus atau latihan berkaitan keusahawanan?',
                     'Adakah universiti anda pernah menganjurkan program berkaitan perniagaan atau ekonomi gig seperti hackathon, bootcamp, atau geran permulaan perniagaan?',
-                    'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+                    'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
                     'Bagaimanakah anda memperoleh kemahiran untuk bekerja dalam ekonomi gig?',
                     'Apakah cabaran utama yang anda hadapi dalam keusahawanan atau ekonomi gig?',
                     'Apakah bantuan atau sokongan yang anda rasa perlu untuk berjaya dalam keusahawanan dan ekonomi gig?',
@@ -331,18 +330,14 @@ def api_available_filters():
         sample_df = data_processor.df
         filters = {}
         
-        # Core demographic filters - handle column name variations
+        # Core demographic filters (headers are aligned to the canonical schema at load)
         filter_columns = [
             'Tahun graduasi anda?',
-            'Tahun graduasi anda? ',  # With trailing space
             'Jantina anda?',
-            'Jantina anda? ',  # With trailing space
             'Institusi pendidikan MARA yang anda hadiri?',
             'Bidang pengajian utama anda?',
-            'Bidang pengajian utama anda? ',  # With trailing space
-            'Tahap pendidikan tertinggi',
+            'Tahap pendidikan tertinggi anda?',
             'Umur anda?',
-            'Umur anda? ',  # With trailing space
             'Adakah anda kini bekerja?',
             'Apakah status pekerjaan anda sekarang?',
             'Apakah sektor pekerjaan anda?',
@@ -369,6 +364,9 @@ def api_available_filters():
                         cleaned_values = sorted([str(val) for val in cleaned_values])
                     filters[column] = cleaned_values
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(clean_nan_values(filters))
         
     except Exception as e:
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from models.data_processor import DataProcessor, generate_sample_data
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -125,11 +125,17 @@ def demografi_table_data():
 # Global analytics endpoints
 @analytics_bp.route('/health')
 def health_check():
+    warm_up = current_app.extensions.get('warm_up')
+    warm_up_state = warm_up.to_dict() if warm_up else {'status': 'disabled', 'ready': True}
+    ready = warm_up_state['status'] in ('ready', 'disabled')
+    
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if ready else 'warming_up',
+        'ready': ready,
         'timestamp': data_processor.get_summary_stats()['last_updated'],
-        'version': '1.0.0'
-    })
+        'version': '1.0.0',
+        'warm_up': warm_up_state
+    }), 200 if ready else 503
 
 @analytics_bp.route('/filters/available')
 def available_filters():
@@ -1,17 +1,27 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
-from models.graduate_quality import calculate_quality_insights, default_quality_payload
+from models.cohorts import COHORT_PARAM, COMPARISON_CHARTS, MAX_COHORTS, compare_cohorts, parse_cohort
+from models.dataset import LazyDataProcessor
+from models.facets import get_facet_index
+from models.normalize import parse_years
+from models.graduate_quality import (
+    CRITERIA_IDS, HIGH_QUALITY_MIN, MEDIUM_QUALITY_MIN, QUALITY_CRITERIA_CONFIG,
+    calculate_quality_insights, default_quality_payload,
+)
+from models.quality_cube import QUALITY_DIMENSIONS, get_quality_scores, get_score_matrix, quality_breakdown, simulate_rubric
+from models.registry import get_registry
+from models.trends import TREND_METRICS, get_trend_metrics, trend_table
+from models.validation import get_validation_report
 import io
 import os
 from collections import Counter
 import numpy as np
+from werkzeug.datastructures import MultiDict
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 @dashboard_bp.route('/')
 def index():
@@ -26,7 +36,7 @@ def get_dashboard_data():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                values = [int(float(v)) for v in values if v.strip()]
+                values = parse_years(values)
             filters[key] = values
 
         filtered_processor = data_processor.apply_filters(filters)
@@ -75,7 +85,7 @@ def get_dashboard_data():
 def api_test():
     """Test endpoint to verify the blueprint is working"""
     try:
-        all_columns = list(df.columns) if not df.empty else []
+        all_columns = list(data_processor.df.columns) if not data_processor.df.empty else []
         
         # Check for similar column names
         relevant_patterns = ['Tahun', 'Umur', 'Jantina', 'Institusi', 'Bidang']
@@ -87,10 +97,10 @@ def api_test():
         return jsonify({
             'status': 'success',
             'message': 'Enhanced Dashboard API is working',
-            'total_records': len(df),
+            'total_records': len(data_processor.df),
             'all_columns': all_columns,
             'matching_columns': matching_columns,
-            'sample_data': df.head(2).to_dict('records') if not df.empty else []
+            'sample_data': data_processor.df.head(2).to_dict('records') if not data_processor.df.empty else []
         })
     except Exception as e:
         return jsonify({
@@ -170,25 +180,11 @@ def api_age_by_graduation_year():
         filtered_processor = data_processor.apply_filters(filters)
         filtered_df = filtered_processor.filtered_df
         
-        # Try multiple possible column names
-        year_columns = ['Tahun graduasi anda?', 'Tahun graduasi anda? ', 'Tahun graduasi anda']
-        age_columns = ['Umur anda?', 'Umur anda? ', 'Umur anda']
-        
-        year_column = None
-        age_column = None
-        
-        # Find the correct column names
-        for col in year_columns:
-            if col in filtered_df.columns:
-                year_column = col
-                break
-                
-        for col in age_columns:
-            if col in filtered_df.columns:
-                age_column = col
-                break
-        
-        if year_column is None or age_column is None:
+        # Headers are aligned to the canonical schema at load
+        year_column = 'Tahun graduasi anda?'
+        age_column = 'Umur anda?'
+        
+        if year_column not in filtered_df.columns or age_column not in filtered_df.columns:
             print("Column not found - available columns:", list(filtered_df.columns))
             return jsonify({
                 'labels': ['2020', '2021', '2022', '2023', '2024'],
@@ -263,37 +259,21 @@ def api_available_filters():
         sample_df = data_processor.df
         filters = {}
         
-        # Define comprehensive filter mappings
-        filter_mappings = {
-            'graduation_years': ['Tahun graduasi anda?', 'Tahun graduasi anda? ', 'Tahun graduasi anda'],
-            'genders': ['Jantina anda?', 'Jantina anda? ', 'Jantina anda'],
-            'age_groups': ['Umur anda?', 'Umur anda? ', 'Umur anda'],
-            'institutions': [
-                'Institusi pendidikan MARA yang anda hadiri?', 
-                'Institusi pendidikan MARA yang anda hadiri? ', 
-                'Institusi pendidikan MARA yang anda hadiri'
-            ],
-            'fields_of_study': [
-                'Bidang pengajian utama anda?', 
-                'Bidang pengajian utama anda? ', 
-                'Bidang pengajian utama anda'
-            ],
-            'programs': [
-                'Program pengajian yang anda ikuti?', 
-                'Program pengajian yang anda ikuti? ', 
-                'Program pengajian yang anda ikuti'
-            ]
+        # Filter key -> column (headers are aligned to the canonical schema at load)
+        filter_columns = {
+            'graduation_years': 'Tahun graduasi anda?',
+            'genders': 'Jantina anda?',
+            'age_groups': 'Umur anda?',
+            'institutions': 'Institusi pendidikan MARA yang anda hadiri?',
+            'fields_of_study': 'Bidang pengajian utama anda?',
+            'programs': 'Program pengajian yang anda ikuti?'
         }
         
-        for filter_key, possible_columns in filter_mappings.items():
-            found_column = None
-            for col in possible_columns:
-                if col in sample_df.columns:
-                    found_column = col
-                    break
-            
-            if found_column:
-                unique_values = sample_df[found_column].dropna().unique().tolist()
+        facet_columns = {}
+        for filter_key, column in filter_columns.items():
+            if column in sample_df.columns:
+                facet_columns[filter_key] = column
+                unique_values = sample_df[column].dropna().unique().tolist()
                 if isinstance(unique_values[0] if unique_values else None, (int, float)):
                     unique_values = sorted(unique_values)
                 else:
@@ -302,6 +282,9 @@ def api_available_filters():
             else:
                 filters[filter_key] = []
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts(facet_columns, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
@@ -488,3 +471,183 @@ def api_quality_insights():
     except Exception as exc:
         print(f"Error in quality insights endpoint: {exc}")
         return jsonify(default_quality_payload())
+
+@dashboard_bp.route('/api/quality-breakdown')
+def api_quality_breakdown():
+    """Quality scores for every group of one or two dimensions (``?by=field&by=year``)."""
+    try:
+        dimensions = request.args.getlist('by') or ['field']
+        filters = {k: request.args.getlist(k) for k in request.args.keys() if k != 'by'}
+        
+        if len(dimensions) > 2:
+            return jsonify({'error': 'At most two breakdown dimensions are supported'}), 400
+        
+        filtered_df = data_processor.apply_filters(filters).filtered_df
+        schema = data_processor.schema
+        
+        groups = {}
+        for dimension in dimensions:
+            key = QUALITY_DIMENSIONS.get(dimension, dimension)
+            column = schema.get(key)
+            if key not in QUALITY_DIMENSIONS.values() or column is None:
+                return jsonify({
+                    'error': f"Unknown breakdown dimension '{dimension}'",
+                    'dimensions': list(QUALITY_DIMENSIONS)
+                }), 400
+            groups[dimension] = filtered_df[column]
+        
+        # Rows are scored once per dataset version; only the grouping runs per request
+        scores = get_quality_scores(data_processor.path).loc[filtered_df.index]
+        
+        return jsonify({
+            'dimensions': dimensions,
+            'columns': {dimension: series.name for dimension, series in groups.items()},
+            'criteria': [{'id': config['id'], 'title': config['title']} for config in QUALITY_CRITERIA_CONFIG],
+            'total_graduates': len(filtered_df),
+            'groups': quality_breakdown(scores, groups),
+            'filters_applied': any(v for v in filters.values() if v)
+        })
+    except Exception as exc:
+        print(f"Error in quality breakdown endpoint: {exc}")
+        return jsonify({'error': str(exc), 'groups': []}), 500
+
+
+# Query arguments of the rubric simulator that are not dataset filters
+SIMULATION_ARGS = {'high_min', 'medium_min'} | {f'weight.{criterion}' for criterion in CRITERIA_IDS}
+
+
+@dashboard_bp.route('/api/quality-simulate')
+def api_quality_simulate():
+    """Quality bands under other criterion weights and cut-offs.
+    
+    ``?weight.job_alignment=2&weight.salary_progression=0.5&high_min=12&medium_min=8``;
+    criteria without a weight keep weight 1 and cut-offs default to the rubric's.
+    """
+    try:
+        try:
+            weights = {
+                criterion: float(request.args[f'weight.{criterion}'])
+                for criterion in CRITERIA_IDS if request.args.get(f'weight.{criterion}', '') != ''
+            }
+            high_min = float(request.args.get('high_min') or HIGH_QUALITY_MIN)
+            medium_min = float(request.args.get('medium_min') or MEDIUM_QUALITY_MIN)
+        except ValueError:
+            return jsonify({'error': 'Weights and thresholds must be numbers'}), 400
+        if not np.all(np.isfinite(list(weights.values()) + [high_min, medium_min])):
+            return jsonify({'error': 'Weights and thresholds must be numbers'}), 400
+        if any(weight < 0 for weight in weights.values()):
+            return jsonify({'error': 'Weights cannot be negative'}), 400
+        if medium_min > high_min:
+            return jsonify({'error': 'medium_min cannot be above high_min'}), 400
+        
+        filters = {k: request.args.getlist(k) for k in request.args.keys() if k not in SIMULATION_ARGS}
+        filtered_df = data_processor.apply_filters(filters).filtered_df
+        
+        # Cached 0/1/2 scores per criterion; the simulation is a dot product over them
+        matrix = get_score_matrix(filtered_df.index, data_processor.path)
+        result = simulate_rubric(matrix, weights, high_min, medium_min)
+        result['filters_applied'] = any(v for v in filters.values() if v)
+        return jsonify(result)
+    except Exception as exc:
+        print(f"Error in quality simulation endpoint: {exc}")
+        return jsonify({'error': str(exc)}), 500
+
+
+@dashboard_bp.route('/api/compare')
+def api_compare():
+    """Distributions of one chart for several cohorts, computed in one pass.
+    
+    ``?chart=employment-status&cohort=Tahun graduasi anda?%3D2022&cohort=Tahun graduasi anda?%3D2023``;
+    each ``cohort`` is a URL-encoded filter set (``label=`` names it) and the
+    other arguments filter every cohort. Differences are against the first cohort.
+    """
+    try:
+        chart = request.args.get('chart', '')
+        key = COMPARISON_CHARTS.get(chart)
+        column = data_processor.schema.get(key) if key else None
+        if column is None:
+            return jsonify({
+                'error': f"Unknown comparison chart '{chart}'",
+                'charts': sorted(COMPARISON_CHARTS)
+            }), 400
+        
+        cohort_args = request.args.getlist(COHORT_PARAM)
+        if not 2 <= len(cohort_args) <= MAX_COHORTS:
+            return jsonify({'error': f'Compare between 2 and {MAX_COHORTS} cohorts'}), 400
+        cohorts = [parse_cohort(text, position) for position, text in enumerate(cohort_args)]
+        
+        index = get_facet_index(data_processor.path)
+        unknown = sorted({name for _, filters in cohorts for name in filters.keys() if name not in index.df.columns})
+        if unknown:
+            return jsonify({'error': f"Unknown filter column(s): {', '.join(unknown)}"}), 400
+        
+        filters = MultiDict([(k, v) for k, v in request.args.items(multi=True) if k not in ('chart', COHORT_PARAM)])
+        result = compare_cohorts(index, column, cohorts, filters, key)
+        result['chart'] = chart
+        result['filters_applied'] = any(v for v in filters.values() if v)
+        return jsonify(result)
+    except Exception as exc:
+        print(f"Error in cohort comparison endpoint: {exc}")
+        return jsonify({'error': str(exc), 'cohorts': []}), 500
+
+
+@dashboard_bp.route('/api/trends')
+def api_trends():
+    """Metrics per graduation year in one grouped pass (``?metric=employment&metric=quality_band``).
+    
+    Metrics default to all of ``TREND_METRICS``; the other arguments are filters.
+    """
+    try:
+        metrics = request.args.getlist('metric') or list(TREND_METRICS)
+        unknown = [metric for metric in metrics if metric not in TREND_METRICS]
+        if unknown:
+            return jsonify({
+                'error': f"Unknown trend metric(s): {', '.join(unknown)}",
+                'metrics': list(TREND_METRICS)
+            }), 400
+        
+        year_column = data_processor.schema.get('graduation_year')
+        if year_column is None:
+            return jsonify({'error': 'Graduation year column not found', 'years': [], 'metrics': {}}), 404
+        
+        filters = MultiDict([(k, v) for k, v in request.args.items(multi=True) if k != 'metric'])
+        result = trend_table(get_trend_metrics(data_processor.path), get_facet_index(data_processor.path),
+                             year_column, filters, metrics)
+        result['filters_applied'] = any(v for v in filters.values() if v)
+        return jsonify(result)
+    except Exception as exc:
+        print(f"Error in trends endpoint: {exc}")
+        return jsonify({'error': str(exc), 'years': [], 'metrics': {}}), 500
+
+
+@dashboard_bp.route('/api/dataset/duplicates')
+def api_dataset_duplicates():
+    """Repeat submissions dropped when the survey was loaded (see models.dedupe)"""
+    try:
+        dataset = data_processor.store.get()
+        if dataset.duplicates is None:
+            return jsonify({'enabled': False, 'dataset_version': dataset.version, 'rows': len(dataset.df)})
+        return jsonify({'enabled': True, 'dataset_version': dataset.version, **dataset.duplicates.to_dict()})
+    except Exception as exc:
+        print(f"Error in duplicates report endpoint: {exc}")
+        return jsonify({'error': str(exc)}), 500
+
+
+@dashboard_bp.route('/api/dataset/validation')
+def api_dataset_validation():
+    """Expected columns, null rates and value domain checks of the loaded survey"""
+    try:
+        return jsonify(get_validation_report(data_processor.path))
+    except Exception as exc:
+        print(f"Error in validation report endpoint: {exc}")
+        return jsonify({'error': str(exc)}), 500
+
+
+@dashboard_bp.route('/api/datasets')
+def api_datasets():
+    """Datasets selectable with ?dataset=<id> and which of them are in memory"""
+    try:
+        return jsonify(get_registry().status())
+    except Exception as exc:
+        print(f"Error in datasets endpoint: {exc}")
+        return jsonify({'error': str(exc)}), 500
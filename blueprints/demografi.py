@@ -1,64 +1,44 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.normalize import YEAR_DTYPE, year_mask, year_options
+from models.trace import TRACE_PARAM, trace
 import io
 import os
 import pandas as pd
 from collections import Counter
 import numpy as np
-import re
 
 demografi_bp = Blueprint('demografi', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 
-# Check key columns for demografi
-key_columns = [
-    'Tahun graduasi anda?',
-    'Umur anda?',
-    'Jantina anda?',
-    'Institusi pendidikan MARA yang anda hadiri?',
-    'Bidang pengajian utama anda?'
-]
-
-for col in key_columns:
-    if col in df.columns:
-        non_null = df[col].notna().sum()
-        print(f"✓ {col}: {non_null}/{len(df)} non-null values")
-        # Show sample values
-        sample_values = df[col].dropna().unique()[:3]
-        print(f"    Sample values: {list(sample_values)}")
-    else:
-        print(f"✗ {col}: NOT FOUND")
-
-print("="*50)
+# Column coverage and value checks run once per dataset version in
+# models.validation (/dashboard/api/dataset/validation)
 
 def debug_filter_application(df_original, filters):
     """Debug filter application step by step for demografi"""
-    print(f"\n=== DEMOGRAFI FILTER DEBUG ===")
-    print(f"Original data shape: {df_original.shape}")
-    print(f"Filters received: {filters}")
+    trace('demografi filter start', shape=df_original.shape, filters=filters)
     
     df_result = df_original.copy()
     
     for column, values in filters.items():
-        if not values or len(values) == 0:
+        if not values or len(values) == 0 or column == TRACE_PARAM:
             continue
-            
-        print(f"\nApplying filter: {column} = {values}")
-        print(f"Column exists: {column in df_result.columns}")
         
         if column in df_result.columns:
-            print(f"Before filter - rows: {len(df_result)}")
-            print(f"Column data type: {df_result[column].dtype}")
-            print(f"Unique values in column: {list(df_result[column].unique())[:5]}...")
-            print(f"Looking for values: {values}")
+            rows_before = len(df_result)
+            trace('applying filter', column=column, values=values,
+                  dtype=lambda: str(df_result[column].dtype),
+                  unique_values=lambda: list(df_result[column].unique())[:5])
             
+            # Graduation year is an integer column (normalised at load)
+            if str(df_result[column].dtype) == YEAR_DTYPE:
+                df_result = df_result[year_mask(df_result[column], values)]
             # Convert filter values to match column data type
-            if df_result[column].dtype in ['int64', 'float64']:
+            elif df_result[column].dtype in ['int64', 'float64']:
                 try:
                     converted_values = []
                     for v in values:
@@ -66,25 +46,24 @@ def debug_filter_application(df_original, filters):
                             converted_values.append(v)
                         else:
                             converted_values.append(int(float(v)))
-                    print(f"Converted filter values to numbers: {converted_values}")
+                    trace('converted filter values to numbers', column=column, values=converted_values)
                     df_result = df_result[df_result[column].isin(converted_values)]
                 except Exception as e:
-                    print(f"Number conversion failed: {e}, using string matching")
+                    trace('number conversion failed, using string matching', column=column, error=str(e))
                     df_result = df_result[df_result[column].astype(str).isin([str(v) for v in values])]
             else:
                 # String matching
                 df_result = df_result[df_result[column].isin(values)]
             
-            print(f"After filter - rows: {len(df_result)}")
+            trace('filter applied', column=column, rows_before=rows_before, rows_after=len(df_result))
             
             if len(df_result) == 0:
-                print("WARNING: Filter eliminated all rows!")
+                trace('filter eliminated all rows', column=column)
                 break
         else:
-            print(f"WARNING: Column {column} not found!")
+            trace('filter column not found', column=column)
     
-    print(f"Final filtered shape: {df_result.shape}")
-    print("=== END DEMOGRAFI FILTER DEBUG ===\n")
+    trace('demografi filter done', shape=df_result.shape)
     
     return df_result
 
@@ -109,16 +88,16 @@ def api_summary():
             values = request.args.getlist(key)
             if values:  # Only include non-empty filters
                 filters[key] = values
-                print(f"Filter applied in summary: {key} = {values}")
+                trace('filter applied in summary', column=key, values=values)
         
-        print(f"All filters for summary: {filters}")
+        trace('all filters for summary', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         total_records = len(df_filtered)
         
-        print(f"Total records after filtering: {total_records}")
-        print(f"Available columns: {list(df_filtered.columns)}")
+        trace('total records after filtering', records=total_records)
+        trace('available columns', columns=lambda: list(df_filtered.columns))
         
         # Initialize default values
         male_rate = 0
@@ -131,7 +110,7 @@ def api_summary():
         engineering_rate = 0
         
         if total_records == 0:
-            print("No data found - returning default values")
+            trace('no data found - returning default values')
             return jsonify({
                 'total_records': 0,
                 'male_rate': 0,
@@ -145,21 +124,14 @@ def api_summary():
                 'filter_applied': len(filters) > 0
             })
         
-        # Gender analysis - try multiple column variations
-        gender_columns = ['Jantina anda?', 'Jantina anda? ', 'Jantina anda']
-        gender_column = None
-        
-        for col in gender_columns:
-            if col in df_filtered.columns:
-                gender_column = col
-                print(f"Found gender column: '{gender_column}'")
-                break
+        # Gender analysis (headers are aligned to the canonical schema at load)
+        gender_column = 'Jantina anda?'
         
-        if gender_column and gender_column in df_filtered.columns:
+        if gender_column in df_filtered.columns:
             # Clean and standardize gender data
             gender_data = df_filtered[gender_column].dropna().astype(str).str.strip()
             gender_counts = gender_data.value_counts()
-            print(f"Gender counts: {gender_counts.to_dict()}")
+            trace('gender counts', counts=lambda: gender_counts.to_dict())
             
             total_gender_responses = gender_counts.sum()
             
@@ -177,27 +149,20 @@ def api_summary():
                 for variation in female_variations:
                     female_count += gender_counts.get(variation, 0)
                 
-                print(f"Male count: {male_count}, Female count: {female_count}")
+                trace('gender totals', male=male_count, female=female_count)
                 
                 male_rate = (male_count / total_gender_responses) * 100
                 female_rate = (female_count / total_gender_responses) * 100
         else:
-            print("Gender column not found")
+            trace('gender column not found')
         
-        # Age analysis - try multiple column variations
-        age_columns = ['Umur anda?', 'Umur anda? ', 'Umur anda']
-        age_column = None
+        # Age analysis
+        age_column = 'Umur anda?'
         
-        for col in age_columns:
-            if col in df_filtered.columns:
-                age_column = col
-                print(f"Found age column: '{age_column}'")
-                break
-        
-        if age_column and age_column in df_filtered.columns:
+        if age_column in df_filtered.columns:
             age_data = df_filtered[age_column].dropna().astype(str).str.strip()
             age_counts = age_data.value_counts()
-            print(f"Age counts: {age_counts.to_dict()}")
+            trace('age counts', counts=lambda: age_counts.to_dict())
             
             if len(age_counts) > 0:
                 most_common_age = age_counts.index[0]
@@ -216,37 +181,14 @@ def api_summary():
                 if total_age_responses > 0:
                     young_graduates_rate = (young_responses / total_age_responses) * 100
         else:
-            print("Age column not found")
+            trace('age column not found')
         
-        # Institution analysis - try multiple column variations
-        institution_columns = [
-            'Institusi pendidikan MARA yang anda hadiri?',
-            'Institusi pendidikan MARA yang anda hadiri? ', 
-            'Institusi pendidikan MARA yang anda hadiri'
-        ]
-        institution_column = None
+        # Institution analysis - categories come from the derived-column registry
+        institution_categories = data_processor.derived(df_filtered, 'institution_category')
         
-        for col in institution_columns:
-            if col in df_filtered.columns:
-                institution_column = col
-                print(f"Found institution column: '{institution_column}'")
-                break
-        
-        if institution_column and institution_column in df_filtered.columns:
-            def categorize_institution(cell):
-                if pd.isnull(cell):
-                    return None
-                cell_str = str(cell).strip()
-                if 'Universiti Poly-Tech Malaysia' in cell_str or 'UPTM' in cell_str:
-                    return 'Universiti Poly-Tech Malaysia (UPTM)'
-                elif 'Kolej Poly-Tech MARA' in cell_str or 'KPTM' in cell_str:
-                    return 'Kolej Poly-Tech MARA'
-                else:
-                    return 'Other'
-            
-            institution_categories = df_filtered[institution_column].apply(categorize_institution)
+        if institution_categories is not None:
             institution_counts = institution_categories.value_counts()
-            print(f"Institution counts: {institution_counts.to_dict()}")
+            trace('institution counts', counts=lambda: institution_counts.to_dict())
             
             if len(institution_counts) > 0:
                 most_common_institution = institution_counts.index[0]
@@ -256,62 +198,14 @@ def api_summary():
                 if total_institution_responses > 0:
                     uptm_rate = (uptm_count / total_institution_responses) * 100
         else:
-            print("Institution column not found")
+            trace('institution column not found')
         
-        # Field of study analysis - try multiple column variations
-        field_columns = [
-            'Bidang pengajian utama anda?',
-            'Bidang pengajian utama anda? ', 
-            'Bidang pengajian utama anda'
-        ]
-        field_column = None
-        
-        for col in field_columns:
-            if col in df_filtered.columns:
-                field_column = col
-                print(f"Found field column: '{field_column}'")
-                break
+        # Field of study analysis - groups come from the derived-column registry
+        field_categories = data_processor.derived(df_filtered, 'field_group')
         
-        if field_column and field_column in df_filtered.columns:
-            # Define the mapping for grouping fields of study
-            field_of_study_mapping = {
-                'Kejuruteraan & Teknologi': 'Engineering Environment',
-                'Teknologi Elektrik, Elektronik & Pembinaan': 'Engineering Environment',
-                'Sains Komputer & Kecerdasan Buatan': 'IT & Computer Science',
-                'Sains Data & Analitik': 'IT & Computer Science',
-                'Fizik, Kimia & Bioteknologi': 'Natural Science Medical Science / Specialist',
-                'Perubatan, Farmasi & Sains Kesihatan': 'Natural Science Medical Science / Specialist',
-                'Pemakanan, Dietetik & Fisioterapi': 'Natural Science Medical Science / Specialist',
-                'Kewangan, Perbankan & Perakaunan': 'Accounting & Finance',
-                'Matematik & Sains Aktuari': 'Accounting & Finance',
-                'Pemasaran & Pengurusan Sumber Manusia': 'Economy, Business & Management',
-                'Pengurusan Perniagaan & Keusahawanan': 'Economy, Business & Management',
-                'Logistik, Pengangkutan & Rantaian Bekalan': 'Economy, Business & Management',
-                'Komunikasi, Media & Hubungan Antarabangsa': 'Economy, Business & Management',
-                'Psikologi, Sosiologi & Kajian Kemanusiaan': 'Economy, Business & Management',
-                'Pelancongan, Hospitaliti & Pengurusan Acara': 'Economy, Business & Management',
-                'Seni Kulinari & Pengurusan Perkhidmatan Makanan': 'Economy, Business & Management',
-                'Undang-Undang & Pengajian Perundangan': 'Economy, Business & Management',
-                'Pengajian Islam & Syariah': 'Economy, Business & Management',
-                'Teknologi Automotif & Mekatronik': 'Transport - Vehicle Design & Engineering',
-                'Kimpalan, Fabrikasi & Pembuatan': 'Transport - Vehicle Design & Engineering',
-                'Senibina & Reka Bentuk': 'Build Professionals',
-                'Animasi, Multimedia & Kreativiti Digital': 'Creative Design',
-                'Pendidikan & Latihan': 'Other',
-                'Information Security': 'IT & Computer Science',
-                'Cyber Security': 'IT & Computer Science',
-                'Information Security (IT)': 'IT & Computer Science'
-            }
-            
-            def group_field_of_study(cell):
-                if pd.isnull(cell):
-                    return None
-                cell_str = str(cell).strip()
-                return field_of_study_mapping.get(cell_str, 'Other')
-            
-            field_categories = df_filtered[field_column].apply(group_field_of_study)
+        if field_categories is not None:
             field_counts = field_categories.value_counts()
-            print(f"Field counts: {field_counts.to_dict()}")
+            trace('field counts', counts=lambda: field_counts.to_dict())
             
             if len(field_counts) > 0:
                 most_common_field = field_counts.index[0]
@@ -321,7 +215,7 @@ def api_summary():
                 if total_field_responses > 0:
                     engineering_rate = (engineering_count / total_field_responses) * 100
         else:
-            print("Field column not found")
+            trace('field column not found')
         
         # Print final results for debugging
         enhanced_stats = {
@@ -338,7 +232,7 @@ def api_summary():
             'filter_applied': len(filters) > 0
         }
         
-        print(f"Final enhanced stats: {enhanced_stats}")
+        trace('final enhanced stats', stats=enhanced_stats)
         return jsonify(enhanced_stats)
         
     except Exception as e:
@@ -410,37 +304,19 @@ def api_age_by_graduation_year():
             if values:  # Only include non-empty filters
                 filters[key] = values
         
-        print(f"Age-by-year filters: {filters}")
+        trace('age-by-year filters', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        print(f"Age-by-year filtered data shape: {df_filtered.shape}")
-        
-        # Try multiple possible column names
-        year_columns = ['Tahun graduasi anda?', 'Tahun graduasi anda? ', 'Tahun graduasi anda']
-        age_columns = ['Umur anda?', 'Umur anda? ', 'Umur anda']
+        trace('age-by-year filtered data shape', shape=df_filtered.shape)
         
-        year_column = None
-        age_column = None
+        # Headers are aligned to the canonical schema at load
+        year_column = 'Tahun graduasi anda?'
+        age_column = 'Umur anda?'
         
-        # Find the correct column names
-        for col in year_columns:
-            if col in df_filtered.columns:
-                year_column = col
-                break
-                
-        for col in age_columns:
-            if col in df_filtered.columns:
-                age_column = col
-                break
-        
-        print(f"Available columns: {list(df_filtered.columns)}")
-        print(f"Year column found: {year_column}")
-        print(f"Age column found: {age_column}")
-        
-        if year_column is None or age_column is None:
-            print("Column not found - available columns:", list(df_filtered.columns))
+        if year_column not in df_filtered.columns or age_column not in df_filtered.columns:
+            trace('column not found', available_columns=lambda: list(df_filtered.columns))
             return jsonify(formatter.format_stacked_bar_chart(
                 pd.DataFrame([1], index=['No Data'], columns=['No Data']),
                 "Age by Graduation Year"
@@ -459,8 +335,8 @@ def api_age_by_graduation_year():
         # Group by graduation year and age (EXACT COLAB REPLICATION)
         grouped_data = clean_df.groupby([year_column, age_column]).size().unstack(fill_value=0)
         
-        print(f"Grouped data shape: {grouped_data.shape}")
-        print(f"Grouped data (raw counts):\n{grouped_data}")
+        trace('grouped data shape', shape=grouped_data.shape)
+        trace('grouped data (raw counts)', counts=grouped_data)
         
         if grouped_data.empty:
             return jsonify(formatter.format_stacked_bar_chart(
@@ -472,11 +348,11 @@ def api_age_by_graduation_year():
         percentage_data = grouped_data.div(grouped_data.sum(axis=1), axis=0) * 100
         percentage_data = percentage_data.round(1)  # Round to 1 decimal place
         
-        print(f"Percentage data:\n{percentage_data}")
+        trace('percentage data', data=percentage_data)
         
         chart_data = formatter.format_stacked_bar_chart(percentage_data, "Age by Graduation Year (%)")
         chart_data['isPercentage'] = True  # Flag to indicate this is percentage data
-        print(f"Chart data: {chart_data}")
+        trace('chart data', data=chart_data)
         return jsonify(chart_data)
         
     except Exception as e:
@@ -499,28 +375,18 @@ def api_gender_distribution():
             if values:  # Only include non-empty filters
                 filters[key] = values
         
-        print(f"Gender distribution filters: {filters}")
+        trace('gender distribution filters', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        print(f"Gender distribution filtered data shape: {df_filtered.shape}")
+        trace('gender distribution filtered data shape', shape=df_filtered.shape)
         
-        # Try multiple possible column names
-        gender_columns = ['Jantina anda?', 'Jantina anda? ', 'Jantina anda']
-        gender_column = None
+        # Headers are aligned to the canonical schema at load
+        gender_column = 'Jantina anda?'
         
-        # Find the correct column name
-        for col in gender_columns:
-            if col in df_filtered.columns:
-                gender_column = col
-                break
-        
-        print(f"Available columns: {list(df_filtered.columns)}")
-        print(f"Gender column found: {gender_column}")
-        
-        if gender_column is None:
-            print("Gender column not found - available columns:", list(df_filtered.columns))
+        if gender_column not in df_filtered.columns:
+            trace('gender column not found', available_columns=lambda: list(df_filtered.columns))
             return jsonify(formatter.format_pie_chart(
                 pd.Series([1], index=['No Data Available']),
                 "Gender Distribution"
@@ -538,7 +404,7 @@ def api_gender_distribution():
         # Get gender distribution counts (EXACT COLAB REPLICATION)
         gender_counts = gender_data.value_counts()
         
-        print(f"Gender counts: {gender_counts}")
+        trace('gender counts', counts=gender_counts)
         
         if gender_counts.empty:
             return jsonify(formatter.format_pie_chart(
@@ -547,7 +413,7 @@ def api_gender_distribution():
             ))
         
         chart_data = formatter.format_pie_chart(gender_counts, "Gender Distribution")
-        print(f"Chart data: {chart_data}")
+        trace('chart data', data=chart_data)
         return jsonify(chart_data)
         
     except Exception as e:
@@ -570,57 +436,27 @@ def api_institution_category():
             if values:  # Only include non-empty filters
                 filters[key] = values
         
-        print(f"Institution category filters: {filters}")
+        trace('institution category filters', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        print(f"Institution category filtered data shape: {df_filtered.shape}")
-        
-        # Try multiple possible column names
-        institution_columns = [
-            'Institusi pendidikan MARA yang anda hadiri?',
-            'Institusi pendidikan MARA yang anda hadiri? ', 
-            'Institusi pendidikan MARA yang anda hadiri'
-        ]
-        institution_column = None
-        
-        # Find the correct column name
-        for col in institution_columns:
-            if col in df_filtered.columns:
-                institution_column = col
-                break
+        trace('institution category filtered data shape', shape=df_filtered.shape)
         
-        print(f"Available columns: {list(df_filtered.columns)}")
-        print(f"Institution column found: {institution_column}")
+        # Institution categories are a cached derived column (computed once per dataset version)
+        institution_categories = data_processor.derived(df_filtered, 'institution_category')
         
-        if institution_column is None:
-            print("Institution column not found - available columns:", list(df_filtered.columns))
+        if institution_categories is None:
+            trace('institution column not found', available_columns=lambda: list(df_filtered.columns))
             return jsonify(formatter.format_pie_chart(
                 pd.Series([100], index=['No Data Available']),
                 "Institution Categories (%)"
             ))
         
-        # Apply categorization function (EXACT COLAB REPLICATION)
-        def categorize_institution(cell):
-            if pd.isnull(cell):
-                return None
-            cell_str = str(cell).strip()
-            if 'Universiti Poly-Tech Malaysia' in cell_str or 'UPTM' in cell_str:
-                return 'Universiti Poly-Tech Malaysia (UPTM)'
-            elif 'Kolej Poly-Tech MARA' in cell_str or 'KPTM' in cell_str:
-                return 'Kolej Poly-Tech MARA'
-            else:
-                return 'Other'
-        
-        # Apply categorization to the filtered data
-        df_filtered_copy = df_filtered.copy()
-        df_filtered_copy['Institution_Category'] = df_filtered_copy[institution_column].apply(categorize_institution)
-        
         # Get institution category counts
-        institution_counts = df_filtered_copy['Institution_Category'].dropna().value_counts()
+        institution_counts = institution_categories.dropna().value_counts()
         
-        print(f"Institution counts (raw): {institution_counts}")
+        trace('institution counts (raw)', counts=institution_counts)
         
         if institution_counts.empty:
             return jsonify(formatter.format_pie_chart(
@@ -632,11 +468,11 @@ def api_institution_category():
         total = institution_counts.sum()
         institution_percentages = (institution_counts / total * 100).round(1)
         
-        print(f"Institution percentages: {institution_percentages}")
+        trace('institution percentages', percentages=institution_percentages)
         
         chart_data = formatter.format_pie_chart(institution_percentages, "Institution Categories (%)")
         chart_data['isPercentage'] = True  # Flag to indicate this is percentage data
-        print(f"Chart data: {chart_data}")
+        trace('chart data', data=chart_data)
         return jsonify(chart_data)
         
     except Exception as e:
@@ -659,84 +495,28 @@ def api_field_of_study():
             if values:  # Only include non-empty filters
                 filters[key] = values
         
-        print(f"Field of study filters: {filters}")
+        trace('field of study filters', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        print(f"Field of study filtered data shape: {df_filtered.shape}")
+        trace('field of study filtered data shape', shape=df_filtered.shape)
         
-        # Try multiple possible column names
-        field_columns = [
-            'Bidang pengajian utama anda?',
-            'Bidang pengajian utama anda? ', 
-            'Bidang pengajian utama anda'
-        ]
-        field_column = None
+        # Field groups are a cached derived column (computed once per dataset version)
+        field_categories = data_processor.derived(df_filtered, 'field_group')
         
-        # Find the correct column name
-        for col in field_columns:
-            if col in df_filtered.columns:
-                field_column = col
-                break
-        
-        print(f"Available columns: {list(df_filtered.columns)}")
-        print(f"Field column found: {field_column}")
-        
-        if field_column is None:
-            print("Field column not found - available columns:", list(df_filtered.columns))
+        if field_categories is None:
+            trace('field column not found', available_columns=lambda: list(df_filtered.columns))
             return jsonify(formatter.format_bar_chart(
                 pd.Series([1], index=['No Data Available']),
                 "Field of Study"
             ))
         
-        # EXACT COLAB REPLICATION - Field of study mapping
-        field_of_study_mapping = {
-            'Kejuruteraan & Teknologi': 'Engineering Environment',
-            'Teknologi Elektrik, Elektronik & Pembinaan': 'Engineering Environment',
-            'Sains Komputer & Kecerdasan Buatan': 'IT & Computer Science',
-            'Sains Data & Analitik': 'IT & Computer Science',
-            'Fizik, Kimia & Bioteknologi': 'Natural Science Medical Science / Specialist',
-            'Perubatan, Farmasi & Sains Kesihatan': 'Natural Science Medical Science / Specialist',
-            'Pemakanan, Dietetik & Fisioterapi': 'Natural Science Medical Science / Specialist',
-            'Kewangan, Perbankan & Perakaunan': 'Accounting & Finance',
-            'Matematik & Sains Aktuari': 'Accounting & Finance',
-            'Pemasaran & Pengurusan Sumber Manusia': 'Economy, Business & Management',
-            'Pengurusan Perniagaan & Keusahawanan': 'Economy, Business & Management',
-            'Logistik, Pengangkutan & Rantaian Bekalan': 'Economy, Business & Management',
-            'Komunikasi, Media & Hubungan Antarabangsa': 'Economy, Business & Management',
-            'Psikologi, Sosiologi & Kajian Kemanusiaan': 'Economy, Business & Management',
-            'Pelancongan, Hospitaliti & Pengurusan Acara': 'Economy, Business & Management',
-            'Seni Kulinari & Pengurusan Perkhidmatan Makanan': 'Economy, Business & Management',
-            'Undang-Undang & Pengajian Perundangan': 'Economy, Business & Management',
-            'Pengajian Islam & Syariah': 'Economy, Business & Management',
-            'Teknologi Automotif & Mekatronik': 'Transport - Vehicle Design & Engineering',
-            'Kimpalan, Fabrikasi & Pembuatan': 'Transport - Vehicle Design & Engineering',
-            'Senibina & Reka Bentuk': 'Build Professionals',
-            'Animasi, Multimedia & Kreativiti Digital': 'Creative Design',
-            'Pendidikan & Latihan': 'Other',
-            'Information Security': 'IT & Computer Science',
-            'Cyber Security': 'IT & Computer Science',
-            'Information Security (IT)': 'IT & Computer Science'
-        }
-        
-        # EXACT COLAB REPLICATION - Apply the mapping function
-        def group_field_of_study(cell):
-            if pd.isnull(cell):
-                return None
-            cell_str = str(cell).strip()
-            # Use mapping directly
-            return field_of_study_mapping.get(cell_str, 'Other')
-        
-        # Create a copy and apply grouping
-        df_filtered_copy = df_filtered.copy()
-        df_filtered_copy['Bidang_pengajian'] = df_filtered_copy[field_column].apply(group_field_of_study)
-        
         # Get field of study counts
-        field_counts = df_filtered_copy['Bidang_pengajian'].dropna().value_counts()
+        field_counts = field_categories.dropna().value_counts()
         
-        print(f"Field of study sample values: {df_filtered_copy[field_column].head()}")
-        print(f"Field counts: {field_counts}")
+        trace('field of study sample values', values=lambda: field_categories.head())
+        trace('field counts', counts=field_counts)
         
         if field_counts.empty:
             return jsonify(formatter.format_bar_chart(
@@ -745,7 +525,7 @@ def api_field_of_study():
             ))
         
         chart_data = formatter.format_bar_chart(field_counts, "Field of Study", sort_desc=True)
-        print(f"Chart data: {chart_data}")
+        trace('chart data', data=chart_data)
         return jsonify(chart_data)
         
     except Exception as e:
@@ -769,15 +549,9 @@ def api_age_distribution():
         
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        age_columns = ['Umur anda?', 'Umur anda? ', 'Umur anda']
-        age_column = None
-        
-        for col in age_columns:
-            if col in df_filtered.columns:
-                age_column = col
-                break
+        age_column = 'Umur anda?'
         
-        if age_column is None:
+        if age_column not in df_filtered.columns:
             return jsonify(formatter.format_pie_chart(
                 pd.Series([100], index=['No Data']),
                 "Age Distribution (%)"
@@ -815,32 +589,18 @@ def api_field_distribution():
             if values:  # Only include non-empty filters
                 filters[key] = values
         
-        print(f"Field distribution filters: {filters}")
+        trace('field distribution filters', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        print(f"Field distribution filtered data shape: {df_filtered.shape}")
+        trace('field distribution filtered data shape', shape=df_filtered.shape)
         
-        # Try multiple possible column names
-        field_columns = [
-            'Bidang pengajian utama anda?',
-            'Bidang pengajian utama anda? ', 
-            'Bidang pengajian utama anda'
-        ]
-        field_column = None
-        
-        # Find the correct column name
-        for col in field_columns:
-            if col in df_filtered.columns:
-                field_column = col
-                break
+        # Headers are aligned to the canonical schema at load
+        field_column = 'Bidang pengajian utama anda?'
         
-        print(f"Available columns: {list(df_filtered.columns)}")
-        print(f"Field column found: {field_column}")
-        
-        if field_column is None:
-            print("Field column not found - available columns:", list(df_filtered.columns))
+        if field_column not in df_filtered.columns:
+            trace('field column not found', available_columns=lambda: list(df_filtered.columns))
             return jsonify(formatter.format_bar_chart(
                 pd.Series([1], index=['No Data Available']),
                 "Field Distribution"
@@ -858,8 +618,8 @@ def api_field_distribution():
         # Get field distribution counts (ungrouped)
         field_counts = field_data.value_counts().head(15)  # Top 15 fields
         
-        print(f"Field distribution sample values: {field_data.head()}")
-        print(f"Field distribution counts: {field_counts}")
+        trace('field distribution sample values', values=lambda: field_data.head())
+        trace('field distribution counts', counts=field_counts)
         
         if field_counts.empty:
             return jsonify(formatter.format_bar_chart(
@@ -868,7 +628,7 @@ def api_field_distribution():
             ))
         
         chart_data = formatter.format_bar_chart(field_counts, "Field Distribution", sort_desc=True)
-        print(f"Chart data: {chart_data}")
+        trace('chart data', data=chart_data)
         return jsonify(chart_data)
         
     except Exception as e:
@@ -892,7 +652,7 @@ def api_table_data():
                 if values:  # Only include non-empty filters
                     filters[key] = values
         
-        print(f"Table data filters: {filters}")
+        trace('table data filters', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
@@ -961,7 +721,7 @@ def api_export():
     try:
         # Get format first
         format_type = request.args.get('format', 'csv')
-        print(f"Export format requested: {format_type}")
+        trace('export format requested', format=format_type)
         
         # Get filters (exclude 'format' parameter)
         filters = {}
@@ -970,17 +730,17 @@ def api_export():
                 values = request.args.getlist(key)
                 if values:  # Only include non-empty filters
                     filters[key] = values
-                    print(f"Filter applied: {key} = {values}")
+                    trace('filter applied', column=key, values=values)
         
-        print(f"All filters for export: {filters}")
+        trace('all filters for export', filters=filters)
         
         # Use debug filter application
         df_filtered = debug_filter_application(data_processor.df, filters)
         
-        print(f"Filtered data shape: {df_filtered.shape}")
+        trace('filtered data shape', shape=df_filtered.shape)
         
         if df_filtered.empty:
-            print("No data after filtering")
+            trace('no data after filtering')
             return jsonify({'error': 'No data available for export'}), 400
         
         # Define relevant columns for export
@@ -997,7 +757,7 @@ def api_export():
         # Get only available columns
         available_columns = [col for col in relevant_columns if col in df_filtered.columns]
         
-        print(f"Available columns for export: {available_columns}")
+        trace('available columns for export', columns=available_columns)
         
         if not available_columns:
             return jsonify({'error': 'No relevant columns found for export'}), 400
@@ -1025,7 +785,7 @@ def api_export():
         
         buffer.seek(0)
         
-        print(f"Export successful: {format_type}, {len(export_df)} records, {len(buffer.getvalue())} bytes")
+        trace('export successful', format=format_type, records=len(export_df))
         
         return send_file(
             buffer,
@@ -1040,34 +800,6 @@ def api_export():
         print(f"Full traceback: {traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
-def extract_graduation_year(val):
-    """Enhanced graduation year extraction"""
-    if pd.isna(val):
-        return None
-    
-    val_str = str(val).strip()
-    
-    # Method 1: Direct number
-    try:
-        clean_val = val_str.replace(',', '').replace('.0', '')
-        if clean_val.isdigit():
-            year = int(clean_val)
-            if 1990 <= year <= 2030:
-                return year
-    except:
-        pass
-    
-    # Method 2: Extract 4-digit years using regex
-    year_pattern = r'\b(19|20)\d{2}\b'
-    matches = re.findall(year_pattern, val_str)
-    if matches:
-        for match in matches:
-            year = int(match)
-            if 1990 <= year <= 2030:
-                return year
-    
-    return None
-
 @demografi_bp.route('/api/filters/available')
 def api_available_filters():
     """Get available filter options for demografi data with enhanced debugging"""
@@ -1075,69 +807,60 @@ def api_available_filters():
         sample_df = data_processor.df
         filters = {}
         
-        print(f"\n=== DEMOGRAFI FILTERS DEBUG ===")
-        print(f"All available columns: {list(sample_df.columns)}")
+        trace('demografi filter options', columns=lambda: list(sample_df.columns))
         
         # Define the exact column names that should be used for filtering
-        filter_mappings = {
-            'Tahun graduasi anda?': ['Tahun graduasi anda?', 'Tahun graduasi anda? ', 'Tahun graduasi anda'],
-            'Jantina anda?': ['Jantina anda?', 'Jantina anda? ', 'Jantina anda'],
-            'Umur anda?': ['Umur anda?', 'Umur anda? ', 'Umur anda'],
-            'Institusi pendidikan MARA yang anda hadiri?': ['Institusi pendidikan MARA yang anda hadiri?', 'Institusi pendidikan MARA yang anda hadiri? ', 'Institusi pendidikan MARA yang anda hadiri'],
-            'Bidang pengajian utama anda?': ['Bidang pengajian utama anda?', 'Bidang pengajian utama anda? ', 'Bidang pengajian utama anda'],
-        }
+        # Headers are aligned to the canonical schema at load
+        filter_columns = [
+            'Tahun graduasi anda?',
+            'Jantina anda?',
+            'Umur anda?',
+            'Institusi pendidikan MARA yang anda hadiri?',
+            'Bidang pengajian utama anda?',
+        ]
         
-        for expected_key, possible_columns in filter_mappings.items():
-            found_column = None
-            for col in possible_columns:
-                if col in sample_df.columns:
-                    found_column = col
-                    break
+        facet_columns = {}
+        for expected_key in filter_columns:
+            found_column = expected_key if expected_key in sample_df.columns else None
             
             if found_column:
+                facet_columns[expected_key] = found_column
                 non_null_data = sample_df[found_column].dropna()
-                print(f"\nProcessing filter '{expected_key}' from column '{found_column}':")
-                print(f"  Non-null values: {len(non_null_data)}/{len(sample_df)}")
+                trace('processing filter', filter=expected_key, column=found_column,
+                      non_null=len(non_null_data), rows=len(sample_df))
                 
                 if len(non_null_data) == 0:
                     filters[expected_key] = []
                     continue
                 
                 unique_values = non_null_data.unique()
-                print(f"  Unique values: {len(unique_values)}")
+                trace('unique values', count=len(unique_values))
                 
-                # Special handling for graduation year
+                # Graduation year is an integer column (normalised at load)
                 if 'Tahun graduasi' in expected_key or 'graduasi' in expected_key.lower():
-                    processed_years = set()
-                    for val in unique_values:
-                        if pd.notna(val):
-                            year = extract_graduation_year(val)
-                            if year:
-                                processed_years.add(year)
-                    
-                    final_years = sorted(list(processed_years))
+                    final_years = year_options(non_null_data)
                     filters[expected_key] = final_years
-                    print(f"  Graduation years processed: {final_years}")
+                    trace('graduation years processed', values=final_years)
                     
                 elif isinstance(unique_values[0] if len(unique_values) > 0 else None, (int, float)):
                     # Other numeric columns
                     unique_values = sorted([val for val in unique_values if pd.notna(val)])
                     filters[expected_key] = unique_values
-                    print(f"  Numeric values: {len(unique_values)} items")
+                    trace('numeric values', count=len(unique_values))
                 else:
                     # String columns
                     unique_values = sorted([str(val) for val in unique_values if pd.notna(val) and str(val).strip()])
                     filters[expected_key] = unique_values
-                    print(f"  String values: {len(unique_values)} items")
-                    print(f"  Sample: {unique_values[:3]}...")
+                    trace('string values', count=len(unique_values), sample=lambda: unique_values[:3])
                     
             else:
-                print(f"Column not found for filter '{expected_key}'")
+                trace('column not found for filter', column=expected_key)
                 filters[expected_key] = []
         
-        print(f"\n=== FINAL FILTER SUMMARY ===")
-        for col, values in filters.items():
-            print(f"  {col}: {len(values)} values")
+        trace('filter summary', counts=lambda: {col: len(values) for col, values in filters.items()})
+        
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts(facet_columns, request.args)
         
         return jsonify(filters)
         
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.likert import LIKERT_LABELS, LIKERT_POINTS, summarize_likert
+from models.normalize import parse_years
 import io
 import os
 import pandas as pd
@@ -8,10 +10,18 @@ import numpy as np
 
 faktor_graduan_bp = Blueprint('faktor-graduan', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
+
+# Employability factor id -> schema key of its 1-5 scale question
+EMPLOYABILITY_FACTORS = {
+    'industrial-training': 'internship_impact',
+    'communication-skills': 'communication_impact',
+    'technical-skills': 'technical_impact',
+    'networking': 'networking_impact',
+    'academic-qualifications': 'academic_impact',
+}
 
 @faktor_graduan_bp.route('/')
 def index():
@@ -28,12 +38,7 @@ def api_summary():
             values = request.args.getlist(key)
             # Convert graduation year strings back to integers if needed
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not convert graduation years to int: {values}")
-                    # Keep as strings if conversion fails
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         print(f"API Summary - Received filters: {filters}")
@@ -48,7 +53,7 @@ def api_summary():
         # Define employability impact columns
         employability_columns = [
             'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-            'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+            'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
             'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?'
@@ -119,7 +124,7 @@ def api_summary():
                         print(f"Certificate impact: {helped_count} out of {len(cert_impact_responses)} = {cert_impact_rate}%")
         
         # Most requested additional skill analysis - matching the chart API
-        skills_column = 'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? '
+        skills_column = 'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?'
         most_requested_skill = "N/A"
         
         # Try to find the column with variations
@@ -227,11 +232,7 @@ def api_individual_employability_factor(factor_id):
             values = request.args.getlist(key)
             # Convert graduation year strings back to integers if needed
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not convert graduation years to int: {values}")
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         print(f"API Individual Factor {factor_id} - Received filters: {filters}")
@@ -243,7 +244,7 @@ def api_individual_employability_factor(factor_id):
         
         employability_columns = {
             'industrial-training': 'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-            'communication-skills': 'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+            'communication-skills': 'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
             'technical-skills': 'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
             'networking': 'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
             'academic-qualifications': 'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?'
@@ -293,16 +294,8 @@ def api_individual_employability_factor(factor_id):
         # Ensure we have all scale points 1-5
         labels = []
         data = []
-        scale_labels = {
-            1: '1 - Sangat Rendah',
-            2: '2 - Rendah', 
-            3: '3 - Sederhana',
-            4: '4 - Tinggi',
-            5: '5 - Sangat Tinggi'
-        }
-        
-        for i in range(1, 6):
-            labels.append(scale_labels[i])
+        for i in LIKERT_POINTS:
+            labels.append(LIKERT_LABELS[i])
             # Convert to int to avoid JSON serialization issues
             count = int(value_counts.get(i, 0))
             data.append(count)
@@ -332,6 +325,90 @@ def api_individual_employability_factor(factor_id):
             }]
         }), 500
 
+@faktor_graduan_bp.route('/api/employability-factors')
+def api_employability_factors():
+    """All employability factors in one response: distributions, means and
+    top-box shares, optionally broken down by ``?breakdown=<filter column>``"""
+    try:
+        breakdown = request.args.get('breakdown')
+        filters = {}
+        for key in request.args.keys():
+            if key == 'breakdown':
+                continue
+            values = request.args.getlist(key)
+            if key == 'Tahun graduasi anda?':
+                values = parse_years(values)
+            filters[key] = values
+        
+        filtered_df = data_processor.apply_filters(filters).filtered_df
+        schema = data_processor.schema
+        
+        factor_ids = [factor_id for factor_id, key in EMPLOYABILITY_FACTORS.items() if key in schema]
+        columns = [schema[EMPLOYABILITY_FACTORS[factor_id]] for factor_id in factor_ids]
+        
+        breakdown_column = None
+        if breakdown:
+            # Any filter column, by header or schema key
+            breakdown_column = breakdown if breakdown in filtered_df.columns else schema.get(breakdown)
+            if breakdown_column is None:
+                return jsonify({'error': f"Unknown breakdown column '{breakdown}'"}), 400
+        
+        summary = summarize_likert(
+            filtered_df, columns,
+            groups=filtered_df[breakdown_column] if breakdown_column else None
+        )
+        
+        def factor_entries(stats):
+            return [
+                dict(id=factor_id, label=factor_label(column), **factor_stats)
+                for factor_id, column, factor_stats in zip(factor_ids, columns, stats)
+            ]
+        
+        overall = factor_entries(summary['overall'])
+        result = {
+            'total_records': len(filtered_df),
+            'scale': [{'value': point, 'label': LIKERT_LABELS[point]} for point in LIKERT_POINTS],
+            'factors': overall,
+            # Stacked bar chart: one dataset per scale point across the factors
+            'labels': [factor['label'] for factor in overall],
+            'datasets': [{
+                'label': LIKERT_LABELS[point],
+                'data': [factor['distribution'][i] for factor in overall]
+            } for i, point in enumerate(LIKERT_POINTS)],
+            'filter_applied': len([f for f in filters.values() if f]) > 0
+        }
+        
+        if breakdown_column:
+            result['breakdown'] = {
+                'column': breakdown_column,
+                'groups': [{
+                    'value': group['value'],
+                    'total': group['total'],
+                    'factors': factor_entries(group['factors'])
+                } for group in summary['groups']]
+            }
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        print(f"Error in employability factors endpoint: {str(e)}")
+        import traceback
+        print(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'error': str(e),
+            'total_records': 0,
+            'factors': [],
+            'labels': ['Error'],
+            'datasets': [{
+                'label': 'Error Loading Data',
+                'data': [1]
+            }]
+        }), 500
+
+def factor_label(column):
+    """Short chart label of an employability question"""
+    return ' '.join(column.replace('Sejauh mana ', '').replace(' mempengaruhi kebolehpasaran anda?', '').split()).title()
+
 @faktor_graduan_bp.route('/api/professional-certificates')
 def api_professional_certificates():
     """Get professional certificates impact analysis - Bar Chart"""
@@ -341,10 +418,7 @@ def api_professional_certificates():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -414,10 +488,7 @@ def api_employer_requirements():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -473,10 +544,7 @@ def api_university_preparedness():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -551,17 +619,14 @@ def api_additional_skills():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
         filtered_df = filtered_processor.filtered_df
         
         # Find the skills column - try exact match first, then similar
-        skills_column = 'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? '
+        skills_column = 'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?'
         
         if skills_column not in filtered_df.columns:
             # Try to find similar column names
@@ -690,10 +755,7 @@ def api_table_data():
             if key not in ['page', 'per_page', 'search']:
                 values = request.args.getlist(key)
                 if key == 'Tahun graduasi anda?':
-                    try:
-                        values = [int(float(v)) for v in values if v.strip()]
-                    except (ValueError, TypeError):
-                        pass
+                    values = parse_years(values)
                 filters[key] = values
                 
         filtered_processor = data_processor.apply_filters(filters)
@@ -705,14 +767,14 @@ def api_table_data():
         # Define relevant columns for faktor graduan
         relevant_columns = [
             'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-            'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+            'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
             'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?',
             'Adakah anda memiliki sijil profesional tambahan selain ijazah/diploma?',
             'Adakah sijil profesional ini membantu anda dalam mendapatkan pekerjaan?',
             'Adakah majikan anda meminta kelayakan tambahan selain daripada ijazah anda?',
-            'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? ',
+            'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?',
             'Sejauh mana anda bersetuju bahawa universiti telah menyediakan anda untuk pasaran kerja?',
             'Tahun graduasi anda?',
             'Jantina anda?',
@@ -743,10 +805,7 @@ def api_export():
             if key != 'format':
                 values = request.args.getlist(key)
                 if key == 'Tahun graduasi anda?':
-                    try:
-                        values = [int(float(v)) for v in values if v.strip()]
-                    except (ValueError, TypeError):
-                        pass
+                    values = parse_years(values)
                 filters[key] = values
                 
         filtered_processor = data_processor.apply_filters(filters)
@@ -756,14 +815,14 @@ def api_export():
         relevant_columns = [
             'Timestamp',
             'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?',
-            'Sejauh mana kemahiran komunikasi  mempengaruhi kebolehpasaran anda?',
+            'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?',
             'Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?',
             'Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?',
             'Adakah anda memiliki sijil profesional tambahan selain ijazah/diploma?',
             'Adakah sijil profesional ini membantu anda dalam mendapatkan pekerjaan?',
             'Adakah majikan anda meminta kelayakan tambahan selain daripada ijazah anda?',
-            'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga? ',
+            'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?',
             'Sejauh mana anda bersetuju bahawa universiti telah menyediakan anda untuk pasaran kerja?',
             'Tahun graduasi anda?',
             'Jantina anda?',
@@ -819,6 +878,9 @@ def api_available_filters():
                 filters[column] = unique_values
                 print(f"Filter options for {column}: {unique_values}")
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
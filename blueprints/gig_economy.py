@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.normalize import parse_years, year_mask, year_options
+from models.query_backends import table_records
+from models.trace import TRACE_PARAM, trace
 import io
 import os
 import pandas as pd
@@ -7,10 +10,9 @@ import numpy as np
 
 gig_economy_bp = Blueprint('gig_economy', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 # Centralized Chart Data Formatter for consistent data structure
 class ChartDataFormatter:
@@ -77,26 +79,8 @@ def process_filter_values(key, values):
     """Process filter values based on the filter type"""
     # Handle graduation year with better conversion
     if 'Tahun graduasi' in key:
-        processed_values = []
-        for val in values:
-            if val and str(val).strip():
-                # Clean the value
-                clean_val = str(val).strip()
-                processed_values.append(clean_val)
-                
-                # Also try to add as float/int for broader matching
-                try:
-                    numeric_val = float(clean_val)
-                    if numeric_val.is_integer():
-                        int_val = int(numeric_val)
-                        if str(int_val) not in processed_values:
-                            processed_values.append(str(int_val))
-                        if int_val not in processed_values:
-                            processed_values.append(int_val)
-                except (ValueError, AttributeError):
-                    pass
-        
-        print(f"  Graduation year processed: {processed_values}")
+        processed_values = parse_years(values)
+        trace('graduation year processed', key=key, values=processed_values)
         return processed_values
     else:
         # For other filters, ensure we have clean string values
@@ -104,16 +88,13 @@ def process_filter_values(key, values):
         for val in values:
             if val and str(val).strip():
                 clean_values.append(str(val).strip())
-        print(f"  Other filter processed: {clean_values}")
+        trace('filter processed', key=key, values=clean_values)
         return clean_values
 
 def process_filters_with_conversion_v2(request_args, exclude_keys=None):
     """Improved filter processing that can handle both request.args and dict objects"""
     filters = {}
-    exclude_keys = exclude_keys or ['page', 'per_page', 'search']
-    
-    print(f"=== PROCESSING FILTERS (V2) - GIG ECONOMY ===")
-    print(f"Raw request args type: {type(request_args)}")
+    exclude_keys = list(exclude_keys or ['page', 'per_page', 'search']) + [TRACE_PARAM]
     
     # Handle both Flask request.args and regular dict
     if hasattr(request_args, 'getlist'):
@@ -121,7 +102,6 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         keys_to_process = [k for k in request_args.keys() if k not in exclude_keys]
         for key in keys_to_process:
             values = request_args.getlist(key)
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
@@ -132,15 +112,13 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         for key, values in request_args.items():
             if key in exclude_keys:
                 continue
-                
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
                 
             filters[key] = process_filter_values(key, values)
     
-    print(f"Final processed filters: {filters}")
+    trace('filters processed', filters=filters)
     return filters
 
 def apply_improved_filters(df, filters):
@@ -150,17 +128,14 @@ def apply_improved_filters(df, filters):
     
     filtered_df = df.copy()
     
-    print(f"=== APPLYING IMPROVED FILTERS - GIG ECONOMY ===")
-    print(f"Original dataframe shape: {filtered_df.shape}")
+    trace('applying filters', shape=filtered_df.shape, filters=filters)
     
     for filter_key, filter_values in filters.items():
         if not filter_values:
             continue
             
-        print(f"Applying filter: {filter_key} = {filter_values}")
-        
         if filter_key not in filtered_df.columns:
-            print(f"  Warning: Column '{filter_key}' not found in dataframe")
+            trace('filter column not found', column=filter_key)
             continue
         
         # Get the column data and handle different data types
@@ -169,36 +144,9 @@ def apply_improved_filters(df, filters):
         # Create mask for matching values
         mask = pd.Series([False] * len(filtered_df), index=filtered_df.index)
         
-        # Special handling for graduation year
+        # Graduation year is an integer column (normalised at load)
         if 'Tahun graduasi' in filter_key:
-            for filter_val in filter_values:
-                # Try multiple matching strategies
-                try:
-                    # Direct string match
-                    string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
-                    mask |= string_match
-                    
-                    # Numeric match if possible
-                    if pd.api.types.is_numeric_dtype(column_data):
-                        try:
-                            numeric_filter = float(filter_val)
-                            numeric_match = column_data == numeric_filter
-                            mask |= numeric_match
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Try converting column to numeric and compare
-                    try:
-                        numeric_column = pd.to_numeric(column_data, errors='coerce')
-                        numeric_filter = float(filter_val)
-                        numeric_match = numeric_column == numeric_filter
-                        mask |= numeric_match.fillna(False)
-                    except (ValueError, TypeError):
-                        pass
-                        
-                except Exception as e:
-                    print(f"    Error processing graduation year filter {filter_val}: {e}")
-                    
+            mask = year_mask(column_data, filter_values)
         else:
             # Standard string matching for other filters
             for filter_val in filter_values:
@@ -206,20 +154,21 @@ def apply_improved_filters(df, filters):
                     string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
                     mask |= string_match
                 except Exception as e:
-                    print(f"    Error processing filter {filter_val}: {e}")
+                    trace('filter error', column=filter_key, value=filter_val, error=str(e))
         
         # Apply the mask
         before_count = len(filtered_df)
         filtered_df = filtered_df[mask]
         after_count = len(filtered_df)
         
-        print(f"  Filter '{filter_key}' reduced data from {before_count} to {after_count} rows")
+        trace('filter applied', column=filter_key, values=filter_values,
+              rows_before=before_count, rows_after=after_count)
         
         if after_count == 0:
-            print(f"  Warning: Filter '{filter_key}' resulted in empty dataset")
+            trace('filter eliminated all rows', column=filter_key)
             break
     
-    print(f"Final filtered dataframe shape: {filtered_df.shape}")
+    trace('filters done', shape=filtered_df.shape)
     return filtered_df
 
 # ===== END IMPROVED FILTER PROCESSING =====
@@ -242,8 +191,8 @@ def api_test():
     return jsonify({
         'status': 'success',
         'message': 'Gig Economy API is working',
-        'available_columns': list(df.columns) if not df.empty else [],
-        'total_records': len(df)
+        'available_columns': list(data_processor.df.columns) if not data_processor.df.empty else [],
+        'total_records': len(data_processor.df)
     })
 
 @gig_economy_bp.route('/api/debug-data')
@@ -253,17 +202,17 @@ def api_debug_data():
         grad_col = 'Tahun graduasi anda?'
         sample_data = {}
         
-        if grad_col in df.columns:
-            grad_data = df[grad_col].dropna()
+        if grad_col in data_processor.df.columns:
+            grad_data = data_processor.df[grad_col].dropna()
             sample_data['graduation_years'] = {
                 'unique_values': sorted(grad_data.unique().tolist()),
-                'value_counts': grad_data.value_counts().to_dict(),
+                'value_counts': {str(year): int(count) for year, count in grad_data.value_counts().items()},
                 'data_types': [str(type(x)) for x in grad_data.unique()[:5]]
             }
         
         return jsonify({
-            'total_records': len(df),
-            'columns': list(df.columns),
+            'total_records': len(data_processor.df),
+            'columns': list(data_processor.df.columns),
             'sample_data': sample_data
         })
     except Exception as e:
@@ -275,12 +224,10 @@ def api_summary():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
-        print(f"=== API SUMMARY DEBUG - GIG ECONOMY ===")
-        print(f"Processed filters: {filters}")
-        print(f"Filtered DF shape: {filtered_df.shape}")
-        print(f"Original DF shape: {df.shape}")
+        trace('summary filters applied', filters=filters, shape=filtered_df.shape,
+              original_shape=data_processor.df.shape)
         
         total_records = len(filtered_df)
         
@@ -291,29 +238,8 @@ def api_summary():
             # Gig economy participation rate
             gig_column = 'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?'
             if gig_column in filtered_df.columns:
-                # Apply gig mapping
-                gig_mapping = {
-                    'Ekonomi Gig: Penghantaran & e-hailing (Grab, FoodPanda, Lalamove)': 'Penghantaran',
-                    'Keusahawanan: Mengusahakan perniagaan sendiri (produk, perkhidmatan, syarikat)': 'Usahawan',
-                    'Ekonomi Gig: Pendidikan & konsultasi (tutor online, coaching, kursus digital)': 'Pendidikan',
-                    'Ekonomi Gig: Pembuatan kandungan (YouTube, TikTok, streaming)': 'Pembuatan Kandungan',
-                    'Ekonomi Gig: Freelancing digital (design, copywriting, programming, social media marketing)': 'Digital',
-                    'Ekonomi Gig: E-commerce & dropshipping (Shopee, Lazada, TikTok Shop)': 'E-commerce',
-                    'Saya tidak bercadang untuk terlibat dalam mana-mana pekerjaan bebas': 'Tidak Berminat'
-                }
-                
-                def clean_gig(cell):
-                    if pd.isnull(cell):
-                        return ''
-                    found = []
-                    for full_string, label in gig_mapping.items():
-                        if full_string in str(cell):
-                            found.append(label)
-                    found = list(dict.fromkeys(found))
-                    return '; '.join(found)
-                
-                filtered_df_copy = filtered_df.copy()
-                filtered_df_copy['gig_clean'] = filtered_df_copy[gig_column].apply(clean_gig)
+                # Gig types are a cached derived column (computed once per dataset version)
+                filtered_df_copy = filtered_df.assign(gig_clean=data_processor.derived(filtered_df, 'gig_type'))
                 
                 # Calculate participation rates
                 gig_interested = len(filtered_df_copy[filtered_df_copy['gig_clean'] != 'Tidak Berminat'])
@@ -370,27 +296,21 @@ def api_summary():
                 prefer_permanent = len(filtered_df[filtered_df[job_pref_column].str.contains('Ya', na=False)])
                 job_preference_rate = (prefer_permanent / total_records) * 100 if total_records > 0 else 0
             # Top gig motivation
-            motivations_columns = [
-                'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
-                'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?'
-            ]
+            motivations_column = 'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?'
             
             top_motivation = 'N/A'
-            for col in motivations_columns:
-                if col in filtered_df.columns:
-                    all_motivations = []
-                    for motivations_cell in filtered_df[col].dropna():
-                        if pd.notna(motivations_cell) and 'Tidak relevan' not in str(motivations_cell):
-                            motivations = [m.strip() for m in str(motivations_cell).split(',')]
-                            motivations = [m for m in motivations if m and len(m.strip()) > 0]
-                            all_motivations.extend(motivations)
-                    
-                    if all_motivations:
-                        motivation_counts = pd.Series(all_motivations).value_counts()
-                        if not motivation_counts.empty:
-                            top_motivation = motivation_counts.index[0]
-                            # Remove truncation to show full text
-                    break
+            if motivations_column in filtered_df.columns:
+                all_motivations = []
+                for motivations_cell in filtered_df[motivations_column].dropna():
+                    if pd.notna(motivations_cell) and 'Tidak relevan' not in str(motivations_cell):
+                        motivations = [m.strip() for m in str(motivations_cell).split(',')]
+                        motivations = [m for m in motivations if m and len(m.strip()) > 0]
+                        all_motivations.extend(motivations)
+                
+                if all_motivations:
+                    motivation_counts = pd.Series(all_motivations).value_counts()
+                    if not motivation_counts.empty:
+                        top_motivation = motivation_counts.index[0]
             
             gig_stats['top_gig_motivation'] = top_motivation
             
@@ -426,7 +346,7 @@ def api_summary():
             'filter_applied': len([f for f in filters.values() if f]) > 0
         }
         
-        print(f"Summary stats: {enhanced_stats}")
+        trace('final enhanced stats', stats=enhanced_stats)
         return jsonify(enhanced_stats)
         
     except Exception as e:
@@ -451,7 +371,7 @@ def api_gig_types():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         gig_column = 'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?'
         
@@ -461,29 +381,8 @@ def api_gig_types():
                 "Gig Economy Types"
             ))
         
-        # Apply gig mapping and filtering
-        gig_mapping = {
-            'Ekonomi Gig: Penghantaran & e-hailing (Grab, FoodPanda, Lalamove)': 'Penghantaran',
-            'Keusahawanan: Mengusahakan perniagaan sendiri (produk, perkhidmatan, syarikat)': 'Usahawan',
-            'Ekonomi Gig: Pendidikan & konsultasi (tutor online, coaching, kursus digital)': 'Pendidikan',
-            'Ekonomi Gig: Pembuatan kandungan (YouTube, TikTok, streaming)': 'Pembuatan Kandungan',
-            'Ekonomi Gig: Freelancing digital (design, copywriting, programming, social media marketing)': 'Digital',
-            'Ekonomi Gig: E-commerce & dropshipping (Shopee, Lazada, TikTok Shop)': 'E-commerce',
-            'Saya tidak bercadang untuk terlibat dalam mana-mana pekerjaan bebas': 'Tidak Berminat'
-        }
-        
-        def clean_gig(cell):
-            if pd.isnull(cell):
-                return ''
-            found = []
-            for full_string, label in gig_mapping.items():
-                if full_string in str(cell):
-                    found.append(label)
-            found = list(dict.fromkeys(found))
-            return '; '.join(found)
-        
-        df_work = filtered_df.copy()
-        df_work['gig_clean'] = df_work[gig_column].apply(clean_gig)
+        # Gig types are a cached derived column (computed once per dataset version)
+        df_work = filtered_df.assign(gig_clean=data_processor.derived(filtered_df, 'gig_type'))
         
         # Filter out 'Tidak Berminat'
         df_gig_filtered = df_work[df_work['gig_clean'] != 'Tidak Berminat'].copy()
@@ -531,7 +430,7 @@ def api_university_support():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         support_column = 'Adakah universiti anda menawarkan kursus atau latihan berkaitan keusahawanan?'
         
@@ -563,7 +462,7 @@ def api_entrepreneurship_offerings():
     """Analyse sentiment on entrepreneurship course offerings."""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         column = 'Adakah universiti anda menawarkan kursus atau latihan berkaitan keusahawanan?'
 
         filters_applied = any(values for values in filters.values())
@@ -641,7 +540,7 @@ def api_university_programs():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         programs_column = 'Adakah universiti anda pernah menganjurkan program berkaitan perniagaan atau ekonomi gig seperti hackathon, bootcamp, atau geran permulaan perniagaan?'
         
@@ -674,7 +573,7 @@ def api_program_effectiveness():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         programs_column = 'Adakah universiti anda pernah menganjurkan program berkaitan perniagaan atau ekonomi gig seperti hackathon, bootcamp, atau geran permulaan perniagaan?'
         effectiveness_column = 'Adakah program berkaitan perniagaan atau ekonomi gig di universiti membantu anda dalam memulakan atau mengembangkan pekerjaan bebas anda?'
@@ -713,21 +612,12 @@ def api_gig_motivations():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
-        # Try both possible column names
-        motivations_columns = [
-            'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
-            'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?'
-        ]
+        # Headers are aligned to the canonical schema at load
+        motivations_column = 'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?'
         
-        motivations_column = None
-        for col in motivations_columns:
-            if col in filtered_df.columns:
-                motivations_column = col
-                break
-        
-        if motivations_column is None:
+        if motivations_column not in filtered_df.columns:
             return jsonify(formatter.format_bar_chart(
                 pd.Series([1], index=['Column not found']),
                 "Gig Motivations"
@@ -792,7 +682,7 @@ def api_skill_acquisition():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         skills_column = 'Bagaimanakah anda memperoleh kemahiran untuk bekerja dalam ekonomi gig?'
         
@@ -861,7 +751,7 @@ def api_gig_challenges():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         challenges_column = 'Apakah cabaran utama yang anda hadapi dalam keusahawanan atau ekonomi gig?'
         
@@ -909,7 +799,7 @@ def api_support_needed():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         support_column = 'Apakah bantuan atau sokongan yang anda rasa perlu untuk berjaya dalam keusahawanan dan ekonomi gig?'
         
@@ -997,9 +887,10 @@ def api_support_needed():
                         all_support.append('Lain-lain')
                         uncategorized_items.append(item)
         
-        # Print uncategorized items for debugging
+        # Trace uncategorized items for debugging
         if uncategorized_items:
-            print(f"Uncategorized support items ({len(uncategorized_items)}): {set(uncategorized_items)}")
+            trace('uncategorized support items', count=len(uncategorized_items),
+                  items=lambda: set(uncategorized_items))
         
         if not all_support:
             return jsonify(formatter.format_bar_chart(
@@ -1031,7 +922,7 @@ def api_monthly_income():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         # Try multiple possible column names
         income_columns = [
@@ -1101,7 +992,7 @@ def api_job_preference():
     try:
         # Use improved filter processing
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         preference_column = 'Jika diberikan peluang pekerjaan tetap dengan gaji setanding ekonomi gig, adakah anda akan menerimanya?'
         
@@ -1149,7 +1040,7 @@ def api_chart_table_data(chart_type):
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 100))
@@ -1165,7 +1056,7 @@ def api_chart_table_data(chart_type):
                 'Program pengajian yang anda ikuti?'
             ],
             'gig-motivations': [
-                'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+                'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
                 'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?',
                 'Tahun graduasi anda?',
                 'Jantina anda?',
@@ -1263,7 +1154,7 @@ def api_chart_table_data(chart_type):
                 end_idx = start_idx + per_page
                 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -1300,7 +1191,7 @@ def api_table_data():
             request.args,
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -1312,7 +1203,7 @@ def api_table_data():
             'Adakah universiti anda menawarkan kursus atau latihan berkaitan keusahawanan?',
             'Adakah universiti anda pernah menganjurkan program berkaitan perniagaan atau ekonomi gig seperti hackathon, bootcamp, atau geran permulaan perniagaan?',
             'Adakah program berkaitan perniagaan atau ekonomi gig di universiti membantu anda dalam memulakan atau mengembangkan pekerjaan bebas anda?',
-            'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+            'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
             'Bagaimanakah anda memperoleh kemahiran untuk bekerja dalam ekonomi gig?',
             'Apakah cabaran utama yang anda hadapi dalam keusahawanan atau ekonomi gig?',
             'Apakah bantuan atau sokongan yang anda rasa perlu untuk berjaya dalam keusahawanan dan ekonomi gig?',
@@ -1346,7 +1237,7 @@ def api_table_data():
                 end_idx = start_idx + per_page
                 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -1383,7 +1274,7 @@ def api_export():
             request.args,
             exclude_keys=['format', 'chart_type']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         format_type = request.args.get('format', 'csv')
         chart_type = request.args.get('chart_type')
@@ -1398,7 +1289,7 @@ def api_export():
                     'Institusi pendidikan MARA yang anda hadiri?'
                 ],
                 'gig-motivations': [
-                    'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+                    'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
                     'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?',
                     'Tahun graduasi anda?',
                     'Jantina anda?'
@@ -1461,7 +1352,7 @@ def api_export():
                 'Adakah universiti anda menawarkan kursus atau latihan berkaitan keusahawanan?',
                 'Adakah universiti anda pernah menganjurkan program berkaitan perniagaan atau ekonomi gig seperti hackathon, bootcamp, atau geran permulaan perniagaan?',
                 'Adakah program berkaitan perniagaan atau ekonomi gig di universiti membantu anda dalam memulakan atau mengembangkan pekerjaan bebas anda?',
-                'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+                'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
                 'Bagaimanakah anda memperoleh kemahiran untuk bekerja dalam ekonomi gig?',
                 'Apakah cabaran utama yang anda hadapi dalam keusahawanan atau ekonomi gig?',
                 'Apakah bantuan atau sokongan yang anda rasa perlu untuk berjaya dalam keusahawanan dan ekonomi gig?',
@@ -1511,7 +1402,7 @@ def api_export():
 def api_available_filters():
     """Get available filter options for gig economy data"""
     try:
-        sample_df = df.copy()
+        sample_df = data_processor.df.copy()
         filters = {}
         
         filter_columns = [
@@ -1520,34 +1411,21 @@ def api_available_filters():
             'Institusi pendidikan MARA yang anda hadiri?'
         ]
         
-        # Debug: Print all column names to see exact format
-        print("Available columns in gig economy dataset:")
-        for i, col in enumerate(sample_df.columns):
-            print(f"  {i}: '{col}'")
+        trace('available columns', columns=lambda: list(sample_df.columns))
         
         for column in filter_columns:
             if column in sample_df.columns:
                 # Get unique values and handle different data types
                 unique_values = sample_df[column].dropna().unique()
-                print(f"Column '{column}' has {len(unique_values)} unique values: {list(unique_values)[:5]}...")
+                trace('filter column values', column=column, count=len(unique_values),
+                      sample=lambda: list(unique_values)[:5])
                 
-                # Special handling for graduation years - ensure consistent string format
+                # Graduation years - integer column, sorted and sent as strings
                 if 'Tahun graduasi' in column:
-                    processed_values = []
-                    for val in unique_values:
-                        # Convert to string and clean
-                        str_val = str(val).strip()
-                        if str_val and str_val != 'nan':
-                            processed_values.append(str_val)
-                    
-                    # Sort numerically if possible, otherwise alphabetically
-                    try:
-                        processed_values = sorted(processed_values, key=lambda x: float(x))
-                    except (ValueError, TypeError):
-                        processed_values = sorted(processed_values)
+                    processed_values = [str(year) for year in year_options(sample_df[column])]
                     
                     filters[column] = processed_values
-                    print(f"  Graduation years after processing: {processed_values}")
+                    trace('graduation years processed', values=processed_values)
                 else:
                     # Convert all values to string for consistency and clean
                     processed_values = []
@@ -1557,11 +1435,14 @@ def api_available_filters():
                             processed_values.append(str_val)
                     
                     filters[column] = sorted(processed_values)
-                    print(f"  Other filter processed: {len(processed_values)} values")
+                    trace('filter processed', column=column, count=len(processed_values))
             else:
-                print(f"Column '{column}' not found in dataset")
+                trace('filter column not found', column=column)
                 filters[column] = []
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.normalize import parse_years, year_mask, year_options
+from models.query_backends import table_records
+from models.trace import TRACE_PARAM, trace
 import io
 import os
 import pandas as pd
@@ -8,35 +11,16 @@ import numpy as np
 
 graduan_bidang_bp = Blueprint('graduan-bidang', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 def process_filter_values(key, values):
     """Process filter values based on the filter type - FIXED VERSION"""
     # Handle graduation year with better conversion
     if 'Tahun graduasi' in key:
-        processed_values = []
-        for val in values:
-            if val and str(val).strip():
-                # Clean the value
-                clean_val = str(val).strip()
-                processed_values.append(clean_val)
-                
-                # Also try to add as float/int for broader matching
-                try:
-                    numeric_val = float(clean_val)
-                    if numeric_val.is_integer():
-                        int_val = int(numeric_val)
-                        if str(int_val) not in processed_values:
-                            processed_values.append(str(int_val))
-                        if int_val not in processed_values:
-                            processed_values.append(int_val)
-                except (ValueError, AttributeError):
-                    pass
-        
-        print(f"  Graduation year processed: {processed_values}")
+        processed_values = parse_years(values)
+        trace('graduation year processed', key=key, values=processed_values)
         return processed_values
     else:
         # For other filters, ensure we have clean string values
@@ -44,16 +28,13 @@ def process_filter_values(key, values):
         for val in values:
             if val and str(val).strip():
                 clean_values.append(str(val).strip())
-        print(f"  Other filter processed: {clean_values}")
+        trace('filter processed', key=key, values=clean_values)
         return clean_values
 
 def process_filters_with_conversion_v2(request_args, exclude_keys=None):
     """Improved filter processing that can handle both request.args and dict objects"""
     filters = {}
-    exclude_keys = exclude_keys or ['page', 'per_page', 'search']
-    
-    print(f"=== PROCESSING FILTERS (V2) ===")
-    print(f"Raw request args type: {type(request_args)}")
+    exclude_keys = list(exclude_keys or ['page', 'per_page', 'search']) + [TRACE_PARAM]
     
     # Handle both Flask request.args and regular dict
     if hasattr(request_args, 'getlist'):
@@ -61,7 +42,6 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         keys_to_process = [k for k in request_args.keys() if k not in exclude_keys]
         for key in keys_to_process:
             values = request_args.getlist(key)
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
@@ -72,15 +52,13 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         for key, values in request_args.items():
             if key in exclude_keys:
                 continue
-                
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
                 
             filters[key] = process_filter_values(key, values)
     
-    print(f"Final processed filters: {filters}")
+    trace('filters processed', filters=filters)
     return filters
 
 def apply_improved_filters(df, filters):
@@ -90,17 +68,14 @@ def apply_improved_filters(df, filters):
     
     filtered_df = df.copy()
     
-    print(f"=== APPLYING IMPROVED FILTERS ===")
-    print(f"Original dataframe shape: {filtered_df.shape}")
+    trace('applying filters', shape=filtered_df.shape, filters=filters)
     
     for filter_key, filter_values in filters.items():
         if not filter_values:
             continue
             
-        print(f"Applying filter: {filter_key} = {filter_values}")
-        
         if filter_key not in filtered_df.columns:
-            print(f"  Warning: Column '{filter_key}' not found in dataframe")
+            trace('filter column not found', column=filter_key)
             continue
         
         # Get the column data and handle different data types
@@ -109,36 +84,9 @@ def apply_improved_filters(df, filters):
         # Create mask for matching values
         mask = pd.Series([False] * len(filtered_df), index=filtered_df.index)
         
-        # Special handling for graduation year
+        # Graduation year is an integer column (normalised at load)
         if 'Tahun graduasi' in filter_key:
-            for filter_val in filter_values:
-                # Try multiple matching strategies
-                try:
-                    # Direct string match
-                    string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
-                    mask |= string_match
-                    
-                    # Numeric match if possible
-                    if pd.api.types.is_numeric_dtype(column_data):
-                        try:
-                            numeric_filter = float(filter_val)
-                            numeric_match = column_data == numeric_filter
-                            mask |= numeric_match
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Try converting column to numeric and compare
-                    try:
-                        numeric_column = pd.to_numeric(column_data, errors='coerce')
-                        numeric_filter = float(filter_val)
-                        numeric_match = numeric_column == numeric_filter
-                        mask |= numeric_match.fillna(False)
-                    except (ValueError, TypeError):
-                        pass
-                        
-                except Exception as e:
-                    print(f"    Error processing graduation year filter {filter_val}: {e}")
-                    
+            mask = year_mask(column_data, filter_values)
         else:
             # Standard string matching for other filters
             for filter_val in filter_values:
@@ -146,20 +94,21 @@ def apply_improved_filters(df, filters):
                     string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
                     mask |= string_match
                 except Exception as e:
-                    print(f"    Error processing filter {filter_val}: {e}")
+                    trace('filter error', column=filter_key, value=filter_val, error=str(e))
         
         # Apply the mask
         before_count = len(filtered_df)
         filtered_df = filtered_df[mask]
         after_count = len(filtered_df)
         
-        print(f"  Filter '{filter_key}' reduced data from {before_count} to {after_count} rows")
+        trace('filter applied', column=filter_key, values=filter_values,
+              rows_before=before_count, rows_after=after_count)
         
         if after_count == 0:
-            print(f"  Warning: Filter '{filter_key}' resulted in empty dataset")
+            trace('filter eliminated all rows', column=filter_key)
             break
     
-    print(f"Final filtered dataframe shape: {filtered_df.shape}")
+    trace('filters done', shape=filtered_df.shape)
     return filtered_df
 
 @graduan_bidang_bp.route('/')
@@ -171,11 +120,11 @@ def index():
 def api_test():
     """Test endpoint to verify the blueprint is working"""
     # Get available columns for debugging
-    available_columns = list(df.columns) if not df.empty else []
+    available_columns = list(data_processor.df.columns) if not data_processor.df.empty else []
     
     # Check for specific columns we need
-    year_columns = ['Tahun graduasi ', 'Tahun graduasi', 'Tahun graduasi anda?', 'Graduation Year']
-    field_columns = ['Bidang pengajian utama ', 'Bidang pengajian utama', 'Bidang pengajian', 'Field of Study', 'Program pengajian yang anda ikuti?']
+    year_columns = ['Tahun graduasi', 'Tahun graduasi anda?', 'Graduation Year']
+    field_columns = ['Bidang pengajian utama', 'Bidang pengajian', 'Field of Study', 'Program pengajian yang anda ikuti?']
     
     # Find which columns exist
     found_year = [col for col in year_columns if col in available_columns]
@@ -199,20 +148,20 @@ def api_test():
     year_sample = []
     field_sample = []
     
-    if found_year and found_year[0] in df.columns:
-        year_sample = df[found_year[0]].dropna().unique()[:10].tolist()
-    elif possible_year_columns and possible_year_columns[0] in df.columns:
-        year_sample = df[possible_year_columns[0]].dropna().unique()[:10].tolist()
-        
-    if found_field and found_field[0] in df.columns:
-        field_sample = df[found_field[0]].dropna().unique()[:5].tolist()
-    elif possible_field_columns and possible_field_columns[0] in df.columns:
-        field_sample = df[possible_field_columns[0]].dropna().unique()[:5].tolist()
+    if found_year and found_year[0] in data_processor.df.columns:
+        year_sample = data_processor.df[found_year[0]].dropna().unique()[:10].tolist()
+    elif possible_year_columns and possible_year_columns[0] in data_processor.df.columns:
+        year_sample = data_processor.df[possible_year_columns[0]].dropna().unique()[:10].tolist()
+        
+    if found_field and found_field[0] in data_processor.df.columns:
+        field_sample = data_processor.df[found_field[0]].dropna().unique()[:5].tolist()
+    elif possible_field_columns and possible_field_columns[0] in data_processor.df.columns:
+        field_sample = data_processor.df[possible_field_columns[0]].dropna().unique()[:5].tolist()
     
     return jsonify({
         'status': 'success',
         'message': 'Graduan Bidang API is working',
-        'total_records': len(df),
+        'total_records': len(data_processor.df),
         'available_columns': available_columns,
         'found_year_columns': found_year,
         'found_field_columns': found_field,
@@ -231,14 +180,13 @@ def api_summary():
         # Process filters with improved conversion
         filters = process_filters_with_conversion_v2(request.args)
         
-        print(f"=== API SUMMARY DEBUG ===")
-        print(f"Processed filters: {filters}")
+        trace('summary filters', filters=filters)
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
-        print(f"Filtered DF shape: {filtered_df.shape}")
-        print(f"Original DF shape: {df.shape}")
+        trace('summary filtered data shape', shape=filtered_df.shape,
+              original_shape=data_processor.df.shape)
         
         total_records = len(filtered_df)
         
@@ -253,7 +201,6 @@ def api_summary():
         # Find year column - prioritize exact matches first
         year_columns = [
             'Tahun graduasi anda?',  # Most likely column name
-            'Tahun graduasi ',
             'Tahun graduasi', 
             'Graduation Year', 
             'Year'
@@ -269,7 +216,7 @@ def api_summary():
         for col in year_columns:
             if col in filtered_df.columns:
                 year_column = col
-                print(f"Using year column: {year_column}")
+                trace('using year column', column=year_column)
                 break
         
         if year_column:
@@ -294,7 +241,6 @@ def api_summary():
         # Find field column - prioritize exact matches first
         field_columns = [
             'Program pengajian yang anda ikuti?',  # Most likely column name
-            'Bidang pengajian utama ',
             'Bidang pengajian utama', 
             'Bidang pengajian', 
             'Field of Study'
@@ -310,7 +256,7 @@ def api_summary():
         for col in field_columns:
             if col in filtered_df.columns:
                 field_column = col
-                print(f"Using field column: {field_column}")
+                trace('using field column', column=field_column)
                 break
         
         if field_column:
@@ -362,12 +308,11 @@ def api_field_by_year():
         filters = process_filters_with_conversion_v2(request.args)
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         # Find year column - prioritize exact matches first
         year_columns = [
             'Tahun graduasi anda?',  # Most likely column name
-            'Tahun graduasi ',
             'Tahun graduasi', 
             'Graduation Year', 
             'Year'
@@ -389,7 +334,6 @@ def api_field_by_year():
         # Find field column - prioritize exact matches first
         field_columns = [
             'Program pengajian yang anda ikuti?',  # Most likely column name
-            'Bidang pengajian utama ',
             'Bidang pengajian utama', 
             'Bidang pengajian', 
             'Field of Study'
@@ -408,9 +352,8 @@ def api_field_by_year():
                 field_column = col
                 break
         
-        print(f"Available columns for field by year chart: {list(filtered_df.columns)}")
-        print(f"Year column found: {year_column}")
-        print(f"Field column found: {field_column}")
+        trace('field-by-year columns', year_column=year_column, field_column=field_column,
+              available_columns=lambda: list(filtered_df.columns))
         
         if not year_column or not field_column:
             return jsonify({
@@ -431,8 +374,7 @@ def api_field_by_year():
         # Remove NaN values and group by year and field
         clean_df = filtered_df[[year_column, field_column]].dropna()
         
-        print(f"Clean dataframe shape: {clean_df.shape}")
-        print(f"Sample clean data:\n{clean_df.head()}")
+        trace('clean data shape', shape=clean_df.shape, sample=lambda: clean_df.head())
         
         if clean_df.empty:
             return jsonify({
@@ -447,8 +389,8 @@ def api_field_by_year():
         # field_by_year = df.groupby(['Tahun graduasi ', 'Bidang pengajian utama ']).size().unstack(fill_value=0)
         grouped_data = clean_df.groupby([year_column, field_column]).size().unstack(fill_value=0)
         
-        print(f"Grouped data shape: {grouped_data.shape}")
-        print(f"Grouped data:\n{grouped_data}")
+        trace('grouped data shape', shape=grouped_data.shape)
+        trace('grouped data (raw counts)', counts=grouped_data)
         
         if grouped_data.empty:
             return jsonify({
@@ -499,7 +441,7 @@ def api_field_by_year():
             'datasets': datasets
         }
         
-        print(f"Final chart data: {chart_data}")
+        trace('chart data', data=chart_data)
         
         return jsonify(chart_data)
         
@@ -533,14 +475,12 @@ def api_chart_table_data():
         )
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         # Define relevant columns for field-by-year chart
         relevant_columns = [
             'Tahun graduasi anda?',
-            'Tahun graduasi ',
             'Program pengajian yang anda ikuti?',
-            'Bidang pengajian utama ',
             'Jantina anda?',
             'Institusi pendidikan MARA yang anda hadiri?'
         ]
@@ -553,10 +493,8 @@ def api_chart_table_data():
             available_columns = list(filtered_df.columns)[:6]
         
         # Prepare data for the modal
-        filtered_data = filtered_df[available_columns].fillna('')
-        
         # Convert to list of dictionaries for JSON serialization
-        data_records = filtered_data.to_dict('records')
+        data_records = table_records(filtered_df[available_columns])
         
         return jsonify({
             'data': data_records,
@@ -580,13 +518,13 @@ def api_chart_table_data():
 def api_columns():
     """Get all available columns and sample data for debugging"""
     try:
-        available_columns = list(df.columns) if not df.empty else []
+        available_columns = list(data_processor.df.columns) if not data_processor.df.empty else []
         
         # Get sample data for each column
         column_samples = {}
         for col in available_columns[:20]:  # Limit to first 20 columns
             try:
-                sample_data = df[col].dropna().unique()[:5].tolist()
+                sample_data = data_processor.df[col].dropna().unique()[:5].tolist()
                 column_samples[col] = [str(x) for x in sample_data]
             except Exception as e:
                 column_samples[col] = [f"Error: {str(e)}"]
@@ -601,7 +539,7 @@ def api_columns():
             'column_samples': column_samples,
             'year_related_columns': year_related,
             'field_related_columns': field_related,
-            'data_shape': df.shape if not df.empty else [0, 0]
+            'data_shape': data_processor.df.shape if not data_processor.df.empty else [0, 0]
         })
         
     except Exception as e:
@@ -618,7 +556,7 @@ def api_table_data():
         )
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -627,8 +565,6 @@ def api_table_data():
         # Define relevant columns for graduan bidang
         relevant_columns = [
             'Tahun graduasi anda?',
-            'Tahun graduasi ',
-            'Bidang pengajian utama ',
             'Bidang pengajian',
             'Program pengajian yang anda ikuti?',
             'Jantina anda?',
@@ -659,7 +595,7 @@ def api_table_data():
                 end_idx = start_idx + per_page
                 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -701,7 +637,7 @@ def api_export():
         )
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         format_type = request.args.get('format', 'csv')
         
@@ -710,9 +646,7 @@ def api_export():
             relevant_columns = [
                 'Timestamp',
                 'Tahun graduasi anda?',
-                'Tahun graduasi ',
                 'Program pengajian yang anda ikuti?',
-                'Bidang pengajian utama ',
                 'Jantina anda?',
                 'Institusi pendidikan MARA yang anda hadiri?'
             ]
@@ -720,8 +654,6 @@ def api_export():
             relevant_columns = [
                 'Timestamp',
                 'Tahun graduasi anda?',
-                'Tahun graduasi ',
-                'Bidang pengajian utama ',
                 'Bidang pengajian',
                 'Program pengajian yang anda ikuti?',
                 'Jantina anda?',
@@ -767,48 +699,33 @@ def api_export():
 def api_available_filters():
     """Get available filter options for graduan bidang data - FIXED VERSION"""
     try:
-        sample_df = df.copy()
+        sample_df = data_processor.df.copy()
         filters = {}
         
         filter_columns = [
             'Tahun graduasi anda?',  # Primary graduation year column
-            'Tahun graduasi ',
             'Tahun graduasi',
             'Jantina anda?',
             'Institusi pendidikan MARA yang anda hadiri?',
             'Program pengajian yang anda ikuti?',
-            'Bidang pengajian utama ',
             'Bidang pengajian'
         ]
         
-        # Debug: Print all column names to see exact format
-        print("Available columns in dataset:")
-        for i, col in enumerate(sample_df.columns):
-            print(f"  {i}: '{col}'")
+        trace('available columns', columns=lambda: list(sample_df.columns))
         
         for column in filter_columns:
             if column in sample_df.columns:
                 # Get unique values and handle different data types
                 unique_values = sample_df[column].dropna().unique()
-                print(f"Column '{column}' has {len(unique_values)} unique values: {list(unique_values)[:5]}...")
+                trace('filter column values', column=column, count=len(unique_values),
+                      sample=lambda: list(unique_values)[:5])
                 
-                # Special handling for graduation years - ensure consistent string format
+                # Graduation years - integer column, sorted and sent as strings
                 if 'Tahun graduasi' in column:
-                    processed_values = []
-                    for val in unique_values:
-                        # Convert to string and clean
-                        str_val = str(val).strip()
-                        if str_val and str_val != 'nan':
-                            processed_values.append(str_val)
-                    
-                    # Sort numerically if possible, otherwise alphabetically
-                    try:
-                        processed_values = sorted(processed_values, key=lambda x: float(x))
-                    except (ValueError, TypeError):
-                        processed_values = sorted(processed_values)
+                    processed_values = [str(year) for year in year_options(sample_df[column])]
                     
                     filters[column] = processed_values
-                    print(f"  Graduation years after processing: {processed_values}")
+                    trace('graduation years processed', values=processed_values)
                 else:
                     # Convert all values to string for consistency and clean
                     processed_values = []
@@ -818,11 +735,14 @@ def api_available_filters():
                             processed_values.append(str_val)
                     
                     filters[column] = sorted(processed_values)
-                    print(f"  Other filter processed: {len(processed_values)} values")
+                    trace('filter processed', column=column, count=len(processed_values))
             else:
-                print(f"Column '{column}' not found in dataset")
+                trace('filter column not found', column=column)
                 filters[column] = []
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
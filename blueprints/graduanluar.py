@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.normalize import YEAR_DTYPE, year_mask
+from models.query_backends import table_records
+from models.trace import trace
 import io
 import os
 import pandas as pd
@@ -8,13 +11,12 @@ import re
 
 graduanluar_bp = Blueprint('graduanluar', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
 
 # Remove the global pre-filtering — keep full dataset and let endpoints apply filters explicitly
 # (previous code removed rows early which caused missing/incorrect reason aggregation)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 # Enhanced Chart Data Formatter for better integration with ChartConfig
 class EnhancedChartDataFormatter:
@@ -209,8 +211,11 @@ def api_summary():
                 continue
             
             if column in filtered_df.columns:
+                # Graduation year is an integer column (normalised at load)
+                if str(filtered_df[column].dtype) == YEAR_DTYPE:
+                    filtered_df = filtered_df[year_mask(filtered_df[column], values)]
                 # Convert filter values to match column data type
-                if filtered_df[column].dtype in ['int64', 'float64']:
+                elif filtered_df[column].dtype in ['int64', 'float64']:
                     try:
                         converted_values = []
                         for v in values:
@@ -513,7 +518,10 @@ def api_reasons_distribution():
             if not values or len(values) == 0:
                 continue
             if column in filtered_df.columns:
-                if filtered_df[column].dtype in ['int64', 'float64']:
+                # Graduation year is an integer column (normalised at load)
+                if str(filtered_df[column].dtype) == YEAR_DTYPE:
+                    filtered_df = filtered_df[year_mask(filtered_df[column], values)]
+                elif filtered_df[column].dtype in ['int64', 'float64']:
                     try:
                         converted_values = [int(float(v)) if isinstance(v, str) else v for v in values]
                         filtered_df = filtered_df[filtered_df[column].isin(converted_values)]
@@ -594,7 +602,10 @@ def api_job_types():
             if not values or len(values) == 0:
                 continue
             if column in filtered_df.columns:
-                if filtered_df[column].dtype in ['int64', 'float64']:
+                # Graduation year is an integer column (normalised at load)
+                if str(filtered_df[column].dtype) == YEAR_DTYPE:
+                    filtered_df = filtered_df[year_mask(filtered_df[column], values)]
+                elif filtered_df[column].dtype in ['int64', 'float64']:
                     try:
                         converted_values = [int(float(v)) if isinstance(v, str) else v for v in values]
                         filtered_df = filtered_df[filtered_df[column].isin(converted_values)]
@@ -664,7 +675,10 @@ def api_reasons_simple():
             if not values or len(values) == 0:
                 continue
             if column in filtered_df.columns:
-                if filtered_df[column].dtype in ['int64', 'float64']:
+                # Graduation year is an integer column (normalised at load)
+                if str(filtered_df[column].dtype) == YEAR_DTYPE:
+                    filtered_df = filtered_df[year_mask(filtered_df[column], values)]
+                elif filtered_df[column].dtype in ['int64', 'float64']:
                     try:
                         converted_values = [int(float(v)) if isinstance(v, str) else v for v in values]
                         filtered_df = filtered_df[filtered_df[column].isin(converted_values)]
@@ -836,7 +850,10 @@ def api_outside_field_programs():
             if not values or len(values) == 0:
                 continue
             if column in filtered_df.columns:
-                if filtered_df[column].dtype in ['int64', 'float64']:
+                # Graduation year is an integer column (normalised at load)
+                if str(filtered_df[column].dtype) == YEAR_DTYPE:
+                    filtered_df = filtered_df[year_mask(filtered_df[column], values)]
+                elif filtered_df[column].dtype in ['int64', 'float64']:
                     try:
                         converted_values = [int(float(v)) if isinstance(v, str) else v for v in values]
                         filtered_df = filtered_df[filtered_df[column].isin(converted_values)]
@@ -867,14 +884,10 @@ def api_outside_field_programs():
             (~filtered_df[not_in_field_column].str.contains('Tidak berkaitan kerana saya bekerja dalam bidang pengajian', na=False))
         ].copy()
 
-        # Debug: Check what data we have
-        print(f"DEBUG GRADUAN LUAR: Total filtered rows: {len(filtered_df)}")
-        print(f"DEBUG GRADUAN LUAR: Outside field rows: {len(outside_field_df)}")
-        print(f"DEBUG GRADUAN LUAR: Program column exists: {program_column in filtered_df.columns}")
-
-        if len(outside_field_df) > 0:
-            print(f"DEBUG GRADUAN LUAR: Sample programs: {outside_field_df[program_column].dropna().head().tolist()}")
-            print(f"DEBUG GRADUAN LUAR: Program value counts: {outside_field_df[program_column].value_counts().head()}")
+        trace('graduan luar outside field rows', filtered_rows=len(filtered_df),
+              outside_field_rows=len(outside_field_df),
+              sample_programs=lambda: outside_field_df[program_column].dropna().head().tolist(),
+              program_counts=lambda: outside_field_df[program_column].value_counts().head())
 
         # Get program distribution for those working outside their field
         program_counts = outside_field_df[program_column].value_counts(dropna=False)
@@ -885,9 +898,9 @@ def api_outside_field_programs():
         # Remove NaN from counts for display
         program_counts = program_counts[program_counts.index.notna()]
         
-        print(f"DEBUG GRADUAN LUAR: Program counts (excluding NaN): {program_counts.to_dict()}")
-        print(f"DEBUG GRADUAN LUAR: Missing program data: {missing_program_count}")
-        print(f"DEBUG GRADUAN LUAR: Total should be: {program_counts.sum() + missing_program_count}")
+        trace('graduan luar program counts', counts=program_counts,
+              missing=missing_program_count,
+              total=lambda: program_counts.sum() + missing_program_count)
 
         if program_counts.empty:
             return jsonify({
@@ -984,7 +997,7 @@ def api_outside_field_table():
                 end_idx = start_idx + per_page
 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
 
                 return {
                     'data': page_data,
@@ -1162,6 +1175,9 @@ def api_available_filters():
                 print(f"    Graduation years: {vals}")
         
         print(f"\nFinal filters response: {filters}")
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
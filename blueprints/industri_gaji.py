@@ -1,5 +1,9 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.bands import sort_bands
+from models.contingency import STATS_PARAM, contingency_stats, stats_requested
+from models.dataset import LazyDataProcessor
+from models.normalize import parse_years
+from models.schema import COLUMN_MAPPING
 import io
 import os
 import pandas as pd
@@ -8,10 +12,12 @@ import numpy as np
 
 sektor_gaji_bp = Blueprint('sektor-gaji', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
+
+# Monthly salary (RM) counted as a high salary in the summary
+HIGH_SALARY_THRESHOLD = 3000
 
 @sektor_gaji_bp.route('/')
 def index():
@@ -28,12 +34,7 @@ def api_summary():
             values = request.args.getlist(key)
             # Convert graduation year strings back to integers if needed
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not convert graduation years to int: {values}")
-                    # Keep as strings if conversion fails
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         print(f"API Summary - Received filters: {filters}")
@@ -58,6 +59,9 @@ def api_summary():
         # Salary range analysis
         salary_column = 'Berapakah julat gaji bulanan anda sekarang?'
         
+        salary_bands = data_processor.bands(filtered_df, 'current_salary')
+        median_salary_estimate = None
+        
         if salary_column in filtered_df.columns:
             # Remove NaN values first
             salary_data = filtered_df[salary_column].dropna()
@@ -65,42 +69,14 @@ def api_summary():
                 salary_counts = salary_data.value_counts()
                 if len(salary_counts) > 0:
                     avg_salary_range = str(salary_counts.index[0])
-                    total_salary_responses = salary_counts.sum()
-                    
-                    # Calculate high salary rate (RM3000 and above) - check various patterns
-                    high_salary_patterns = ['RM3', 'RM4', 'RM5', 'RM6', 'RM7', 'RM8', 'RM9', 'RM10', '3000', '4000', '5000', '6000', '7000', '8000', '9000', '10000']
-                    high_salary_responses = 0
-                    
-                    for salary_range in salary_counts.index:
-                        salary_str = str(salary_range)
-                        if any(pattern in salary_str for pattern in high_salary_patterns):
-                            high_salary_responses += salary_counts[salary_range]
-                    
-                    if total_salary_responses > 0:
-                        high_salary_rate = (high_salary_responses / total_salary_responses) * 100
-
-        # Education level analysis - try multiple possible column names including broader search
-        education_columns = [
-            'Tahap pendidikan tertinggi', 
-            'Tahap pendidikan', 
-            'Education Level', 
-            'Pendidikan',
-            'Institusi pendidikan MARA yang anda hadiri?',  # Try using institution as education proxy
-            'Program pengajian yang anda ikuti?'  # Try using program as education proxy
-        ]
         
-        # Also search for any column containing education-related keywords
-        education_keywords = ['pendidikan', 'education', 'level', 'tahap']
-        for col in filtered_df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in education_keywords) and col not in education_columns:
-                education_columns.append(col)
-        
-        for col in education_columns:
-            if col in filtered_df.columns:
-                education_column = col
-                print(f"Using education column: {education_column}")
-                break
+        if salary_bands is not None and salary_bands.total() > 0:
+            # High salary rate (RM3,000 and above) from the parsed salary bands
+            high_salary_rate = salary_bands.share_at_least(HIGH_SALARY_THRESHOLD)
+            median_salary_estimate = round(salary_bands.median())
+
+        # Education level analysis - column resolved once per dataset version
+        education_column = data_processor.schema.get('education_level')
         
         if education_column:
             try:
@@ -137,27 +113,8 @@ def api_summary():
             except Exception as e:
                 print(f"Error processing sector data: {str(e)}")
 
-        # Field matching analysis - enhanced search
-        field_columns = [
-            'Bidang pengajian', 
-            'Field of Study', 
-            'Bidang', 
-            'Program pengajian yang anda ikuti?',
-            'Institusi pendidikan MARA yang anda hadiri?'  # Try institution as field proxy
-        ]
-        
-        # Also search for any column containing field-related keywords
-        field_keywords = ['bidang', 'field', 'program', 'pengajian', 'study']
-        for col in filtered_df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in field_keywords) and col not in field_columns:
-                field_columns.append(col)
-        
-        for col in field_columns:
-            if col in filtered_df.columns:
-                field_column = col
-                print(f"Using field column: {field_column}")
-                break
+        # Field matching analysis - prefer the grouped field column when present
+        field_column = data_processor.schema.get('field_group') or data_processor.schema.get('field_of_study')
         
         if field_column:
             try:
@@ -173,6 +130,7 @@ def api_summary():
             'total_records': total_records,
             'avg_salary_range': avg_salary_range,
             'high_salary_rate': round(high_salary_rate, 1),
+            'median_salary_estimate': median_salary_estimate,
             'most_common_education': most_common_education,
             'most_common_sector': most_common_sector,
             'private_sector_rate': round(private_sector_rate, 1),
@@ -198,6 +156,7 @@ def api_summary():
             'total_records': 0,
             'avg_salary_range': 'N/A',
             'high_salary_rate': 0,
+            'median_salary_estimate': None,
             'most_common_education': 'N/A',
             'most_common_sector': 'N/A',
             'private_sector_rate': 0,
@@ -211,12 +170,11 @@ def api_salary_by_field():
         # Fixed filter handling
         filters = {}
         for key in request.args.keys():
+            if key == STATS_PARAM:
+                continue
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         print(f"API Salary by Field - Received filters: {filters}")
@@ -226,14 +184,7 @@ def api_salary_by_field():
         
         print(f"Salary by field - Filtered data shape: {filtered_df.shape}")
         
-        # Try multiple possible column names for field of study
-        field_columns = ['Bidang pengajian', 'Field of Study', 'Bidang', 'Program pengajian yang anda ikuti?']
-        field_column = None
-        for col in field_columns:
-            if col in filtered_df.columns:
-                field_column = col
-                print(f"Found field column: {field_column}")
-                break
+        field_column = data_processor.schema.get('field_group') or data_processor.schema.get('field_of_study')
         
         salary_column = 'Berapakah julat gaji bulanan anda sekarang?'
         
@@ -262,6 +213,7 @@ def api_salary_by_field():
         
         # Group by field and salary range
         grouped_data = clean_df.groupby([field_column, salary_column]).size().unstack(fill_value=0)
+        grouped_data = grouped_data[sort_bands(grouped_data.columns)]
         print(f"Grouped data shape: {grouped_data.shape}")
         
         if grouped_data.empty:
@@ -287,6 +239,8 @@ def api_salary_by_field():
             'labels': labels,
             'datasets': datasets
         }
+        if stats_requested(request.args):
+            chart_data['statistics'] = contingency_stats(grouped_data)
         
         print(f"Returning field chart data: {chart_data}")
         return jsonify(chart_data)
@@ -312,12 +266,11 @@ def api_salary_by_education():
         # Fixed filter handling
         filters = {}
         for key in request.args.keys():
+            if key == STATS_PARAM:
+                continue
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         print(f"API Salary by Education - Received filters: {filters}")
@@ -327,19 +280,7 @@ def api_salary_by_education():
         
         print(f"Salary by education - Filtered data shape: {filtered_df.shape}")
         
-        # Use specific education level column only
-        education_columns = [
-            'Tahap pendidikan tertinggi anda?',
-            'Tahap pendidikan tertinggi', 
-            'Tahap pendidikan'
-        ]
-        
-        education_column = None
-        for col in education_columns:
-            if col in filtered_df.columns:
-                education_column = col
-                print(f"Found education column for chart: {education_column}")
-                break
+        education_column = data_processor.schema.get('education_level')
         
         salary_column = 'Berapakah julat gaji bulanan anda sekarang?'
         
@@ -359,7 +300,7 @@ def api_salary_by_education():
                     'education_column_found': education_column,
                     'salary_column_exists': salary_column in filtered_df.columns,
                     'available_columns': list(filtered_df.columns),
-                    'searched_education_columns': education_columns
+                    'searched_education_columns': COLUMN_MAPPING['education_level']
                 }
             })
         
@@ -380,6 +321,7 @@ def api_salary_by_education():
         
         # Group by education level and salary range
         grouped_data = clean_df.groupby([education_column, salary_column]).size().unstack(fill_value=0)
+        grouped_data = grouped_data[sort_bands(grouped_data.columns)]
         
         print(f"Grouped data shape: {grouped_data.shape}")
         print(f"Grouped data:\n{grouped_data}")
@@ -407,6 +349,8 @@ def api_salary_by_education():
             'labels': labels,
             'datasets': datasets
         }
+        if stats_requested(request.args):
+            chart_data['statistics'] = contingency_stats(grouped_data)
         
         print(f"Final chart data: {chart_data}")
         
@@ -440,10 +384,7 @@ def api_employment_sectors():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -506,12 +447,11 @@ def api_salary_by_industry():
         # Fixed filter handling
         filters = {}
         for key in request.args.keys():
+            if key == STATS_PARAM:
+                continue
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -538,6 +478,7 @@ def api_salary_by_industry():
         
         # Group by industry and salary range
         grouped_data = df_working.groupby([industry_column, salary_column]).size().unstack(fill_value=0)
+        grouped_data = grouped_data[sort_bands(grouped_data.columns)]
         
         if grouped_data.empty:
             return jsonify({
@@ -562,6 +503,8 @@ def api_salary_by_industry():
             'labels': labels,
             'datasets': datasets
         }
+        if stats_requested(request.args):
+            chart_data['statistics'] = contingency_stats(grouped_data)
         
         return jsonify(chart_data)
         
@@ -585,10 +528,7 @@ def api_expected_vs_current_salary():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -615,6 +555,8 @@ def api_expected_vs_current_salary():
         
         # Group by expected salary and current salary
         grouped_data = df_working.groupby([expected_column, current_column]).size().unstack(fill_value=0)
+        # Both axes in salary order rather than alphabetical
+        grouped_data = grouped_data.loc[sort_bands(grouped_data.index), sort_bands(grouped_data.columns)]
         
         if grouped_data.empty:
             return jsonify({
@@ -662,10 +604,7 @@ def api_salary_commensurate():
         for key in request.args.keys():
             values = request.args.getlist(key)
             if key == 'Tahun graduasi anda?':
-                try:
-                    values = [int(float(v)) for v in values if v.strip()]
-                except (ValueError, TypeError):
-                    pass
+                values = parse_years(values)
             filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -724,10 +663,7 @@ def api_table_data():
             if key not in ['page', 'per_page', 'search']:
                 values = request.args.getlist(key)
                 if key == 'Tahun graduasi anda?':
-                    try:
-                        values = [int(float(v)) for v in values if v.strip()]
-                    except (ValueError, TypeError):
-                        pass
+                    values = parse_years(values)
                 filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -774,10 +710,7 @@ def api_export():
             if key != 'format':
                 values = request.args.getlist(key)
                 if key == 'Tahun graduasi anda?':
-                    try:
-                        values = [int(float(v)) for v in values if v.strip()]
-                    except (ValueError, TypeError):
-                        pass
+                    values = parse_years(values)
                 filters[key] = values
         
         filtered_processor = data_processor.apply_filters(filters)
@@ -849,6 +782,9 @@ def api_available_filters():
                 filters[column] = unique_values
                 print(f"Filter options for {column}: {unique_values}")
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
@@ -863,8 +799,8 @@ def api_test():
         test_info = {
             'status': 'success',
             'message': 'Sektor Gaji API is working',
-            'available_columns': list(df.columns) if not df.empty else [],
-            'total_records': len(df)
+            'available_columns': list(data_processor.df.columns) if not data_processor.df.empty else [],
+            'total_records': len(data_processor.df)
         }
 
         # Build filter options
@@ -1,41 +1,22 @@
 # Fixed intern routes with comprehensive debugging
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.normalize import YEAR_DTYPE, year_mask, year_options
+from models.trace import TRACE_PARAM, trace
 import io
 import os
 import pandas as pd
 import numpy as np
-import re
 from collections import Counter
 
 intern_bp = Blueprint('intern', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
-
-
-# Check key columns
-key_columns = [
-    'Tahun graduasi anda?',
-    'Apakah cabaran utama yang anda hadapi dalam mendapatkan pekerjaan?',
-    'Jantina anda?',
-    'Institusi pendidikan MARA yang anda hadiri?',
-    'Adakah anda menjalani internship/praktikal sebelum tamat pengajian?'
-]
-
-for col in key_columns:
-    if col in df.columns:
-        non_null = df[col].notna().sum()
-        print(f"✓ {col}: {non_null}/{len(df)} non-null values")
-        if col == 'Adakah anda menjalani internship/praktikal sebelum tamat pengajian?':
-            print(f"    Values: {df[col].value_counts().to_dict()}")
-    else:
-        print(f"✗ {col}: NOT FOUND")
-
-print("="*50)
+# Column coverage and value checks run once per dataset version in
+# models.validation (/dashboard/api/dataset/validation)
 
 # Centralized Chart Data Formatter
 class ChartDataFormatter:
@@ -76,48 +57,45 @@ def table_view():
 
 def debug_filter_application(df_original, filters):
     """Debug filter application step by step"""
-    print(f"\n=== FILTER DEBUG ===")
-    print(f"Original data shape: {df_original.shape}")
-    print(f"Filters received: {filters}")
+    trace('filter start', shape=df_original.shape, filters=filters)
     
     df_result = df_original.copy()
     
     for column, values in filters.items():
-        if not values or len(values) == 0:
+        if not values or len(values) == 0 or column == TRACE_PARAM:
             continue
-            
-        print(f"\nApplying filter: {column} = {values}")
-        print(f"Column exists: {column in df_result.columns}")
         
         if column in df_result.columns:
-            print(f"Before filter - rows: {len(df_result)}")
-            print(f"Column data type: {df_result[column].dtype}")
-            print(f"Unique values in column: {df_result[column].unique()}")
-            print(f"Looking for values: {values}")
+            rows_before = len(df_result)
+            trace('applying filter', column=column, values=values,
+                  dtype=lambda: str(df_result[column].dtype),
+                  unique_values=lambda: list(df_result[column].unique()))
             
+            # Graduation year is an integer column (normalised at load)
+            if str(df_result[column].dtype) == YEAR_DTYPE:
+                df_result = df_result[year_mask(df_result[column], values)]
             # Convert filter values to match column data type
-            if df_result[column].dtype in ['int64', 'float64']:
+            elif df_result[column].dtype in ['int64', 'float64']:
                 try:
                     converted_values = [int(float(v)) for v in values]
-                    print(f"Converted filter values to int: {converted_values}")
+                    trace('converted filter values to int', column=column, values=converted_values)
                     df_result = df_result[df_result[column].isin(converted_values)]
                 except:
-                    print(f"Failed to convert values to int, using as string")
+                    trace('failed to convert values to int, using as string', column=column)
                     df_result = df_result[df_result[column].astype(str).isin([str(v) for v in values])]
             else:
                 # String matching
                 df_result = df_result[df_result[column].isin(values)]
             
-            print(f"After filter - rows: {len(df_result)}")
+            trace('filter applied', column=column, rows_before=rows_before, rows_after=len(df_result))
             
             if len(df_result) == 0:
-                print("WARNING: Filter eliminated all rows!")
+                trace('filter eliminated all rows', column=column)
                 break
         else:
-            print(f"WARNING: Column {column} not found!")
+            trace('filter column not found', column=column)
     
-    print(f"Final filtered shape: {df_result.shape}")
-    print("=== END FILTER DEBUG ===\n")
+    trace('filter done', shape=df_result.shape)
     
     return df_result
 
@@ -336,21 +314,9 @@ def api_available_filters():
                 sample_values = list(unique_values)[:5]
                 print(f"Sample values: {sample_values}")
                 
-                # Special handling for graduation year
+                # Graduation year is an integer column (normalised at load)
                 if 'Tahun graduasi' in column or 'graduasi' in column.lower():
-                    print("GRADUATION YEAR PROCESSING:")
-                    processed_years = set()
-                    
-                    for val in unique_values:
-                        if pd.notna(val):
-                            year = extract_graduation_year(val)
-                            if year:
-                                processed_years.add(year)
-                                print(f"  '{val}' -> {year}")
-                            else:
-                                print(f"  '{val}' -> FAILED")
-                    
-                    final_years = sorted(list(processed_years))
+                    final_years = year_options(non_null_data)
                     print(f"FINAL YEARS: {final_years}")
                     filters[column] = final_years
                     
@@ -375,6 +341,9 @@ def api_available_filters():
             if 'graduasi' in col.lower() and values:
                 print(f"    Graduation years: {values}")
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
@@ -383,44 +352,6 @@ def api_available_filters():
         traceback.print_exc()
         return jsonify({'error': str(e), 'filters': {}}), 500
 
-def extract_graduation_year(val):
-    """Enhanced graduation year extraction with debugging"""
-    if pd.isna(val):
-        return None
-    
-    val_str = str(val).strip()
-    
-    # Method 1: Direct number
-    try:
-        # Remove commas and decimal points
-        clean_val = val_str.replace(',', '').replace('.0', '')
-        if clean_val.isdigit():
-            year = int(clean_val)
-            if 1990 <= year <= 2030:
-                return year
-    except:
-        pass
-    
-    # Method 2: Extract 4-digit years using regex
-    year_pattern = r'\b(19|20)\d{2}\b'
-    matches = re.findall(year_pattern, val_str)
-    if matches:
-        for match in matches:
-            year = int(match)
-            if 1990 <= year <= 2030:
-                return year
-    
-    # Method 3: Handle decimal/float format
-    try:
-        float_val = float(val_str.replace(',', ''))
-        year = int(float_val)
-        if 1990 <= year <= 2030:
-            return year
-    except:
-        pass
-    
-    return None
-
 # Fixed internship participation with debug filter
 @intern_bp.route('/api/internship-participation')
 def api_internship_participation():
@@ -1,5 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.bands import sort_bands
+from models.contingency import STATS_PARAM, contingency_stats, stats_requested
+from models.dataset import LazyDataProcessor
+from models.normalize import parse_years, year_mask, year_options
+from models.query_backends import table_records
+from models.trace import TRACE_PARAM, trace
 import io
 import os
 import pandas as pd
@@ -8,10 +13,12 @@ import numpy as np
 
 sosioekonomi_bp = Blueprint('sosioekonomi', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
+
+# Monthly household income (RM) counted as a high income in the summary
+HIGH_INCOME_THRESHOLD = 5000
 
 # Centralized Chart Data Formatter for consistent data structure
 class ChartDataFormatter:
@@ -86,26 +93,8 @@ def process_filter_values(key, values):
     """Process filter values based on the filter type"""
     # Handle graduation year with better conversion
     if 'Tahun graduasi' in key:
-        processed_values = []
-        for val in values:
-            if val and str(val).strip():
-                # Clean the value
-                clean_val = str(val).strip()
-                processed_values.append(clean_val)
-                
-                # Also try to add as float/int for broader matching
-                try:
-                    numeric_val = float(clean_val)
-                    if numeric_val.is_integer():
-                        int_val = int(numeric_val)
-                        if str(int_val) not in processed_values:
-                            processed_values.append(str(int_val))
-                        if int_val not in processed_values:
-                            processed_values.append(int_val)
-                except (ValueError, AttributeError):
-                    pass
-        
-        print(f"  Graduation year processed: {processed_values}")
+        processed_values = parse_years(values)
+        trace('graduation year processed', key=key, values=processed_values)
         return processed_values
     else:
         # For other filters, ensure we have clean string values
@@ -113,16 +102,13 @@ def process_filter_values(key, values):
         for val in values:
             if val and str(val).strip():
                 clean_values.append(str(val).strip())
-        print(f"  Other filter processed: {clean_values}")
+        trace('filter processed', key=key, values=clean_values)
         return clean_values
 
 def process_filters_with_conversion_v2(request_args, exclude_keys=None):
     """Improved filter processing that can handle both request.args and dict objects"""
     filters = {}
-    exclude_keys = exclude_keys or ['page', 'per_page', 'search']
-    
-    print(f"=== PROCESSING FILTERS (V2) ===")
-    print(f"Raw request args type: {type(request_args)}")
+    exclude_keys = list(exclude_keys or ['page', 'per_page', 'search']) + [TRACE_PARAM, STATS_PARAM]
     
     # Handle both Flask request.args and regular dict
     if hasattr(request_args, 'getlist'):
@@ -130,7 +116,6 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         keys_to_process = [k for k in request_args.keys() if k not in exclude_keys]
         for key in keys_to_process:
             values = request_args.getlist(key)
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
@@ -141,15 +126,13 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         for key, values in request_args.items():
             if key in exclude_keys:
                 continue
-                
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
                 
             filters[key] = process_filter_values(key, values)
     
-    print(f"Final processed filters: {filters}")
+    trace('filters processed', filters=filters)
     return filters
 
 def apply_improved_filters(df, filters):
@@ -159,17 +142,14 @@ def apply_improved_filters(df, filters):
     
     filtered_df = df.copy()
     
-    print(f"=== APPLYING IMPROVED FILTERS ===")
-    print(f"Original dataframe shape: {filtered_df.shape}")
+    trace('applying filters', shape=filtered_df.shape, filters=filters)
     
     for filter_key, filter_values in filters.items():
         if not filter_values:
             continue
             
-        print(f"Applying filter: {filter_key} = {filter_values}")
-        
         if filter_key not in filtered_df.columns:
-            print(f"  Warning: Column '{filter_key}' not found in dataframe")
+            trace('filter column not found', column=filter_key)
             continue
         
         # Get the column data and handle different data types
@@ -178,36 +158,9 @@ def apply_improved_filters(df, filters):
         # Create mask for matching values
         mask = pd.Series([False] * len(filtered_df), index=filtered_df.index)
         
-        # Special handling for graduation year
+        # Graduation year is an integer column (normalised at load)
         if 'Tahun graduasi' in filter_key:
-            for filter_val in filter_values:
-                # Try multiple matching strategies
-                try:
-                    # Direct string match
-                    string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
-                    mask |= string_match
-                    
-                    # Numeric match if possible
-                    if pd.api.types.is_numeric_dtype(column_data):
-                        try:
-                            numeric_filter = float(filter_val)
-                            numeric_match = column_data == numeric_filter
-                            mask |= numeric_match
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Try converting column to numeric and compare
-                    try:
-                        numeric_column = pd.to_numeric(column_data, errors='coerce')
-                        numeric_filter = float(filter_val)
-                        numeric_match = numeric_column == numeric_filter
-                        mask |= numeric_match.fillna(False)
-                    except (ValueError, TypeError):
-                        pass
-                        
-                except Exception as e:
-                    print(f"    Error processing graduation year filter {filter_val}: {e}")
-                    
+            mask = year_mask(column_data, filter_values)
         else:
             # Standard string matching for other filters
             for filter_val in filter_values:
@@ -215,20 +168,21 @@ def apply_improved_filters(df, filters):
                     string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
                     mask |= string_match
                 except Exception as e:
-                    print(f"    Error processing filter {filter_val}: {e}")
+                    trace('filter error', column=filter_key, value=filter_val, error=str(e))
         
         # Apply the mask
         before_count = len(filtered_df)
         filtered_df = filtered_df[mask]
         after_count = len(filtered_df)
         
-        print(f"  Filter '{filter_key}' reduced data from {before_count} to {after_count} rows")
+        trace('filter applied', column=filter_key, values=filter_values,
+              rows_before=before_count, rows_after=after_count)
         
         if after_count == 0:
-            print(f"  Warning: Filter '{filter_key}' resulted in empty dataset")
+            trace('filter eliminated all rows', column=filter_key)
             break
     
-    print(f"Final filtered dataframe shape: {filtered_df.shape}")
+    trace('filters done', shape=filtered_df.shape)
     return filtered_df
 
 @sosioekonomi_bp.route('/api/test')
@@ -237,8 +191,8 @@ def api_test():
     return jsonify({
         'status': 'success',
         'message': 'Sosioekonomi API is working',
-        'available_columns': list(df.columns) if not df.empty else [],
-        'total_records': len(df)
+        'available_columns': list(data_processor.df.columns) if not data_processor.df.empty else [],
+        'total_records': len(data_processor.df)
     })
 
 @sosioekonomi_bp.route('/api/debug-data')
@@ -248,17 +202,17 @@ def api_debug_data():
         grad_col = 'Tahun graduasi anda?'
         sample_data = {}
         
-        if grad_col in df.columns:
-            grad_data = df[grad_col].dropna()
+        if grad_col in data_processor.df.columns:
+            grad_data = data_processor.df[grad_col].dropna()
             sample_data['graduation_years'] = {
                 'unique_values': sorted(grad_data.unique().tolist()),
-                'value_counts': grad_data.value_counts().to_dict(),
+                'value_counts': {str(year): int(count) for year, count in grad_data.value_counts().items()},
                 'data_types': [str(type(x)) for x in grad_data.unique()[:5]]
             }
         
         return jsonify({
-            'total_records': len(df),
-            'columns': list(df.columns),
+            'total_records': len(data_processor.df),
+            'columns': list(data_processor.df.columns),
             'sample_data': sample_data
         })
     except Exception as e:
@@ -271,14 +225,13 @@ def api_summary():
         # Process filters with improved conversion
         filters = process_filters_with_conversion_v2(request.args)
         
-        print(f"=== API SUMMARY DEBUG ===")
-        print(f"Processed filters: {filters}")
+        trace('summary filters', filters=filters)
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
-        print(f"Filtered DF shape: {filtered_df.shape}")
-        print(f"Original DF shape: {df.shape}")
+        trace('summary filtered data shape', shape=filtered_df.shape,
+              original_shape=data_processor.df.shape)
         
         total_records = len(filtered_df)
         
@@ -287,23 +240,18 @@ def api_summary():
         avg_income_range = "N/A"
         high_income_rate = 0
         
+        income_bands = data_processor.bands(filtered_df, 'household_income')
+        median_income_estimate = None
+        
         if income_column in filtered_df.columns:
             income_counts = filtered_df[income_column].value_counts()
             if len(income_counts) > 0:
                 avg_income_range = income_counts.index[0]
-                
-                # Calculate high income rate (above RM5000)
-                high_income_mask = income_counts.index.str.contains(
-                    'RM5|RM6|RM7|RM8|RM9|RM10|lebih', 
-                    case=False, 
-                    na=False, 
-                    regex=True
-                )
-                high_income_responses = income_counts[high_income_mask].sum()
-                
-                total_income_responses = income_counts.sum()
-                if total_income_responses > 0:
-                    high_income_rate = (high_income_responses / total_income_responses) * 100
+        
+        if income_bands is not None and income_bands.total() > 0:
+            # High income rate (above RM5000) from the parsed income bands
+            high_income_rate = income_bands.share_at_least(HIGH_INCOME_THRESHOLD)
+            median_income_estimate = round(income_bands.median())
         
         # Education financing analysis
         financing_column = 'Bagaimana anda membiayai pendidikan anda?'
@@ -339,13 +287,14 @@ def api_summary():
             'total_records': total_records,
             'avg_income_range': avg_income_range,
             'high_income_rate': round(high_income_rate, 1),
+            'median_income_estimate': median_income_estimate,
             'loan_financing_rate': round(loan_financing_rate, 1),
             'most_common_financing': most_common_financing,
             'advantage_rate': round(advantage_rate, 1),
             'filter_applied': len([f for f in filters.values() if f]) > 0
         }
         
-        print(f"Summary stats: {enhanced_stats}")
+        trace('final enhanced stats', stats=enhanced_stats)
         return jsonify(enhanced_stats)
         
     except Exception as e:
@@ -357,6 +306,7 @@ def api_summary():
             'total_records': 0,
             'avg_income_range': 'N/A',
             'high_income_rate': 0,
+            'median_income_estimate': None,
             'loan_financing_rate': 0,
             'most_common_financing': 'N/A',
             'advantage_rate': 0
@@ -367,7 +317,7 @@ def api_household_income():
     """Get household income distribution - Uses 'household-income' color scheme"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         income_column = 'Pendapatan isi rumah bulanan keluarga anda?'
         
@@ -380,29 +330,10 @@ def api_household_income():
         # Get income distribution counts
         income_counts = filtered_df[income_column].value_counts()
         
-        # Define logical order for income ranges
-        income_order = [
-            'Kurang daripada RM1,000',
-            'RM1,000 - RM2,999',
-            'RM3,000 - RM4,999', 
-            'RM5,000 - RM6,999',
-            'RM7,000 - RM9,999',
-            'RM10,000 dan lebih'
-        ]
-        
-        # Sort according to logical order
-        ordered_data = []
-        ordered_labels = []
-        for income_range in income_order:
-            if income_range in income_counts.index:
-                ordered_labels.append(income_range)
-                ordered_data.append(int(income_counts[income_range]))
-        
-        # Add any remaining categories not in our predefined order
-        for income_range in income_counts.index:
-            if income_range not in income_order:
-                ordered_labels.append(str(income_range))
-                ordered_data.append(int(income_counts[income_range]))
+        # Income ranges in ascending order of their parsed bounds
+        income_order = sort_bands(income_counts.index)
+        ordered_labels = [str(income_range) for income_range in income_order]
+        ordered_data = [int(income_counts[income_range]) for income_range in income_order]
         
         chart_data = {
             'labels': ordered_labels,
@@ -426,7 +357,7 @@ def api_education_financing():
     """Get education financing methods - Uses 'education-financing' color scheme"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         financing_column = 'Bagaimana anda membiayai pendidikan anda?'
         
@@ -459,7 +390,7 @@ def api_father_occupation_by_income():
     """Get father occupation by income distribution - Uses 'father-occupation' color scheme"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         income_column = 'Pendapatan isi rumah bulanan keluarga anda?'
         occupation_column = 'Pekerjaan bapa anda'
@@ -472,11 +403,14 @@ def api_father_occupation_by_income():
         
         # Group by income and father occupation
         grouped_data = filtered_df.groupby([income_column, occupation_column]).size().unstack(fill_value=0)
+        grouped_data = grouped_data.loc[sort_bands(grouped_data.index)]
         
         chart_data = formatter.format_stacked_bar_chart(
             grouped_data,
             "Pekerjaan Bapa Mengikut Pendapatan"
         )
+        if stats_requested(request.args):
+            chart_data['statistics'] = contingency_stats(grouped_data)
         
         return jsonify(chart_data)
         
@@ -492,7 +426,7 @@ def api_mother_occupation_by_income():
     """Get mother occupation by income distribution - Uses 'mother-occupation' color scheme"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         income_column = 'Pendapatan isi rumah bulanan keluarga anda?'
         occupation_column = 'Pekerjaan ibu anda?'
@@ -505,11 +439,14 @@ def api_mother_occupation_by_income():
         
         # Group by income and mother occupation
         grouped_data = filtered_df.groupby([income_column, occupation_column]).size().unstack(fill_value=0)
+        grouped_data = grouped_data.loc[sort_bands(grouped_data.index)]
         
         chart_data = formatter.format_stacked_bar_chart(
             grouped_data,
             "Pekerjaan Ibu Mengikut Pendapatan"
         )
+        if stats_requested(request.args):
+            chart_data['statistics'] = contingency_stats(grouped_data)
         
         return jsonify(chart_data)
         
@@ -525,7 +462,7 @@ def api_financing_job_advantage():
     """Get financing method vs job advantage - Uses 'financing-advantage' color scheme"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         financing_column = 'Bagaimana anda membiayai pendidikan anda?'
         advantage_column = 'Adakah jenis pembiayaan ini memberi kelebihan dalam mencari kerja?'
@@ -558,7 +495,7 @@ def api_debt_impact_career():
     """Get debt impact on career choices for loan-financed students - Uses 'debt-impact' color scheme"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         financing_column = 'Bagaimana anda membiayai pendidikan anda?'
         debt_impact_column = 'Jika anda mempunyai pinjaman pendidikan, adakah beban hutang mempengaruhi pilihan kerjaya anda?'
@@ -609,7 +546,7 @@ def api_table_data():
         )
         
         # Use improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -653,7 +590,7 @@ def api_table_data():
                 end_idx = start_idx + per_page
                 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -691,11 +628,10 @@ def api_chart_table_data(chart_type):
             exclude_keys=['page', 'per_page', 'search']
         )
         
-        print(f"=== CHART TABLE DATA for {chart_type} ===")
-        print("Processed filters:", filters)
+        trace('chart table filters', chart_type=chart_type, filters=filters)
         
         # Use improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -723,8 +659,8 @@ def api_chart_table_data(chart_type):
         # Remove duplicates and filter available columns
         available_columns = list(dict.fromkeys([col for col in columns if col in filtered_df.columns]))
         
-        print(f"Available columns for {chart_type}: {available_columns}")
-        print(f"Filtered data shape: {filtered_df.shape}")
+        trace('chart table columns', chart_type=chart_type, columns=available_columns,
+              shape=filtered_df.shape)
         
         # Create filtered processor and get data
         class FilteredProcessor:
@@ -748,7 +684,7 @@ def api_chart_table_data(chart_type):
                 end_idx = start_idx + per_page
                 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -787,7 +723,7 @@ def api_export():
         )
         
         # Use improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         format_type = request.args.get('format', 'csv')
         
@@ -844,7 +780,7 @@ def api_export():
 def api_available_filters():
     """Get available filter options for sosioekonomi data"""
     try:
-        sample_df = df.copy()
+        sample_df = data_processor.df.copy()
         filters = {}
         
         filter_columns = [
@@ -856,34 +792,21 @@ def api_available_filters():
             'Bagaimana anda membiayai pendidikan anda?'
         ]
         
-        # Debug: Print all column names to see exact format
-        print("Available columns in dataset:")
-        for i, col in enumerate(sample_df.columns):
-            print(f"  {i}: '{col}'")
+        trace('available columns', columns=lambda: list(sample_df.columns))
         
         for column in filter_columns:
             if column in sample_df.columns:
                 # Get unique values and handle different data types
                 unique_values = sample_df[column].dropna().unique()
-                print(f"Column '{column}' has {len(unique_values)} unique values: {list(unique_values)[:5]}...")
+                trace('filter column values', column=column, count=len(unique_values),
+                      sample=lambda: list(unique_values)[:5])
                 
-                # Special handling for graduation years - ensure consistent string format
+                # Graduation years - integer column, sorted and sent as strings
                 if 'Tahun graduasi' in column:
-                    processed_values = []
-                    for val in unique_values:
-                        # Convert to string and clean
-                        str_val = str(val).strip()
-                        if str_val and str_val != 'nan':
-                            processed_values.append(str_val)
-                    
-                    # Sort numerically if possible, otherwise alphabetically
-                    try:
-                        processed_values = sorted(processed_values, key=lambda x: float(x))
-                    except (ValueError, TypeError):
-                        processed_values = sorted(processed_values)
+                    processed_values = [str(year) for year in year_options(sample_df[column])]
                     
                     filters[column] = processed_values
-                    print(f"  Graduation years after processing: {processed_values}")
+                    trace('graduation years processed', values=processed_values)
                 else:
                     # Convert all values to string for consistency and clean
                     processed_values = []
@@ -893,11 +816,14 @@ def api_available_filters():
                             processed_values.append(str_val)
                     
                     filters[column] = sorted(processed_values)
-                    print(f"  Other filter processed: {len(processed_values)} values")
+                    trace('filter processed', column=column, count=len(processed_values))
             else:
-                print(f"Column '{column}' not found in dataset")
+                trace('filter column not found', column=column)
                 filters[column] = []
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
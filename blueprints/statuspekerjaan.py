@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, send_file
-from models.data_processor import DataProcessor, load_excel_data
+from models.dataset import LazyDataProcessor
+from models.normalize import parse_years, year_mask, year_options
+from models.query_backends import table_records
+from models.trace import TRACE_PARAM, trace
 import io
 import os
 import pandas as pd
@@ -8,35 +11,16 @@ import numpy as np
 
 status_pekerjaan_bp = Blueprint('status-pekerjaan', __name__)
 
-# Load data from Excel file
+# Survey data is loaded lazily from the shared dataset store on first use
 EXCEL_FILE_PATH = 'data/Questionnaire.xlsx'
-df = load_excel_data(EXCEL_FILE_PATH)
-data_processor = DataProcessor(df)
+data_processor = LazyDataProcessor(EXCEL_FILE_PATH)
 
 def process_filter_values(key, values):
     """Process filter values based on the filter type"""
     # Handle graduation year with better conversion
     if 'Tahun graduasi' in key:
-        processed_values = []
-        for val in values:
-            if val and str(val).strip():
-                # Clean the value
-                clean_val = str(val).strip()
-                processed_values.append(clean_val)
-                
-                # Also try to add as float/int for broader matching
-                try:
-                    numeric_val = float(clean_val)
-                    if numeric_val.is_integer():
-                        int_val = int(numeric_val)
-                        if str(int_val) not in processed_values:
-                            processed_values.append(str(int_val))
-                        if int_val not in processed_values:
-                            processed_values.append(int_val)
-                except (ValueError, AttributeError):
-                    pass
-        
-        print(f"  Graduation year processed: {processed_values}")
+        processed_values = parse_years(values)
+        trace('graduation year processed', key=key, values=processed_values)
         return processed_values
     else:
         # For other filters, ensure we have clean string values
@@ -44,16 +28,13 @@ def process_filter_values(key, values):
         for val in values:
             if val and str(val).strip():
                 clean_values.append(str(val).strip())
-        print(f"  Other filter processed: {clean_values}")
+        trace('filter processed', key=key, values=clean_values)
         return clean_values
 
 def process_filters_with_conversion_v2(request_args, exclude_keys=None):
     """Improved filter processing that can handle both request.args and dict objects"""
     filters = {}
-    exclude_keys = exclude_keys or ['page', 'per_page', 'search']
-    
-    print(f"=== PROCESSING FILTERS (V2) ===")
-    print(f"Raw request args type: {type(request_args)}")
+    exclude_keys = list(exclude_keys or ['page', 'per_page', 'search']) + [TRACE_PARAM]
     
     # Handle both Flask request.args and regular dict
     if hasattr(request_args, 'getlist'):
@@ -61,7 +42,6 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         keys_to_process = [k for k in request_args.keys() if k not in exclude_keys]
         for key in keys_to_process:
             values = request_args.getlist(key)
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
@@ -72,15 +52,13 @@ def process_filters_with_conversion_v2(request_args, exclude_keys=None):
         for key, values in request_args.items():
             if key in exclude_keys:
                 continue
-                
-            print(f"Processing filter key: '{key}' with values: {values}")
             
             if not values or (len(values) == 1 and values[0] == ''):
                 continue
                 
             filters[key] = process_filter_values(key, values)
     
-    print(f"Final processed filters: {filters}")
+    trace('filters processed', filters=filters)
     return filters
 
 def apply_improved_filters(df, filters):
@@ -90,17 +68,14 @@ def apply_improved_filters(df, filters):
     
     filtered_df = df.copy()
     
-    print(f"=== APPLYING IMPROVED FILTERS ===")
-    print(f"Original dataframe shape: {filtered_df.shape}")
+    trace('applying filters', shape=filtered_df.shape, filters=filters)
     
     for filter_key, filter_values in filters.items():
         if not filter_values:
             continue
             
-        print(f"Applying filter: {filter_key} = {filter_values}")
-        
         if filter_key not in filtered_df.columns:
-            print(f"  Warning: Column '{filter_key}' not found in dataframe")
+            trace('filter column not found', column=filter_key)
             continue
         
         # Get the column data and handle different data types
@@ -109,36 +84,9 @@ def apply_improved_filters(df, filters):
         # Create mask for matching values
         mask = pd.Series([False] * len(filtered_df), index=filtered_df.index)
         
-        # Special handling for graduation year
+        # Graduation year is an integer column (normalised at load)
         if 'Tahun graduasi' in filter_key:
-            for filter_val in filter_values:
-                # Try multiple matching strategies
-                try:
-                    # Direct string match
-                    string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
-                    mask |= string_match
-                    
-                    # Numeric match if possible
-                    if pd.api.types.is_numeric_dtype(column_data):
-                        try:
-                            numeric_filter = float(filter_val)
-                            numeric_match = column_data == numeric_filter
-                            mask |= numeric_match
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Try converting column to numeric and compare
-                    try:
-                        numeric_column = pd.to_numeric(column_data, errors='coerce')
-                        numeric_filter = float(filter_val)
-                        numeric_match = numeric_column == numeric_filter
-                        mask |= numeric_match.fillna(False)
-                    except (ValueError, TypeError):
-                        pass
-                        
-                except Exception as e:
-                    print(f"    Error processing graduation year filter {filter_val}: {e}")
-                    
+            mask = year_mask(column_data, filter_values)
         else:
             # Standard string matching for other filters
             for filter_val in filter_values:
@@ -146,20 +94,21 @@ def apply_improved_filters(df, filters):
                     string_match = column_data.astype(str).str.strip() == str(filter_val).strip()
                     mask |= string_match
                 except Exception as e:
-                    print(f"    Error processing filter {filter_val}: {e}")
+                    trace('filter error', column=filter_key, value=filter_val, error=str(e))
         
         # Apply the mask
         before_count = len(filtered_df)
         filtered_df = filtered_df[mask]
         after_count = len(filtered_df)
         
-        print(f"  Filter '{filter_key}' reduced data from {before_count} to {after_count} rows")
+        trace('filter applied', column=filter_key, values=filter_values,
+              rows_before=before_count, rows_after=after_count)
         
         if after_count == 0:
-            print(f"  Warning: Filter '{filter_key}' resulted in empty dataset")
+            trace('filter eliminated all rows', column=filter_key)
             break
     
-    print(f"Final filtered dataframe shape: {filtered_df.shape}")
+    trace('filters done', shape=filtered_df.shape)
     return filtered_df
 
 @status_pekerjaan_bp.route('/')
@@ -180,15 +129,15 @@ def api_test():
     return jsonify({
         'status': 'success',
         'message': 'Status Pekerjaan API is working',
-        'available_columns': list(df.columns) if not df.empty else [],
-        'total_records': len(df)
+        'available_columns': list(data_processor.df.columns) if not data_processor.df.empty else [],
+        'total_records': len(data_processor.df)
     })
 
 @status_pekerjaan_bp.route('/api/debug-columns')
 def api_debug_columns():
     """Debug endpoint to check column names and graduation year data"""
     try:
-        sample_df = df.copy()
+        sample_df = data_processor.df.copy()
         
         # Find columns that might contain graduation year
         grad_columns = [col for col in sample_df.columns if 'tahun' in col.lower() or 'graduasi' in col.lower() or 'grad' in col.lower()]
@@ -226,10 +175,10 @@ def api_summary():
         print(f"Processed filters: {filters}")
         
         # Apply improved filtering
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         print(f"Filtered DF shape: {filtered_df.shape}")
-        print(f"Original DF shape: {df.shape}")
+        print(f"Original DF shape: {data_processor.df.shape}")
         
         total_records = len(filtered_df)
         
@@ -323,7 +272,7 @@ def api_employment_status():
     """Get employment status distribution - Pie Chart"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         employment_column = 'Adakah anda kini bekerja?'
         
@@ -368,7 +317,7 @@ def api_employment_status_table():
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -407,7 +356,7 @@ def api_employment_status_table():
                 end_idx = start_idx + per_page
                 
                 # Get page data
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -437,7 +386,7 @@ def api_current_job_status():
     """Get current job status for working respondents - Bar Chart"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         # Filter for working respondents only
         employment_column = 'Adakah anda kini bekerja?'
@@ -496,7 +445,7 @@ def api_job_status_table():
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         # Filter for working respondents only
         employment_column = 'Adakah anda kini bekerja?'
@@ -537,7 +486,7 @@ def api_job_status_table():
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
                 
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -567,7 +516,7 @@ def api_time_to_first_job():
     """Get time taken to get first job after graduation - Area Chart"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         time_column = 'Jika bekerja, berapa lama selepas tamat pengajian anda mendapat pekerjaan pertama?'
         
@@ -640,7 +589,7 @@ def api_time_to_job_table():
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -675,7 +624,7 @@ def api_time_to_job_table():
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
                 
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -705,7 +654,7 @@ def api_current_job_types():
     """Get current job types distribution - Bar Chart"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         job_type_column = 'Apakah jenis pekerjaan anda sekarang'
         
@@ -750,7 +699,7 @@ def api_job_types_table():
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -785,7 +734,7 @@ def api_job_types_table():
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
                 
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -815,7 +764,7 @@ def api_job_finding_factors():
     """Get job finding factors grouped analysis - Bar Chart"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         factors_column = 'Apakah faktor utama yang membantu anda mendapat pekerjaan tersebut?'
         
@@ -834,38 +783,13 @@ def api_job_finding_factors():
                     }]
                 })
         
-        # EXACT COLAB REPLICATION - Job factor grouping mapping
-        job_factor_grouping = {
-            'Permohonan terus kepada syarikat (JobStreet, LinkedIn, laman web syarikat)': 'Saluran Rasmi',
-            'Program kerajaan (contoh: MySTEP, Protege, SL1M)': 'Saluran Rasmi',
-            'Melalui pameran kerjaya atau job fair': 'Saluran Rasmi',
-            'Rangkaian peribadi / kenalan (pensyarah, alumni, keluarga, rakan)': 'Saluran Informal / Sosial',
-            'Dihubungi oleh perekrut atau headhunter': 'Saluran Informal / Sosial',
-            'Melalui latihan industri / praktikal': 'Laluan Berasaskan Institusi Pendidikan',
-            'Tawaran daripada syarikat sebelum tamat pengajian': 'Laluan Berasaskan Institusi Pendidikan',
-            'Memulakan perniagaan sendiri / bekerja dalam ekonomi gig': 'Laluan Kendiri / Keusahawanan'
-        }
-        
-        # EXACT COLAB REPLICATION - Group job factors function
-        def group_job_factors(cell):
-            if pd.isnull(cell):
-                return ''
-            # Split using semicolon or newline if that's the actual delimiter
-            raw_factors = [x.strip() for x in str(cell).split(';')]
-            # Replace each factor using the map
-            mapped = [job_factor_grouping.get(factor, factor) for factor in raw_factors]
-            # Remove duplicates while preserving order
-            return '; '.join(dict.fromkeys(mapped))
-        
-        # Apply grouping to the column
-        filtered_df_copy = filtered_df.copy()
-        filtered_df_copy['Faktor_Pekerjaan_Grouped'] = filtered_df_copy[factors_column].apply(group_job_factors)
-        
-        print(f"Job factors grouping results:")
-        print(filtered_df_copy['Faktor_Pekerjaan_Grouped'].value_counts())
+        # Grouped factors are a cached derived column (computed once per dataset version)
+        grouped_factors = data_processor.derived(filtered_df, 'job_factors_grouped')
+        if grouped_factors is None:
+            grouped_factors = pd.Series(dtype=object)
         
         # EXACT COLAB REPLICATION - Step 1: Drop NA and split each row by ';', stripping whitespace
-        split_factors = filtered_df_copy['Faktor_Pekerjaan_Grouped'].dropna().apply(lambda x: [i.strip() for i in x.split(';')])
+        split_factors = grouped_factors.dropna().apply(lambda x: [i.strip() for i in x.split(';')])
         
         # EXACT COLAB REPLICATION - Step 2: Flatten the list into a single list
         all_factors = [item for sublist in split_factors for item in sublist]
@@ -917,7 +841,7 @@ def api_job_factors_table():
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -952,7 +876,7 @@ def api_job_factors_table():
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
                 
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -985,7 +909,7 @@ def api_table_data():
             request.args, 
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
@@ -1024,7 +948,7 @@ def api_table_data():
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
                 
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
                 
                 return {
                     'data': page_data,
@@ -1057,7 +981,7 @@ def api_export():
             request.args, 
             exclude_keys=['format']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
         
         format_type = request.args.get('format', 'csv')
         
@@ -1110,29 +1034,29 @@ def api_debug_field_data():
     """Debug endpoint to check available data structure"""
     try:
         # Show column names and sample data
-        all_columns = list(df.columns)
+        all_columns = list(data_processor.df.columns)
         job_related_columns = [col for col in all_columns if any(keyword in col.lower() for keyword in ['pekerjaan', 'kerja', 'bidang', 'job', 'work', 'field'])]
 
         sample_data = {}
         for col in job_related_columns[:5]:  # Limit to first 5 relevant columns
-            sample_data[col] = df[col].value_counts().head(10).to_dict()
+            sample_data[col] = data_processor.df[col].value_counts().head(10).to_dict()
 
         # Add specific debug for the key column
         key_column = 'Apakah sebab utama jika anda tidak bekerja dalam bidang pengajian?'
-        if key_column in df.columns:
+        if key_column in data_processor.df.columns:
             sample_data[key_column] = {
-                'value_counts': df[key_column].value_counts().head(10).to_dict(),
-                'null_count': int(df[key_column].isnull().sum()),
-                'empty_string_count': int((df[key_column] == '').sum()),
-                'total_responses': int(len(df[key_column])),
-                'sample_values': df[key_column].dropna().head(10).tolist()
+                'value_counts': data_processor.df[key_column].value_counts().head(10).to_dict(),
+                'null_count': int(data_processor.df[key_column].isnull().sum()),
+                'empty_string_count': int((data_processor.df[key_column] == '').sum()),
+                'total_responses': int(len(data_processor.df[key_column])),
+                'sample_values': data_processor.df[key_column].dropna().head(10).tolist()
             }
 
         return jsonify({
             'all_columns': all_columns,
             'job_related_columns': job_related_columns,
             'sample_data': sample_data,
-            'total_rows': len(df)
+            'total_rows': len(data_processor.df)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1142,7 +1066,7 @@ def api_field_alignment_programs():
     """Get programs breakdown for field alignment analysis - requested for Status Pekerjaan module"""
     try:
         filters = process_filters_with_conversion_v2(request.args)
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
 
         # Get graduates working in their field - use the "not working in field" question logic
         # If they don't have a response to "why not working in field", they are likely working in their field
@@ -1209,7 +1133,7 @@ def api_field_alignment_table():
             request.args,
             exclude_keys=['page', 'per_page', 'search']
         )
-        filtered_df = apply_improved_filters(df, filters)
+        filtered_df = apply_improved_filters(data_processor.df, filters)
 
         # Filter for graduates working in their field - use same logic as chart
         not_in_field_column = 'Apakah sebab utama jika anda tidak bekerja dalam bidang pengajian?'
@@ -1248,7 +1172,7 @@ def api_field_alignment_table():
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
 
-                page_data = df_subset.iloc[start_idx:end_idx].fillna('').to_dict('records')
+                page_data = table_records(df_subset.iloc[start_idx:end_idx])
 
                 return {
                     'data': page_data,
@@ -1277,7 +1201,7 @@ def api_field_alignment_table():
 def api_available_filters():
     """Get available filter options for status pekerjaan data"""
     try:
-        sample_df = df.copy()
+        sample_df = data_processor.df.copy()
         filters = {}
         
         filter_columns = [
@@ -1300,20 +1224,9 @@ def api_available_filters():
                 unique_values = sample_df[column].dropna().unique()
                 print(f"Column '{column}' has {len(unique_values)} unique values: {list(unique_values)[:5]}...")
                 
-                # Special handling for graduation years - ensure consistent string format
+                # Graduation years - integer column, newest first, sent as strings
                 if 'Tahun graduasi' in column:
-                    processed_values = []
-                    for val in unique_values:
-                        # Convert to string and clean
-                        str_val = str(val).strip()
-                        if str_val and str_val != 'nan':
-                            processed_values.append(str_val)
-                    
-                    # Sort numerically if possible, otherwise alphabetically
-                    try:
-                        processed_values = sorted(processed_values, key=lambda x: float(x), reverse=True)
-                    except (ValueError, TypeError):
-                        processed_values = sorted(processed_values)
+                    processed_values = [str(year) for year in reversed(year_options(sample_df[column]))]
                     
                     filters[column] = processed_values
                     print(f"  Graduation years after processing: {processed_values}")
@@ -1331,6 +1244,9 @@ def api_available_filters():
                 print(f"Column '{column}' not found in dataset")
                 filters[column] = []
         
+        # Rows each option would leave, given the other active filters
+        filters['counts'] = data_processor.facet_counts({column: column for column in filters}, request.args)
+        
         return jsonify(filters)
         
     except Exception as e:
@@ -24,5 +24,44 @@ class Config:
     ITEMS_PER_PAGE = 50
     MAX_EXPORT_ROWS = 10000
     
-    # Database configuration (if needed later)
+    # Response cache / warm-up configuration
+    # CACHE_BACKEND: 'memory' (per process), 'sqlite' (shared by the workers
+    # on this host) or 'redis' (needs the redis package and CACHE_REDIS_URL)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 3600))
+    # Salt of every chart cache key; defaults to a hash of the app's Python
+    # sources so a deploy never serves payloads cached by the previous code
+    CACHE_VERSION = os.environ.get('CACHE_VERSION')
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') != '0'
+    WARMUP_WORKERS = int(os.environ.get('WARMUP_WORKERS', 4))
+    
+    # Query engine behind DataProcessor charts, tables and exports:
+    # 'pandas' (in memory), 'parquet' (columnar copy at QUERY_PARQUET_PATH,
+    # needs pyarrow) or 'sqlite' (the survey database at DATABASE_URL)
+    QUERY_BACKEND = os.environ.get('QUERY_BACKEND', 'pandas')
+    QUERY_PARQUET_PATH = os.environ.get('QUERY_PARQUET_PATH')
+    
+    # Drop repeat form submissions when the survey is loaded, keeping the
+    # latest (models/dedupe.py). DEDUPE_KEY_COLUMNS: ';'-separated schema
+    # keys or headers that identify a graduate (default: every answer)
+    DEDUPE_SUBMISSIONS = os.environ.get('DEDUPE_SUBMISSIONS', '1') != '0'
+    DEDUPE_KEY_COLUMNS = os.environ.get('DEDUPE_KEY_COLUMNS', '')
+    
+    # Survey snapshots selectable with ?dataset=<id> on every API
+    # (models/registry.py); requests without it use 'questionnaire'
+    # (data/Questionnaire.xlsx). Datasets load on first use and the least
+    # recently used ones are unloaded when the loaded frames exceed
+    # DATASET_MEMORY_BUDGET_MB
+    DATASETS = {
+        'latest': 'latest_soal_selidik.xlsx',
+        'graduate-csv': 'SOAL_SELIDIK_GRADUATE.csv',
+        'latest-csv': 'latest_soal_selidk.csv',
+    }
+    DATASET_MEMORY_BUDGET_MB = float(os.environ.get('DATASET_MEMORY_BUDGET_MB', 512))
+    
+    # Survey database: responses ingested with `python -m models.storage FILE`
+    # (models/storage.py); only sqlite:///path URLs are supported
     DATABASE_URL = os.environ.get('DATABASE_URL') or 'sqlite:///graduate_analytics.db'
\ No newline at end of file
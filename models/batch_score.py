@@ -0,0 +1,229 @@
+"""Offline graduate-quality scoring of large survey exports.
+
+Scores a CSV or xlsx export with the same compiled rubric as the dashboard
+(``graduate_quality.score_rows``) without loading the whole file: the input
+is read in chunks, chunks are scored in a process pool and results are
+written in input order as they complete. At most ``2 * workers`` chunks are
+in flight, so memory stays bounded by the chunk size rather than the file
+size::
+
+    python -m models.batch_score archive.csv --scores scores.csv --summary summary.json \\
+        --chunksize 20000 --workers 4 --id-column Timestamp
+
+``--scores`` gets one row per graduate (input row number, optional id
+columns, the six criterion scores, total and quality band). ``--summary``
+is rewritten after every chunk with the running band and score
+distributions, so a long run can be followed while it is in progress.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .graduate_quality import CRITERIA_IDS, HIGH_QUALITY_MIN, MEDIUM_QUALITY_MIN, score_rows
+from .quality_cube import QUALITY_BANDS, quality_band_codes
+
+DEFAULT_CHUNKSIZE = 10000
+
+_MAX_TOTAL = 2 * len(CRITERIA_IDS)
+
+
+def read_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Frames of at most ``chunksize`` rows from a CSV or xlsx file.
+
+    Column names are stripped (CSV exports carry trailing spaces) and every
+    value is read as text, as the rubric compares answers as text.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        yield from _read_xlsx_chunks(path, chunksize)
+        return
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=True):
+        chunk.columns = [str(column).strip() for column in chunk.columns]
+        yield chunk
+
+
+def _read_xlsx_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(column).strip() if column is not None else '' for column in header]
+        start = 0
+        while True:
+            block = [row for _, row in zip(range(chunksize), rows)]
+            if not block:
+                break
+            # Built as objects first so numeric cells keep their own text ('2023', not '2023.0')
+            chunk = pd.DataFrame(block, columns=columns, index=pd.RangeIndex(start, start + len(block)), dtype=object)
+            yield chunk.astype(str).where(chunk.notna(), np.nan)
+            start += len(block)
+    finally:
+        workbook.close()
+
+
+class QualityTally:
+    """Running band, total-score and per-criterion score counts."""
+
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.bands = np.zeros(len(QUALITY_BANDS), dtype=np.int64)
+        self.totals = np.zeros(_MAX_TOTAL + 1, dtype=np.int64)
+        self.criteria = np.zeros((len(CRITERIA_IDS), 3), dtype=np.int64)
+
+    def add(self, scores: pd.DataFrame) -> None:
+        total = scores['total'].to_numpy(dtype=np.int64)
+        self.rows += len(scores)
+        self.chunks += 1
+        self.bands += np.bincount(quality_band_codes(total), minlength=len(QUALITY_BANDS))
+        self.totals += np.bincount(total, minlength=_MAX_TOTAL + 1)
+        for i, criterion in enumerate(CRITERIA_IDS):
+            self.criteria[i] += np.bincount(scores[criterion].to_numpy(dtype=np.int64), minlength=3)
+
+    def summary(self) -> Dict:
+        rows = self.rows
+
+        def pct(count):
+            return round(float(count) / rows * 100, 1) if rows else 0.0
+
+        average = float(self.totals @ np.arange(_MAX_TOTAL + 1)) / rows if rows else 0.0
+        return {
+            'total_graduates': rows,
+            'chunks': self.chunks,
+            'average_score': round(average, 2),
+            'average_score_pct': round(average / _MAX_TOTAL * 100, 1),
+            'thresholds': {'high': HIGH_QUALITY_MIN, 'medium': MEDIUM_QUALITY_MIN},
+            'bands': {
+                band: {'count': int(count), 'percentage': pct(count)}
+                for band, count in zip(QUALITY_BANDS, self.bands)
+            },
+            'total_score_distribution': {str(score): int(count) for score, count in enumerate(self.totals)},
+            'criteria': {
+                criterion: {
+                    'average_score': round(float(counts @ np.arange(3)) / rows, 2) if rows else 0.0,
+                    'distribution': {str(score): int(counts[score]) for score in (2, 1, 0)},
+                }
+                for criterion, counts in zip(CRITERIA_IDS, self.criteria)
+            },
+        }
+
+
+def score_chunk(chunk: pd.DataFrame, id_columns: Sequence[str] = ()) -> pd.DataFrame:
+    """Per-row output of one chunk: input row, ``id_columns``, scores and band."""
+    scores = score_rows(chunk)
+    output = pd.DataFrame({'row': chunk.index.to_numpy()}, index=chunk.index)
+    for column in id_columns:
+        output[column] = chunk[column] if column in chunk.columns else None
+    for column in CRITERIA_IDS + ['total']:
+        output[column] = scores[column]
+    output['band'] = np.asarray(QUALITY_BANDS)[quality_band_codes(scores['total'].to_numpy())]
+    return output
+
+
+def _write_summary(path: str, summary: Dict) -> None:
+    # Replace atomically so a reader never sees a half-written file
+    temp = f'{path}.tmp'
+    with open(temp, 'w', encoding='utf-8') as handle:
+        json.dump(summary, handle, indent=2, ensure_ascii=False)
+    os.replace(temp, path)
+
+
+def score_file(path: str, scores_path: Optional[str] = None, summary_path: Optional[str] = None,
+               chunksize: int = DEFAULT_CHUNKSIZE, workers: Optional[int] = None,
+               id_columns: Sequence[str] = (), executor: Optional[Executor] = None) -> Dict:
+    """Score ``path`` chunk by chunk and return the final summary.
+
+    ``workers=1`` scores in this process; otherwise chunks go to a process
+    pool of ``workers`` (default: CPU count) unless an ``executor`` is given.
+    """
+    workers = workers or os.cpu_count() or 1
+    tally = QualityTally()
+    started = time.perf_counter()
+    header = True
+
+    def consume(output: pd.DataFrame) -> None:
+        nonlocal header
+        tally.add(output)
+        if scores_path:
+            output.to_csv(scores_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        if summary_path:
+            _write_summary(summary_path, tally.summary())
+
+    chunks = read_chunks(path, chunksize)
+    if workers == 1 and executor is None:
+        for chunk in chunks:
+            consume(score_chunk(chunk, id_columns))
+    else:
+        own_executor = executor is None
+        executor = executor or ProcessPoolExecutor(max_workers=workers)
+        pending: deque[Future] = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(score_chunk, chunk, tuple(id_columns)))
+                # Bound memory: wait for the oldest chunk before reading too far ahead
+                while len(pending) >= 2 * workers:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+        finally:
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+
+    if scores_path and header:
+        # Empty input: still leave a file with the header row
+        score_chunk(pd.DataFrame(), id_columns).to_csv(scores_path, index=False)
+
+    summary = tally.summary()
+    summary['source'] = path
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    if summary_path:
+        _write_summary(summary_path, summary)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m models.batch_score',
+        description='Score a survey export with the graduate quality rubric.',
+    )
+    parser.add_argument('input', help='CSV or xlsx survey export')
+    parser.add_argument('--scores', help='CSV file for the per-row scores')
+    parser.add_argument('--summary', help='JSON file for the band statistics (updated after every chunk)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='rows per chunk')
+    parser.add_argument('--workers', type=int, default=None, help='scoring processes (default: CPU count)')
+    parser.add_argument('--id-column', action='append', default=[], dest='id_columns',
+                        help='input column copied to the scores file (repeatable)')
+    args = parser.parse_args(argv)
+
+    if args.chunksize < 1:
+        parser.error('--chunksize must be at least 1')
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if not os.path.exists(args.input):
+        parser.error(f'input file not found: {args.input}')
+
+    summary = score_file(args.input, args.scores, args.summary, args.chunksize, args.workers, args.id_columns)
+    bands = ', '.join(f"{band} {stats['count']} ({stats['percentage']}%)" for band, stats in summary['bands'].items())
+    print(f"Scored {summary['total_graduates']} rows in {summary['chunks']} chunks "
+          f"({summary['seconds']}s): {bands}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
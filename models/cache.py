@@ -0,0 +1,240 @@
+"""Response cache for the blueprint chart endpoints.
+
+Chart payloads only depend on the endpoint, its query arguments and the
+dataset they were computed from, so a JSON response can be reused until the
+dataset is reloaded. ``init_app()`` wraps every GET ``/api/...`` view of the
+registered blueprints (except exports, debug and health routes) and stores
+successful JSON responses under a key built from::
+
+    (code version, dataset fingerprint, endpoint, view args, canonical query args)
+
+The fingerprint is that of the dataset the request selects with
+``?dataset=<id>`` (``models.registry``), so every dataset has its own entries.
+
+Entries live in the backend chosen by ``CACHE_BACKEND`` (see
+``models.cache_backends``); the fingerprint is derived from the data, so a
+SQLite or Redis backend shares entries between all workers and a reload
+switches every worker to new keys. Shared backends outlive the processes, so
+the code version (``CACHE_VERSION``, by default a hash of the app's Python
+sources, ``code_version()``) keeps a deploy from serving payloads built by
+the previous code.
+
+Canonical args are the sorted ``(key, sorted values)`` pairs of the query
+string, so ``?a=1&b=2`` and ``?b=2&a=1`` share an entry. Arguments whose
+value order changes the payload (``ORDERED_ARGS``) keep their order. Requests that ask
+for a debug trace bypass the cache so their trace is always fresh.
+
+Cache misses go through a ``SingleFlight`` group: when several threads miss
+on the same key at once (a dashboard broadcasting a filter change to many
+screens), only the first computes the payload and the others wait for it
+and reuse its body.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from flask import current_app, request
+
+from .cache_backends import CacheBackend, MemoryBackend, create_backend
+from .dataset import DEFAULT_DATASET_PATH, get_store
+from .registry import current_dataset_path, get_registry
+from .trace import TRACE_PARAM, trace_enabled
+
+# Last path segments that must never be served from the cache
+UNCACHED_SEGMENTS = {'export', 'health', 'test', 'debug-data', 'debug-columns', 'debug-field-data', 'datasets',
+                     # Cohort order matters, canonical args sort it away
+                     'compare'}
+
+# Query arguments whose repeated values are read in order (``?by=field&by=year``)
+ORDERED_ARGS = {'by'}
+
+CACHE_HEADER = 'X-Cache'
+
+# Source directories (and files) of the app whose code shapes chart payloads
+CODE_PATHS = ('app.py', 'blueprints', 'models', 'config')
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    class _Call:
+        __slots__ = ('event', 'result', 'error', 'waiters')
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+            self.waiters = 0
+
+    def __init__(self):
+        self._calls: Dict[Hashable, 'SingleFlight._Call'] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per in-flight ``key``; return ``(result, shared)``.
+
+        ``shared`` is True for callers that waited on another thread's result.
+        Exceptions raised by the leader are re-raised in every waiter.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def canonical_args(args, exclude=(TRACE_PARAM,)) -> Tuple:
+    """Order-independent, hashable form of a request's query arguments."""
+    return tuple(sorted(
+        (key, tuple(args.getlist(key) if key in ORDERED_ARGS else sorted(args.getlist(key))))
+        for key in args.keys() if key not in exclude
+    ))
+
+
+def code_version(root: str = _APP_ROOT, paths: Tuple[str, ...] = CODE_PATHS) -> str:
+    """Short hash of the Python sources under ``paths`` (relative to ``root``)."""
+    files = []
+    for path in paths:
+        full = os.path.join(root, path)
+        if os.path.isfile(full):
+            files.append(full)
+        for directory, subdirectories, names in os.walk(full):
+            subdirectories[:] = sorted(name for name in subdirectories if name != '__pycache__')
+            files.extend(os.path.join(directory, name) for name in sorted(names) if name.endswith('.py'))
+    digest = hashlib.sha1()
+    for file in files:
+        digest.update(os.path.relpath(file, root).encode('utf-8'))
+        with open(file, 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:12]
+
+
+def cache_key(endpoint: str, view_args: Optional[Dict], args, fingerprint: str, version: str = '') -> str:
+    """String key for a chart response, usable by every cache backend."""
+    request_part = repr((tuple(sorted((view_args or {}).items())), canonical_args(args)))
+    digest = hashlib.sha1(request_part.encode('utf-8')).hexdigest()
+    return f'{version}:{fingerprint}:{endpoint}:{digest}'
+
+
+
+def is_chart_rule(rule) -> bool:
+    """True for GET ``/api/`` routes whose responses are safe to cache."""
+    if 'GET' not in (rule.methods or ()) or '/api/' not in rule.rule:
+        return False
+    if rule.endpoint == 'static' or '.' not in rule.endpoint:
+        return False
+    last_segment = rule.rule.rstrip('/').rsplit('/', 1)[-1]
+    return last_segment not in UNCACHED_SEGMENTS
+
+
+def cached_view(view: Callable, cache: CacheBackend, dataset_path: str = DEFAULT_DATASET_PATH,
+                flights: Optional[SingleFlight] = None, version: str = '') -> Callable:
+    """Wrap a Flask view so successful JSON responses are cached per dataset.
+
+    Concurrent misses on the same key are coalesced through ``flights``;
+    ``version`` is the code version salting every key.
+    """
+    flights = flights or SingleFlight()
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if trace_enabled():
+            return view(*args, **kwargs)
+
+        fingerprint = get_registry().store(current_dataset_path(dataset_path)).get().fingerprint
+        key = cache_key(request.endpoint, kwargs, request.args, fingerprint, version)
+        entry = cache.get(key)
+        if entry is not None:
+            return _json_response(entry, 'HIT')
+
+        def compute():
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.is_json and not response.direct_passthrough:
+                entry = (response.get_data(), response.status_code)
+                if response.status_code == 200:
+                    cache.set(key, *entry)
+                return entry, response
+            return None, response
+
+        (entry, response), shared = flights.do(key, compute)
+        if not shared:
+            response.headers[CACHE_HEADER] = 'MISS'
+            return response
+        if entry is None:
+            # The leader produced something we cannot share (a file); compute our own
+            return view(*args, **kwargs)
+        return _json_response(entry, 'COALESCED')
+
+    wrapper.__wrapped_chart_view__ = True
+    return wrapper
+
+
+def _json_response(entry: Tuple[bytes, int], cache_status: str):
+    body, status = entry
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    response.headers[CACHE_HEADER] = cache_status
+    return response
+
+
+def chart_rules(app) -> List:
+    """Rules of the chart endpoints wrapped by ``init_app``."""
+    return [rule for rule in app.url_map.iter_rules() if is_chart_rule(rule)]
+
+
+def init_app(app, dataset_path: str = DEFAULT_DATASET_PATH,
+             backend: Optional[CacheBackend] = None) -> CacheBackend:
+    """Wrap the chart views of every registered blueprint with the response cache
+    and single-flight coalescing.
+
+    Call after all blueprints are registered. ``backend`` defaults to the one
+    selected by the app config.
+    """
+    cache = backend if backend is not None else create_backend(app.config)
+    flights = SingleFlight()
+    version = app.config.get('CACHE_VERSION') or code_version()
+    for rule in chart_rules(app):
+        view = app.view_functions[rule.endpoint]
+        if not getattr(view, '__wrapped_chart_view__', False):
+            app.view_functions[rule.endpoint] = cached_view(view, cache, dataset_path, flights, version)
+    app.extensions['response_cache'] = cache
+    app.extensions['single_flight'] = flights
+    app.extensions['cache_version'] = version
+
+    # Entries are keyed by fingerprint, so old ones are simply unreachable after
+    # a reload. A private in-process cache frees them straight away; shared
+    # backends keep them for workers that have not reloaded yet.
+    if isinstance(cache, MemoryBackend):
+        get_store(dataset_path).on_load(lambda dataset: cache.clear())
+    return cache
@@ -0,0 +1,252 @@
+"""Storage backends for the chart response cache.
+
+``MemoryBackend`` keeps entries in the current process only. Under gunicorn
+each worker then computes and warms up its own copy, so two backends share
+entries between all workers instead:
+
+* ``SQLiteBackend`` - a single SQLite file on the local disk. Needs no
+  external service and is safe for concurrent workers (WAL mode).
+* ``RedisBackend`` - an optional Redis server, shared between hosts too.
+  Requires the ``redis`` package.
+
+Backends store ``(body, status)`` pairs under a string key. Keys built by
+``models.cache`` include the dataset fingerprint, which is derived from the
+data itself and therefore identical across workers, so a reload in any
+worker simply starts using new keys. Select a backend with the
+``CACHE_BACKEND`` setting (``memory``, ``sqlite`` or ``redis``).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+Entry = Tuple[bytes, int]
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), 'uptm_chart_cache.sqlite3')
+
+# Cache hits whose ``used_at`` update is held back and then written in one transaction
+TOUCH_BATCH = 64
+
+
+class CacheBackend(ABC):
+    """Interface shared by every cache backend."""
+
+    name = 'base'
+    shared = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Entry]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, body: bytes, status: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _count(self, entry: Optional[Entry]) -> Optional[Entry]:
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def stats(self) -> Dict:
+        return {'backend': self.name, 'entries': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+class MemoryBackend(CacheBackend):
+    """Thread-safe in-process LRU of serialized JSON responses."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 512):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return self._count(entry)
+
+    def set(self, key: str, body: bytes, status: int) -> None:
+        with self._lock:
+            self._entries[key] = (body, status)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """Cache table in a local SQLite file shared by all worker processes.
+
+    Least recently used rows beyond ``max_entries`` are pruned on write.
+    Hits only read: their ``used_at`` times are kept in memory and written
+    in one transaction per ``TOUCH_BATCH`` hits or before the next write, so
+    concurrent readers do not queue for the WAL writer lock.
+    """
+
+    name = 'sqlite'
+    shared = True
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chart_cache (
+            key TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            status INTEGER NOT NULL,
+            used_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, max_entries: int = 512):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        self._held_hits = 0
+        self._touched_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Entry]:
+        conn = self._connect()
+        row = conn.execute('SELECT body, status FROM chart_cache WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            with self._touched_lock:
+                self._touched[key] = time.time()
+                self._held_hits += 1
+                full = self._held_hits >= TOUCH_BATCH
+            if full:
+                self._write_touched(conn)
+            return self._count((bytes(row[0]), row[1]))
+        return self._count(None)
+
+    def _write_touched(self, conn: sqlite3.Connection) -> None:
+        """Write the held-back ``used_at`` times of recent hits."""
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+            self._held_hits = 0
+        if not touched:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('UPDATE chart_cache SET used_at = ? WHERE key = ?',
+                             [(used_at, key) for key, used_at in touched.items()])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def set(self, key: str, body: bytes, status: int) -> None:
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO chart_cache (key, body, status, used_at) VALUES (?, ?, ?, ?)',
+            (key, sqlite3.Binary(body), status, time.time()),
+        )
+        # Pruning ranks rows by used_at, so it needs the recent hits
+        self._write_touched(conn)
+        conn.execute(
+            'DELETE FROM chart_cache WHERE key IN ('
+            ' SELECT key FROM chart_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        with self._touched_lock:
+            self._touched.clear()
+            self._held_hits = 0
+        self._connect().execute('DELETE FROM chart_cache')
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM chart_cache').fetchone()[0]
+
+
+class RedisBackend(CacheBackend):
+    """Cache entries stored in Redis with an expiry of ``ttl`` seconds."""
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', ttl: int = 3600,
+                 prefix: str = 'uptm:chart:'):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Entry]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return self._count(None)
+        status, body = value.split(b'\n', 1)
+        return self._count((body, int(status)))
+
+    def set(self, key: str, body: bytes, status: int) -> None:
+        self.client.set(self.prefix + key, str(status).encode() + b'\n' + body, ex=self.ttl or None)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+def create_backend(config) -> CacheBackend:
+    """Build the backend selected by ``CACHE_BACKEND`` in a Flask config."""
+    name = (config.get('CACHE_BACKEND') or 'memory').lower()
+    max_entries = config.get('CACHE_MAX_ENTRIES', 512)
+    if name == 'memory':
+        return MemoryBackend(max_entries=max_entries)
+    if name == 'sqlite':
+        return SQLiteBackend(config.get('CACHE_SQLITE_PATH') or DEFAULT_SQLITE_PATH, max_entries=max_entries)
+    if name == 'redis':
+        return RedisBackend(config.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0',
+                            ttl=config.get('CACHE_TTL', 3600))
+    raise ValueError(f"Unknown CACHE_BACKEND '{name}' (expected memory, sqlite or redis)")
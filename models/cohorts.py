@@ -0,0 +1,170 @@
+"""Side-by-side answer distributions of several cohorts of graduates.
+
+Comparing 2022 with 2023 graduates (or UPTM with KPTM) used to mean one call
+per cohort to a chart endpoint, each filtering and counting from scratch.
+``compare_cohorts()`` answers every cohort at once on the ``FacetIndex`` of
+the dataset:
+
+* each cohort is a filter set in the usual query-argument form, turned into
+  a row mask by the same facet codes as ``/api/filters/available``;
+* every row is labelled with its cohort membership as a bit pattern (a row
+  may belong to several cohorts);
+* one ``np.bincount`` over ``(membership, answer code)`` counts all
+  patterns, and each cohort's distribution is the sum of the patterns that
+  contain its bit.
+
+Differences are reported against the first cohort: percentage points per
+answer, the largest gap and the total variation distance (half the sum of
+the absolute gaps, 0 for identical distributions and 100 for disjoint ones)::
+
+    compare_cohorts(get_facet_index(), 'Adakah anda kini bekerja?', [
+        ('2022', MultiDict([('Tahun graduasi anda?', '2022')])),
+        ('2023', MultiDict([('Tahun graduasi anda?', '2023')])),
+    ])
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+import numpy as np
+from werkzeug.datastructures import MultiDict
+
+from .bands import BAND_COLUMNS, sort_bands
+from .facets import FacetIndex
+from .likert import LIKERT_KEYS
+
+# Chart id -> schema key of the single-answer question it plots
+COMPARISON_CHARTS = {
+    'gender': 'gender',
+    'age': 'age',
+    'institution': 'institution',
+    'graduation-year': 'graduation_year',
+    'field-of-study': 'field_of_study',
+    'field-group': 'field_group',
+    'education-level': 'education_level',
+    'household-income': 'household_income',
+    'employment-status': 'employment_status',
+    'time-to-employment': 'time_to_employment',
+    'job-type': 'job_type',
+    'job-status': 'job_status',
+    'employment-sector': 'employment_sectors',
+    'industry': 'industry',
+    'current-salary': 'current_salary',
+    'expected-salary': 'expected_salary',
+    'salary-match': 'salary_match',
+    'internship': 'internship',
+    'professional-cert': 'professional_cert',
+    'gig-income': 'gig_income',
+    'university-preparation': 'university_preparation',
+}
+
+# Query argument holding one cohort's filters, and the cohort label inside it
+COHORT_PARAM = 'cohort'
+LABEL_PARAM = 'label'
+
+# Membership patterns grow as 2 ** cohorts
+MAX_COHORTS = 6
+
+Cohort = Tuple[str, MultiDict]
+
+
+def parse_cohort(text: str, position: int = 0) -> Cohort:
+    """``(label, filters)`` of a ``cohort`` argument such as ``'Jantina anda?=Lelaki&label=Men'``.
+
+    Without a ``label`` the selected values name the cohort.
+    """
+    filters = MultiDict(parse_qsl(text, keep_blank_values=False))
+    label = filters.pop(LABEL_PARAM, None)
+    if not label:
+        values = [value for _, value in filters.items(multi=True)]
+        label = ', '.join(values) if values else f'Cohort {position + 1}'
+    return label, filters
+
+
+def _ordered(key: str, facet, totals: np.ndarray) -> List[int]:
+    """Positions of ``facet``'s options in display order."""
+    positions = range(len(facet.options))
+    if facet.is_year or key in LIKERT_KEYS:
+        return sorted(positions, key=lambda position: float(facet.options[position]))
+    if key in BAND_COLUMNS:
+        rank = {option: order for order, option in enumerate(sort_bands(facet.options))}
+        return sorted(positions, key=lambda position: rank[facet.options[position]])
+    return sorted(positions, key=lambda position: -totals[position])
+
+
+def _percentages(counts: np.ndarray, answered: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = counts / answered[:, None] * 100
+    return np.where(answered[:, None] > 0, shares, 0.0)
+
+
+def compare_cohorts(index: FacetIndex, column: str, cohorts: Sequence[Cohort],
+                    base_args=None, key: Optional[str] = None) -> Dict:
+    """Answer distribution of ``column`` for every cohort, with differences to the first.
+
+    ``base_args`` (the request's own filters) narrow every cohort. ``key``
+    is the schema key of ``column`` and only decides the answer order.
+    """
+    if not 1 <= len(cohorts) <= MAX_COHORTS:
+        raise ValueError(f'Between 1 and {MAX_COHORTS} cohorts can be compared')
+
+    base = index.mask(base_args) if base_args is not None else np.ones(len(index.df), dtype=bool)
+    membership = np.zeros(len(index.df), dtype=np.int64)
+    for bit, (_, filters) in enumerate(cohorts):
+        membership |= (index.mask(filters) & base).astype(np.int64) << bit
+
+    # One pass over (membership pattern, answer code); code -1 (no answer) lands in slot 0
+    facet = index.facet(column)
+    width = len(facet.options) + 1
+    patterns = 1 << len(cohorts)
+    rows = membership > 0
+    table = np.bincount(membership[rows] * width + facet.codes[rows] + 1,
+                        minlength=patterns * width).reshape(patterns, width)
+
+    # bits[pattern, cohort] is 1 when the pattern includes the cohort
+    bits = (np.arange(patterns)[:, None] >> np.arange(len(cohorts))) & 1
+    totals = bits.T @ table
+    graduates = totals.sum(axis=1)
+    order = _ordered(key or '', facet, totals[:, 1:].sum(axis=0))
+    counts = totals[:, 1:][:, order]
+    answered = counts.sum(axis=1)
+    percentages = _percentages(counts, answered)
+    labels = [facet.options[position] for position in order]
+
+    results = []
+    for position, (label, filters) in enumerate(cohorts):
+        results.append({
+            'label': label,
+            'filters': filters.to_dict(flat=False),
+            'graduates': int(graduates[position]),
+            'answered': int(answered[position]),
+            'counts': counts[position].tolist(),
+            'percentages': np.round(percentages[position], 1).tolist(),
+        })
+
+    differences = []
+    for position in range(1, len(cohorts)):
+        gaps = percentages[position] - percentages[0]
+        shared = table[(bits[:, 0] & bits[:, position]).astype(bool)].sum()
+        largest = int(np.argmax(np.abs(gaps))) if len(gaps) else None
+        differences.append({
+            'cohort': cohorts[position][0],
+            'baseline': cohorts[0][0],
+            'count_difference': (counts[position] - counts[0]).tolist(),
+            'percentage_points': np.round(gaps, 1).tolist(),
+            'largest_gap': None if largest is None else {
+                'label': labels[largest],
+                'percentage_points': round(float(gaps[largest]), 1),
+            },
+            'distance': round(float(np.abs(gaps).sum() / 2), 1),
+            'shared_graduates': int(shared),
+        })
+
+    return {
+        'column': column,
+        'labels': labels,
+        'cohorts': results,
+        'differences': differences,
+    }
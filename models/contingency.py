@@ -0,0 +1,128 @@
+"""Significance statistics of the cross-tab (stacked bar) charts.
+
+The salary and socio-economic cross-tabs show raw counts. With ``?stats=1``
+their endpoints add ``contingency_stats()`` of the same count matrix the
+chart is drawn from:
+
+* Pearson's chi-square, its degrees of freedom and p-value;
+* Cramér's V, the strength of the association (0 = none, 1 = perfect);
+* the adjusted standardized residual of every cell,
+  ``(observed - expected) / sqrt(expected * (1 - row share) * (1 - column share))``,
+  roughly standard normal under independence, so cells beyond +-1.96 are
+  the ones driving a significant result.
+
+Everything is computed with array operations on the whole matrix. Rows and
+columns without any answer are left out of the test (their residuals are
+0). The p-value comes from the regularized upper incomplete gamma function,
+so no statistics package is needed. Results are cached with the chart
+response, per dataset fingerprint and filter set.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict
+
+import numpy as np
+
+# Query argument switching a cross-tab endpoint to statistics mode
+STATS_PARAM = 'stats'
+
+SIGNIFICANCE_LEVEL = 0.05
+
+# Chi-square is unreliable when many cells expect fewer answers than this
+MIN_EXPECTED = 5
+
+_GAMMA_EPSILON = 1e-12
+_GAMMA_ITERATIONS = 500
+
+
+def stats_requested(args) -> bool:
+    """True when the request asks for the statistics of its cross-tab."""
+    return str(args.get(STATS_PARAM, '')).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _upper_gamma(a: float, x: float) -> float:
+    """Regularized upper incomplete gamma function Q(a, x)."""
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # Series for P(a, x)
+        term = total = 1.0 / a
+        for n in range(1, _GAMMA_ITERATIONS):
+            term *= x / (a + n)
+            total += term
+            if abs(term) < abs(total) * _GAMMA_EPSILON:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # Continued fraction for Q(a, x) (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1.0 / tiny
+    d = 1.0 / b
+    fraction = d
+    for n in range(1, _GAMMA_ITERATIONS):
+        an = -n * (n - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1.0 / d
+        delta = d * c
+        fraction *= delta
+        if abs(delta - 1) < _GAMMA_EPSILON:
+            break
+    return min(1.0, math.exp(log_prefix) * fraction)
+
+
+def chi_square_p_value(statistic: float, dof: int) -> float:
+    """Probability of a chi-square statistic at least this large under independence."""
+    if dof <= 0:
+        return 1.0
+    return _upper_gamma(dof / 2, statistic / 2)
+
+
+def contingency_stats(observed) -> Dict:
+    """Chi-square test, Cramér's V and adjusted residuals of a count matrix.
+
+    ``observed`` is a rows-by-columns matrix (a crosstab frame or array).
+    ``standardized_residuals`` and ``expected`` keep its shape and order.
+    """
+    counts = np.asarray(observed, dtype=np.float64)
+    if counts.ndim != 2:
+        raise ValueError('A contingency table needs two dimensions')
+    total = counts.sum()
+    row_totals = counts.sum(axis=1)
+    column_totals = counts.sum(axis=0)
+    rows = int((row_totals > 0).sum())
+    columns = int((column_totals > 0).sum())
+    dof = (rows - 1) * (columns - 1)
+
+    if total == 0:
+        expected = np.zeros_like(counts)
+    else:
+        expected = np.outer(row_totals, column_totals) / total
+    used = expected > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi_square = float(np.where(used, (counts - expected) ** 2 / expected, 0.0).sum())
+        variance = expected * np.outer(1 - row_totals / total, 1 - column_totals / total) if total else expected
+        residuals = np.where(variance > 0, (counts - expected) / np.sqrt(variance), 0.0)
+
+    testable = dof > 0
+    smaller_side = min(rows, columns) - 1
+    cramers_v = math.sqrt(chi_square / (total * smaller_side)) if testable and smaller_side > 0 else 0.0
+    p_value = chi_square_p_value(chi_square, dof) if testable else None
+    return {
+        'n': int(total),
+        'chi_square': round(chi_square, 4),
+        'degrees_of_freedom': dof,
+        'p_value': None if p_value is None else float(f'{p_value:.4g}'),
+        'significant': bool(p_value is not None and p_value < SIGNIFICANCE_LEVEL),
+        'cramers_v': round(min(cramers_v, 1.0), 4),
+        # Share of tested cells expecting fewer than MIN_EXPECTED answers
+        'low_expected_share': round(float((expected[used] < MIN_EXPECTED).mean()) * 100, 1) if used.any() else 0.0,
+        'expected': np.round(expected, 2).tolist(),
+        'standardized_residuals': np.round(residuals, 2).tolist(),
+    }
@@ -5,37 +5,88 @@ from typing import Dict, List, Optional, Union
 from datetime import datetime
 import json
 
+from .normalize import YEAR_DTYPE, year_mask
+
+
+def filter_frame(df: pd.DataFrame, filters: Optional[Dict]) -> pd.DataFrame:
+    """Rows of ``df`` matching every ``{column: [values]}`` filter.
+
+    Empty value lists and columns missing from ``df`` are ignored.
+    """
+    filtered_df = df
+    for filter_key, filter_values in (filters or {}).items():
+        if filter_values and len(filter_values) > 0:
+            if filter_key in filtered_df.columns:
+                # Graduation year is normalised to a small integer column at load
+                if str(filtered_df[filter_key].dtype) == YEAR_DTYPE:
+                    filtered_df = filtered_df[year_mask(filtered_df[filter_key], filter_values)]
+                # Convert filter values to match column data type (Likert scales are nullable Int8)
+                elif pd.api.types.is_numeric_dtype(filtered_df[filter_key]) and not pd.api.types.is_bool_dtype(filtered_df[filter_key]):
+                    try:
+                        if pd.api.types.is_integer_dtype(filtered_df[filter_key]):
+                            converted_values = [int(float(v)) for v in filter_values]
+                        else:
+                            converted_values = [float(v) for v in filter_values]
+                        filtered_df = filtered_df[filtered_df[filter_key].isin(converted_values)]
+                    except:
+                        filtered_df = filtered_df[filtered_df[filter_key].astype(str).isin([str(v) for v in filter_values])]
+                else:
+                    filtered_df = filtered_df[filtered_df[filter_key].isin(filter_values)]
+    return filtered_df
+
+
+def _merge_filters(current: Dict, filters: Dict) -> Dict:
+    """Filters equivalent to applying ``current`` and then ``filters``."""
+    merged = {key: list(values) for key, values in current.items()}
+    for key, values in filters.items():
+        if not values:
+            continue
+        if merged.get(key):
+            merged[key] = [value for value in merged[key] if value in values]
+            if not merged[key]:
+                # Contradicting selections: keep a filter that matches nothing
+                merged[key] = [None]
+        else:
+            merged[key] = list(values)
+    return merged
+
+
 class DataProcessor:
-    def __init__(self, df: pd.DataFrame):
+    """Filtered view of the survey frame.
+
+    Chart, table and export helpers run on a ``QueryBackend``: by default
+    pandas over ``filtered_df``, or the engine given as ``backend`` (queried
+    with the accumulated ``filters``) - see ``models.query_backends``.
+    """
+
+    def __init__(self, df: pd.DataFrame, backend=None, filters: Optional[Dict] = None):
         self.df = df
         self.filtered_df = df.copy()
+        self.backend = backend
+        self.filters = filters or {}
     
     def apply_filters(self, filters: Dict) -> 'DataProcessor':
         """Apply filters and return new instance for method chaining"""
-        filtered_df = self.df.copy()
-        
-        for filter_key, filter_values in filters.items():
-            if filter_values and len(filter_values) > 0:
-                if filter_key in filtered_df.columns:
-                    # Convert filter values to match column data type
-                    if filtered_df[filter_key].dtype in ['int64', 'float64']:
-                        try:
-                            converted_values = [int(float(v)) for v in filter_values]
-                            filtered_df = filtered_df[filtered_df[filter_key].isin(converted_values)]
-                        except:
-                            filtered_df = filtered_df[filtered_df[filter_key].astype(str).isin([str(v) for v in filter_values])]
-                    else:
-                        filtered_df = filtered_df[filtered_df[filter_key].isin(filter_values)]
+        filtered_df = filter_frame(self.df.copy(), filters)
         
-        new_processor = DataProcessor(filtered_df)
+        new_processor = DataProcessor(filtered_df, self.backend, _merge_filters(self.filters, filters))
         new_processor.filtered_df = filtered_df
         return new_processor
     
+    @property
+    def query(self):
+        """``(backend, filters)`` answering queries about ``filtered_df``."""
+        if self.backend is None:
+            from .query_backends import PandasQueryBackend
+            return PandasQueryBackend.for_frame(self.filtered_df), {}
+        return self.backend, self.filters
+    
     def get_summary_stats(self) -> Dict:
         """Get summary statistics"""
+        backend, filters = self.query
         return {
-            'total_records': len(self.filtered_df),
-            'columns': list(self.filtered_df.columns),
+            'total_records': backend.count(filters),
+            'columns': backend.columns(),
             'last_updated': datetime.now().isoformat()
         }
     
@@ -56,13 +107,15 @@ class DataProcessor:
             return {'error': str(e), 'labels': ['No Data'], 'datasets': [{'data': [1], 'backgroundColor': '#6b7280'}]}
     
     def _get_bar_chart_data(self, x_col: str, y_col: str = None) -> Dict:
-        if x_col not in self.filtered_df.columns:
+        backend, filters = self.query
+        columns = backend.columns()
+        if x_col not in columns:
             return {'labels': ['No Data'], 'datasets': [{'data': [1], 'backgroundColor': '#6b7280'}]}
             
-        if y_col and y_col in self.filtered_df.columns:
+        if y_col and y_col in columns:
             grouped = self.filtered_df.groupby(x_col)[y_col].mean()
         else:
-            grouped = self.filtered_df[x_col].value_counts().sort_index()
+            grouped = pd.Series(backend.value_counts(x_col, filters), dtype='int64').sort_index()
         
         return {
             'labels': [str(label) for label in grouped.index.tolist()],
@@ -77,10 +130,11 @@ class DataProcessor:
         }
     
     def _get_pie_chart_data(self, x_col: str) -> Dict:
-        if x_col not in self.filtered_df.columns:
+        backend, filters = self.query
+        if x_col not in backend.columns():
             return {'labels': ['No Data'], 'datasets': [{'data': [1], 'backgroundColor': ['#6b7280']}]}
             
-        value_counts = self.filtered_df[x_col].value_counts()
+        value_counts = pd.Series(backend.value_counts(x_col, filters), dtype='int64')
         colors = ['#074e7e', '#c92427', '#10b981', '#f59e0b', '#3b82f6', '#6b7280']
         
         return {
@@ -94,11 +148,13 @@ class DataProcessor:
         }
     
     def _get_stacked_bar_data(self, x_col: str, group_by: str) -> Dict:
-        if x_col not in self.filtered_df.columns or group_by not in self.filtered_df.columns:
+        backend, filters = self.query
+        columns = backend.columns()
+        if x_col not in columns or group_by not in columns:
             return {'labels': ['No Data'], 'datasets': [{'label': 'No Data', 'data': [1], 'backgroundColor': '#6b7280'}]}
             
         try:
-            pivot_data = self.filtered_df.groupby([x_col, group_by]).size().unstack(fill_value=0)
+            pivot_data = backend.crosstab(x_col, group_by, filters)
             colors = ['#074e7e', '#c92427', '#10b981', '#f59e0b', '#3b82f6']
             
             datasets = []
@@ -121,54 +177,13 @@ class DataProcessor:
     def get_table_data(self, page: int = 1, per_page: int = 50, 
                       search: str = None, columns: List[str] = None) -> Dict:
         """Get paginated table data"""
-        df = self.filtered_df.copy()
-        
-        if columns:
-            # Only use columns that exist in the dataframe
-            existing_columns = [col for col in columns if col in df.columns]
-            if existing_columns:
-                df = df[existing_columns]
-        
-        if search:
-            mask = df.astype(str).apply(lambda x: x.str.contains(search, case=False, na=False)).any(axis=1)
-            df = df[mask]
-        
-        total = len(df)
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        
-        paginated_df = df.iloc[start_idx:end_idx]
-        
-        return {
-            'data': paginated_df.to_dict('records'),
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total,
-                'pages': (total + per_page - 1) // per_page if total > 0 else 0
-            },
-            'columns': list(df.columns)
-        }
+        backend, filters = self.query
+        return backend.paginate(filters, page, per_page, search, columns)
     
     def export_data(self, format: str = 'csv', columns: List[str] = None) -> bytes:
         """Export filtered data"""
-        df = self.filtered_df.copy()
-        
-        if columns:
-            # Only use columns that exist in the dataframe
-            existing_columns = [col for col in columns if col in df.columns]
-            if existing_columns:
-                df = df[existing_columns]
-        
-        if format == 'csv':
-            return df.to_csv(index=False).encode('utf-8')
-        elif format == 'excel':
-            import io
-            buffer = io.BytesIO()
-            df.to_excel(buffer, index=False, engine='openpyxl')
-            return buffer.getvalue()
-        elif format == 'json':
-            return df.to_json(orient='records', indent=2).encode('utf-8')
+        backend, filters = self.query
+        return backend.export(filters, format, columns)
 
 
 # Load from Excel file
@@ -187,6 +202,23 @@ def load_excel_data(file_path):
         print(f"Error loading Excel file: {e}. Using sample data.")
         return generate_sample_data()
 
+def load_survey_file(file_path):
+    """Load a survey export: CSV files with read_csv, anything else as Excel"""
+    if not file_path.lower().endswith('.csv'):
+        return load_excel_data(file_path)
+    try:
+        if os.path.exists(file_path):
+            df = pd.read_csv(file_path)
+            print(f"Loaded {len(df)} records from {file_path}")
+            print(f"Columns: {list(df.columns)}")
+            return df
+        else:
+            print(f"CSV file not found: {file_path}. Using sample data.")
+            return generate_sample_data()
+    except Exception as e:
+        print(f"Error loading CSV file: {e}. Using sample data.")
+        return generate_sample_data()
+
 def generate_sample_data():
     """Generate sample data as fallback"""
     np.random.seed(42)
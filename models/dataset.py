@@ -0,0 +1,461 @@
+"""Shared, lazily loaded survey dataset.
+
+Every blueprint used to call ``load_excel_data()`` at import time, so each
+worker parsed the questionnaire twelve times before it could serve a request.
+This module keeps a single ``DatasetStore`` per file path. The file is read
+on first use (or by ``load_async()`` in the background right after startup)
+and every blueprint shares the same frame.
+
+Each successful load gets a new ``version`` number so caches keyed by version
+are invalidated naturally by ``reload()``. Versions are counted per process;
+``fingerprint`` is a hash of the frame's content and is what caches shared
+between worker processes key on. Callbacks registered with
+``on_load()`` run once per loaded version (diagnostics, warm-up, indexes).
+Frames are passed through ``models.normalize.normalize_dataset`` first.
+
+New responses can be added without a full reload: ``append(rows)`` ingests
+only rows whose key (a response column such as ``Timestamp`` or, by
+default, a hash of the whole row) is not already in the dataset, and
+publishes them as a new version whose ``delta`` holds just those rows.
+Caches built for ``base_version`` extend themselves from the delta instead
+of rescanning the historical rows (``Dataset.appended_since``).
+``refresh()`` re-reads the file and does the same when the file only gained
+rows at the end.
+
+Loading can also drop repeat form submissions (``set_deduplication``, see
+``models.dedupe``); the report of what was dropped is kept on
+``Dataset.duplicates``.
+
+Several files can be served side by side; ``models.registry`` picks the
+store per request and ``unload()``s the least recently used ones when they
+exceed the memory budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data_processor import DataProcessor, load_survey_file
+from .dedupe import DuplicateReport, drop_duplicate_submissions, key_columns, submission_keys
+from .normalize import COERCED_ATTR, merge_coerced, normalize_dataset
+from .registry import current_dataset_path, get_registry, register_dataset_cache
+from .schema import canonical_columns
+
+DEFAULT_DATASET_PATH = 'data/Questionnaire.xlsx'
+
+
+@dataclass
+class Dataset:
+    """One loaded snapshot of the survey file."""
+    path: str
+    df: pd.DataFrame
+    version: int
+    fingerprint: str = ''
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    load_seconds: float = 0.0
+    # Set for versions published by ``DatasetStore.append``: the version the
+    # rows were appended to and the appended (normalised) rows themselves
+    base_version: Optional[int] = None
+    base_fingerprint: str = ''
+    delta: Optional[pd.DataFrame] = None
+    # Repeat submissions dropped while loading (None when deduplication is off)
+    duplicates: Optional[DuplicateReport] = None
+
+    def appended_since(self, version: Optional[int]) -> Optional[pd.DataFrame]:
+        """Rows added to ``version`` to form this one, if it was a single append."""
+        if self.delta is not None and version is not None and version == self.base_version:
+            return self.delta
+        return None
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of ``df`` that is stable across processes."""
+    digest = hashlib.sha1('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts); fall back to the text form
+        digest.update(df.to_csv(index=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def row_keys(df: pd.DataFrame, key: Optional[str] = None) -> np.ndarray:
+    """``uint64`` identity of each row: a hash of column ``key`` or of the whole row.
+
+    Values are compared as stripped text (missing answers as ''), so a row
+    read from a CSV export matches the same row loaded from the workbook.
+    """
+    frame = df[[key]] if key is not None else df
+    text = frame.astype(str).apply(lambda column: column.str.strip()).where(frame.notna(), '')
+    return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+
+def _align_rows(rows: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """``rows`` with the columns and dtypes of ``df``, normalised."""
+    rows = rows.rename(columns=canonical_columns(rows.columns))
+    unknown = [column for column in rows.columns if column not in df.columns]
+    if unknown:
+        raise ValueError(f'Unknown survey columns: {unknown}')
+    rows = normalize_dataset(rows.reindex(columns=df.columns))
+    for column in df.columns:
+        dtype = df[column].dtype
+        if rows[column].dtype != dtype:
+            try:
+                rows[column] = rows[column].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return rows
+
+
+def _concat(df: pd.DataFrame, delta: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """``pd.concat`` of the stored rows and new ones, keeping both coerced-answer records."""
+    combined = pd.concat([df, delta], **kwargs)
+    coerced = merge_coerced(df, delta)
+    if coerced:
+        combined.attrs[COERCED_ATTR] = coerced
+    return combined
+
+
+class DatasetStore:
+    """Thread-safe lazy holder for the dataset behind one file path."""
+
+    def __init__(self, path: str, loader: Callable[[str], pd.DataFrame] = load_survey_file,
+                 deduplicate: bool = False, dedupe_columns: Optional[Sequence[str]] = None):
+        self.path = path
+        self._loader = loader
+        self.deduplicate = deduplicate
+        self.dedupe_columns = list(dedupe_columns) if dedupe_columns else None
+        self._dataset: Optional[Dataset] = None
+        self._version = 0
+        self._lock = threading.RLock()
+        self._callbacks: List[Callable[[Dataset], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        # (version, key column, ordered row keys, key set) for append/refresh
+        self._keys: Optional[tuple] = None
+        # (version, submission key set) for deduplicating appends
+        self._submissions: Optional[tuple] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._dataset is not None
+
+    @property
+    def current(self) -> Optional[Dataset]:
+        """The loaded dataset, without loading it."""
+        return self._dataset
+
+    def get(self) -> Dataset:
+        """Return the current dataset, loading it on first use."""
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            if self._dataset is None:
+                self._load_locked()
+            return self._dataset
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.get().df
+
+    @property
+    def version(self) -> int:
+        return self.get().version
+
+    def reload(self) -> Dataset:
+        """Re-read the file and publish it under a new version."""
+        with self._lock:
+            self._load_locked()
+            return self._dataset
+
+    def publish(self, df: pd.DataFrame) -> Dataset:
+        """Replace the current frame with ``df`` under a new version."""
+        with self._lock:
+            self._set_locked(*self._prepare(df), 0.0)
+            return self._dataset
+
+    def set_deduplication(self, enabled: bool, columns: Optional[Sequence[str]] = None) -> None:
+        """Drop repeat submissions from loaded frames (``models.dedupe``).
+
+        Applies from the next load; ``columns`` are the key columns (schema
+        keys or headers, default every answer).
+        """
+        with self._lock:
+            self.deduplicate = enabled
+            self.dedupe_columns = list(columns) if columns else None
+            self._submissions = None
+
+    def append(self, rows: pd.DataFrame, key: Optional[str] = None) -> Dataset:
+        """Add the rows of ``rows`` that are not in the dataset yet.
+
+        Rows are identified by column ``key`` (e.g. the response timestamp)
+        or, without one, by a hash of the whole row; duplicates inside
+        ``rows`` are dropped too. New rows get index labels after the
+        existing ones and are published as a new version with
+        ``delta``/``base_version`` set. Without new rows the current
+        dataset is returned unchanged.
+
+        With deduplication enabled, repeat submissions inside ``rows`` are
+        dropped as on a load; a new row that repeats a stored submission
+        replaces it, which is published as a full reload.
+        """
+        with self._lock:
+            dataset = self.get()
+            if key is not None and key not in dataset.df.columns:
+                raise ValueError(f"Unknown key column '{key}'")
+            rows = _align_rows(rows, dataset.df)
+            keys = row_keys(rows, key)
+            _, _, known, known_set = self._keys_locked(key)
+            new = ~pd.Series(keys).duplicated().to_numpy()
+            new &= np.fromiter((k not in known_set for k in keys.tolist()), dtype=bool, count=len(keys))
+            if not new.any():
+                return dataset
+
+            delta = rows[new]
+            added = keys[new]
+            duplicates = dataset.duplicates
+            if self.deduplicate:
+                delta, batch = drop_duplicate_submissions(delta, self.dedupe_columns)
+                if batch.dropped:
+                    added = row_keys(delta, key)
+                duplicates = duplicates.merged(batch) if duplicates is not None else batch
+                columns = key_columns(dataset.df, self.dedupe_columns)
+                submitted = submission_keys(delta, columns)
+                known_submissions = self._submissions_locked(columns)
+                if any(k in known_submissions for k in submitted.tolist()):
+                    # The latest submission wins: an earlier row has to go
+                    df, replaced = self._prepare(_concat(dataset.df, delta, ignore_index=True))
+                    # Its rows were already counted by the reports merged so far
+                    replaced.rows_in = 0
+                    self._set_locked(df, duplicates.merged(replaced), 0.0)
+                    return self._dataset
+                known_submissions.update(submitted.tolist())
+
+            start = int(dataset.df.index.max()) + 1 if len(dataset.df) else 0
+            delta.index = pd.RangeIndex(start, start + len(delta))
+            df = _concat(dataset.df, delta)
+            digest = hashlib.sha1(f'{dataset.fingerprint}+{dataset_fingerprint(delta)}'.encode('utf-8'))
+
+            self._version += 1
+            known_set.update(keys[new].tolist())
+            self._keys = (self._version, key, np.concatenate([known, added]), known_set)
+            if self._submissions is not None:
+                self._submissions = (self._version, self._submissions[1])
+            self._publish_locked(Dataset(
+                path=self.path,
+                df=df,
+                version=self._version,
+                fingerprint=digest.hexdigest()[:16],
+                base_version=dataset.version,
+                base_fingerprint=dataset.fingerprint,
+                delta=delta,
+                duplicates=duplicates,
+            ))
+            return self._dataset
+
+    def refresh(self, key: Optional[str] = None) -> Dataset:
+        """Re-read the file; if it only gained rows at the end, append just those.
+
+        Any other change (edited or removed rows, different columns) is
+        published as a full reload.
+        """
+        with self._lock:
+            dataset = self.get()
+            started = time.perf_counter()
+            df, duplicates = self._prepare(self._loader(self.path))
+            old = dataset.df
+            if list(df.columns) == list(old.columns) and len(df) >= len(old):
+                head = _align_rows(df.iloc[:len(old)], old)
+                _, _, known, _ = self._keys_locked(key)
+                if np.array_equal(row_keys(head, key), known):
+                    return self.append(df.iloc[len(old):], key=key)
+            self._set_locked(df, duplicates, time.perf_counter() - started)
+            return self._dataset
+
+    def _keys_locked(self, key: Optional[str]) -> tuple:
+        dataset = self._dataset
+        cached = self._keys
+        if cached is None or cached[0] != dataset.version or cached[1] != key:
+            # Built once per full load; appends extend it
+            known = row_keys(dataset.df, key)
+            cached = self._keys = (dataset.version, key, known, set(known.tolist()))
+        return cached
+
+    def _submissions_locked(self, columns: List[str]) -> Set[int]:
+        dataset = self._dataset
+        cached = self._submissions
+        if cached is None or cached[0] != dataset.version:
+            cached = self._submissions = (dataset.version, set(submission_keys(dataset.df, columns).tolist()))
+        return cached[1]
+
+    def unload(self) -> bool:
+        """Release the loaded frame (the next ``get()`` reads the file again).
+
+        Returns False without waiting when the store is busy loading or
+        appending.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._dataset = None
+            self._keys = None
+            self._submissions = None
+            return True
+        finally:
+            self._lock.release()
+
+    def load_async(self) -> threading.Thread:
+        """Load the dataset in a daemon thread unless already loaded/loading."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self.get, name=f'dataset-load:{self.path}', daemon=True
+                )
+                self._thread.start()
+            return self._thread
+
+    def on_load(self, callback: Callable[[Dataset], None]) -> Callable[[Dataset], None]:
+        """Register ``callback(dataset)`` to run after every load.
+
+        If the dataset is already loaded the callback runs immediately.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+            dataset = self._dataset
+        if dataset is not None:
+            self._run_callback(callback, dataset)
+        return callback
+
+    def _load_locked(self) -> None:
+        started = time.perf_counter()
+        df, duplicates = self._prepare(self._loader(self.path))
+        self._set_locked(df, duplicates, time.perf_counter() - started)
+
+    def _prepare(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[DuplicateReport]]:
+        """Loading pipeline: normalise, then drop repeat submissions if enabled."""
+        df = normalize_dataset(df)
+        if not self.deduplicate:
+            return df, None
+        df, duplicates = drop_duplicate_submissions(df, self.dedupe_columns)
+        if duplicates.dropped:
+            print(f"Dropped {len(duplicates.dropped)} repeat submissions from {self.path}")
+        return df, duplicates
+
+    def _set_locked(self, df: pd.DataFrame, duplicates: Optional[DuplicateReport], load_seconds: float) -> None:
+        """Publish a prepared frame (see ``_prepare``) under a new version."""
+        self._version += 1
+        self._publish_locked(Dataset(
+            path=self.path,
+            df=df,
+            version=self._version,
+            fingerprint=dataset_fingerprint(df),
+            load_seconds=round(load_seconds, 4),
+            duplicates=duplicates,
+        ))
+
+    def _publish_locked(self, dataset: Dataset) -> None:
+        self._dataset = dataset
+        for callback in list(self._callbacks):
+            self._run_callback(callback, self._dataset)
+
+    @staticmethod
+    def _run_callback(callback: Callable[[Dataset], None], dataset: Dataset) -> None:
+        try:
+            callback(dataset)
+        except Exception as e:
+            print(f"Dataset load hook {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+_stores: Dict[str, DatasetStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = DEFAULT_DATASET_PATH) -> DatasetStore:
+    """Return the shared store for ``path`` (created on first call, not loaded)."""
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, DatasetStore(path))
+    return store
+
+
+def get_dataset(path: str = DEFAULT_DATASET_PATH) -> Dataset:
+    return get_store(path).get()
+
+
+class LazyDataProcessor:
+    """Drop-in replacement for a module-level ``DataProcessor(df)``.
+
+    Blueprints keep using ``data_processor.df`` and the ``DataProcessor``
+    methods; the frame is only read when first accessed, and a fresh
+    ``DataProcessor`` is built whenever the shared dataset version changes.
+    Its chart, table and export helpers use the query backend configured for
+    the dataset (``models.query_backends``).
+
+    ``path`` is the dataset selected by the request's ``dataset`` argument
+    (``models.registry``), falling back to the path given here.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATASET_PATH):
+        self.default_path = path
+        # path -> (version, processor)
+        self._processors: Dict[str, Tuple[int, DataProcessor]] = register_dataset_cache({})
+
+    @property
+    def path(self) -> str:
+        return current_dataset_path(self.default_path)
+
+    @property
+    def store(self) -> DatasetStore:
+        return get_registry().store(self.path)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.store.df
+
+    @property
+    def version(self) -> int:
+        return self.store.version
+
+    @property
+    def schema(self):
+        """``SchemaResolver`` for the current dataset version."""
+        from .schema import get_schema
+        return get_schema(self.path)
+
+    def derived(self, df: pd.DataFrame, name: str) -> Optional[pd.Series]:
+        """Registered derived column ``name`` aligned to the rows of ``df``."""
+        from .derived import derived_column
+        return derived_column(df, name, self.path)
+
+    def bands(self, df: pd.DataFrame, key: str):
+        """``BandedColumn`` of range column ``key`` restricted to the rows of ``df``."""
+        from .bands import get_banded
+        banded = get_banded(key, self.path)
+        return None if banded is None else banded.subset(df.index)
+
+    def facet_counts(self, facets: Dict[str, str], args) -> Dict[str, Dict[str, int]]:
+        """Rows per option of each ``{key: column}`` facet, given the other filters in ``args``."""
+        from .facets import get_facet_index
+        return get_facet_index(self.path).counts(facets, args)
+
+    def _current(self) -> DataProcessor:
+        from .query_backends import get_query_backend
+        path = self.path
+        dataset = self.store.get()
+        backend = get_query_backend(path)
+        cached = self._processors.get(path)
+        if cached is None or cached[0] != dataset.version or cached[1].backend is not backend:
+            cached = self._processors[path] = (dataset.version, DataProcessor(dataset.df, backend))
+        return cached[1]
+
+    def __getattr__(self, name):
+        return getattr(self._current(), name)
@@ -0,0 +1,149 @@
+"""Removal of repeat survey submissions at load time.
+
+Google Form exports keep every submission, so a graduate who sends the form
+twice is counted twice by every chart. When deduplication is enabled the
+dataset store drops repeats right after normalisation: two rows are the same
+submission when their answers agree on the key columns (every answer by
+default, or the ``DEDUPE_KEY_COLUMNS`` subset), compared as case- and
+whitespace-insensitive text. The latest submission (by the form timestamp,
+then by file order) is kept.
+
+Keys are computed column by column: each column is normalised on its
+distinct values only and the rows are hashed with
+``pd.util.hash_pandas_object``, so the stage stays vectorized for large
+exports. Rows with no answer in any key column are never treated as
+duplicates. What was dropped is kept on ``Dataset.duplicates`` and served by
+``/api/dataset/duplicates``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .schema import SchemaResolver
+
+# Schema key of the form's submission time; never part of the key
+TIMESTAMP_KEY = 'submitted_at'
+
+
+@dataclass
+class DuplicateReport:
+    """Repeat submissions dropped from one dataset."""
+    key_columns: List[str]
+    timestamp_column: Optional[str]
+    rows_in: int
+    # One entry per dropped row: its label in the frame it was loaded (or
+    # appended) from, the label of the submission kept instead and its time
+    dropped: List[Dict] = field(default_factory=list)
+
+    @property
+    def rows_out(self) -> int:
+        return self.rows_in - len(self.dropped)
+
+    def merged(self, other: 'DuplicateReport') -> 'DuplicateReport':
+        """This report followed by ``other`` (duplicates of an appended batch)."""
+        return DuplicateReport(self.key_columns, self.timestamp_column,
+                               self.rows_in + other.rows_in, self.dropped + other.dropped)
+
+    def to_dict(self) -> Dict:
+        return {
+            'key_columns': self.key_columns,
+            'timestamp_column': self.timestamp_column,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'dropped_count': len(self.dropped),
+            'dropped': self.dropped,
+        }
+
+
+def key_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> List[str]:
+    """Physical key columns: ``columns`` (schema keys or headers) or every non-timestamp column."""
+    schema = SchemaResolver(df.columns)
+    if columns:
+        resolved = [schema.get(column) or (column if column in df.columns else None) for column in columns]
+        missing = [column for column, found in zip(columns, resolved) if found is None]
+        if missing:
+            raise ValueError(f'Unknown deduplication key columns: {missing}')
+        return list(dict.fromkeys(resolved))
+    timestamp = schema.get(TIMESTAMP_KEY)
+    return [column for column in df.columns if column != timestamp]
+
+
+def _normalised_text(column: pd.Series) -> pd.Series:
+    codes, uniques = pd.factorize(column)
+    text = pd.Series(uniques, dtype=object).astype(str).str.replace(r'\s+', ' ', regex=True).str.strip().str.casefold()
+    labels = np.append(text.to_numpy(dtype=object), '')
+    # Code -1 (missing) picks the trailing ''
+    return pd.Series(labels[codes], index=column.index, dtype=object)
+
+
+def submission_keys(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """``uint64`` hash of the normalised answers of each row in ``columns``."""
+    text = pd.DataFrame({column: _normalised_text(df[column]) for column in columns}, index=df.index)
+    return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+
+def drop_duplicate_submissions(df: pd.DataFrame, columns: Optional[Sequence[str]] = None
+                               ) -> Tuple[pd.DataFrame, DuplicateReport]:
+    """``df`` without repeat submissions (index reset) and a report of the dropped rows."""
+    keys_from = key_columns(df, columns)
+    timestamp = SchemaResolver(df.columns).get(TIMESTAMP_KEY)
+    report = DuplicateReport(keys_from, timestamp, len(df))
+    if len(df) < 2 or not keys_from:
+        return df, report
+
+    keys = submission_keys(df, keys_from)
+    answered = df[keys_from].notna().any(axis=1).to_numpy()
+    if timestamp is not None:
+        times = pd.to_datetime(df[timestamp], errors='coerce')
+        # Oldest first, file order on ties; NaT is the smallest int64 so
+        # submissions without a time count as the oldest
+        ticks = times.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        order = np.lexsort((np.arange(len(df)), ticks))
+    else:
+        order = np.arange(len(df))
+
+    ordered_keys = pd.Series(keys[order])
+    repeat = ordered_keys.duplicated(keep='last').to_numpy() & answered[order]
+    if not repeat.any():
+        return df, report
+
+    labels = pd.Series(df.index.to_numpy()[order])
+    dropped_positions = np.sort(order[repeat])
+    kept = labels.groupby(ordered_keys.to_numpy()).last()
+    dropped = pd.DataFrame({
+        'row': df.index.to_numpy()[dropped_positions],
+        'kept_row': kept.reindex(keys[dropped_positions]).to_numpy(),
+    })
+    if timestamp is not None:
+        times = df[timestamp].iloc[dropped_positions]
+        dropped['submitted_at'] = times.astype(str).where(times.notna(), None).to_numpy(dtype=object)
+    report.dropped = dropped.astype(object).to_dict('records')
+
+    keep = np.ones(len(df), dtype=bool)
+    keep[dropped_positions] = False
+    return df[keep].reset_index(drop=True), report
+
+
+def init_app(app, dataset_path: Optional[str] = None) -> None:
+    """Configure submission deduplication of the shared datasets from the app config.
+
+    Applies to ``dataset_path`` or, by default, to every dataset of the
+    registry (``models.registry``). Call before the datasets are first loaded.
+    """
+    from .dataset import get_store
+    from .registry import get_registry
+
+    columns = [column.strip() for column in (app.config.get('DEDUPE_KEY_COLUMNS') or '').split(';') if column.strip()]
+
+    def configure(store) -> None:
+        store.set_deduplication(bool(app.config.get('DEDUPE_SUBMISSIONS', True)), columns or None)
+
+    if dataset_path:
+        configure(get_store(dataset_path))
+    else:
+        get_registry().on_store(configure)
@@ -0,0 +1,249 @@
+"""Registry of derived (categorised) survey columns.
+
+Several charts group raw answers into broader categories: institution
+category, field-of-study group, grouped job-finding factors, grouped job
+challenges and gig type. These used to be rebuilt with a row-wise ``.apply``
+on a copy of the filtered frame in every request. The registry computes each
+derived column once per dataset version, on first use, and caches it:
+
+    categories = derived_column(df_filtered, 'institution_category')
+    counts = categories.dropna().value_counts()
+
+``derived_column()`` returns the cached series aligned to the rows of a
+filtered frame, so handlers read a derived column like a plain one without
+copying the frame. ``add_derived_columns()`` attaches them to a standalone
+frame under their notebook column names (``Institution_Category``,
+``Bidang pengajian``...).
+
+Mapping is vectorised over the distinct answers: each unique cell is
+categorised once and the result is broadcast with ``Series.map``.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .registry import register_dataset_cache
+from .schema import SchemaResolver
+
+UPTM = 'Universiti Poly-Tech Malaysia (UPTM)'
+KPTM = 'Kolej Poly-Tech MARA'
+
+FIELD_OF_STUDY_GROUPS = {
+    'Kejuruteraan & Teknologi': 'Engineering Environment',
+    'Teknologi Elektrik, Elektronik & Pembinaan': 'Engineering Environment',
+    'Sains Komputer & Kecerdasan Buatan': 'IT & Computer Science',
+    'Sains Data & Analitik': 'IT & Computer Science',
+    'Fizik, Kimia & Bioteknologi': 'Natural Science Medical Science / Specialist',
+    'Perubatan, Farmasi & Sains Kesihatan': 'Natural Science Medical Science / Specialist',
+    'Pemakanan, Dietetik & Fisioterapi': 'Natural Science Medical Science / Specialist',
+    'Kewangan, Perbankan & Perakaunan': 'Accounting & Finance',
+    'Matematik & Sains Aktuari': 'Accounting & Finance',
+    'Pemasaran & Pengurusan Sumber Manusia': 'Economy, Business & Management',
+    'Pengurusan Perniagaan & Keusahawanan': 'Economy, Business & Management',
+    'Logistik, Pengangkutan & Rantaian Bekalan': 'Economy, Business & Management',
+    'Komunikasi, Media & Hubungan Antarabangsa': 'Economy, Business & Management',
+    'Psikologi, Sosiologi & Kajian Kemanusiaan': 'Economy, Business & Management',
+    'Pelancongan, Hospitaliti & Pengurusan Acara': 'Economy, Business & Management',
+    'Seni Kulinari & Pengurusan Perkhidmatan Makanan': 'Economy, Business & Management',
+    'Undang-Undang & Pengajian Perundangan': 'Economy, Business & Management',
+    'Pengajian Islam & Syariah': 'Economy, Business & Management',
+    'Teknologi Automotif & Mekatronik': 'Transport - Vehicle Design & Engineering',
+    'Kimpalan, Fabrikasi & Pembuatan': 'Transport - Vehicle Design & Engineering',
+    'Senibina & Reka Bentuk': 'Build Professionals',
+    'Animasi, Multimedia & Kreativiti Digital': 'Creative Design',
+    'Pendidikan & Latihan': 'Other',
+    'Information Security': 'IT & Computer Science',
+    'Cyber Security': 'IT & Computer Science',
+    'Information Security (IT)': 'IT & Computer Science',
+}
+
+JOB_FACTOR_GROUPS = {
+    'Permohonan terus kepada syarikat (JobStreet, LinkedIn, laman web syarikat)': 'Saluran Rasmi',
+    'Program kerajaan (contoh: MySTEP, Protege, SL1M)': 'Saluran Rasmi',
+    'Melalui pameran kerjaya atau job fair': 'Saluran Rasmi',
+    'Rangkaian peribadi / kenalan (pensyarah, alumni, keluarga, rakan)': 'Saluran Informal / Sosial',
+    'Dihubungi oleh perekrut atau headhunter': 'Saluran Informal / Sosial',
+    'Melalui latihan industri / praktikal': 'Laluan Berasaskan Institusi Pendidikan',
+    'Tawaran daripada syarikat sebelum tamat pengajian': 'Laluan Berasaskan Institusi Pendidikan',
+    'Memulakan perniagaan sendiri / bekerja dalam ekonomi gig': 'Laluan Kendiri / Keusahawanan',
+}
+
+CHALLENGE_LABELS = {
+    'Tiada pengalaman kerja yang mencukupi': 'Tiada Pengalaman',
+    'Terlalu banyak persaingan dalam bidang saya': 'Persaingan',
+    'Kekurangan kemahiran yang dicari majikan': 'Kurang Kemahiran',
+    'Gaji yang ditawarkan terlalu rendah': 'Gaji Rendah',
+    'Saya tidak tahu bagaimana mencari pekerjaan yang sesuai': 'Tiada Pengetahuan',
+    'Tiada rangkaian atau hubungan yang boleh membantu saya mendapatkan pekerjaan': 'Tiada Rangkaian',
+    'Kriteria pekerjaan tidak sesuai dengan kelayakan akademik saya': 'Kelayakan Tidak Sepadan',
+    'Kebanyakan syarikat lebih memilih pekerja yang sudah berpengalaman': 'Tiada Pengalaman',
+    'Tiada peluang pekerjaan dalam bidang saya di kawasan tempat tinggal saya': 'Lokasi Pekerjaan',
+    'Saya perlu menjaga keluarga dan sukar untuk bekerja di luar kawasan': 'Isu Keluarga',
+    'Proses permohonan kerja terlalu kompleks atau mengambil masa yang lama': 'Proses Permohonan',
+    'Keadaan ekonomi semasa menyukarkan peluang pekerjaan': 'Ekonomi',
+}
+
+CHALLENGE_GROUPS = {
+    'Tiada Pengalaman': 'Tiada Pengalaman',
+    'Persaingan': 'Pasaran Pekerjaan',
+    'Kurang Kemahiran': 'Ketidakpadanan Kemahiran',
+    'Gaji Rendah': 'Pasaran Pekerjaan',
+    'Tiada Pengetahuan': 'Tiada Pengetahuan',
+    'Tiada Rangkaian': 'Tiada Rangkaian',
+    'Kelayakan Tidak Sepadan': 'Ketidakpadanan Kemahiran',
+    'Lokasi Pekerjaan': 'Kekangan Struktur',
+    'Isu Keluarga': 'Kekangan Personal',
+    'Proses Permohonan': 'Kekangan Struktur',
+    'Ekonomi': 'Pasaran Pekerjaan',
+}
+
+GIG_TYPES = {
+    'Ekonomi Gig: Penghantaran & e-hailing (Grab, FoodPanda, Lalamove)': 'Penghantaran',
+    'Keusahawanan: Mengusahakan perniagaan sendiri (produk, perkhidmatan, syarikat)': 'Usahawan',
+    'Ekonomi Gig: Pendidikan & konsultasi (tutor online, coaching, kursus digital)': 'Pendidikan',
+    'Ekonomi Gig: Pembuatan kandungan (YouTube, TikTok, streaming)': 'Pembuatan Kandungan',
+    'Ekonomi Gig: Freelancing digital (design, copywriting, programming, social media marketing)': 'Digital',
+    'Ekonomi Gig: E-commerce & dropshipping (Shopee, Lazada, TikTok Shop)': 'E-commerce',
+    'Saya tidak bercadang untuk terlibat dalam mana-mana pekerjaan bebas': 'Tidak Berminat',
+}
+
+
+def _join_unique(labels: Iterable[str]) -> str:
+    return '; '.join(dict.fromkeys(labels))
+
+
+def categorize_institution(cell) -> Optional[str]:
+    if pd.isnull(cell):
+        return None
+    cell_str = str(cell).strip()
+    if 'Universiti Poly-Tech Malaysia' in cell_str or 'UPTM' in cell_str:
+        return UPTM
+    if 'Kolej Poly-Tech MARA' in cell_str or 'KPTM' in cell_str:
+        return KPTM
+    return 'Other'
+
+
+def group_field_of_study(cell) -> Optional[str]:
+    if pd.isnull(cell):
+        return None
+    return FIELD_OF_STUDY_GROUPS.get(str(cell).strip(), 'Other')
+
+
+def group_job_factors(cell) -> str:
+    if pd.isnull(cell):
+        return ''
+    return _join_unique(JOB_FACTOR_GROUPS.get(factor, factor) for factor in (x.strip() for x in str(cell).split(';')))
+
+
+def group_challenges(cell) -> str:
+    if pd.isnull(cell):
+        return ''
+    labels = (CHALLENGE_LABELS.get(c, c) for c in (x.strip() for x in str(cell).split(',')) if c)
+    return _join_unique(CHALLENGE_GROUPS.get(label, label) for label in labels)
+
+
+def clean_gig(cell) -> str:
+    if pd.isnull(cell):
+        return ''
+    return _join_unique(label for text, label in GIG_TYPES.items() if text in str(cell))
+
+
+def map_unique(series: pd.Series, func: Callable) -> pd.Series:
+    """Apply ``func`` once per distinct value and broadcast the result."""
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    uniques, codes = np.unique(values[~missing].astype(str), return_inverse=True)
+    labels = np.array([func(value) for value in uniques] + [func(None)], dtype=object)
+    positions = np.full(len(values), len(uniques))
+    positions[~missing] = codes
+    return pd.Series(labels[positions], index=series.index, dtype=object)
+
+
+@dataclass(frozen=True)
+class DerivedColumn:
+    """A categorised column built from one logical source column."""
+    name: str
+    column: str
+    source: str
+    func: Callable
+
+    def build(self, df: pd.DataFrame, schema: Optional[SchemaResolver] = None) -> Optional[pd.Series]:
+        schema = schema or SchemaResolver(df.columns)
+        source = schema.get(self.source)
+        if source is None:
+            return None
+        return map_unique(df[source], self.func).rename(self.column)
+
+
+DERIVED_COLUMNS: Dict[str, DerivedColumn] = {}
+
+
+def register_derived(name: str, column: str, source: str, func: Callable) -> DerivedColumn:
+    """Add a derived column to the registry (``source`` is a schema key)."""
+    derived = DerivedColumn(name=name, column=column, source=source, func=func)
+    DERIVED_COLUMNS[name] = derived
+    return derived
+
+
+register_derived('institution_category', 'Institution_Category', 'institution', categorize_institution)
+register_derived('field_group', 'Bidang pengajian', 'field_of_study', group_field_of_study)
+register_derived('job_factors_grouped', 'Faktor_Pekerjaan_Grouped', 'success_factors', group_job_factors)
+register_derived('challenges_grouped', 'challenge_grouped', 'job_challenges', group_challenges)
+register_derived('gig_type', 'gig_clean', 'gig_economy', clean_gig)
+
+
+_cache: Dict[Tuple[str, int, str], Optional[pd.Series]] = register_dataset_cache({})
+_cache_lock = threading.Lock()
+
+
+def get_derived(name: str, path: Optional[str] = None) -> Optional[pd.Series]:
+    """Derived column for the whole shared dataset (None if the source is missing)."""
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+    from .schema import get_schema
+
+    path = path or DEFAULT_DATASET_PATH
+    dataset = get_store(path).get()
+    key = (path, dataset.version, name)
+    if key in _cache:
+        return _cache[key]
+    with _cache_lock:
+        if key not in _cache:
+            derived = DERIVED_COLUMNS[name]
+            previous = next((k for k in _cache if k[0] == path and k[2] == name
+                             and dataset.appended_since(k[1]) is not None), None)
+            if previous is not None and _cache[previous] is not None:
+                # Map only the appended rows
+                added = derived.build(dataset.appended_since(previous[1]), get_schema(path))
+                series = pd.concat([_cache[previous], added])
+            else:
+                series = derived.build(dataset.df, get_schema(path))
+            # Drop entries for older versions of this dataset
+            for stale in [k for k in _cache if k[0] == path and k[1] != dataset.version]:
+                del _cache[stale]
+            _cache[key] = series
+        return _cache[key]
+
+
+def derived_column(df: pd.DataFrame, name: str, path: Optional[str] = None) -> Optional[pd.Series]:
+    """Cached derived column aligned to the rows of ``df`` (a filtered dataset frame)."""
+    series = get_derived(name, path)
+    if series is None:
+        return None
+    return series.reindex(df.index)
+
+
+def add_derived_columns(df: pd.DataFrame, names: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Compute derived columns for a standalone frame and add them in place."""
+    schema = SchemaResolver(df.columns)
+    for name in names or DERIVED_COLUMNS:
+        derived = DERIVED_COLUMNS[name]
+        series = derived.build(df, schema)
+        if series is not None:
+            df[derived.column] = series
+    return df
@@ -0,0 +1,179 @@
+"""Faceted option counts for the ``/api/filters/available`` endpoints.
+
+For every option of every filter the dashboards can show how many graduates
+would remain if the option were selected, given the other active filters.
+Instead of re-filtering the frame once per option, each filter column is
+encoded once per dataset version as integer value codes (``pd.factorize``).
+A request then needs one boolean mask per active filter, and the counts for
+a facet are a single ``np.bincount`` over the rows that pass every *other*
+active filter::
+
+    counts = get_facet_index().counts({'Jantina anda?': 'Jantina anda?'}, request.args)
+    # {'Jantina anda?': {'Lelaki': 12, 'Perempuan': 27}}
+
+Option keys are the stripped text of each value (graduation years as plain
+integers), matching the option lists the endpoints return.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .normalize import YEAR_DTYPE, parse_years
+from .registry import register_dataset_cache
+
+
+class Facet:
+    """Value codes of one filter column (-1 for missing answers)."""
+
+    def __init__(self, column: pd.Series):
+        self.is_year = str(column.dtype) == YEAR_DTYPE
+        codes, uniques = pd.factorize(self._labels(column))
+        self.codes = codes
+        self.options: List[str] = [str(value) for value in uniques]
+        self.lookup = {option: code for code, option in enumerate(self.options)}
+
+    def _labels(self, column: pd.Series) -> pd.Series:
+        if self.is_year:
+            return column
+        return column.astype(str).str.strip().where(column.notna())
+
+    def extended(self, column: pd.Series) -> 'Facet':
+        """This facet with the rows of ``column`` (appended answers) added.
+
+        Known answers keep their codes and new ones are numbered after them,
+        as a rebuild over the whole column would.
+        """
+        codes, uniques = pd.factorize(self._labels(column))
+        facet = copy.copy(self)
+        facet.options = list(self.options)
+        facet.lookup = dict(self.lookup)
+        mapping = np.empty(len(uniques) + 1, dtype=self.codes.dtype)
+        mapping[-1] = -1
+        for position, value in enumerate(uniques):
+            option = str(value)
+            code = facet.lookup.get(option)
+            if code is None:
+                code = facet.lookup[option] = len(facet.options)
+                facet.options.append(option)
+            mapping[position] = code
+        # Code -1 (missing) picks the trailing -1 of ``mapping``
+        facet.codes = np.concatenate([self.codes, mapping[codes]])
+        return facet
+
+    def mask(self, values) -> np.ndarray:
+        """Rows whose value is one of the selected filter ``values``."""
+        if self.is_year:
+            values = parse_years(values)
+        allowed = np.zeros(len(self.options) + 1, dtype=bool)
+        for value in values:
+            code = self.lookup.get(str(value).strip())
+            if code is not None:
+                allowed[code] = True
+        # Code -1 (missing) indexes the trailing False slot
+        return allowed[self.codes]
+
+    def counts(self, rows: np.ndarray) -> Dict[str, int]:
+        codes = self.codes[rows]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.options))
+        return dict(zip(self.options, counts.tolist()))
+
+
+class FacetIndex:
+    """Lazily built ``Facet`` per column of one dataset version."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._facets: Dict[str, Facet] = {}
+        self._lock = threading.Lock()
+
+    def extended(self, df: pd.DataFrame, delta: pd.DataFrame) -> 'FacetIndex':
+        """Index of ``df`` (this frame plus the appended ``delta`` rows).
+
+        Facets built so far are extended with the appended rows only.
+        """
+        index = FacetIndex(df)
+        index._facets = {column: facet.extended(delta[column]) for column, facet in self._facets.items()}
+        return index
+
+    def facet(self, column: str) -> Facet:
+        facet = self._facets.get(column)
+        if facet is None:
+            with self._lock:
+                facet = self._facets.get(column)
+                if facet is None:
+                    facet = self._facets[column] = Facet(self.df[column])
+        return facet
+
+    def masks(self, args) -> Dict[str, np.ndarray]:
+        """Row mask of every active filter in ``args`` (query arguments).
+
+        Arguments naming a column of the dataset are the active filters.
+        """
+        masks = {}
+        for key in args.keys():
+            values = [value for value in args.getlist(key) if value != '']
+            if key in self.df.columns and values:
+                masks[key] = self.facet(key).mask(values)
+        return masks
+
+    def mask(self, args) -> np.ndarray:
+        """Rows matching every active filter in ``args``."""
+        rows = np.ones(len(self.df), dtype=bool)
+        for mask in self.masks(args).values():
+            rows &= mask
+        return rows
+
+    def counts(self, facets: Mapping[str, str], args) -> Dict[str, Dict[str, int]]:
+        """Option counts for each ``{response key: column}`` in ``facets``.
+
+        ``args`` are the request's query arguments; those naming a column of
+        the dataset are the active filters.
+        """
+        masks = self.masks(args)
+
+        # Number of active filters each row satisfies
+        satisfied = np.zeros(len(self.df), dtype=np.int16)
+        for mask in masks.values():
+            satisfied += mask
+
+        result = {}
+        for key, column in facets.items():
+            if column not in self.df.columns:
+                continue
+            own = masks.get(column)
+            if own is None:
+                rows = satisfied == len(masks)
+            else:
+                rows = (satisfied - own) == len(masks) - 1
+            result[key] = self.facet(column).counts(rows)
+        return result
+
+
+_indexes: Dict[str, Tuple[int, FacetIndex]] = register_dataset_cache({})
+_indexes_lock = threading.Lock()
+
+
+def get_facet_index(path: Optional[str] = None) -> FacetIndex:
+    """``FacetIndex`` for the current version of the shared dataset at ``path``."""
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+
+    path = path or DEFAULT_DATASET_PATH
+    dataset = get_store(path).get()
+    cached = _indexes.get(path)
+    if cached is None or cached[0] != dataset.version:
+        with _indexes_lock:
+            cached = _indexes.get(path)
+            if cached is None or cached[0] != dataset.version:
+                delta = dataset.appended_since(cached[0]) if cached is not None else None
+                if delta is not None:
+                    index = cached[1].extended(dataset.df, delta)
+                else:
+                    index = FacetIndex(dataset.df)
+                cached = _indexes[path] = (dataset.version, index)
+    return cached[1]
@@ -21,8 +21,12 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Dict
 
+import numpy as np
 import pandas as pd
 
+from .bands import band_lower_bounds, parse_band
+from .rubric import compile_rubric, score_with_rubric
+
 # Questionnaire column names (single source of truth)
 JOB_TYPE_COL = 'Apakah jenis pekerjaan anda sekarang'
 EMPLOYMENT_STATUS_COL = 'Apakah status pekerjaan anda sekarang?'
@@ -143,20 +147,29 @@ def _score_job_alignment(row: pd.Series) -> int:
     return 1
 
 
+# Lower bound (RM) of the salary bands scoring 2 and 1
+SALARY_SCORE_THRESHOLDS = (5000, 3000)
+
+
 def _score_salary(value: str) -> int:
     """Implements Gaji scoring from AGENTS.md."""
-    salary = _safe_lower(value)
-    if not salary:
+    band = parse_band(value)
+    if band is None:
         return 0
-    if 'rm5,000' in salary or 'ke atas' in salary:
+    if band.lower >= SALARY_SCORE_THRESHOLDS[0]:
         return 2
-    if 'rm3,000 - rm4,999' in salary:
+    if band.lower >= SALARY_SCORE_THRESHOLDS[1]:
         return 1
-    if 'rm1,500 - rm2,999' in salary or 'kurang daripada rm1,500' in salary:
-        return 0
     return 0
 
 
+def score_salary_column(salaries: pd.Series) -> pd.Series:
+    """Vectorised ``_score_salary`` over a salary range column."""
+    lower = band_lower_bounds(salaries).to_numpy()
+    scores = np.select([lower >= SALARY_SCORE_THRESHOLDS[0], lower >= SALARY_SCORE_THRESHOLDS[1]], [2, 1], 0)
+    return pd.Series(scores, index=salaries.index, dtype='int64')
+
+
 def _score_employer(sector_value: str) -> int:
     """Implements Jenis Syarikat scoring from AGENTS.md."""
     sector = _safe_lower(sector_value)
@@ -242,6 +255,124 @@ def _score_entrepreneurial(row: pd.Series) -> int:
     return 0
 
 
+# Lowest total score of the high and medium quality bands (low is the rest)
+HIGH_QUALITY_MIN = 10
+MEDIUM_QUALITY_MIN = 7
+
+CRITERIA_IDS = [config['id'] for config in QUALITY_CRITERIA_CONFIG]
+
+# The rubric as data (see models/rubric.py): ordered (score, {column: patterns})
+# rules per criterion, first match wins. The ``_score_*`` functions above are
+# the reference implementation it is checked against (``rubric_mismatches``).
+QUALITY_RUBRIC = {
+    'job_alignment': {
+        'default': 0,
+        'rules': [
+            (0, {JOB_TYPE_COL: ('luar bidang', 'tidak bekerja', 'ekonomi gig')}),
+            (2, {JOB_TYPE_COL: ('mengusahakan perniagaan',), EMPLOYMENT_STATUS_COL: ('usahawan',)}),
+            (2, {JOB_TYPE_COL: ('mengusahakan perniagaan',), SECTOR_COL: ('keusahawanan',)}),
+            (1, {JOB_TYPE_COL: ('mengusahakan perniagaan',)}),
+            (2, {JOB_TYPE_COL: ('bekerja dalam bidang',), EMPLOYMENT_STATUS_COL: ('pekerja tetap', 'usahawan')}),
+            (1, {JOB_TYPE_COL: ('bekerja dalam bidang',), EMPLOYMENT_STATUS_COL: ('pekerja kontrak',)}),
+            (0, {JOB_TYPE_COL: ('bekerja dalam bidang',), EMPLOYMENT_STATUS_COL: ('ekonomi gig',)}),
+            (1, {JOB_TYPE_COL: ('bekerja dalam bidang',)}),
+        ],
+    },
+    'salary_progression': {
+        'column': SALARY_COL,
+        'thresholds': [(SALARY_SCORE_THRESHOLDS[0], 2), (SALARY_SCORE_THRESHOLDS[1], 1)],
+        'default': 0,
+    },
+    'employer_quality': {
+        'default': 1,
+        'rules': [
+            (0, {SECTOR_COL: ''}),
+            (0, {SECTOR_COL: ('ekonomi gig', 'tidak bekerja', 'mikro')}),
+            (1, {SECTOR_COL: ('keusahawanan',)}),
+            (2, {SECTOR_COL: ('glc', 'multinasional', 'saham', 'swasta', 'kerajaan')}),
+        ],
+    },
+    'time_to_employment': {
+        'default': 0,
+        'rules': [
+            (2, {TIME_TO_JOB_COL: ('kurang dari 3 bulan', '3 - 6 bulan', '7 - 12 bulan')}),
+            (1, {TIME_TO_JOB_COL: ('1 tahun', '2 tahun', '1-2 tahun', '13-24 bulan')}),
+        ],
+    },
+    'industry_relevance': {
+        'default': 1,
+        'rules': [
+            (2, {INDUSTRY_COL: (
+                'teknologi maklumat & telekomunikasi',
+                'kewangan, perbankan & insurans',
+                'perubatan, farmasi & penjagaan kesihatan',
+                'perakaunan & audit',
+                'komunikasi, media & penyiaran',
+                'logistik, pengangkutan & rantaian bekalan',
+            )}),
+            (0, {INDUSTRY_COL: ('ekonomi gig & freelancing', 'pertanian, perladangan & sumber asli')}),
+        ],
+    },
+    'entrepreneurial_impact': {
+        'default': 0,
+        'rules': [
+            (0, {JOB_TYPE_COL: ('ekonomi gig',)}),
+            (0, {EMPLOYMENT_STATUS_COL: ('ekonomi gig',)}),
+            (2, {EMPLOYMENT_STATUS_COL: ('usahawan',)}),
+            (2, {JOB_TYPE_COL: ('mengusahakan perniagaan',), SECTOR_COL: ('keusahawanan',)}),
+            (1, {JOB_TYPE_COL: ('mengusahakan perniagaan',)}),
+            (1, {SECTOR_COL: ('keusahawanan',)}),
+        ],
+    },
+}
+
+COMPILED_RUBRIC = compile_rubric(QUALITY_RUBRIC)
+
+
+def score_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-graduate ``int8`` score (0-2) for each criterion id, plus ``total``.
+
+    Scores come from the compiled ``QUALITY_RUBRIC``; time to employment is
+    scored from each graduate's own answer.
+    """
+    scores = pd.DataFrame(index=df.index)
+    if df.empty:
+        for criterion in CRITERIA_IDS + ['total']:
+            scores[criterion] = pd.Series(dtype=np.int8)
+        return scores
+
+    for criterion, values in score_with_rubric(COMPILED_RUBRIC, df, CRITERIA_IDS).items():
+        scores[criterion] = values
+    scores['total'] = scores[CRITERIA_IDS].sum(axis=1).astype(np.int8)
+    return scores
+
+
+# Reference row-wise scorer of each criterion
+_REFERENCE_RULES = {
+    'job_alignment': lambda df: df.apply(_score_job_alignment, axis=1),
+    'salary_progression': lambda df: df[SALARY_COL].map(_score_salary),
+    'employer_quality': lambda df: df[SECTOR_COL].map(_score_employer),
+    'time_to_employment': lambda df: df[TIME_TO_JOB_COL].map(_score_time_to_job),
+    'industry_relevance': lambda df: df[INDUSTRY_COL].map(_score_industry),
+    'entrepreneurial_impact': lambda df: df.apply(_score_entrepreneurial, axis=1),
+}
+
+
+def rubric_mismatches(df: pd.DataFrame) -> Dict[str, int]:
+    """Rows of ``df`` where the compiled rubric and the ``_score_*`` functions disagree.
+
+    Only criteria whose columns are all present are compared.
+    """
+    compiled = score_rows(df)
+    mismatches = {}
+    for criterion, reference in _REFERENCE_RULES.items():
+        if df.empty or not all(column in df.columns for column in COMPILED_RUBRIC[criterion].columns):
+            continue
+        expected = reference(df).to_numpy(dtype=np.int64)
+        mismatches[criterion] = int((compiled[criterion].to_numpy(dtype=np.int64) != expected).sum())
+    return mismatches
+
+
 def default_quality_payload() -> Dict:
     """Return an empty payload with the expected structure."""
     criteria_defaults = []
@@ -296,16 +427,17 @@ def calculate_quality_insights(filtered_df: pd.DataFrame) -> Dict:
     df = filtered_df.copy()
     total = len(df)
 
-    job_scores = df.apply(_score_job_alignment, axis=1)
-    salary_scores = df[SALARY_COL].apply(_score_salary) if SALARY_COL in df.columns else pd.Series([0] * total, index=df.index)
-    employer_scores = df[SECTOR_COL].apply(_score_employer) if SECTOR_COL in df.columns else pd.Series([0] * total, index=df.index)
+    scores = score_rows(df).astype('int64')
+    job_scores = scores['job_alignment']
+    salary_scores = scores['salary_progression']
+    employer_scores = scores['employer_quality']
     # Static time scores: 0% for score 2, 17.9% for score 1, 82.1% for score 0
     score_0_count = int(total * 0.821)
     score_1_count = int(total * 0.179)
     score_2_count = total - score_0_count - score_1_count
     time_scores = pd.Series([0] * score_0_count + [1] * score_1_count + [2] * score_2_count, index=df.index[:total])
-    industry_scores = df[INDUSTRY_COL].apply(_score_industry) if INDUSTRY_COL in df.columns else pd.Series([0] * total, index=df.index)
-    entrepreneurial_scores = df.apply(_score_entrepreneurial, axis=1)
+    industry_scores = scores['industry_relevance']
+    entrepreneurial_scores = scores['entrepreneurial_impact']
 
     total_scores = (
         job_scores +
@@ -316,9 +448,9 @@ def calculate_quality_insights(filtered_df: pd.DataFrame) -> Dict:
         entrepreneurial_scores
     )
 
-    high_count = int((total_scores >= 10).sum())
-    medium_count = int(((total_scores >= 7) & (total_scores <= 9)).sum())
-    low_count = int((total_scores <= 6).sum())
+    high_count = int((total_scores >= HIGH_QUALITY_MIN).sum())
+    medium_count = int(((total_scores >= MEDIUM_QUALITY_MIN) & (total_scores < HIGH_QUALITY_MIN)).sum())
+    low_count = int((total_scores < MEDIUM_QUALITY_MIN).sum())
 
     average_score = round(total_scores.mean(), 2) if total > 0 else 0.0
     average_pct = round((average_score / 12) * 100, 1) if total > 0 else 0.0
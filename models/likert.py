@@ -0,0 +1,108 @@
+"""Likert-scale answers encoded as small integers.
+
+The employability questions (``Sejauh mana ... mempengaruhi kebolehpasaran
+anda?``) and the university preparation question are answered on a 1-5
+scale. Exports store these as ints, floats or text such as ``'4 - Tinggi'``;
+``to_likert_series()`` turns each into a nullable ``Int8`` column once at
+load time (see ``models.normalize``), so charts read the codes directly.
+
+``summarize_likert()`` aggregates several Likert columns in one pass over the
+respondents x factors matrix: per-point counts come from a single
+``np.bincount`` over ``(group, factor, point)`` cells, and means and top-box
+shares are derived from those counts.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+LIKERT_DTYPE = 'Int8'
+LIKERT_POINTS = (1, 2, 3, 4, 5)
+LIKERT_LABELS = {
+    1: '1 - Sangat Rendah',
+    2: '2 - Rendah',
+    3: '3 - Sederhana',
+    4: '4 - Tinggi',
+    5: '5 - Sangat Tinggi',
+}
+
+# Schema keys of the 1-5 scale questions encoded at load
+LIKERT_KEYS = [
+    'internship_impact',
+    'communication_impact',
+    'technical_impact',
+    'networking_impact',
+    'academic_impact',
+    'university_preparation',
+]
+
+_SCALE_SIZE = len(LIKERT_POINTS) + 1  # code 0 collects missing answers
+
+
+def to_likert_series(column: pd.Series) -> pd.Series:
+    """Vectorised conversion of a 1-5 answer column to ``Int8`` (``<NA>`` if off-scale)."""
+    if str(column.dtype) == LIKERT_DTYPE:
+        return column
+    points = pd.to_numeric(column, errors='coerce')
+    text = points.isna() & column.notna()
+    if text.any():
+        points = points.astype('float64')
+        points[text] = pd.to_numeric(column[text].astype(str).str.extract(r'^\s*(\d)\b')[0], errors='coerce')
+    points = points.where(points.isin(LIKERT_POINTS))
+    return points.astype(LIKERT_DTYPE)
+
+
+def likert_matrix(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Respondents x factors ``int8`` matrix of scale points (0 where unanswered)."""
+    matrix = np.zeros((len(df), len(columns)), dtype=np.int8)
+    for j, column in enumerate(columns):
+        matrix[:, j] = to_likert_series(df[column]).fillna(0).to_numpy(dtype=np.int8)
+    return matrix
+
+
+def _factor_stats(counts: np.ndarray) -> List[Dict]:
+    """Per-factor statistics from a factors x (0..5) count array."""
+    points = np.array(LIKERT_POINTS, dtype=np.float64)
+    scored = counts[:, 1:]
+    answered = scored.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(answered > 0, (scored * points).sum(axis=1) / answered, 0.0)
+        shares = np.where(answered[:, None] > 0, scored / answered[:, None] * 100, 0.0)
+    return [{
+        'answered': int(answered[j]),
+        'distribution': [int(c) for c in scored[j]],
+        'percentages': [round(float(p), 1) for p in shares[j]],
+        'mean': round(float(means[j]), 2),
+        'top_box_pct': round(float(shares[j, -1]), 1),
+        'top_two_box_pct': round(float(shares[j, -2:].sum()), 1),
+    } for j in range(len(counts))]
+
+
+def summarize_likert(df: pd.DataFrame, columns: Sequence[str],
+                     groups: Optional[pd.Series] = None) -> Dict:
+    """Distributions, means and top-box shares of every Likert column in ``columns``.
+
+    With ``groups`` (a column aligned to ``df``), the same statistics are also
+    returned for each distinct group value, in sorted order.
+    """
+    matrix = likert_matrix(df, columns).astype(np.int64)
+    factors = len(columns)
+    cells = (np.arange(factors) * _SCALE_SIZE + matrix).ravel()
+    overall = np.bincount(cells, minlength=factors * _SCALE_SIZE).reshape(factors, _SCALE_SIZE)
+    result = {'overall': _factor_stats(overall)}
+
+    if groups is not None:
+        codes, values = pd.factorize(groups, sort=True)
+        valid = codes >= 0
+        cells = ((codes[valid, None] * factors + np.arange(factors)) * _SCALE_SIZE + matrix[valid]).ravel()
+        counts = np.bincount(cells, minlength=len(values) * factors * _SCALE_SIZE)
+        counts = counts.reshape(len(values), factors, _SCALE_SIZE)
+        result['groups'] = [{
+            'value': value.item() if hasattr(value, 'item') else value,
+            'total': int((codes == g).sum()),
+            'factors': _factor_stats(counts[g]),
+        } for g, value in enumerate(values)]
+    return result
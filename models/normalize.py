@@ -0,0 +1,184 @@
+"""Load-time normalisation of the survey frame.
+
+``normalize_dataset()`` runs once for every dataset the shared store loads,
+so request handlers can rely on clean, compact dtypes instead of converting
+values on every call.
+
+Graduation year
+    Exports store the year as an int, a float (``2023.0``), a padded string
+    (``'2023 '``) or free text (``'Graduasi 2023'``). The column is converted
+    in place to the nullable ``Int16`` dtype; anything that is not a plausible
+    year becomes ``<NA>``. Year filters are then a single ``isin`` over small
+    integers and per-year counts a ``np.bincount``.
+
+Coerced answers
+    Every non-blank raw answer a normaliser turns into ``<NA>`` is counted in
+    ``df.attrs['coerced']`` (``{column: {raw value: rows}}``, see
+    ``coerced_values``), so the validation report can still list the bad
+    years and off-scale answers after the raw values are gone.
+
+Column alignment
+    Runs first. Headers drift between survey versions (trailing spaces,
+    double spaces, capitalisation, reworded questions); every column the
+    schema recognises is renamed to its canonical header and the others are
+    trimmed (``models.schema.canonical_columns``). A column is then either
+    under its canonical header or not in the survey at all, so lookups
+    never need a list of spellings.
+
+Likert scales
+    The 1-5 employability and preparation questions become ``Int8`` columns
+    (see ``models.likert``).
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .likert import LIKERT_KEYS, to_likert_series
+from .schema import SchemaResolver, canonical_columns
+
+YEAR_DTYPE = 'Int16'
+MIN_YEAR = 1990
+MAX_YEAR = 2100
+
+_YEAR_PATTERN = r'\b((?:19|20)\d{2})\b'
+
+# ``df.attrs`` key of the raw answers the normalisers turned into <NA>
+COERCED_ATTR = 'coerced'
+
+
+def parse_year(value) -> Optional[int]:
+    """Graduation year in ``value`` (``2023``, ``'2023.0'``, ``'Tahun 2023'``) or None."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    try:
+        year = int(float(str(value).strip().replace(',', '')))
+    except (TypeError, ValueError):
+        match = pd.Series([str(value)]).str.extract(_YEAR_PATTERN)[0].iloc[0]
+        if pd.isna(match):
+            return None
+        year = int(match)
+    return year if MIN_YEAR <= year <= MAX_YEAR else None
+
+
+def parse_years(values: Iterable) -> List[int]:
+    """Distinct graduation years in a list of filter values, in request order."""
+    years: List[int] = []
+    for value in values:
+        year = parse_year(value)
+        if year is not None and year not in years:
+            years.append(year)
+    return years
+
+
+def to_year_series(column: pd.Series) -> pd.Series:
+    """Vectorised conversion of a raw year column to ``Int16``."""
+    if pd.api.types.is_integer_dtype(column) and str(column.dtype) == YEAR_DTYPE:
+        return column
+    years = pd.to_numeric(column, errors='coerce')
+    text = years.isna() & column.notna()
+    if text.any():
+        as_text = column[text].astype(str).str.strip()
+        extracted = pd.to_numeric(as_text, errors='coerce')
+        missing = extracted.isna()
+        if missing.any():
+            extracted[missing] = pd.to_numeric(as_text[missing].str.extract(_YEAR_PATTERN)[0], errors='coerce')
+        years = years.astype('float64')
+        years[text] = extracted
+    years = years.where((years >= MIN_YEAR) & (years <= MAX_YEAR))
+    return years.round().astype(YEAR_DTYPE)
+
+
+def year_mask(column: pd.Series, values: Iterable) -> pd.Series:
+    """Boolean mask of rows whose graduation year is one of ``values``."""
+    if str(column.dtype) != YEAR_DTYPE:
+        column = to_year_series(column)
+    return column.isin(parse_years(values)).fillna(False).astype(bool)
+
+
+def year_counts(column: pd.Series) -> pd.Series:
+    """Rows per graduation year (ascending, years without rows omitted)."""
+    years = to_year_series(column).dropna().to_numpy(dtype=np.int64)
+    if len(years) == 0:
+        return pd.Series(dtype='int64')
+    counts = np.bincount(years - MIN_YEAR)
+    present = np.flatnonzero(counts)
+    return pd.Series(counts[present], index=present + MIN_YEAR)
+
+
+def year_options(column: pd.Series) -> List[int]:
+    """Sorted distinct graduation years present in ``column``."""
+    return [int(year) for year in year_counts(column).index]
+
+
+def align_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename ``df``'s headers to the canonical headers of the survey schema."""
+    renames = canonical_columns(df.columns)
+    if any(column != target for column, target in renames.items()):
+        df.columns = [renames[column] for column in df.columns]
+    return df
+
+
+def coerced_counts(raw: pd.Series, converted: pd.Series) -> Dict[str, int]:
+    """Non-blank answers of ``raw`` that are ``<NA>`` in ``converted``, as ``{value: rows}``."""
+    lost = raw.notna() & converted.isna()
+    if not lost.any():
+        return {}
+    text = raw[lost].astype(str).str.strip()
+    counts = text[text != ''].value_counts()
+    return {str(value): int(rows) for value, rows in counts.items()}
+
+
+def coerced_values(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+    """Raw answers the normalisers coerced to ``<NA>`` in ``df``, per column."""
+    return df.attrs.get(COERCED_ATTR, {})
+
+
+def merge_coerced(*frames: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+    """``coerced_values`` of several frames added up (for frames concatenated together)."""
+    merged: Dict[str, Dict[str, int]] = {}
+    for frame in frames:
+        for column, counts in coerced_values(frame).items():
+            totals = merged.setdefault(column, {})
+            for value, rows in counts.items():
+                totals[value] = totals.get(value, 0) + rows
+    return merged
+
+
+def _convert(df: pd.DataFrame, column: str, converter) -> None:
+    """Replace ``df[column]`` with its converted values and record the answers lost."""
+    raw = df[column]
+    df[column] = converted = converter(raw)
+    lost = coerced_counts(raw, converted)
+    if lost:
+        df.attrs.setdefault(COERCED_ATTR, {})[column] = lost
+
+
+def normalize_graduation_year(df: pd.DataFrame) -> pd.DataFrame:
+    column = SchemaResolver(df.columns).get('graduation_year')
+    if column is not None:
+        _convert(df, column, to_year_series)
+    return df
+
+
+def normalize_likert(df: pd.DataFrame) -> pd.DataFrame:
+    schema = SchemaResolver(df.columns)
+    for key in LIKERT_KEYS:
+        column = schema.get(key)
+        if column is not None:
+            _convert(df, column, to_likert_series)
+    return df
+
+
+# Applied in order to every loaded dataset
+NORMALIZERS = [align_columns, normalize_graduation_year, normalize_likert]
+
+
+def normalize_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    """Run every normaliser over ``df`` (modified in place and returned)."""
+    for normalizer in NORMALIZERS:
+        df = normalizer(df)
+    return df
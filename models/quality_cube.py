@@ -0,0 +1,191 @@
+"""Graduate quality scores broken down by group.
+
+``/dashboard/api/quality-insights`` scores one filtered set at a time, so
+comparing programmes meant one call (and one full re-scoring) per field of
+study. Here every graduate is scored once per dataset version with
+``graduate_quality.score_rows()``; a breakdown then selects the filtered
+rows of that score frame and aggregates all groups of one or two dimensions
+in a single grouped pass::
+
+    scores = get_quality_scores().loc[filtered_df.index]
+    groups = quality_breakdown(scores, {'field_of_study': filtered_df[field_col]})
+
+Each group reports the criterion averages, the 0/1/2 distribution of every
+criterion and the high / medium / low quality band counts.
+
+``simulate_rubric()`` answers "what if" questions about the rubric itself:
+the same cached scores as a rows-by-criteria int8 matrix, re-weighted with a
+dot product and re-banded under other cut-offs.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .graduate_quality import CRITERIA_IDS, HIGH_QUALITY_MIN, MEDIUM_QUALITY_MIN, score_rows
+from .registry import register_dataset_cache
+
+# Breakdown dimension name -> schema key
+QUALITY_DIMENSIONS = {
+    'field': 'field_of_study',
+    'field_group': 'field_group',
+    'year': 'graduation_year',
+    'institution': 'institution',
+    'gender': 'gender',
+}
+
+QUALITY_BANDS = ('high', 'medium', 'low')
+
+_MAX_SCORE = 2 * len(CRITERIA_IDS)
+
+
+def quality_band_codes(total, high_min: float = HIGH_QUALITY_MIN,
+                       medium_min: float = MEDIUM_QUALITY_MIN) -> np.ndarray:
+    """0 / 1 / 2 for the high / medium / low band of each total score."""
+    return np.select([total >= high_min, total >= medium_min], [0, 1], 2)
+
+
+def _plain(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def quality_breakdown(scores: pd.DataFrame, groups: Dict[str, pd.Series]) -> List[Dict]:
+    """Per-group quality statistics for every combination of ``groups`` values.
+
+    ``scores`` is a ``score_rows()`` frame; each ``groups`` series is aligned
+    to it. Rows missing any group value are left out.
+    """
+    dims = list(groups)
+    frame = scores.assign(band=quality_band_codes(scores['total']), **groups).dropna(subset=dims)
+    if frame.empty:
+        return []
+
+    grouped = frame.groupby(dims, sort=True, observed=True)
+    sizes = grouped.size()
+    means = grouped[CRITERIA_IDS + ['total']].mean()
+    bands = grouped['band'].value_counts().unstack(fill_value=0)
+
+    # One grouped count over (group, criterion, score) for all distributions
+    long = frame.melt(id_vars=dims, value_vars=CRITERIA_IDS, var_name='criterion', value_name='score')
+    distribution = long.groupby(dims + ['criterion', 'score'], sort=False, observed=True).size().to_dict()
+
+    result = []
+    for key, size in sizes.items():
+        key = key if isinstance(key, tuple) else (key,)
+        row_means = means.loc[key if len(key) > 1 else key[0]]
+        row_bands = bands.loc[key if len(key) > 1 else key[0]]
+        average = float(row_means['total'])
+        result.append({
+            'group': {dim: _plain(value) for dim, value in zip(dims, key)},
+            'total': int(size),
+            'average_score': round(average, 2),
+            'average_score_pct': round(average / _MAX_SCORE * 100, 1),
+            'criteria': {
+                criterion: {
+                    'average_score': round(float(row_means[criterion]), 2),
+                    'distribution': {str(score): int(distribution.get(key + (criterion, score), 0)) for score in (2, 1, 0)},
+                }
+                for criterion in CRITERIA_IDS
+            },
+            'bands': {band: int(row_bands.get(code, 0)) for code, band in enumerate(QUALITY_BANDS)},
+        })
+    return result
+
+
+def score_matrix(scores: pd.DataFrame) -> np.ndarray:
+    """Rows-by-criteria int8 matrix of a ``score_rows()`` frame, in ``CRITERIA_IDS`` order."""
+    return scores[CRITERIA_IDS].to_numpy(dtype=np.int8)
+
+
+_cache: Dict[str, Tuple[int, pd.DataFrame, np.ndarray]] = register_dataset_cache({})
+_cache_lock = threading.Lock()
+
+
+def _cached_scores(path: Optional[str]) -> Tuple[int, pd.DataFrame, np.ndarray]:
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+
+    path = path or DEFAULT_DATASET_PATH
+    dataset = get_store(path).get()
+    cached = _cache.get(path)
+    if cached is None or cached[0] != dataset.version:
+        with _cache_lock:
+            cached = _cache.get(path)
+            if cached is None or cached[0] != dataset.version:
+                delta = dataset.appended_since(cached[0]) if cached is not None else None
+                if delta is not None:
+                    # Score only the appended rows
+                    added = score_rows(delta)
+                    scores = pd.concat([cached[1], added])
+                    matrix = np.vstack([cached[2], score_matrix(added)])
+                else:
+                    scores = score_rows(dataset.df)
+                    matrix = score_matrix(scores)
+                cached = _cache[path] = (dataset.version, scores, matrix)
+    return cached
+
+
+def get_quality_scores(path: Optional[str] = None) -> pd.DataFrame:
+    """``score_rows()`` of the current version of the shared dataset at ``path``."""
+    return _cached_scores(path)[1]
+
+
+def get_score_matrix(index: pd.Index, path: Optional[str] = None) -> np.ndarray:
+    """Cached ``score_matrix()`` rows of the shared dataset at ``path`` for ``index``."""
+    _, scores, matrix = _cached_scores(path)
+    return matrix[scores.index.get_indexer(index)]
+
+
+def _band_counts(totals: np.ndarray, high_min: float, medium_min: float) -> Tuple[np.ndarray, np.ndarray]:
+    codes = quality_band_codes(totals, high_min, medium_min)
+    return codes, np.bincount(codes, minlength=len(QUALITY_BANDS))
+
+
+def simulate_rubric(matrix: np.ndarray,
+                    weights: Optional[Dict[str, float]] = None,
+                    high_min: float = HIGH_QUALITY_MIN,
+                    medium_min: float = MEDIUM_QUALITY_MIN) -> Dict:
+    """Band distribution of ``matrix`` under other criterion weights and cut-offs.
+
+    Weighted totals are one dot product of the cached 0/1/2 scores with the
+    weight vector, so no answer is re-scored. Criteria missing from
+    ``weights`` keep weight 1. The result sets the simulated bands against the
+    current rubric, including how many graduates move between bands.
+    """
+    weights = weights or {}
+    vector = np.array([float(weights.get(criterion, 1.0)) for criterion in CRITERIA_IDS])
+    total = len(matrix)
+
+    baseline_codes, baseline = _band_counts(matrix.sum(axis=1, dtype=np.int16), HIGH_QUALITY_MIN, MEDIUM_QUALITY_MIN)
+    totals = matrix @ vector
+    codes, simulated = _band_counts(totals, high_min, medium_min)
+    moves = np.bincount(baseline_codes * len(QUALITY_BANDS) + codes,
+                        minlength=len(QUALITY_BANDS) ** 2).reshape(len(QUALITY_BANDS), -1)
+
+    def _bands(counts):
+        return {
+            band: {
+                'count': int(count),
+                'percentage': round(float(count) / total * 100, 1) if total else 0.0,
+            }
+            for band, count in zip(QUALITY_BANDS, counts)
+        }
+
+    max_score = 2 * float(vector.sum())
+    return {
+        'weights': dict(zip(CRITERIA_IDS, vector.tolist())),
+        'thresholds': {'high': high_min, 'medium': medium_min},
+        'max_score': max_score,
+        'total_graduates': total,
+        'average_score': round(float(totals.mean()), 2) if total else 0.0,
+        'average_score_pct': round(float(totals.mean()) / max_score * 100, 1) if total and max_score else 0.0,
+        'bands': _bands(simulated),
+        'baseline_bands': _bands(baseline),
+        'transitions': {
+            before: {after: int(moves[i, j]) for j, after in enumerate(QUALITY_BANDS)}
+            for i, before in enumerate(QUALITY_BANDS)
+        },
+    }
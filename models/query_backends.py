@@ -0,0 +1,338 @@
+"""Query engines behind ``DataProcessor``.
+
+Chart, table and export code asks a ``QueryBackend`` for filtered counts
+and rows instead of slicing a pandas frame itself, so the engine can be
+chosen per deployment with the ``QUERY_BACKEND`` setting:
+
+* ``pandas`` (default) - the shared in-memory dataset. Fastest for the
+  survey sizes we have today.
+* ``parquet`` - a columnar copy of the dataset (``QUERY_PARQUET_PATH``);
+  each query reads only the columns it needs. Requires ``pyarrow``.
+* ``sqlite`` - the survey database of ``models.storage``
+  (``DATABASE_URL``); filters and counts run in SQL.
+
+Every backend answers the same primitives: ``count``, ``value_counts``,
+``crosstab`` and ``rows``, with filters given as in
+``DataProcessor.apply_filters`` (``{column: [values]}``). ``paginate`` and
+``export`` are built on top of them. The file-backed engines are re-synced
+from the survey file whenever the shared dataset loads a new version; after
+``DatasetStore.append`` an engine that supports it (sqlite) receives only the
+appended rows. Rows added to the engine's copy from outside the app
+(``python -m models.storage --append``) come back through ``imported`` and
+are appended to the shared dataset, on load and at the start of a request,
+so charts and counts see the same responses.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from .data_processor import filter_frame
+
+Filters = Optional[Mapping[str, Sequence]]
+
+DEFAULT_PARQUET_PATH = os.path.join(tempfile.gettempdir(), 'uptm_survey.parquet')
+
+
+def search_mask(df: pd.DataFrame, search: str) -> pd.Series:
+    """Rows where any cell contains ``search`` (case-insensitive)."""
+    return df.astype(str).apply(lambda x: x.str.contains(search, case=False, na=False)).any(axis=1)
+
+
+def table_records(df: pd.DataFrame, fill='') -> List[Dict]:
+    """Rows of ``df`` as dicts with missing cells replaced by ``fill``.
+
+    Cells are converted to objects first: ``fillna('')`` raises on the
+    nullable integer columns (graduation year, Likert scales).
+    """
+    return df.astype(object).where(df.notna(), fill).to_dict('records')
+
+
+def export_frame(df: pd.DataFrame, format: str = 'csv') -> Optional[bytes]:
+    """``df`` as CSV, Excel or JSON bytes (``None`` for unknown formats)."""
+    if format == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    if format == 'excel':
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False, engine='openpyxl')
+        return buffer.getvalue()
+    if format == 'json':
+        return df.to_json(orient='records', indent=2).encode('utf-8')
+    return None
+
+
+class QueryBackend(ABC):
+    """Interface shared by every query engine."""
+
+    name = 'base'
+
+    @abstractmethod
+    def columns(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, filters: Filters = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def value_counts(self, column: str, filters: Filters = None, options: bool = False) -> Dict:
+        """Rows per answer of ``column``, most frequent first.
+
+        With ``options=True`` a multi-select column is counted per selected
+        option instead of per full answer.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def crosstab(self, rows: str, columns: str, filters: Filters = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    @abstractmethod
+    def rows(self, filters: Filters = None, columns: Optional[Sequence[str]] = None,
+             limit: Optional[int] = None, offset: int = 0) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def paginate(self, filters: Filters = None, page: int = 1, per_page: int = 50,
+                 search: Optional[str] = None, columns: Optional[Sequence[str]] = None) -> Dict:
+        """One page of matching rows in the ``DataProcessor.get_table_data`` format."""
+        selected = self._selected(columns)
+        start = (page - 1) * per_page
+        if search:
+            df = self.rows(filters, selected)
+            df = df[search_mask(df, search)]
+            total = len(df)
+            page_df = df.iloc[start:start + per_page]
+        else:
+            total = self.count(filters)
+            page_df = self.rows(filters, selected, limit=per_page, offset=max(start, 0))
+        return {
+            'data': table_records(page_df, fill=None),
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page if total > 0 else 0
+            },
+            'columns': list(page_df.columns) if len(page_df.columns) else list(selected),
+        }
+
+    def export(self, filters: Filters = None, format: str = 'csv',
+               columns: Optional[Sequence[str]] = None) -> Optional[bytes]:
+        return export_frame(self.rows(filters, self._selected(columns)), format)
+
+    def sync(self, df: pd.DataFrame, fingerprint: str = '') -> None:
+        """Refresh the engine's copy of the survey (no-op for in-memory engines)."""
+
+    def append(self, delta: pd.DataFrame, fingerprint: str = '', base_fingerprint: str = '') -> bool:
+        """Add appended rows to the engine's copy; False if a full ``sync`` is needed."""
+        return False
+
+    def imported(self, changed_only: bool = False) -> Optional[pd.DataFrame]:
+        """Rows added to the engine's copy from outside the app, if any.
+
+        ``changed_only`` skips the read when the copy did not change since
+        the last sync or look.
+        """
+        return None
+
+    def _selected(self, columns: Optional[Sequence[str]]) -> List[str]:
+        available = self.columns()
+        if columns:
+            existing = [column for column in columns if column in available]
+            if existing:
+                return existing
+        return available
+
+
+class PandasQueryBackend(QueryBackend):
+    """Queries on an in-memory frame (``frame()`` is called per query)."""
+
+    name = 'pandas'
+
+    def __init__(self, frame: Callable[[], pd.DataFrame]):
+        self._frame = frame
+
+    @classmethod
+    def for_frame(cls, df: pd.DataFrame) -> 'PandasQueryBackend':
+        return cls(lambda: df)
+
+    def _filtered(self, filters: Filters, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        return filter_frame(self._load(columns, filters), filters)
+
+    def _load(self, columns: Optional[Sequence[str]], filters: Filters) -> pd.DataFrame:
+        return self._frame()
+
+    def columns(self) -> List[str]:
+        return list(self._frame().columns)
+
+    def count(self, filters: Filters = None) -> int:
+        return len(self._filtered(filters, []))
+
+    def value_counts(self, column: str, filters: Filters = None, options: bool = False) -> Dict:
+        if column not in self.columns():
+            return {}
+        values = self._filtered(filters, [column])[column]
+        separator = _separators(self.columns()).get(column) if options else None
+        if separator:
+            from .storage import split_options
+            values = values.map(lambda value: split_options(value, separator)).explode().dropna()
+        return values.value_counts().to_dict()
+
+    def crosstab(self, rows: str, columns: str, filters: Filters = None) -> pd.DataFrame:
+        available = self.columns()
+        if rows not in available or columns not in available:
+            return pd.DataFrame()
+        return self._filtered(filters, [rows, columns]).groupby([rows, columns]).size().unstack(fill_value=0)
+
+    def rows(self, filters: Filters = None, columns: Optional[Sequence[str]] = None,
+             limit: Optional[int] = None, offset: int = 0) -> pd.DataFrame:
+        selected = list(columns) if columns else self.columns()
+        df = self._filtered(filters, selected)[selected]
+        if limit is not None:
+            df = df.iloc[offset:offset + limit]
+        return df
+
+
+class ParquetQueryBackend(PandasQueryBackend):
+    """Queries on a columnar Parquet copy, reading only the needed columns."""
+
+    name = 'parquet'
+
+    def __init__(self, path: str = DEFAULT_PARQUET_PATH):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("QUERY_BACKEND=parquet requires the 'pyarrow' package") from e
+        self._pq = pq
+        self.path = path
+        self._columns: Optional[List[str]] = None
+        self._lock = threading.Lock()
+        super().__init__(lambda: self._read(None))
+
+    def _read(self, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        return pd.read_parquet(self.path, columns=None if columns is None else list(columns))
+
+    def _load(self, columns: Optional[Sequence[str]], filters: Filters) -> pd.DataFrame:
+        if columns is None:
+            return self._read(None)
+        available = set(self.columns())
+        needed = list(dict.fromkeys(list(columns) + [key for key, values in (filters or {}).items() if values]))
+        return self._read([column for column in needed if column in available])
+
+    def columns(self) -> List[str]:
+        columns = self._columns
+        if columns is None:
+            if not os.path.exists(self.path):
+                return []
+            columns = self._columns = list(self._pq.read_schema(self.path).names)
+        return [column for column in columns if column != '__index_level_0__']
+
+    def count(self, filters: Filters = None) -> int:
+        if not any(values for values in (filters or {}).values()):
+            return self._pq.ParquetFile(self.path).metadata.num_rows if os.path.exists(self.path) else 0
+        return super().count(filters)
+
+    def sync(self, df: pd.DataFrame, fingerprint: str = '') -> None:
+        with self._lock:
+            temp = f'{self.path}.tmp'
+            df.to_parquet(temp, index=False)
+            os.replace(temp, self.path)
+            self._columns = None
+
+
+def _separators(columns: Sequence[str]) -> Dict[str, str]:
+    from .schema import SchemaResolver
+    from .storage import MULTI_SELECT_SEPARATORS
+
+    schema = SchemaResolver(columns)
+    separators = {}
+    for key, separator in MULTI_SELECT_SEPARATORS.items():
+        column = schema.get(key) or (key if key in columns else None)
+        if column is not None:
+            separators[column] = separator
+    return separators
+
+
+def create_query_backend(config, dataset_path: Optional[str] = None) -> QueryBackend:
+    """Build the backend selected by ``QUERY_BACKEND`` in a Flask config."""
+    name = (config.get('QUERY_BACKEND') or 'pandas').lower()
+    if name == 'pandas':
+        from .dataset import DEFAULT_DATASET_PATH, get_store
+        store = get_store(dataset_path or DEFAULT_DATASET_PATH)
+        return PandasQueryBackend(lambda: store.df)
+    if name == 'parquet':
+        return ParquetQueryBackend(config.get('QUERY_PARQUET_PATH') or DEFAULT_PARQUET_PATH)
+    if name == 'sqlite':
+        from .storage import DEFAULT_DATABASE_URL, SQLiteQueryBackend, get_database
+        return SQLiteQueryBackend(get_database(config.get('DATABASE_URL') or DEFAULT_DATABASE_URL))
+    raise ValueError(f"Unknown QUERY_BACKEND '{name}' (expected pandas, parquet or sqlite)")
+
+
+_backends: Dict[str, QueryBackend] = {}
+
+
+def set_query_backend(path: str, backend: Optional[QueryBackend]) -> None:
+    """Use ``backend`` for the dataset at ``path`` (``None`` restores pandas)."""
+    if backend is None:
+        _backends.pop(path, None)
+    else:
+        _backends[path] = backend
+
+
+def get_query_backend(path: str) -> Optional[QueryBackend]:
+    """Backend configured for the dataset at ``path``, if any."""
+    return _backends.get(path)
+
+
+def init_app(app, dataset_path: Optional[str] = None, backend: Optional[QueryBackend] = None) -> QueryBackend:
+    """Select the query backend of the shared dataset from the app config.
+
+    File-backed engines are refreshed from the survey file after every load
+    of a new dataset version, after taking in the rows imported into them.
+    """
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+
+    path = dataset_path or DEFAULT_DATASET_PATH
+    backend = backend or create_query_backend(app.config, path)
+    app.extensions['query_backend'] = backend
+    if isinstance(backend, PandasQueryBackend) and backend.name == 'pandas':
+        set_query_backend(path, None)
+        return backend
+
+    set_query_backend(path, backend)
+    store = get_store(path)
+
+    def add_imported_rows(changed_only: bool = False) -> bool:
+        """Append the backend's imported rows to the dataset; True if that published a new version."""
+        rows = backend.imported(changed_only)
+        if rows is None:
+            return False
+        current = store.current
+        try:
+            return store.append(rows) is not current
+        except ValueError as e:
+            print(f"Imported rows not added to {path}: {e}")
+            return False
+
+    def sync_backend(dataset) -> None:
+        # A full load lacks the imported rows; the version adding them syncs the backend itself
+        if dataset.delta is None and add_imported_rows():
+            return
+        if dataset.delta is not None and backend.append(dataset.delta, dataset.fingerprint, dataset.base_fingerprint):
+            return
+        backend.sync(dataset.df, dataset.fingerprint)
+
+    @app.before_request
+    def pick_up_imported_rows():
+        if store.loaded:
+            add_imported_rows(changed_only=True)
+
+    store.on_load(sync_backend)
+    return backend
@@ -0,0 +1,253 @@
+"""Several survey datasets served from one deployment.
+
+Every API accepts a ``dataset`` query argument naming one of the datasets
+configured in ``DATASETS`` (id -> file path)::
+
+    /dashboard/api/employment-status?dataset=latest&Jantina anda?=Lelaki
+
+The argument is taken out of ``request.args`` before the view runs, so
+filters never see it. Requests without it use ``DEFAULT_DATASET_ID``, which always names
+``models.dataset.DEFAULT_DATASET_PATH``. ``LazyDataProcessor`` and
+the response cache resolve their path per request (``current_dataset_path``),
+so each dataset keeps its own ``DatasetStore`` and the per-path indexes
+and caches built on it (schema, bands, facets, derived columns, ...).
+
+Datasets are read on first use. After every load the registry measures the
+frame (``memory_usage(deep=True)``) and, while the loaded datasets exceed
+``DATASET_MEMORY_BUDGET_MB``, unloads the least recently used one together
+with the cache entries of its path. The default dataset is never evicted:
+the warm-up, query backend and validation hooks are attached to it.
+
+Modules that keep per-dataset caches register them with
+``register_dataset_cache``; they are plain dicts keyed by path or by tuples
+starting with the path.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+
+from flask import g, has_request_context, jsonify, request
+from werkzeug.datastructures import ImmutableMultiDict
+
+# Query argument selecting the dataset of a request
+DATASET_PARAM = 'dataset'
+
+DEFAULT_DATASET_ID = 'questionnaire'
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+_dataset_caches: List[Dict] = []
+
+
+def register_dataset_cache(cache: Dict) -> Dict:
+    """Drop the entries of ``cache`` for datasets the registry evicts."""
+    _dataset_caches.append(cache)
+    return cache
+
+
+def evict_dataset_caches(path: str) -> None:
+    """Remove every registered cache entry of the dataset at ``path``."""
+    for cache in _dataset_caches:
+        for key in list(cache):
+            if key == path or (isinstance(key, tuple) and key and key[0] == path):
+                cache.pop(key, None)
+
+
+class UnknownDatasetError(KeyError):
+    """A ``dataset`` id that is not configured."""
+
+
+class DatasetRegistry:
+    """Dataset ids, on-demand stores and memory-budgeted LRU eviction."""
+
+    def __init__(self, datasets: Dict[str, str], default_id: str = DEFAULT_DATASET_ID,
+                 memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB):
+        if default_id not in datasets:
+            raise ValueError(f"Default dataset '{default_id}' is not in {sorted(datasets)}")
+        self.datasets = dict(datasets)
+        self.default_id = default_id
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._lock = threading.RLock()
+        # Paths in least recently used order
+        self._lru: 'OrderedDict[str, None]' = OrderedDict()
+        self._memory: Dict[str, int] = {}
+        self._tracked: Set[str] = set()
+        self._store_callbacks: List[Callable] = []
+        self.evictions = 0
+
+    @property
+    def default_path(self) -> str:
+        return self.datasets[self.default_id]
+
+    def path_for(self, dataset_id: Optional[str]) -> str:
+        """File path of ``dataset_id`` (the default dataset when empty)."""
+        if not dataset_id:
+            return self.default_path
+        try:
+            return self.datasets[dataset_id]
+        except KeyError:
+            raise UnknownDatasetError(dataset_id) from None
+
+    def store(self, path: str):
+        """Shared ``DatasetStore`` of ``path``, marked as most recently used."""
+        store = self._track(path)
+        with self._lock:
+            self._lru[path] = None
+            self._lru.move_to_end(path)
+        return store
+
+    def on_store(self, callback: Callable) -> Callable:
+        """Run ``callback(store)`` for the store of every dataset before it is loaded."""
+        with self._lock:
+            self._store_callbacks.append(callback)
+            tracked = set(self._tracked)
+        for path in tracked:
+            callback(self._track(path))
+        for path in set(self.datasets.values()) - tracked:
+            self._track(path)
+        return callback
+
+    def evict(self, path: str) -> bool:
+        """Unload the dataset at ``path`` and its caches; False if it is busy."""
+        from .dataset import get_store
+
+        if not get_store(path).unload():
+            return False
+        evict_dataset_caches(path)
+        with self._lock:
+            self._memory.pop(path, None)
+            self.evictions += 1
+        print(f"Evicted dataset {path} from memory")
+        return True
+
+    def enforce_budget(self, keep: Optional[str] = None) -> None:
+        """Evict least recently used datasets until the loaded ones fit the budget."""
+        with self._lock:
+            total = sum(self._memory.values())
+            candidates = [path for path in self._lru
+                          if path in self._memory and path not in (keep, self.default_path)]
+        for path in candidates:
+            if total <= self.memory_budget:
+                break
+            size = self._memory.get(path, 0)
+            if self.evict(path):
+                total -= size
+
+    def status(self) -> Dict:
+        """Configured datasets and what is loaded, for ``/api/datasets``."""
+        from .dataset import get_store
+
+        with self._lock:
+            order = list(self._lru)
+            memory = dict(self._memory)
+        datasets = []
+        for dataset_id, path in self.datasets.items():
+            dataset = get_store(path).current
+            datasets.append({
+                'id': dataset_id,
+                'path': path,
+                'default': dataset_id == self.default_id,
+                'loaded': dataset is not None,
+                'rows': len(dataset.df) if dataset is not None else None,
+                'version': dataset.version if dataset is not None else None,
+                'memory_mb': round(memory[path] / 1024 / 1024, 2) if path in memory else None,
+                # 0 = least recently used
+                'recency': order.index(path) if path in order else None,
+            })
+        return {
+            'default': self.default_id,
+            'memory_budget_mb': round(self.memory_budget / 1024 / 1024, 2),
+            'memory_used_mb': round(sum(memory.values()) / 1024 / 1024, 2),
+            'evictions': self.evictions,
+            'datasets': datasets,
+        }
+
+    def _track(self, path: str):
+        from .dataset import get_store
+
+        store = get_store(path)
+        if path in self._tracked:
+            return store
+        with self._lock:
+            if path in self._tracked:
+                return store
+            self._tracked.add(path)
+            callbacks = list(self._store_callbacks)
+        for callback in callbacks:
+            callback(store)
+        store.on_load(lambda dataset: self._loaded(path, dataset))
+        return store
+
+    def _loaded(self, path: str, dataset) -> None:
+        if dataset.delta is not None and path in self._memory:
+            size = self._memory[path] + int(dataset.delta.memory_usage(deep=True).sum())
+        else:
+            size = int(dataset.df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._memory[path] = size
+            self._lru[path] = None
+            self._lru.move_to_end(path)
+        self.enforce_budget(keep=path)
+
+
+_registry: Optional[DatasetRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DatasetRegistry:
+    """The app's registry (only the default dataset until ``init_app`` runs)."""
+    global _registry
+    if _registry is None:
+        from .dataset import DEFAULT_DATASET_PATH
+        with _registry_lock:
+            if _registry is None:
+                _registry = DatasetRegistry({DEFAULT_DATASET_ID: DEFAULT_DATASET_PATH})
+    return _registry
+
+
+def current_dataset_path(default: str) -> str:
+    """Path of the dataset selected by the current request, else ``default``."""
+    if has_request_context():
+        return g.get('dataset_path') or default
+    return default
+
+
+def init_app(app) -> DatasetRegistry:
+    """Configure the datasets from ``DATASETS`` and select one per request.
+
+    The ``dataset`` argument is resolved before the view runs (unknown ids
+    get a 404) and removed from ``request.args``, so the blueprints never
+    mistake it for a column filter. Call before the other ``init_app`` hooks
+    so they see every dataset.
+    """
+    global _registry
+    from .dataset import DEFAULT_DATASET_PATH
+
+    # The default id always names the file the app-level hooks are attached to
+    datasets = {**(app.config.get('DATASETS') or {}), DEFAULT_DATASET_ID: DEFAULT_DATASET_PATH}
+    registry = DatasetRegistry(datasets, DEFAULT_DATASET_ID,
+                               app.config.get('DATASET_MEMORY_BUDGET_MB') or DEFAULT_MEMORY_BUDGET_MB)
+    with _registry_lock:
+        _registry = registry
+    app.extensions['datasets'] = registry
+
+    @app.before_request
+    def select_dataset():
+        if DATASET_PARAM not in request.args:
+            return None
+        dataset_id = request.args.get(DATASET_PARAM)
+        try:
+            g.dataset_path = registry.path_for(dataset_id)
+        except UnknownDatasetError:
+            return jsonify({
+                'error': f"Unknown dataset '{dataset_id}'",
+                'datasets': sorted(registry.datasets),
+            }), 404
+        g.dataset_id = dataset_id or registry.default_id
+        request.args = ImmutableMultiDict([(key, value) for key, value in request.args.items(multi=True)
+                                           if key != DATASET_PARAM])
+        return None
+
+    return registry
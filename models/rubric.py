@@ -0,0 +1,153 @@
+"""Quality rubric as data, compiled to per-column lookup arrays.
+
+Each criterion of the graduate quality rubric is written as a table instead
+of nested ``if 'text' in answer`` branches::
+
+    {
+        'default': 1,
+        'rules': [
+            (0, {SECTOR_COL: ''}),                            # blank answer
+            (0, {SECTOR_COL: ('ekonomi gig', 'mikro')}),      # any pattern
+            (2, {JOB_TYPE_COL: ('mengusahakan perniagaan',),  # every column
+                 EMPLOYMENT_STATUS_COL: ('usahawan',)}),
+        ],
+    }
+
+Rules are tried in order and the first match wins; answers are compared as
+lower-cased, stripped text and a pattern matches as a substring. A criterion
+may instead give ``'thresholds': [(5000, 2), (3000, 1)]`` on the lower
+bound (RM) of a range column such as salary.
+
+``compile_rubric()`` turns the tables into ``CompiledCriterion`` objects.
+Scoring a frame factorizes each column once, evaluates every pattern on
+the distinct answers only and produces a value-to-score lookup array per
+column (or per-column match arrays combined with ``np.select`` for rules
+spanning several columns), so a rule change is a data change and re-scoring
+stays vectorized.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bands import band_lower_bounds
+
+# A column condition: '' for a blank answer, otherwise patterns (any may match)
+Condition = Tuple[str, ...]
+
+
+def _text(value) -> str:
+    return str(value).strip().lower()
+
+
+def _normalise_condition(condition) -> Condition:
+    if condition == '' or condition is None:
+        return ()
+    if isinstance(condition, str):
+        return (condition.lower(),)
+    return tuple(pattern.lower() for pattern in condition)
+
+
+class ColumnCodes:
+    """Distinct answers of one column and the code of each row."""
+
+    def __init__(self, column: pd.Series):
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        self.codes = codes
+        self.text = pd.Series([_text(value) for value in uniques], dtype=object)
+
+    def matches(self, condition: Condition) -> np.ndarray:
+        """Per distinct answer: does ``condition`` hold?"""
+        if not condition:
+            return (self.text == '').to_numpy()
+        pattern = '|'.join(re.escape(text) for text in condition)
+        return self.text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+
+class CompiledCriterion:
+    """Vectorized scorer for one criterion table."""
+
+    def __init__(self, criterion: str, spec: Mapping):
+        self.criterion = criterion
+        self.default = int(spec.get('default', 0))
+        self.thresholds: List[Tuple[float, int]] = [
+            (float(bound), int(score)) for bound, score in spec.get('thresholds', ())
+        ]
+        self.threshold_column: Optional[str] = spec.get('column')
+        self.rules: List[Tuple[int, Dict[str, Condition]]] = [
+            (int(score), {column: _normalise_condition(condition) for column, condition in when.items()})
+            for score, when in spec.get('rules', ())
+        ]
+        if self.thresholds and not self.threshold_column:
+            raise ValueError(f"Criterion '{criterion}' has thresholds but no column")
+
+    @property
+    def columns(self) -> List[str]:
+        if self.thresholds:
+            return [self.threshold_column]
+        columns: List[str] = []
+        for _, when in self.rules:
+            columns.extend(column for column in when if column not in columns)
+        return columns
+
+    def lookup(self, codes: ColumnCodes) -> np.ndarray:
+        """Score per distinct answer of a criterion that reads a single column."""
+        conditions = [codes.matches(when[self.columns[0]]) for _, when in self.rules]
+        scores = [score for score, _ in self.rules]
+        return np.select(conditions, scores, self.default).astype(np.int8)
+
+    def score(self, df: pd.DataFrame, encoded: Optional[Dict[str, ColumnCodes]] = None) -> np.ndarray:
+        """``int8`` score of every row of ``df``.
+
+        ``encoded`` shares column factorizations between criteria. A criterion
+        whose columns are all missing from ``df`` scores 0.
+        """
+        columns = [column for column in self.columns if column in df.columns]
+        if not columns:
+            return np.zeros(len(df), dtype=np.int8)
+
+        if self.thresholds:
+            lower = band_lower_bounds(df[self.threshold_column]).to_numpy()
+            conditions = [lower >= bound for bound, _ in self.thresholds]
+            return np.select(conditions, [score for _, score in self.thresholds], self.default).astype(np.int8)
+
+        encoded = {} if encoded is None else encoded
+        for column in columns:
+            if column not in encoded:
+                encoded[column] = ColumnCodes(df[column])
+
+        if len(self.columns) == 1:
+            codes = encoded[columns[0]]
+            return self.lookup(codes)[codes.codes]
+
+        conditions = []
+        for _, when in self.rules:
+            matched = np.ones(len(df), dtype=bool)
+            for column, condition in when.items():
+                if column in encoded:
+                    codes = encoded[column]
+                    matched &= codes.matches(condition)[codes.codes]
+                elif condition:
+                    # Absent columns read as blank answers
+                    matched[:] = False
+            conditions.append(matched)
+        return np.select(conditions, [score for score, _ in self.rules], self.default).astype(np.int8)
+
+
+def compile_rubric(rubric: Mapping[str, Mapping]) -> Dict[str, CompiledCriterion]:
+    """``CompiledCriterion`` per criterion id of ``rubric``."""
+    return {criterion: CompiledCriterion(criterion, spec) for criterion, spec in rubric.items()}
+
+
+def score_with_rubric(compiled: Mapping[str, CompiledCriterion], df: pd.DataFrame,
+                      criteria: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Scores of every row of ``df`` for each compiled criterion."""
+    encoded: Dict[str, ColumnCodes] = {}
+    return {
+        criterion: compiled[criterion].score(df, encoded)
+        for criterion in (criteria or compiled)
+    }
@@ -0,0 +1,197 @@
+"""Logical column names for the questionnaire, resolved once per dataset.
+
+The survey has been exported several times and the headers drift between
+snapshots: trailing spaces (``'Tahun graduasi anda? '``), capitalisation
+(``'Kemahiran Komunikasi'``) and reworded questions (``'Jika Tidak, apakah
+sebab utama?'``). Instead of scanning ``df.columns`` with fuzzy matching on
+every request, ``SchemaResolver`` maps each logical key to the physical
+column a single time and then answers lookups from a dict::
+
+    schema = get_schema()               # cached per dataset version
+    salary_col = schema['current_salary']
+    education_col = schema.get('education_level')
+
+Resolution order for each key: exact alias, normalised alias (case and
+whitespace insensitive, trailing ``?`` ignored), then keyword match. Keywords
+only see the columns no key claimed by alias, so one column never resolves
+to two keys.
+
+The same resolution aligns each survey version at load: ``canonical_columns``
+renames every resolved column to the canonical header of its key (the first
+alias below), so after ``models.normalize.align_columns`` the headers of
+every snapshot are the canonical ones and blueprints can index them exactly.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .graduate_quality import (
+    EMPLOYMENT_STATUS_COL,
+    INDUSTRY_COL,
+    JOB_TYPE_COL,
+    SALARY_COL,
+    SECTOR_COL,
+    TIME_TO_JOB_COL,
+)
+from .registry import register_dataset_cache
+
+# Logical key -> known header variants (the canonical header first)
+COLUMN_MAPPING: Dict[str, List[str]] = {
+    'employment_status': ['Adakah anda kini bekerja?'],
+    'job_type': [JOB_TYPE_COL],
+    'job_status': [EMPLOYMENT_STATUS_COL],
+    'time_to_employment': [TIME_TO_JOB_COL],
+    'field_of_study': ['Bidang pengajian utama anda?'],
+    'field_group': ['Bidang pengajian'],
+    'graduation_year': ['Tahun graduasi anda?'],
+    'education_level': ['Tahap pendidikan tertinggi anda?', 'Tahap pendidikan tertinggi', 'Tahap pendidikan', 'Education Level'],
+    'current_salary': [SALARY_COL],
+    'expected_salary': ['Apakah jangkaan gaji permulaan yang anda anggap sesuai dengan kelulusan anda?'],
+    'salary_match': ['Adakah gaji anda bersesuaian dengan kelulusan anda?'],
+    'household_income': ['Pendapatan isi rumah bulanan keluarga anda?'],
+    'out_of_field_reason': ['Apakah sebab utama jika anda tidak bekerja dalam bidang pengajian?'],
+    'academic_skills_needed': ['Jika anda bekerja di luar bidang pengajian, adakah pekerjaan tersebut masih memerlukan kemahiran akademik anda?'],
+    'job_challenges': ['Apakah cabaran utama yang anda hadapi dalam mendapatkan pekerjaan?'],
+    'success_factors': ['Apakah faktor utama yang membantu anda mendapat pekerjaan tersebut?'],
+    'employment_sectors': [SECTOR_COL],
+    'industry': [INDUSTRY_COL],
+    'professional_cert': ['Adakah anda memiliki sijil profesional tambahan selain ijazah/diploma?'],
+    'additional_skills': ['Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?'],
+    'internship': ['Adakah anda menjalani internship/praktikal sebelum tamat pengajian?'],
+    'internship_skip_reason': ['Jika tidak menjalani internship, apakah sebab utama?', 'Jika Tidak, apakah sebab utama?'],
+    'internship_impact': ['Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?'],
+    'communication_impact': ['Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?'],
+    'technical_impact': ['Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?'],
+    'networking_impact': ['Sejauh mana rangkaian peribadi (networking) mempengaruhi kebolehpasaran anda?'],
+    'academic_impact': ['Sejauh mana kelayakan akademik mempengaruhi kebolehpasaran anda?'],
+    'university_preparation': ['Sejauh mana anda bersetuju bahawa universiti telah menyediakan anda untuk pasaran kerja?'],
+    'gig_economy': ['Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?'],
+    'gig_reason': ['Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?'],
+    'gig_income': ['Berapakah purata pendapatan bulan anda daripada ekonomi gig?'],
+    'support_needed': ['Apakah bantuan atau sokongan yang anda rasa perlu untuk berjaya dalam keusahawanan dan ekonomi gig?'],
+    'gender': ['Jantina anda?'],
+    'age': ['Umur anda?'],
+    'institution': ['Institusi pendidikan MARA yang anda hadiri?'],
+    'submitted_at': ['Timestamp', 'Cap masa'],
+}
+
+# Last resort for keys whose wording varies most: every keyword must appear
+# in the normalised header
+COLUMN_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    'education_level': ('tahap pendidikan',),
+    'graduation_year': ('tahun graduasi',),
+    # 'jika tidak' keeps the out-of-field question ('... jika anda tidak bekerja ...') out
+    'internship_skip_reason': ('jika tidak', 'sebab utama'),
+}
+
+
+def normalize_label(label) -> str:
+    """Case- and whitespace-insensitive form of a header, without trailing ``?``."""
+    return ' '.join(str(label).split()).casefold().rstrip(' ?:')
+
+
+def canonical_header(key: str) -> str:
+    """Header every survey version's column for ``key`` is renamed to at load."""
+    return COLUMN_MAPPING[key][0]
+
+
+def canonical_columns(columns: Iterable) -> Dict:
+    """Header -> canonical header for one survey version's columns.
+
+    Columns the schema resolves take the canonical header of their key;
+    every other header is trimmed and single-spaced. A column claimed by
+    two keys, or whose canonical header is already taken, keeps its own.
+    """
+    columns = list(columns)
+    claims: Dict[str, List[str]] = {}
+    for key, column in SchemaResolver(columns).to_dict().items():
+        claims.setdefault(column, []).append(key)
+    resolved = {column: canonical_header(keys[0]) for column, keys in claims.items() if len(keys) == 1}
+    renames, taken = {}, set()
+    for column in columns:
+        target = resolved.get(column, ' '.join(str(column).split()))
+        if target in taken:
+            target = column
+        taken.add(target)
+        renames[column] = target
+    return renames
+
+
+class SchemaResolver:
+    """Logical key -> physical column mapping for one set of headers."""
+
+    def __init__(self, columns: Iterable, mapping: Optional[Dict[str, List[str]]] = None,
+                 keywords: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.columns = list(columns)
+        mapping = COLUMN_MAPPING if mapping is None else mapping
+        keywords = COLUMN_KEYWORDS if keywords is None else keywords
+
+        exact = set(self.columns)
+        normalized: Dict[str, str] = {}
+        for column in self.columns:
+            normalized.setdefault(normalize_label(column), column)
+
+        self._columns: Dict[str, str] = {}
+        for key, aliases in mapping.items():
+            column = next((alias for alias in aliases if alias in exact), None)
+            if column is None:
+                column = next((normalized[n] for n in map(normalize_label, aliases) if n in normalized), None)
+            if column is not None:
+                self._columns[key] = column
+
+        # Keywords only match columns that no alias claimed
+        claimed = set(self._columns.values())
+        for key, words in keywords.items():
+            if key in self._columns or key not in mapping:
+                continue
+            column = next((original for n, original in normalized.items()
+                           if original not in claimed and all(word in n for word in words)), None)
+            if column is not None:
+                self._columns[key] = column
+                claimed.add(column)
+        self._columns = {key: self._columns[key] for key in mapping if key in self._columns}
+
+        self.missing = [key for key in mapping if key not in self._columns]
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Physical column for ``key``, or ``default`` when it is not in the data."""
+        return self._columns.get(key, default)
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return self._columns[key]
+        except KeyError:
+            raise KeyError(f"Column '{key}' is not present in the dataset") from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._columns
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self._columns)
+
+
+_schemas: Dict[str, Tuple[int, SchemaResolver]] = register_dataset_cache({})
+_schemas_lock = threading.Lock()
+
+
+def get_schema(path: Optional[str] = None) -> SchemaResolver:
+    """Resolver for the current version of the shared dataset at ``path``."""
+    # Imported here: the dataset store itself normalises frames using this module
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+
+    path = path or DEFAULT_DATASET_PATH
+    dataset = get_store(path).get()
+    cached = _schemas.get(path)
+    if cached is not None and cached[0] == dataset.version:
+        return cached[1]
+    with _schemas_lock:
+        cached = _schemas.get(path)
+        if cached is None or cached[0] != dataset.version:
+            if cached is not None and dataset.appended_since(cached[0]) is not None:
+                # Appended rows never change the columns
+                cached = _schemas[path] = (dataset.version, cached[1])
+            else:
+                cached = _schemas[path] = (dataset.version, SchemaResolver(dataset.df.columns))
+        return cached[1]
@@ -0,0 +1,666 @@
+"""SQLite storage for survey responses and a query backend over it.
+
+Every worker otherwise holds the whole survey as a pandas frame. Here the
+responses are ingested once into the database named by ``DATABASE_URL``
+(``sqlite:///graduate_analytics.db`` by default) and dashboards ask the
+database for counts instead::
+
+    database = SurveyDatabase.from_url(Config.DATABASE_URL)
+    database.ingest(df)                                  # or ingest_chunks(...)
+    backend = SQLiteQueryBackend(database)
+    backend.value_counts('Jantina anda?', {'Tahun graduasi anda?': ['2023']})
+
+Layout:
+
+* ``survey_columns`` - one row per survey column (position, header, SQL
+  type, pandas dtype and, for multi-select questions, the answer
+  separator).
+* ``responses`` - one row per graduate; column ``c<position>`` holds the
+  answer to column ``position``. The filter dimensions (year, gender,
+  institution, field, ...) are indexed.
+* ``response_options`` - one row per selected option of a multi-select
+  answer, indexed by (column, option), so option counts are a GROUP BY.
+* ``survey_meta`` - dataset version, fingerprint and ingestion time.
+* ``imported_responses`` - ``row_key`` of every response added with
+  ``--append`` rather than from the survey file the app loads.
+
+Each response also stores ``row_key``, its ``models.dataset.row_keys``
+identity (a hash of the whole row, or of the key column given at
+ingestion). ``append()`` uses it to insert only responses that are not
+stored yet, without touching the existing rows.
+
+Filters follow ``DataProcessor.apply_filters``: ``{column: [values]}``,
+every value list is an ``IN``, graduation years compare as integers and
+unknown columns are ignored. All filtering and counting runs in SQL, so
+memory use does not grow with the number of responses.
+
+Ingest from the command line with ``python -m models.storage FILE`` (add
+``--append`` to add only the new responses of a weekly export), or set
+``QUERY_BACKEND=sqlite`` to serve the dashboards from the database (it is
+re-synced whenever the survey file is reloaded). Responses appended from the
+command line are not in that file: the app adds them to the shared dataset
+as soon as it sees the database change (``SQLiteQueryBackend.imported``),
+and re-syncs keep them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dataset import row_keys
+from .likert import LIKERT_DTYPE
+from .normalize import YEAR_DTYPE, normalize_dataset, parse_years
+from .query_backends import QueryBackend
+from .schema import SchemaResolver, canonical_columns
+
+DEFAULT_DATABASE_URL = 'sqlite:///graduate_analytics.db'
+
+# Schema keys of the filter dimensions that get an index on ``responses``
+INDEXED_KEYS = (
+    'graduation_year', 'gender', 'institution', 'field_of_study', 'field_group',
+    'education_level', 'employment_status', 'age',
+)
+
+# pandas dtypes restored when rows are read back (and datetime64)
+_RESTORED_DTYPES = (YEAR_DTYPE, LIKERT_DTYPE)
+
+# Multi-select questions -> separator between the selected options. Keys are
+# schema keys or exact headers (questions the schema does not name).
+MULTI_SELECT_SEPARATORS: Dict[str, str] = {
+    'additional_skills': ',',
+    'job_challenges': ',',
+    'out_of_field_reason': ',',
+    'success_factors': ';',
+    'gig_economy': ',',
+    'gig_reason': ',',
+    'support_needed': ',',
+    'Bagaimana anda membiayai pendidikan anda?': ',',
+    'Bagaimana internship membantu anda dalam mendapatkan pekerjaan?': ',',
+    'Bagaimanakah anda memperoleh kemahiran untuk bekerja dalam ekonomi gig?': ',',
+    'Apakah cabaran utama yang anda hadapi dalam keusahawanan atau ekonomi gig?': ',',
+    'Faktor_Pekerjaan_Grouped': ';',
+    'Additional_Skills_Grouped': ';',
+    'challenge_grouped': ';',
+    'gig_clean': ';',
+    'skills_acquisition_clean': ';',
+}
+
+_INSERT_BATCH = 1000
+
+
+def database_path(url: str) -> str:
+    """File path of a ``sqlite:///path`` URL (``sqlite:///:memory:`` allowed)."""
+    if not url.startswith('sqlite:///'):
+        raise ValueError(f"Unsupported DATABASE_URL '{url}' (expected sqlite:///path)")
+    return url[len('sqlite:///'):] or ':memory:'
+
+
+def split_options(value, separator: str) -> List[str]:
+    """Selected options of one multi-select answer.
+
+    Commas inside parentheses belong to the option text
+    (``'Penghantaran (Grab, FoodPanda)'``) and do not split it.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    text = str(value)
+    if separator == ',':
+        parts = re.split(r',(?![^()]*\))', text)
+    else:
+        parts = text.split(separator)
+    seen: List[str] = []
+    for part in (part.strip() for part in parts):
+        if part and part not in seen:
+            seen.append(part)
+    return seen
+
+
+def _sql_type(series: pd.Series) -> str:
+    dtype = series.dtype
+    if str(dtype) == YEAR_DTYPE or pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _sql_value(value, sql_type: str):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if sql_type == 'INTEGER':
+        return int(value)
+    if sql_type == 'REAL':
+        return float(value)
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat(sep=' ')
+    return str(value)
+
+
+class SurveyColumn:
+    """One survey column as stored in ``survey_columns``."""
+
+    def __init__(self, position: int, name: str, sql_type: str, dtype: str = '',
+                 separator: Optional[str] = None):
+        self.position = position
+        self.name = name
+        self.sql_type = sql_type
+        self.dtype = dtype
+        self.separator = separator
+
+    @property
+    def sql(self) -> str:
+        return f'c{self.position}'
+
+
+class SurveyDatabase:
+    """Survey responses in one SQLite file (one connection per thread)."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS survey_meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS survey_columns (
+            position INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            sql_type TEXT NOT NULL,
+            dtype TEXT NOT NULL,
+            separator TEXT
+        );
+        CREATE TABLE IF NOT EXISTS response_options (
+            response_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            option TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_response_options_option ON response_options (position, option, response_id);
+        CREATE INDEX IF NOT EXISTS ix_response_options_response ON response_options (response_id);
+        CREATE TABLE IF NOT EXISTS imported_responses (row_key INTEGER PRIMARY KEY);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._columns: Optional[Tuple[int, Dict[str, SurveyColumn]]] = None
+        self._memory_conn: Optional[sqlite3.Connection] = None
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connect().executescript(self._SCHEMA)
+
+    @classmethod
+    def from_url(cls, url: str = DEFAULT_DATABASE_URL) -> 'SurveyDatabase':
+        return cls(database_path(url))
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path == ':memory:':
+                # An in-memory database lives in its connection; share that one
+                if self._memory_conn is None:
+                    self._memory_conn = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+                conn = self._memory_conn
+            else:
+                conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # -- metadata -------------------------------------------------------
+
+    def meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.connect().execute('SELECT value FROM survey_meta WHERE key = ?', (key,)).fetchone()
+        return default if row is None else row[0]
+
+    @property
+    def version(self) -> int:
+        return int(self.meta('version', '0'))
+
+    @property
+    def columns(self) -> Dict[str, SurveyColumn]:
+        """Stored survey columns by header (re-read when another process ingests)."""
+        version = self.version
+        cached = self._columns
+        if cached is None or cached[0] != version:
+            rows = self.connect().execute(
+                'SELECT position, name, sql_type, dtype, separator FROM survey_columns ORDER BY position').fetchall()
+            cached = self._columns = (version, {row[1]: SurveyColumn(*row) for row in rows})
+        return cached[1]
+
+    def __len__(self) -> int:
+        if not self.columns:
+            return 0
+        return self.connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    # -- ingestion ------------------------------------------------------
+
+    def ingest(self, df: pd.DataFrame, fingerprint: str = '', key: Optional[str] = None,
+               keep_imported: bool = False) -> int:
+        """Replace the stored responses with ``df``; returns the new version."""
+        return self.ingest_chunks([df], fingerprint=fingerprint, key=key, keep_imported=keep_imported)
+
+    def ingest_chunks(self, chunks: Iterable[pd.DataFrame], fingerprint: str = '',
+                      key: Optional[str] = None, keep_imported: bool = False) -> int:
+        """Replace the stored responses with the rows of ``chunks``.
+
+        The first chunk defines the columns. Each chunk is normalised
+        (``normalize_dataset``, on a copy: the caller's frames are left
+        untouched) and inserted in one pass, so only one chunk
+        is in memory at a time. Everything happens in a single transaction:
+        readers see the old responses until the new ones are complete.
+        ``key`` names the column that identifies a response for later
+        appends (default: the whole row). Responses marked as imported stay
+        marked with ``keep_imported`` (when ``chunks`` still hold them).
+        """
+        conn = self.connect()
+        with self._lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DROP TABLE IF EXISTS responses')
+                conn.execute('DELETE FROM survey_columns')
+                conn.execute('DELETE FROM response_options')
+                columns: Optional[List[SurveyColumn]] = None
+                next_id = 0
+                for chunk in chunks:
+                    chunk = normalize_dataset(chunk.copy())
+                    if columns is None:
+                        if key is not None and key not in chunk.columns:
+                            raise ValueError(f"Unknown key column '{key}'")
+                        columns = self._create_tables(conn, chunk)
+                    next_id = self._insert(conn, chunk, columns, next_id, _row_key_values(chunk, key))
+                if columns is None:
+                    self._create_tables(conn, pd.DataFrame())
+                if keep_imported:
+                    conn.execute('DELETE FROM imported_responses WHERE row_key NOT IN (SELECT row_key FROM responses)')
+                else:
+                    conn.execute('DELETE FROM imported_responses')
+                version = self.version + 1
+                self._set_meta(conn, version, fingerprint, next_id, [('row_key', key or '')])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            finally:
+                self._columns = None
+        conn.execute('ANALYZE')
+        return version
+
+    def append(self, df: pd.DataFrame, fingerprint: str = '', dedupe: bool = True,
+               imported: bool = False) -> Tuple[int, int]:
+        """Insert the responses of ``df`` that are not stored yet.
+
+        Returns ``(version, rows added)``; see ``append_chunks``.
+        """
+        return self.append_chunks([df], fingerprint=fingerprint, dedupe=dedupe, imported=imported)
+
+    def append_chunks(self, chunks: Iterable[pd.DataFrame], fingerprint: str = '',
+                      dedupe: bool = True, imported: bool = False) -> Tuple[int, int]:
+        """Insert the new responses of ``chunks`` after the stored ones.
+
+        A response is new when its ``row_key`` is neither stored nor earlier
+        in the input (``dedupe=False`` inserts every row). Existing rows are
+        only probed through the ``row_key`` index, so the cost depends on
+        the number of appended rows. The version is bumped only when rows
+        were added. An empty database is ingested instead. ``imported``
+        marks the added rows as coming from outside the app's survey file
+        (``imported_responses``).
+        """
+        stored = self.columns
+        if not stored:
+            version = self.ingest_chunks(chunks, fingerprint=fingerprint)
+            if imported:
+                self.connect().execute(
+                    'INSERT OR IGNORE INTO imported_responses (row_key) SELECT row_key FROM responses')
+            return version, len(self)
+
+        conn = self.connect()
+        table = {row[1] for row in conn.execute('PRAGMA table_info(responses)')}
+        if 'row_key' not in table:
+            raise RuntimeError('The survey database predates appends; ingest it again first')
+        key = self.meta('row_key') or None
+        columns = list(stored.values())
+        with self._lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                next_id = conn.execute('SELECT COALESCE(MAX(id) + 1, 0) FROM responses').fetchone()[0]
+                first_id = next_id
+                for chunk in chunks:
+                    chunk = _align_chunk(normalize_dataset(chunk.copy()), columns)
+                    keys = _row_key_values(chunk, key)
+                    if dedupe:
+                        new = ~pd.Series(keys).duplicated().to_numpy()
+                        existing = self._stored_keys(conn, keys[new])
+                        new &= ~np.isin(keys, list(existing))
+                        chunk, keys = chunk[new], keys[new]
+                    next_id = self._insert(conn, chunk, columns, next_id, keys)
+                    if imported:
+                        conn.executemany('INSERT OR IGNORE INTO imported_responses (row_key) VALUES (?)',
+                                         ((row_key,) for row_key in keys.tolist()))
+                added = next_id - first_id
+                if not added:
+                    conn.execute('ROLLBACK')
+                    return self.version, 0
+                version = self.version + 1
+                self._set_meta(conn, version, fingerprint, next_id, [])
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                self._columns = None
+        return version, added
+
+    @staticmethod
+    def _stored_keys(conn: sqlite3.Connection, keys: np.ndarray) -> set:
+        found = set()
+        values = keys.tolist()
+        for start in range(0, len(values), 500):
+            block = values[start:start + 500]
+            placeholders = ', '.join('?' * len(block))
+            found.update(row[0] for row in conn.execute(
+                f'SELECT row_key FROM responses WHERE row_key IN ({placeholders})', block))
+        return found
+
+    def _set_meta(self, conn: sqlite3.Connection, version: int, fingerprint: str, rows: int,
+                  extra: List[Tuple[str, str]]) -> None:
+        conn.executemany('INSERT OR REPLACE INTO survey_meta (key, value) VALUES (?, ?)', [
+            ('version', str(version)),
+            ('fingerprint', fingerprint),
+            ('ingested_at', datetime.now().isoformat()),
+            ('rows', str(rows)),
+        ] + extra)
+
+    def _create_tables(self, conn: sqlite3.Connection, df: pd.DataFrame) -> List[SurveyColumn]:
+        schema = SchemaResolver(df.columns)
+        separators = {}
+        for key, separator in MULTI_SELECT_SEPARATORS.items():
+            column = schema.get(key) or (key if key in df.columns else None)
+            if column is not None:
+                separators[column] = separator
+
+        columns = [
+            SurveyColumn(position, str(name), _sql_type(df[name]), str(df[name].dtype), separators.get(name))
+            for position, name in enumerate(df.columns)
+        ]
+        conn.executemany(
+            'INSERT INTO survey_columns (position, name, sql_type, dtype, separator) VALUES (?, ?, ?, ?, ?)',
+            [(c.position, c.name, c.sql_type, c.dtype, c.separator) for c in columns],
+        )
+        definitions = ''.join(f', {c.sql} {c.sql_type}' for c in columns)
+        conn.execute(f'CREATE TABLE responses (id INTEGER PRIMARY KEY, row_key INTEGER{definitions})')
+        conn.execute('CREATE INDEX ix_responses_row_key ON responses (row_key)')
+
+        by_name = {c.name: c for c in columns}
+        for key in INDEXED_KEYS:
+            column = by_name.get(schema.get(key))
+            if column is not None:
+                conn.execute(f'CREATE INDEX ix_responses_{column.sql} ON responses ({column.sql})')
+        return columns
+
+    def _insert(self, conn: sqlite3.Connection, df: pd.DataFrame, columns: List[SurveyColumn], next_id: int,
+                keys: np.ndarray) -> int:
+        names = [c.name for c in columns]
+        placeholders = ', '.join('?' * (len(columns) + 2))
+        insert = f"INSERT INTO responses (id, row_key{''.join(', ' + c.sql for c in columns)}) VALUES ({placeholders})"
+        multi = [c for c in columns if c.separator]
+
+        frame = df.reindex(columns=names)
+        values = frame.astype(object).to_numpy()
+        for start in range(0, len(frame), _INSERT_BATCH):
+            block = values[start:start + _INSERT_BATCH]
+            ids = range(next_id + start, next_id + start + len(block))
+            block_keys = keys[start:start + _INSERT_BATCH].tolist()
+            conn.executemany(insert, (
+                (row_id, row_key, *(_sql_value(value, c.sql_type) for value, c in zip(row, columns)))
+                for row_id, row_key, row in zip(ids, block_keys, block)
+            ))
+            options = [
+                (row_id, c.position, option)
+                for row_id, row in zip(ids, block)
+                for c in multi
+                for option in split_options(row[c.position], c.separator)
+            ]
+            conn.executemany('INSERT INTO response_options (response_id, position, option) VALUES (?, ?, ?)', options)
+        return next_id + len(frame)
+
+
+class SQLiteQueryBackend(QueryBackend):
+    """Filtered counts and rows computed by SQLite."""
+
+    name = 'sqlite'
+
+    def __init__(self, database: SurveyDatabase):
+        self.database = database
+        # Database version whose imported responses were last looked at
+        self._seen_version: Optional[int] = None
+
+    def columns(self) -> List[str]:
+        return list(self.database.columns)
+
+    def sync(self, df: pd.DataFrame, fingerprint: str = '') -> None:
+        """Re-ingest ``df`` unless the database already holds this fingerprint.
+
+        ``df`` is expected to include the imported responses (see
+        ``imported``); they stay marked as imported.
+        """
+        if not fingerprint or self.database.meta('fingerprint') != fingerprint:
+            key = self.database.meta('row_key') or None
+            self.database.ingest(df, fingerprint=fingerprint, key=key if key in df.columns else None,
+                                 keep_imported=True)
+        self._seen_version = self.database.version
+
+    def append(self, delta: pd.DataFrame, fingerprint: str = '', base_fingerprint: str = '') -> bool:
+        """Insert only ``delta`` when the database holds the version it was appended to."""
+        if not base_fingerprint or self.database.meta('fingerprint') != base_fingerprint:
+            return False
+        self.database.append(delta, fingerprint=fingerprint, dedupe=False)
+        self._seen_version = self.database.version
+        return True
+
+    def imported(self, changed_only: bool = False) -> Optional[pd.DataFrame]:
+        """Responses appended with ``--append`` (None if there are none).
+
+        With ``changed_only`` they are only read when the database version
+        is not the one last synced or looked at, so checking costs a single
+        metadata read.
+        """
+        version = self.database.version
+        if changed_only and version == self._seen_version:
+            return None
+        self._seen_version = version
+        if not self.database.columns:
+            return None
+        rows = self._read(' WHERE row_key IN (SELECT row_key FROM imported_responses)', [])
+        return rows if len(rows) else None
+
+    def _column(self, name: str) -> Optional[SurveyColumn]:
+        return self.database.columns.get(name)
+
+    def where(self, filters: Optional[Mapping[str, Sequence]]) -> Tuple[str, List]:
+        """``WHERE`` clause (or ``''``) and parameters for ``filters``."""
+        clauses, params = [], []
+        for name, values in (filters or {}).items():
+            column = self._column(name)
+            values = [value for value in (values or []) if value != '']
+            if column is None or not values:
+                continue
+            if column.dtype == YEAR_DTYPE:
+                values = parse_years(values)
+            elif column.sql_type == 'INTEGER':
+                values = [int(float(value)) for value in values if _is_number(value)]
+            elif column.sql_type == 'REAL':
+                values = [float(value) for value in values if _is_number(value)]
+            else:
+                values = [str(value) for value in values]
+            if not values:
+                clauses.append('0')
+                continue
+            clauses.append(f"{column.sql} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def count(self, filters: Optional[Mapping[str, Sequence]] = None) -> int:
+        if not self.database.columns:
+            return 0
+        where, params = self.where(filters)
+        return self.database.connect().execute(f'SELECT COUNT(*) FROM responses{where}', params).fetchone()[0]
+
+    def value_counts(self, column: str, filters: Optional[Mapping[str, Sequence]] = None,
+                     options: bool = False) -> Dict:
+        target = self._column(column)
+        if target is None:
+            return {}
+        where, params = self.where(filters)
+        if options and target.separator:
+            sql = (f'SELECT o.option, COUNT(*) AS n FROM response_options o '
+                   f'WHERE o.position = ? AND o.response_id IN (SELECT id FROM responses{where}) '
+                   f'GROUP BY o.option ORDER BY n DESC, o.option')
+            params = [target.position] + params
+        else:
+            condition = f'{target.sql} IS NOT NULL'
+            where = f'{where} AND {condition}' if where else f' WHERE {condition}'
+            sql = (f'SELECT {target.sql}, COUNT(*) AS n FROM responses{where} '
+                   f'GROUP BY {target.sql} ORDER BY n DESC, {target.sql}')
+        return {value: count for value, count in self.database.connect().execute(sql, params)}
+
+    def crosstab(self, rows: str, columns: str, filters: Optional[Mapping[str, Sequence]] = None) -> pd.DataFrame:
+        """Counts of every (``rows``, ``columns``) answer pair as a frame."""
+        row_column, col_column = self._column(rows), self._column(columns)
+        if row_column is None or col_column is None:
+            return pd.DataFrame()
+        where, params = self.where(filters)
+        condition = f'{row_column.sql} IS NOT NULL AND {col_column.sql} IS NOT NULL'
+        where = f'{where} AND {condition}' if where else f' WHERE {condition}'
+        sql = (f'SELECT {row_column.sql}, {col_column.sql}, COUNT(*) FROM responses{where} '
+               f'GROUP BY {row_column.sql}, {col_column.sql}')
+        cells = self.database.connect().execute(sql, params).fetchall()
+        if not cells:
+            return pd.DataFrame()
+        table = pd.DataFrame(cells, columns=[rows, columns, 'count'])
+        return table.pivot(index=rows, columns=columns, values='count').fillna(0).astype('int64')
+
+    def rows(self, filters: Optional[Mapping[str, Sequence]] = None, columns: Optional[Sequence[str]] = None,
+             limit: Optional[int] = None, offset: int = 0) -> pd.DataFrame:
+        """Matching responses (only ``columns`` if given), in ingestion order."""
+        where, params = self.where(filters)
+        return self._read(where, params, columns, limit, offset)
+
+    def _read(self, where: str, params: List, columns: Optional[Sequence[str]] = None,
+              limit: Optional[int] = None, offset: int = 0) -> pd.DataFrame:
+        stored = self.database.columns
+        selected = [stored[name] for name in (columns or stored) if name in stored]
+        if not selected:
+            return pd.DataFrame()
+        sql = f"SELECT id{''.join(', ' + c.sql for c in selected)} FROM responses{where} ORDER BY id"
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params = params + [int(limit), int(offset)]
+        cursor = self.database.connect().execute(sql, params)
+        frame = pd.DataFrame.from_records(cursor.fetchall(), columns=['id'] + [c.name for c in selected])
+        frame = frame.set_index('id')
+        frame.index.name = None
+        for column in selected:
+            if column.dtype in _RESTORED_DTYPES:
+                frame[column.name] = frame[column.name].astype(column.dtype)
+            elif column.dtype.startswith('datetime64'):
+                frame[column.name] = pd.to_datetime(frame[column.name]).astype(column.dtype)
+        return frame
+
+
+def _row_key_values(df: pd.DataFrame, key: Optional[str]) -> np.ndarray:
+    # SQLite integers are signed
+    return row_keys(df, key if key in df.columns else None).view(np.int64)
+
+
+def _align_chunk(df: pd.DataFrame, columns: List[SurveyColumn]) -> pd.DataFrame:
+    """``df`` with the stored columns, cast to their stored dtypes where possible."""
+    df = df.rename(columns=canonical_columns(df.columns))
+    names = [c.name for c in columns]
+    unknown = [column for column in df.columns if column not in names]
+    if unknown:
+        raise ValueError(f'Unknown survey columns: {unknown}')
+    df = df.reindex(columns=names)
+    for column in columns:
+        if column.dtype and str(df[column.name].dtype) != column.dtype:
+            try:
+                df[column.name] = df[column.name].astype(column.dtype)
+            except (TypeError, ValueError):
+                pass
+    return df
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+_databases: Dict[str, SurveyDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(url: str = DEFAULT_DATABASE_URL) -> SurveyDatabase:
+    """Shared ``SurveyDatabase`` for ``url`` (opened on first call)."""
+    database = _databases.get(url)
+    if database is None:
+        with _databases_lock:
+            database = _databases.get(url)
+            if database is None:
+                database = _databases[url] = SurveyDatabase.from_url(url)
+    return database
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m models.storage',
+        description='Load a survey export into the SQLite survey database.',
+    )
+    parser.add_argument('input', help='CSV or xlsx survey export')
+    parser.add_argument('--database-url', default=None,
+                        help='sqlite:///path (default: DATABASE_URL setting)')
+    parser.add_argument('--chunksize', type=int, default=10000, help='rows inserted per chunk')
+    parser.add_argument('--append', action='store_true',
+                        help='add only responses that are not stored yet instead of replacing them')
+    parser.add_argument('--key', default=None,
+                        help='column identifying a response, e.g. Timestamp (default: the whole row)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f'input file not found: {args.input}')
+    url = args.database_url
+    if url is None:
+        from config.settings import Config
+        url = Config.DATABASE_URL
+
+    from .batch_score import read_chunks
+
+    database = SurveyDatabase.from_url(url)
+    chunks = read_chunks(args.input, args.chunksize)
+    if args.append and database.columns:
+        stored_key = database.meta('row_key') or None
+        if args.key is not None and args.key != stored_key:
+            parser.error(f"the database identifies responses by {stored_key or 'the whole row'}; "
+                         f"re-ingest it to use --key {args.key}")
+        version, added = database.append_chunks(chunks, imported=True)
+        print(json.dumps({'database': database.path, 'version': version, 'added': added, 'rows': len(database)}))
+        return 0
+    version = database.ingest_chunks(chunks, key=args.key)
+    print(json.dumps({'database': database.path, 'version': version, 'rows': len(database)}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
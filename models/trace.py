@@ -0,0 +1,114 @@
+"""Request-scoped debug tracing for the filter and chart endpoints.
+
+Tracing is switched off unless a request asks for it, either with the
+``X-Debug-Trace: 1`` header or the ``?_trace=1`` query flag. When it is off,
+``trace()`` returns after a single flag check and never formats its message
+or evaluates its fields, so it is safe to leave in hot paths.
+
+When it is on, every event is collected on ``flask.g`` and attached to the
+JSON response under the ``_trace`` key::
+
+    trace('filter applied', column=column, rows=len(df))
+    trace('unique values', values=lambda: list(df[column].unique()[:5]))
+
+Field values that are callables are only invoked while tracing is enabled,
+which keeps expensive diagnostics (``unique()``, ``value_counts()``) out of
+normal requests.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from flask import g, has_request_context, request
+
+TRACE_HEADER = 'X-Debug-Trace'
+TRACE_PARAM = '_trace'
+TRACE_KEY = '_trace'
+
+_TRUTHY = {'1', 'true', 'yes', 'on'}
+
+
+def _requested() -> bool:
+    flag = request.headers.get(TRACE_HEADER) or request.args.get(TRACE_PARAM)
+    return bool(flag) and flag.strip().lower() in _TRUTHY
+
+
+def trace_enabled() -> bool:
+    """Return True when the current request asked for a debug trace."""
+    if not has_request_context():
+        return False
+    return g.get('_trace_events') is not None
+
+
+def _to_jsonable(value: Any) -> Any:
+    if callable(value):
+        value = value()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return _to_jsonable(value.item())
+    if hasattr(value, 'to_dict'):
+        return _to_jsonable(value.to_dict())
+    if hasattr(value, 'tolist'):
+        return _to_jsonable(value.tolist())
+    return str(value)
+
+
+def trace(message: str, **fields: Any) -> None:
+    """Record a trace event for the current request (no-op when disabled)."""
+    if not has_request_context():
+        return
+    events = g.get('_trace_events')
+    if events is None:
+        return
+    event = {
+        'msg': message,
+        't_ms': round((time.perf_counter() - g._trace_started) * 1000, 3),
+    }
+    for key, value in fields.items():
+        try:
+            event[key] = _to_jsonable(value)
+        except Exception as exc:  # diagnostics must never break the request
+            event[key] = f'<unavailable: {exc}>'
+    events.append(event)
+
+
+def get_trace() -> List[Dict[str, Any]]:
+    """Return the events collected so far for the current request."""
+    if not trace_enabled():
+        return []
+    return list(g._trace_events)
+
+
+def init_app(app) -> None:
+    """Install the before/after request hooks that collect and emit traces."""
+
+    @app.before_request
+    def _start_trace():
+        if _requested():
+            g._trace_events = []
+            g._trace_started = time.perf_counter()
+
+    @app.after_request
+    def _attach_trace(response):
+        events = g.get('_trace_events')
+        if events is None or not response.is_json:
+            return response
+        payload = response.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload[TRACE_KEY] = {
+                'endpoint': request.endpoint,
+                'elapsed_ms': round((time.perf_counter() - g._trace_started) * 1000, 3),
+                'events': events,
+            }
+            response.set_data(app.json.dumps(payload))
+        return response
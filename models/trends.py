@@ -0,0 +1,158 @@
+"""Survey metrics per graduation year.
+
+Trend charts (employment rate, salary bands, quality bands and gig
+participation by ``Tahun graduasi anda?``) used to need one filtered call per
+year. Every metric is encoded once per dataset version as small integer
+category codes aligned to the dataset rows (-1 where the graduate did not
+answer), reusing the caches that already exist for them:
+
+* ``employment`` - employed / not employed (``employment_status``);
+* ``salary_band`` - ``BandedColumn`` codes of ``current_salary``;
+* ``quality_band`` - high / medium / low band of the cached rubric scores;
+* ``gig_participation`` - taking part or not (the ``gig_type`` derived column).
+
+A request filters rows with the ``FacetIndex`` masks and counts every
+(metric, year, category) combination in one ``np.bincount``::
+
+    trend_table(get_trend_metrics(), get_facet_index(), 'Tahun graduasi anda?',
+                request.args, ['employment', 'quality_band'])
+
+Responses are served through the chart response cache, so each result is
+kept per dataset fingerprint and filter set (``models.cache``).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .facets import FacetIndex
+from .registry import register_dataset_cache
+
+# Answers of ``employment_status`` that count as employed
+EMPLOYED_ANSWERS = ('Ya, bekerja sepenuh masa', 'Ya, bekerja separuh masa')
+
+# ``gig_type`` label of graduates not taking part in the gig economy
+NOT_INTERESTED_GIG = 'Tidak Berminat'
+
+TREND_METRICS = ('employment', 'salary_band', 'quality_band', 'gig_participation')
+
+# Metrics reported as the share of their first category
+RATE_METRICS = {'employment', 'gig_participation'}
+
+
+class EncodedMetric:
+    """Category code of every dataset row (-1 for no answer) and the category labels."""
+
+    def __init__(self, codes: np.ndarray, labels: List[str]):
+        self.codes = codes
+        self.labels = labels
+
+
+def _binary(positive: pd.Series, answered: pd.Series) -> np.ndarray:
+    codes = np.where(positive.to_numpy(dtype=bool), 0, 1).astype(np.int8)
+    codes[~answered.to_numpy(dtype=bool)] = -1
+    return codes
+
+
+def encode_metrics(df: pd.DataFrame, path: Optional[str] = None) -> Dict[str, EncodedMetric]:
+    """``EncodedMetric`` of every trend metric available in ``df`` (the shared dataset at ``path``)."""
+    from .bands import get_banded
+    from .derived import get_derived
+    from .quality_cube import QUALITY_BANDS, get_score_matrix, quality_band_codes
+    from .schema import get_schema
+
+    schema = get_schema(path)
+    metrics = {}
+
+    status_column = schema.get('employment_status')
+    if status_column is not None:
+        status = df[status_column].astype(str).str.strip()
+        metrics['employment'] = EncodedMetric(
+            _binary(status.isin(EMPLOYED_ANSWERS), df[status_column].notna()),
+            ['Employed', 'Not employed'])
+
+    banded = get_banded('current_salary', path)
+    if banded is not None:
+        metrics['salary_band'] = EncodedMetric(banded.codes.reindex(df.index, fill_value=-1).to_numpy(), banded.labels)
+
+    totals = get_score_matrix(df.index, path).sum(axis=1, dtype=np.int16)
+    metrics['quality_band'] = EncodedMetric(quality_band_codes(totals).astype(np.int8), list(QUALITY_BANDS))
+
+    gig = get_derived('gig_type', path)
+    if gig is not None:
+        gig = gig.reindex(df.index)
+        metrics['gig_participation'] = EncodedMetric(
+            _binary(gig != NOT_INTERESTED_GIG, gig.notna() & (gig != '')),
+            ['Taking part', 'Not taking part'])
+    return metrics
+
+
+def trend_table(metrics: Dict[str, EncodedMetric], index: FacetIndex, year_column: str,
+                args=None, names: Optional[Sequence[str]] = None) -> Dict:
+    """Per-year counts and shares of the ``names`` metrics for the rows matching ``args``."""
+    names = [name for name in (names or TREND_METRICS) if name in metrics]
+    year = index.facet(year_column)
+    rows = index.mask(args) if args is not None else np.ones(len(index.df), dtype=bool)
+    rows &= year.codes >= 0
+
+    # Lay every metric's (year, category) cells side by side and count them all at once
+    years = len(year.options)
+    offsets, keys, start = {}, [], 0
+    year_codes = year.codes[rows].astype(np.int64)
+    for name in names:
+        metric = metrics[name]
+        codes = metric.codes[rows]
+        answered = codes >= 0
+        offsets[name] = start
+        keys.append(start + year_codes[answered] * len(metric.labels) + codes[answered])
+        start += years * len(metric.labels)
+    cells = np.bincount(np.concatenate(keys) if keys else np.array([], dtype=np.int64), minlength=start)
+    graduates = np.bincount(year_codes, minlength=years)
+
+    order = sorted(range(years), key=lambda code: int(year.options[code]))
+    result = {}
+    for name in names:
+        labels = metrics[name].labels
+        counts = cells[offsets[name]:offsets[name] + years * len(labels)].reshape(years, len(labels))[order]
+        answered = counts.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = np.where(answered[:, None] > 0, counts / answered[:, None] * 100, 0.0)
+        entry = {
+            'labels': labels,
+            'answered': answered.tolist(),
+            'counts': {label: counts[:, position].tolist() for position, label in enumerate(labels)},
+            'percentages': {label: np.round(shares[:, position], 1).tolist()
+                            for position, label in enumerate(labels)},
+        }
+        if name in RATE_METRICS:
+            entry['rate'] = np.round(shares[:, 0], 1).tolist()
+        result[name] = entry
+
+    return {
+        'years': [int(year.options[code]) for code in order],
+        'graduates': graduates[order].tolist(),
+        'metrics': result,
+    }
+
+
+_cache: Dict[str, Tuple[int, Dict[str, EncodedMetric]]] = register_dataset_cache({})
+_cache_lock = threading.Lock()
+
+
+def get_trend_metrics(path: Optional[str] = None) -> Dict[str, EncodedMetric]:
+    """``encode_metrics()`` of the current version of the shared dataset at ``path``."""
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+
+    path = path or DEFAULT_DATASET_PATH
+    dataset = get_store(path).get()
+    cached = _cache.get(path)
+    if cached is None or cached[0] != dataset.version:
+        with _cache_lock:
+            cached = _cache.get(path)
+            if cached is None or cached[0] != dataset.version:
+                cached = _cache[path] = (dataset.version, encode_metrics(dataset.df, path))
+    return cached[1]
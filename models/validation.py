@@ -0,0 +1,223 @@
+"""Validation report of the loaded survey, built once per dataset version.
+
+Blueprints used to print their own key-column checks on every load and a
+separate debug script re-read the workbook to inspect graduation years.
+``validate_dataset()`` checks the whole frame in one pass instead:
+
+* expected columns - the schema keys (or headers) each dashboard reads,
+  listed in ``EXPECTED_COLUMNS``, and which of them are missing;
+* null rates - answered / missing counts of every column;
+* value domains - closed-choice questions against their known options
+  (``CHOICE_DOMAINS``), range columns that are not ringgit bands, 1-5
+  scales and graduation years outside their ranges.
+
+Domain checks work on the distinct answers of a column (``pd.factorize``),
+so the cost does not grow with repeated answers. Years and scale answers
+are already ``<NA>`` when they do not parse, so for normalised columns the
+report lists the raw answers the normalisers recorded
+(``models.normalize.coerced_values``). The report is cached per
+dataset version (``get_validation_report``), computed right after every
+load by ``init_app`` and served as JSON by ``/dashboard/api/dataset/validation``.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bands import BAND_COLUMNS, parse_band
+from .likert import LIKERT_DTYPE, LIKERT_KEYS, to_likert_series
+from .normalize import YEAR_DTYPE, coerced_counts, coerced_values, to_year_series
+from .registry import register_dataset_cache
+from .schema import SchemaResolver
+
+# Filters every dashboard offers
+FILTER_KEYS = ('graduation_year', 'gender', 'institution')
+
+# Dashboard -> schema keys (or exact headers) it reads, besides FILTER_KEYS
+EXPECTED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'dashboard': ('employment_status', 'time_to_employment', 'job_type', 'job_status',
+                  'employment_sectors', 'industry', 'current_salary', 'field_of_study'),
+    'demografi': ('age', 'field_of_study', 'field_group'),
+    'sosioekonomi': ('household_income', 'Pekerjaan bapa anda', 'Pekerjaan ibu anda?',
+                     'Bagaimana anda membiayai pendidikan anda?'),
+    'sektor-gaji': ('employment_status', 'employment_sectors', 'expected_salary', 'current_salary',
+                    'salary_match', 'field_group', 'education_level'),
+    'graduanluar': ('employment_status', 'job_type', 'out_of_field_reason', 'field_of_study'),
+    'intern': ('internship', 'internship_skip_reason', 'job_challenges',
+               'Bagaimana internship membantu anda dalam mendapatkan pekerjaan?'),
+    'gig_economy': ('gig_economy', 'gig_reason', 'support_needed', 'gig_income'),
+    'faktor-graduan': tuple(LIKERT_KEYS) + ('professional_cert',),
+    'status-pekerjaan': ('employment_status', 'time_to_employment', 'job_type', 'success_factors',
+                         'out_of_field_reason', 'job_status'),
+    'graduan-bidang': ('field_group',),
+}
+
+# Options of the closed-choice questions (compared as stripped text)
+CHOICE_DOMAINS: Dict[str, Tuple[str, ...]] = {
+    'gender': ('Lelaki', 'Perempuan'),
+    'age': ('20-24 tahun', '25-29 tahun', '30 tahun ke atas'),
+    'education_level': ('Diploma', 'Ijazah Sarjana Muda', 'Sarjana'),
+    'employment_status': ('Ya, bekerja sepenuh masa', 'Ya, bekerja separuh masa', 'Tidak, sedang mencari pekerjaan'),
+    'time_to_employment': ('Kurang dari 3 bulan', '3 - 6 bulan', '7 - 12 bulan', 'Lebih dari 1 tahun'),
+    'job_status': ('Pekerja tetap', 'Pekerja kontrak', 'Usahawan',
+                   'Pekerja ekonomi gig (contoh: Grab, freelancer, Shopee seller)'),
+    'salary_match': ('Ya, gaji saya setanding dengan kelulusan saya', 'Tidak pasti',
+                     'Tidak, gaji saya lebih rendah daripada yang sepatutnya'),
+    'professional_cert': ('Tidak', 'Ya, contoh: ACCA, CFA, PMP, Cisco, Google Certification'),
+    'internship': ('Ya, di sektor swasta', 'Ya, di sektor awam', 'Ya, di syarikat sendiri', 'Tidak menjalani internship'),
+}
+
+# Answers of range columns that are valid without being a ringgit band
+BAND_EXTRAS: Dict[str, Tuple[str, ...]] = {
+    'gig_income': ('Tidak relevan kerana saya tidak bekerja dalam ekonomi gig',),
+}
+
+# Keys converted at load: domain kind, normalised dtype and converter
+PARSED_DOMAINS: Dict[str, Tuple[str, str, Callable[[pd.Series], pd.Series]]] = {
+    'graduation_year': ('year', YEAR_DTYPE, to_year_series),
+    **{key: ('likert', LIKERT_DTYPE, to_likert_series) for key in LIKERT_KEYS},
+}
+
+# Distinct unknown values listed per column
+MAX_UNKNOWN_VALUES = 10
+
+
+def _text(values: np.ndarray) -> pd.Series:
+    return pd.Series(values, dtype=object).astype(str).str.strip()
+
+
+def _domain(key: str, column: pd.Series,
+            coerced: Dict[str, Dict[str, int]]) -> Tuple[Optional[str], Optional[Dict]]:
+    """Domain kind of schema key ``key`` and its unknown answers ``{value: rows}``.
+
+    ``coerced`` holds the answers the normalisers turned into ``<NA>``
+    (``coerced_values`` of the frame).
+    """
+    if key in PARSED_DOMAINS:
+        kind, dtype, convert = PARSED_DOMAINS[key]
+        if str(column.dtype) == dtype:
+            return kind, dict(coerced.get(column.name, {}))
+        return kind, coerced_counts(column, convert(column))
+    if key in BAND_COLUMNS:
+        extras = set(BAND_EXTRAS.get(key, ()))
+        kind, valid = 'band', lambda uniques: np.array(
+            [parse_band(value) is not None or value in extras for value in _text(uniques)], dtype=bool)
+    elif key in CHOICE_DOMAINS:
+        kind, valid = 'choices', lambda uniques: _text(uniques).isin(CHOICE_DOMAINS[key]).to_numpy()
+    else:
+        return None, None
+
+    codes, uniques = pd.factorize(column)
+    uniques = np.asarray(uniques, dtype=object)
+    unknown = ~np.asarray(valid(uniques), dtype=bool)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return kind, {str(value): int(count) for value, count in zip(uniques[unknown], counts[unknown])}
+
+
+def validate_dataset(df: pd.DataFrame, schema: Optional[SchemaResolver] = None) -> Dict:
+    """Expected columns, null rates and domain checks of ``df`` as a JSON-ready dict."""
+    schema = schema or SchemaResolver(df.columns)
+    keys_by_column = {column: key for key, column in schema.to_dict().items()}
+    rows = len(df)
+
+    def resolve(name: str) -> Optional[str]:
+        return schema.get(name) or (name if name in df.columns else None)
+
+    dashboards = {}
+    for dashboard, names in EXPECTED_COLUMNS.items():
+        expected = list(dict.fromkeys(FILTER_KEYS + names))
+        dashboards[dashboard] = {
+            'expected': len(expected),
+            'missing': [name for name in expected if resolve(name) is None],
+        }
+
+    # One vectorized pass for every column's answered count
+    answered = df.notna().sum().to_numpy() if len(df.columns) else np.array([], dtype=np.int64)
+    coerced = coerced_values(df)
+    columns = {}
+    issues: List[str] = []
+    for position, column in enumerate(df.columns):
+        key = keys_by_column.get(column)
+        nulls = rows - int(answered[position])
+        entry = {
+            'key': key,
+            'dtype': str(df[column].dtype),
+            'answered': int(answered[position]),
+            'nulls': nulls,
+            'null_rate': round(nulls / rows * 100, 1) if rows else 0.0,
+        }
+        kind, unknown = _domain(key, df[column], coerced) if key else (None, None)
+        if kind is not None:
+            ranked = sorted(unknown.items(), key=lambda item: -item[1])
+            entry.update({
+                'domain': kind,
+                'unknown_rows': sum(unknown.values()),
+                'unknown_values': dict(ranked[:MAX_UNKNOWN_VALUES]),
+            })
+            if unknown:
+                issues.append(f"{key}: {len(unknown)} unknown value(s) in {entry['unknown_rows']} row(s)")
+        columns[str(column)] = entry
+
+    for dashboard, result in dashboards.items():
+        if result['missing']:
+            issues.append(f"{dashboard}: missing {', '.join(result['missing'])}")
+    empty = [name for name, entry in columns.items() if rows and entry['answered'] == 0]
+    if empty:
+        issues.append(f"{len(empty)} column(s) without any answer")
+
+    return {
+        'rows': rows,
+        'columns_total': len(df.columns),
+        'valid': not issues,
+        'issues': issues,
+        'dashboards': dashboards,
+        'schema_missing': list(schema.missing),
+        'columns': columns,
+    }
+
+
+_cache: Dict[str, Tuple[int, Dict]] = register_dataset_cache({})
+_cache_lock = threading.Lock()
+
+
+def get_validation_report(path: Optional[str] = None) -> Dict:
+    """``validate_dataset()`` of the current version of the shared dataset at ``path``."""
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+    from .schema import get_schema
+
+    path = path or DEFAULT_DATASET_PATH
+    dataset = get_store(path).get()
+    cached = _cache.get(path)
+    if cached is None or cached[0] != dataset.version:
+        with _cache_lock:
+            cached = _cache.get(path)
+            if cached is None or cached[0] != dataset.version:
+                report = validate_dataset(dataset.df, get_schema(path))
+                report.update({
+                    'dataset_version': dataset.version,
+                    'fingerprint': dataset.fingerprint,
+                    'generated_at': datetime.now().isoformat(),
+                })
+                cached = _cache[path] = (dataset.version, report)
+    return cached[1]
+
+
+def init_app(app, dataset_path: Optional[str] = None) -> None:
+    """Validate every loaded version of the shared dataset and print a summary."""
+    from .dataset import DEFAULT_DATASET_PATH, get_store
+
+    path = dataset_path or DEFAULT_DATASET_PATH
+
+    def report_validation(dataset) -> None:
+        report = get_validation_report(path)
+        print(f"Dataset version {dataset.version}: {report['rows']} rows, "
+              f"{len(report['issues'])} validation issue(s)")
+        for issue in report['issues']:
+            print(f"  ✗ {issue}")
+
+    get_store(path).on_load(report_validation)
@@ -0,0 +1,120 @@
+"""Background warm-up of the unfiltered chart payloads.
+
+After every dataset load (startup and each ``reload()``) the warm-up stage
+requests every cacheable chart endpoint without filters through the app's
+test client, on a small thread pool, so the responses land in the response
+cache before the first real visitor arrives. ``/api/health`` reports ready
+only once the warm-up for the current dataset version has finished.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .cache import chart_rules
+from .dataset import DEFAULT_DATASET_PATH, Dataset, get_store
+
+
+class WarmUp:
+    """Tracks and runs the warm-up for the current dataset version."""
+
+    def __init__(self, app, workers: int = 4):
+        self.app = app
+        self.workers = workers
+        self.status = 'pending'
+        self.version: Optional[int] = None
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.duration_ms = 0.0
+        self.endpoints: List[str] = []
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def paths(self) -> List[str]:
+        """URL paths of the chart endpoints that take no view arguments."""
+        return sorted(rule.rule for rule in chart_rules(self.app) if not rule.arguments)
+
+    def start(self, dataset: Dataset) -> threading.Thread:
+        with self._lock:
+            self.status = 'running'
+            self.version = dataset.version
+            self.started_at = datetime.now().isoformat()
+            self.finished_at = None
+            self.errors = {}
+        thread = threading.Thread(
+            target=self.run, args=(dataset.version,), name='chart-warm-up', daemon=True
+        )
+        self._thread = thread
+        thread.start()
+        return thread
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the running warm-up finishes; return ``ready``."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def run(self, version: int) -> None:
+        started = time.perf_counter()
+        paths = self.paths()
+        errors: Dict[str, str] = {}
+
+        def fetch(path):
+            try:
+                response = self.app.test_client().get(path)
+                if response.status_code != 200:
+                    errors[path] = f'HTTP {response.status_code}'
+            except Exception as e:
+                errors[path] = str(e)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='warm-up') as pool:
+            list(pool.map(fetch, paths))
+
+        with self._lock:
+            if self.version != version:
+                # A newer reload started its own warm-up; leave its status alone
+                return
+            self.endpoints = paths
+            self.errors = errors
+            self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.finished_at = datetime.now().isoformat()
+            self.status = 'ready'
+        print(f"Warm-up finished: {len(paths)} chart endpoints in {self.duration_ms} ms "
+              f"({len(errors)} errors) for dataset version {version}")
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'status': self.status,
+                'ready': self.status == 'ready',
+                'dataset_version': self.version,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'duration_ms': self.duration_ms,
+                'endpoints': len(self.endpoints),
+                'errors': dict(self.errors),
+            }
+
+
+def init_app(app, dataset_path: str = DEFAULT_DATASET_PATH) -> WarmUp:
+    """Run a warm-up after every load of ``dataset_path``.
+
+    Call after the response cache is installed so the warm-up fills it.
+    """
+    warm_up = WarmUp(app, workers=app.config.get('WARMUP_WORKERS', 4))
+    app.extensions['warm_up'] = warm_up
+    if app.config.get('WARMUP_ENABLED', True):
+        get_store(dataset_path).on_load(warm_up.start)
+    else:
+        warm_up.status = 'disabled'
+    return warm_up
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from models.bands import BandedColumn, parse_band, sort_bands
+from models.graduate_quality import _score_salary, score_salary_column
+
+SALARIES = ['RM3,000 - RM4,999', 'Kurang daripada RM1,500', 'RM1,500 - RM2,999',
+            'RM5,000 ke atas', 'RM3,000 - RM4,999', None, 'Tidak relevan']
+
+
+def test_range_labels_parsed_into_ordered_bounds():
+    assert (parse_band('RM4,850 – RM10,959').lower, parse_band('RM4,850 – RM10,959').upper) == (4850, 10959)
+    assert (parse_band('Kurang daripada RM1,500').lower, parse_band('Kurang daripada RM1,500').upper) == (0, 1500)
+    assert parse_band('Lebih daripada RM10,959').upper is None
+    assert parse_band('Tidak relevan kerana saya tidak bekerja dalam ekonomi gig') is None
+    assert sort_bands(['RM5,000 ke atas', 'Tiada', 'RM1,500 - RM2,999', 'Kurang daripada RM1,500']) == [
+        'Kurang daripada RM1,500', 'RM1,500 - RM2,999', 'RM5,000 ke atas', 'Tiada']
+
+
+def test_banded_column_rates_and_median():
+    banded = BandedColumn.from_series(pd.Series(SALARIES))
+
+    assert banded.labels == ['Kurang daripada RM1,500', 'RM1,500 - RM2,999', 'RM3,000 - RM4,999', 'RM5,000 ke atas']
+    assert banded.counts().tolist() == [1, 1, 2, 1]
+    assert banded.share_at_least(3000) == 60.0
+    assert banded.median() == 3000 + (2.5 - 2) / 2 * 1999
+    assert banded.subset([0, 3, 5]).counts().tolist() == [0, 0, 1, 1]
+
+
+def test_vectorised_salary_score_matches_rubric():
+    salaries = pd.Series(SALARIES)
+    assert score_salary_column(salaries).tolist() == [_score_salary(value) for value in SALARIES]
+    assert score_salary_column(salaries).tolist() == [1, 0, 0, 2, 1, 0, 0]
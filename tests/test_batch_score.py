@@ -0,0 +1,93 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from models.batch_score import read_chunks, score_file
+from models.graduate_quality import (
+    EMPLOYMENT_STATUS_COL,
+    INDUSTRY_COL,
+    JOB_TYPE_COL,
+    SALARY_COL,
+    SECTOR_COL,
+    TIME_TO_JOB_COL,
+    score_rows,
+)
+
+ROWS = [
+    {
+        JOB_TYPE_COL: 'Bekerja dalam bidang pengajian',
+        EMPLOYMENT_STATUS_COL: 'Pekerja tetap',
+        SECTOR_COL: 'Sektor Swasta (Syarikat Tempatan, Syarikat Multinasional)',
+        INDUSTRY_COL: 'Teknologi Maklumat & Telekomunikasi',
+        SALARY_COL: 'RM5,000 ke atas',
+        TIME_TO_JOB_COL: '3 - 6 bulan',
+    },
+    {
+        JOB_TYPE_COL: 'Tidak bekerja',
+        EMPLOYMENT_STATUS_COL: None,
+        SECTOR_COL: None,
+        INDUSTRY_COL: None,
+        SALARY_COL: None,
+        TIME_TO_JOB_COL: None,
+    },
+    {
+        JOB_TYPE_COL: 'Mengusahakan perniagaan sendiri',
+        EMPLOYMENT_STATUS_COL: 'Usahawan',
+        SECTOR_COL: 'Sektor Keusahawanan (Menjalankan perniagaan sendiri)',
+        INDUSTRY_COL: 'Perniagaan, Keusahawanan & Perdagangan',
+        SALARY_COL: 'RM3,000 - RM4,999',
+        TIME_TO_JOB_COL: 'Kurang dari 3 bulan',
+    },
+]
+
+
+def _export(tmp_path):
+    df = pd.DataFrame(ROWS * 7)
+    df.insert(0, 'id', [f'g{i}' for i in range(len(df))])
+    path = tmp_path / 'archive.csv'
+    # Survey exports carry trailing spaces in the header
+    df.rename(columns=lambda column: column + ' ').to_csv(path, index=False)
+    return df, path
+
+
+def test_chunked_scores_match_whole_file_scoring(tmp_path):
+    df, path = _export(tmp_path)
+    scores_path, summary_path = tmp_path / 'scores.csv', tmp_path / 'summary.json'
+
+    summary = score_file(str(path), str(scores_path), str(summary_path), chunksize=4, workers=1, id_columns=['id'])
+
+    expected = score_rows(df)
+    written = pd.read_csv(scores_path)
+    assert written['id'].tolist() == df['id'].tolist()
+    assert written['total'].tolist() == expected['total'].tolist()
+    assert summary['chunks'] == 6
+    assert summary['total_graduates'] == 21
+    assert sum(band['count'] for band in summary['bands'].values()) == 21
+    assert json.loads(summary_path.read_text())['bands'] == summary['bands']
+
+
+def test_parallel_chunks_are_written_in_input_order(tmp_path):
+    _, path = _export(tmp_path)
+    serial, parallel = tmp_path / 'serial.csv', tmp_path / 'parallel.csv'
+
+    score_file(str(path), str(serial), chunksize=2, workers=1)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        score_file(str(path), str(parallel), chunksize=2, workers=3, executor=executor)
+
+    assert serial.read_text() == parallel.read_text()
+
+
+def test_xlsx_chunks_are_read_as_text_like_csv(tmp_path):
+    df = pd.DataFrame({
+        'Tahun graduasi anda?': pd.array([2022, None, 2024], dtype='Int16'),
+        'Jantina anda?': ['Lelaki', 'Perempuan', None],
+    })
+    df.to_csv(tmp_path / 'survey.csv', index=False)
+    df.to_excel(tmp_path / 'survey.xlsx', index=False)
+
+    from_csv = pd.concat(read_chunks(str(tmp_path / 'survey.csv'), chunksize=2))
+    from_xlsx = pd.concat(read_chunks(str(tmp_path / 'survey.xlsx'), chunksize=2))
+
+    assert from_xlsx['Tahun graduasi anda?'].tolist()[0] == '2022'
+    pd.testing.assert_frame_equal(from_xlsx, from_csv)
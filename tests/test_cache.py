@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pandas as pd
+from flask import Blueprint, Flask, jsonify, request
+
+from models.cache import code_version, init_app as init_response_cache
+from models.cache_backends import SQLiteBackend
+from models.dataset import get_store
+from models.warmup import init_app as init_warm_up
+
+
+def _app(path, calls, backend=None, version=None):
+    app = Flask(__name__)
+    app.config['CACHE_VERSION'] = version
+    bp = Blueprint('charts', __name__)
+
+    @bp.route('/api/chart')
+    def chart():
+        calls.append(dict(request.args.lists()))
+        return jsonify({'rows': len(get_store(path).df)})
+
+    @bp.route('/api/export')
+    def export():
+        calls.append('export')
+        return jsonify({'ok': True})
+
+    app.register_blueprint(bp, url_prefix='/charts')
+    init_response_cache(app, dataset_path=path, backend=backend)
+    return app
+
+
+def test_identical_requests_share_cached_response():
+    calls = []
+    path = 'test-cache-share.xlsx'
+    get_store(path).publish(pd.DataFrame({'a': [1, 2]}))
+    client = _app(path, calls).test_client()
+
+    first = client.get('/charts/api/chart?x=1&y=2')
+    second = client.get('/charts/api/chart?y=2&x=1')
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == {'rows': 2}
+    assert len(calls) == 1
+
+    # Dimension order is part of the payload
+    assert client.get('/charts/api/chart?by=field&by=year').headers['X-Cache'] == 'MISS'
+    assert client.get('/charts/api/chart?by=year&by=field').headers['X-Cache'] == 'MISS'
+    assert client.get('/charts/api/chart?by=field&by=year').headers['X-Cache'] == 'HIT'
+
+
+def test_shared_entries_are_not_served_to_other_code_versions(tmp_path):
+    calls, backend = [], SQLiteBackend(str(tmp_path / 'cache.sqlite3'))
+    path = 'test-cache-version.xlsx'
+    get_store(path).publish(pd.DataFrame({'a': [1, 2]}))
+
+    assert _app(path, calls, backend, 'v1').test_client().get('/charts/api/chart').headers['X-Cache'] == 'MISS'
+    assert _app(path, calls, backend, 'v1').test_client().get('/charts/api/chart').headers['X-Cache'] == 'HIT'
+    assert _app(path, calls, backend, 'v2').test_client().get('/charts/api/chart').headers['X-Cache'] == 'MISS'
+    assert len(code_version()) == 12 and code_version() == code_version()
+
+
+def test_reload_invalidates_and_exports_are_not_cached():
+    calls = []
+    path = 'test-cache-reload.xlsx'
+    store = get_store(path)
+    store.publish(pd.DataFrame({'a': [1, 2]}))
+    client = _app(path, calls).test_client()
+
+    client.get('/charts/api/chart')
+    store.publish(pd.DataFrame({'a': [1, 2, 3]}))
+    assert client.get('/charts/api/chart').get_json() == {'rows': 3}
+
+    client.get('/charts/api/export')
+    client.get('/charts/api/export')
+    assert calls.count('export') == 2
+
+
+def test_warm_up_precomputes_unfiltered_payloads():
+    calls = []
+    path = 'test-cache-warm.xlsx'
+    app = _app(path, calls)
+    warm_up = init_warm_up(app, dataset_path=path)
+
+    get_store(path).publish(pd.DataFrame({'a': [1]}))
+
+    assert warm_up.wait(timeout=5)
+    assert warm_up.to_dict()['endpoints'] == 1
+    assert app.test_client().get('/charts/api/chart').headers['X-Cache'] == 'HIT'
+
+
+def test_concurrent_misses_are_coalesced():
+    path = 'test-cache-flight.xlsx'
+    get_store(path).publish(pd.DataFrame({'a': [1, 2]}))
+    app = Flask(__name__)
+    bp = Blueprint('slow', __name__)
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    @bp.route('/api/slow')
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return jsonify({'rows': 2})
+
+    app.register_blueprint(bp)
+    init_response_cache(app, dataset_path=path)
+    flights = app.extensions['single_flight']
+    results = []
+
+    def fetch():
+        results.append(app.test_client().get('/api/slow?f=1').headers['X-Cache'])
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.time() + 5
+    while flights.shared < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == ['COALESCED'] * 3 + ['MISS']
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from models.cache_backends import TOUCH_BATCH, CacheBackend, MemoryBackend, SQLiteBackend, create_backend
+
+
+@pytest.mark.parametrize('make', [
+    lambda tmp_path: MemoryBackend(max_entries=2),
+    lambda tmp_path: SQLiteBackend(str(tmp_path / 'cache.sqlite3'), max_entries=2),
+])
+def test_backend_roundtrip_and_eviction(tmp_path, make):
+    backend = make(tmp_path)
+    assert backend.get('a') is None
+
+    backend.set('a', b'{"x": 1}', 200)
+    backend.set('b', b'{}', 404)
+    assert backend.get('a') == (b'{"x": 1}', 200)
+    backend.set('c', b'{}', 200)
+
+    assert len(backend) == 2
+    assert backend.get('a') is not None
+    assert backend.stats()['hits'] == 2
+
+    backend.clear()
+    assert len(backend) == 0
+
+
+def test_sqlite_entries_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    SQLiteBackend(path).set('k', b'[1]', 200)
+
+    other = create_backend({'CACHE_BACKEND': 'sqlite', 'CACHE_SQLITE_PATH': path})
+    assert other.get('k') == (b'[1]', 200)
+
+
+def test_sqlite_hits_write_their_use_times_in_batches(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    backend = SQLiteBackend(path)
+    backend.set('k', b'[1]', 200)
+
+    def used_at():
+        return sqlite3.connect(path).execute('SELECT used_at FROM chart_cache').fetchone()[0]
+
+    stored = used_at()
+    for _ in range(TOUCH_BATCH - 1):
+        assert backend.get('k') == (b'[1]', 200)
+    assert used_at() == stored
+    backend.get('k')
+    assert used_at() > stored
+
+
+def test_incomplete_backend_fails_when_created():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
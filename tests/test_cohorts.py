@@ -0,0 +1,46 @@
+import pandas as pd
+from werkzeug.datastructures import MultiDict
+
+from models.cohorts import compare_cohorts, parse_cohort
+from models.facets import FacetIndex
+from models.normalize import normalize_dataset
+
+YEAR_COL = 'Tahun graduasi anda?'
+GENDER_COL = 'Jantina anda?'
+STATUS_COL = 'Adakah anda kini bekerja?'
+
+
+def _index():
+    return FacetIndex(normalize_dataset(pd.DataFrame({
+        YEAR_COL: [2022, 2022, 2022, 2023, 2023, 2023, 2024],
+        GENDER_COL: ['Lelaki', 'Perempuan', 'Perempuan', 'Lelaki', 'Perempuan', 'Perempuan', 'Lelaki'],
+        STATUS_COL: ['Ya', 'Ya', 'Tidak', 'Ya', None, 'Tidak', 'Tidak'],
+    })))
+
+
+def test_parse_cohort_reads_filters_and_label():
+    label, filters = parse_cohort(f'{YEAR_COL}=2022&{YEAR_COL}=2023&label=Early')
+    assert label == 'Early'
+    assert filters.getlist(YEAR_COL) == ['2022', '2023']
+    assert parse_cohort(f'{GENDER_COL}=Lelaki')[0] == 'Lelaki'
+    assert parse_cohort('', 2)[0] == 'Cohort 3'
+
+
+def test_overlapping_cohorts_match_filtering_each_separately():
+    cohorts = [
+        parse_cohort(f'{YEAR_COL}=2022'),
+        parse_cohort(f'{YEAR_COL}=2022&{YEAR_COL}=2023&label=2022-2023'),
+    ]
+    result = compare_cohorts(_index(), STATUS_COL, cohorts, MultiDict([(GENDER_COL, 'Perempuan')]))
+
+    assert result['labels'] == ['Tidak', 'Ya']
+    first, second = result['cohorts']
+    assert (first['graduates'], first['counts'], first['percentages']) == (2, [1, 1], [50.0, 50.0])
+    # The 2023 woman without an answer counts as a graduate but not as answered
+    assert (second['graduates'], second['answered'], second['counts']) == (4, 3, [2, 1])
+
+    difference = result['differences'][0]
+    assert difference['baseline'] == '2022' and difference['cohort'] == '2022-2023'
+    assert difference['percentage_points'] == [16.7, -16.7]
+    assert difference['distance'] == 16.7
+    assert difference['shared_graduates'] == 2
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from werkzeug.datastructures import MultiDict
+
+from models.contingency import chi_square_p_value, contingency_stats, stats_requested
+
+
+def test_chi_square_p_value_matches_critical_values():
+    assert abs(chi_square_p_value(3.841458820694124, 1) - 0.05) < 1e-9
+    assert abs(chi_square_p_value(5.991464547107979, 2) - 0.05) < 1e-9
+    assert abs(chi_square_p_value(0.5, 3) - 0.918891) < 1e-6
+    assert chi_square_p_value(0.0, 4) == 1.0
+
+
+def test_contingency_stats_of_a_crosstab():
+    table = pd.DataFrame([[10, 20, 30], [20, 20, 10], [0, 0, 0]],
+                         index=['Diploma', 'Ijazah', 'Sarjana'],
+                         columns=['< RM1,500', 'RM1,500 - RM2,999', 'RM3,000 +'])
+    stats = contingency_stats(table)
+
+    # The empty row is left out of the test
+    assert stats['n'] == 110
+    assert stats['degrees_of_freedom'] == 2
+    assert abs(stats['chi_square'] - 12.5278) < 1e-4
+    assert stats['significant'] and stats['p_value'] < 0.01
+    assert abs(stats['cramers_v'] - np.sqrt(12.5278 / 110)) < 1e-4
+    assert np.array(stats['standardized_residuals']).shape == (3, 3)
+    assert stats['standardized_residuals'][0] == [-2.74, -0.72, 3.26]
+    assert stats['standardized_residuals'][2] == [0.0, 0.0, 0.0]
+
+
+def test_single_row_tables_are_not_tested():
+    stats = contingency_stats([[3, 4, 5]])
+    assert stats['degrees_of_freedom'] == 0
+    assert stats['p_value'] is None and not stats['significant']
+    assert stats['cramers_v'] == 0.0
+
+
+def test_stats_mode_is_opt_in():
+    assert stats_requested(MultiDict([('stats', '1')]))
+    assert not stats_requested(MultiDict([('stats', '0')]))
+    assert not stats_requested(MultiDict())
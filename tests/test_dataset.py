@@ -0,0 +1,95 @@
+import pandas as pd
+
+from models.dataset import DatasetStore
+from models.normalize import coerced_values
+
+
+def _store(calls):
+    def loader(path):
+        calls.append(path)
+        return pd.DataFrame({'Jantina anda?': ['Lelaki', 'Perempuan']})
+    return DatasetStore('survey.xlsx', loader=loader)
+
+
+def test_store_loads_lazily_once():
+    calls = []
+    store = _store(calls)
+    assert not store.loaded
+    assert calls == []
+
+    first = store.get()
+    second = store.get()
+
+    assert first is second
+    assert calls == ['survey.xlsx']
+    assert first.version == 1
+
+
+def test_reload_bumps_version_and_runs_hooks():
+    calls, seen = [], []
+    store = _store(calls)
+    store.get()
+    store.on_load(lambda dataset: seen.append(dataset.version))
+
+    store.reload()
+
+    assert seen == [1, 2]
+    assert store.version == 2
+
+
+def test_load_async_populates_store():
+    calls = []
+    store = _store(calls)
+    store.load_async().join(timeout=5)
+    assert store.loaded
+    assert len(store.df) == 2
+
+
+def _survey():
+    return pd.DataFrame({
+        'Timestamp': ['2024-01-01 10:00', '2024-01-02 11:00', '2024-01-03 12:00'],
+        'Jantina anda?': ['Lelaki', 'Perempuan', 'Lelaki'],
+        'Tahun graduasi anda?': [2022, 2023, 2023],
+    })
+
+
+def test_append_adds_only_new_rows_as_a_delta():
+    store = DatasetStore('survey.xlsx', loader=lambda path: _survey().iloc[:2])
+    first = store.get()
+
+    dataset = store.append(_survey().iloc[1:], key='Timestamp')
+
+    assert dataset.version == 2
+    assert dataset.appended_since(first.version) is dataset.delta
+    assert dataset.delta.index.tolist() == [2]
+    assert dataset.df['Jantina anda?'].tolist() == ['Lelaki', 'Perempuan', 'Lelaki']
+    assert str(dataset.df['Tahun graduasi anda?'].dtype) == 'Int16'
+    assert store.append(_survey()) is dataset
+
+
+def test_append_keeps_the_coerced_answers_of_both_frames():
+    survey = _survey().astype({'Tahun graduasi anda?': object})
+    survey.loc[[0, 2], 'Tahun graduasi anda?'] = 'tidak ingat'
+    store = DatasetStore('survey.xlsx', loader=lambda path: survey.iloc[:2].copy())
+    assert coerced_values(store.get().df) == {'Tahun graduasi anda?': {'tidak ingat': 1}}
+
+    dataset = store.append(survey.iloc[1:], key='Timestamp')
+
+    assert coerced_values(dataset.df) == {'Tahun graduasi anda?': {'tidak ingat': 2}}
+
+
+def test_refresh_appends_rows_added_to_the_file():
+    rows = [2]
+    store = DatasetStore('survey.xlsx', loader=lambda path: _survey().iloc[:rows[0]])
+    store.get()
+
+    rows[0] = 3
+    appended = store.refresh()
+    assert appended.base_version == 1
+    assert len(appended.delta) == 1
+
+    # An edited row is a full reload
+    store._loader = lambda path: _survey().assign(**{'Jantina anda?': 'Perempuan'})
+    reloaded = store.refresh()
+    assert reloaded.version == 3
+    assert reloaded.delta is None
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from models.dataset import DatasetStore
+from models.dedupe import drop_duplicate_submissions
+
+GENDER_COL = 'Jantina anda?'
+YEAR_COL = 'Tahun graduasi anda?'
+INSTITUTION_COL = 'Institusi pendidikan MARA yang anda hadiri?'
+
+
+def _df():
+    return pd.DataFrame({
+        'Timestamp': ['2024-01-03 09:00', '2024-01-01 09:00', '2024-01-02 09:00', '2024-01-04 09:00'],
+        GENDER_COL: ['Lelaki', 'Perempuan', 'lelaki ', 'Perempuan'],
+        YEAR_COL: [2023, 2022, 2023, 2024],
+        INSTITUTION_COL: ['UPTM', 'KPTM', 'UPTM', 'KPTM'],
+    })
+
+
+def test_keeps_the_latest_of_repeated_answers():
+    df, report = drop_duplicate_submissions(_df())
+
+    # Rows 0 and 2 only differ in case, spacing and submission time
+    assert df['Timestamp'].tolist() == ['2024-01-03 09:00', '2024-01-01 09:00', '2024-01-04 09:00']
+    assert report.dropped == [{'row': 2, 'kept_row': 0, 'submitted_at': '2024-01-02 09:00'}]
+    assert (report.rows_in, report.rows_out) == (4, 3)
+
+
+def test_key_subset_and_store_pipeline():
+    df, report = drop_duplicate_submissions(_df(), ['gender', INSTITUTION_COL])
+    assert report.key_columns == [GENDER_COL, INSTITUTION_COL]
+    assert df['Timestamp'].tolist() == ['2024-01-03 09:00', '2024-01-04 09:00']
+
+    store = DatasetStore('survey.xlsx', loader=lambda path: _df(), deduplicate=True)
+    assert len(store.df) == 3
+    assert store.get().duplicates.to_dict()['dropped_count'] == 1
+
+    # A resubmission replaces the stored answer instead of being appended
+    resubmitted = _df().iloc[[1]].assign(Timestamp='2024-02-01 09:00')
+    dataset = store.append(resubmitted)
+    assert dataset.delta is None
+    assert len(dataset.df) == 3
+    assert '2024-02-01 09:00' in dataset.df['Timestamp'].tolist()
+    assert len(dataset.duplicates.dropped) == 2
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from models.dataset import LazyDataProcessor, get_store
+from models.derived import add_derived_columns, map_unique
+
+INSTITUTION_COL = 'Institusi pendidikan MARA yang anda hadiri?'
+FIELD_COL = 'Bidang pengajian utama anda? '
+
+
+def test_map_unique_calls_function_once_per_distinct_value():
+    calls = []
+
+    def upper(value):
+        calls.append(value)
+        return None if value is None else value.upper()
+
+    result = map_unique(pd.Series(['a', 'b', 'a', None, 'a']), upper)
+
+    assert result.tolist() == ['A', 'B', 'A', None, 'A']
+    assert len(calls) == 3
+
+
+def test_derived_columns_are_cached_per_version_and_aligned_to_filtered_rows():
+    path = 'test-derived.xlsx'
+    store = get_store(path)
+    store.publish(pd.DataFrame({
+        INSTITUTION_COL: ['Universiti Poly-Tech Malaysia (UPTM)', 'KPTM Kuala Lumpur', None],
+        FIELD_COL: ['Cyber Security', 'Sains Data & Analitik', 'Sejarah'],
+    }))
+    processor = LazyDataProcessor(path)
+    filtered = processor.df.iloc[[2, 0]]
+
+    categories = processor.derived(filtered, 'institution_category')
+    assert categories.tolist() == [None, 'Universiti Poly-Tech Malaysia (UPTM)']
+    assert processor.derived(filtered, 'field_group').tolist() == ['Other', 'IT & Computer Science']
+
+    store.publish(pd.DataFrame({INSTITUTION_COL: ['Kolej Poly-Tech MARA']}))
+    assert processor.derived(processor.df, 'institution_category').tolist() == ['Kolej Poly-Tech MARA']
+    assert processor.derived(processor.df, 'field_group') is None
+
+
+def test_add_derived_columns_uses_notebook_column_names():
+    df = add_derived_columns(pd.DataFrame({
+        'Apakah bentuk pekerjaan bebas yang anda ceburi sekarang atau bercadang untuk ceburi dalam masa terdekat?': [
+            'Ekonomi Gig: E-commerce & dropshipping (Shopee, Lazada, TikTok Shop), '
+            'Keusahawanan: Mengusahakan perniagaan sendiri (produk, perkhidmatan, syarikat)',
+        ],
+    }))
+
+    assert df['gig_clean'].tolist() == ['Usahawan; E-commerce']
@@ -0,0 +1,49 @@
+import pandas as pd
+from werkzeug.datastructures import MultiDict
+
+from models.facets import FacetIndex
+from models.normalize import normalize_dataset
+
+YEAR_COL = 'Tahun graduasi anda?'
+GENDER_COL = 'Jantina anda?'
+INSTITUTION_COL = 'Institusi pendidikan MARA yang anda hadiri?'
+
+
+def _index():
+    return FacetIndex(normalize_dataset(pd.DataFrame({
+        YEAR_COL: [2022, 2022, 2023, 2023, 2024, None],
+        GENDER_COL: ['Lelaki', 'Perempuan', 'Perempuan', 'Perempuan ', 'Lelaki', 'Perempuan'],
+        INSTITUTION_COL: ['UPTM', 'UPTM', 'KPTM', 'UPTM', None, 'KPTM'],
+    })))
+
+
+def test_counts_without_active_filters():
+    counts = _index().counts({YEAR_COL: YEAR_COL, GENDER_COL: GENDER_COL}, MultiDict())
+
+    assert counts[YEAR_COL] == {'2022': 2, '2023': 2, '2024': 1}
+    assert counts[GENDER_COL] == {'Lelaki': 2, 'Perempuan': 4}
+
+
+def test_each_facet_counts_rows_matching_the_other_filters():
+    args = MultiDict([(GENDER_COL, 'Perempuan'), (YEAR_COL, '2023'), (YEAR_COL, '2024.0'), ('unknown', 'x')])
+    counts = _index().counts(
+        {'years': YEAR_COL, 'genders': GENDER_COL, 'institutions': INSTITUTION_COL}, args)
+
+    # Year options ignore the year filter itself, gender options the gender filter
+    assert counts['years'] == {'2022': 1, '2023': 2, '2024': 0}
+    assert counts['genders'] == {'Lelaki': 1, 'Perempuan': 2}
+    assert counts['institutions'] == {'UPTM': 1, 'KPTM': 1}
+
+
+def test_extended_index_matches_a_rebuild():
+    df = _index().df
+    index = FacetIndex(df.iloc[:4])
+    for column in (YEAR_COL, GENDER_COL, INSTITUTION_COL):
+        index.facet(column)
+
+    extended = index.extended(df, df.iloc[4:])
+    rebuilt = FacetIndex(df)
+    args = MultiDict([(INSTITUTION_COL, 'KPTM')])
+    facets = {YEAR_COL: YEAR_COL, GENDER_COL: GENDER_COL, INSTITUTION_COL: INSTITUTION_COL}
+    assert extended.counts(facets, args) == rebuilt.counts(facets, args)
+    assert extended.facet(YEAR_COL).options == ['2022', '2023', '2024']
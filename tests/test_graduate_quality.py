@@ -9,6 +9,7 @@ from models.graduate_quality import (
     TIME_TO_JOB_COL,
     calculate_quality_insights,
     default_quality_payload,
+    rubric_mismatches,
 )
 
 
@@ -73,3 +74,21 @@ def test_entrepreneurial_signal_counts_as_job_creator():
 
     assert payload['meta']['entrepreneurial_pct'] == 100.0
     assert entrepreneur_card['average_score'] == 2.0
+
+
+def test_compiled_rubric_matches_the_scoring_functions():
+    df = pd.DataFrame({
+        JOB_TYPE_COL: ['Bekerja dalam bidang pengajian', 'Mengusahakan perniagaan sendiri',
+                       'Bekerja di luar bidang pengajian', 'Bekerja dalam bidang pengajian', '', None],
+        EMPLOYMENT_STATUS_COL: ['Pekerja kontrak', 'Usahawan', 'Pekerja tetap',
+                                'Pekerja ekonomi gig (contoh: Grab, freelancer, Shopee seller)', 'Usahawan', None],
+        SECTOR_COL: ['Sektor Kerajaan', 'Sektor Keusahawanan (Menjalankan perniagaan sendiri)',
+                     'Perusahaan Kecil & Sederhana (PKS) / Mikro', '', 'GLC', None],
+        INDUSTRY_COL: ['Perakaunan & Audit', 'Pertanian, Perladangan & Sumber Asli',
+                       'Pendidikan & Latihan', 'Lain-lain', '', None],
+        SALARY_COL: ['RM3,000 - RM4,999', 'RM5,000 ke atas', 'Kurang daripada RM1,500', '', 'Tiada', None],
+        TIME_TO_JOB_COL: ['Kurang dari 3 bulan', '7 - 12 bulan', 'Lebih dari 1 tahun',
+                          'Belum bekerja', '', None],
+    })
+
+    assert set(rubric_mismatches(df).values()) == {0}
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from models.data_processor import filter_frame
+from models.likert import LIKERT_DTYPE, summarize_likert
+from models.normalize import normalize_dataset
+
+INTERNSHIP_COL = 'Sejauh mana latihan industri/praktikal mempengaruhi kebolehpasaran anda?'
+COMMUNICATION_COL = 'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?'
+
+
+def _df():
+    return normalize_dataset(pd.DataFrame({
+        INTERNSHIP_COL: [5, '4 - Tinggi', 4.0, None, 9, 1],
+        COMMUNICATION_COL: [3, 5, 5, 5, 2, '5'],
+        'Jantina anda?': ['Lelaki', 'Perempuan', 'Perempuan', 'Lelaki', 'Perempuan', None],
+    }))
+
+
+def test_likert_columns_encoded_at_load():
+    df = _df()
+
+    assert str(df[INTERNSHIP_COL].dtype) == LIKERT_DTYPE
+    assert df[INTERNSHIP_COL].tolist()[:3] == [5, 4, 4]
+    assert df[INTERNSHIP_COL].isna().tolist()[3:5] == [True, True]
+    assert str(df[COMMUNICATION_COL].dtype) == LIKERT_DTYPE
+
+
+def test_summary_matches_per_factor_counts():
+    df = _df()
+    summary = summarize_likert(df, [INTERNSHIP_COL, COMMUNICATION_COL], groups=df['Jantina anda?'])
+    internship, communication = summary['overall']
+
+    assert internship['distribution'] == [1, 0, 0, 2, 1]
+    assert internship['mean'] == round((1 + 4 + 4 + 5) / 4, 2)
+    assert internship['top_two_box_pct'] == 75.0
+    assert communication['top_box_pct'] == round(4 / 6 * 100, 1)
+
+    groups = {group['value']: group for group in summary['groups']}
+    assert list(groups) == ['Lelaki', 'Perempuan']
+    assert groups['Perempuan']['total'] == 3
+    assert groups['Perempuan']['factors'][0]['distribution'] == [0, 0, 0, 2, 0]
+    assert groups['Lelaki']['factors'][1]['distribution'] == [0, 0, 1, 0, 1]
+
+
+def test_likert_columns_filter_on_query_string_values():
+    df = _df()
+
+    assert len(filter_frame(df, {COMMUNICATION_COL: ['5']})) == 4
+    assert len(filter_frame(df, {COMMUNICATION_COL: ['5', '3']})) == 5
+    assert len(filter_frame(df, {INTERNSHIP_COL: ['4.0']})) == 2
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from models.data_processor import DataProcessor
+from models.normalize import YEAR_DTYPE, normalize_dataset, parse_years, year_counts, year_mask
+
+YEAR_COL = 'Tahun graduasi anda?'
+
+
+def test_graduation_year_normalised_to_small_integers():
+    df = normalize_dataset(pd.DataFrame({
+        'Tahun graduasi anda? ': ['2023 ', 2021.0, 'Graduasi 2020', None, 'tidak pasti', 1850],
+    }))
+    # Aligned to the canonical header first
+    years = df[YEAR_COL]
+
+    assert str(years.dtype) == YEAR_DTYPE
+    assert years.tolist()[:3] == [2023, 2021, 2020]
+    assert years.isna().tolist()[3:] == [True, True, True]
+
+
+def test_year_filters_are_single_integer_comparisons():
+    df = normalize_dataset(pd.DataFrame({YEAR_COL: [2020, 2021, 2021, 2023]}))
+
+    assert parse_years(['2021', '2021.0', ' 2023', 'x']) == [2021, 2023]
+    assert year_mask(df[YEAR_COL], ['2021']).tolist() == [False, True, True, False]
+    assert year_counts(df[YEAR_COL]).to_dict() == {2020: 1, 2021: 2, 2023: 1}
+    assert len(DataProcessor(df).apply_filters({YEAR_COL: ['2023.0']}).filtered_df) == 1
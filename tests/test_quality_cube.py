@@ -0,0 +1,78 @@
+import pandas as pd
+
+from models.graduate_quality import (
+    EMPLOYMENT_STATUS_COL,
+    INDUSTRY_COL,
+    JOB_TYPE_COL,
+    SALARY_COL,
+    SECTOR_COL,
+    TIME_TO_JOB_COL,
+    _score_entrepreneurial,
+    _score_job_alignment,
+    score_rows,
+)
+from models.quality_cube import quality_breakdown, score_matrix, simulate_rubric
+
+HIGH = {
+    JOB_TYPE_COL: 'Bekerja dalam bidang pengajian',
+    EMPLOYMENT_STATUS_COL: 'Pekerja tetap',
+    SECTOR_COL: 'Sektor Swasta (Syarikat Tempatan, Syarikat Multinasional)',
+    INDUSTRY_COL: 'Teknologi Maklumat & Telekomunikasi',
+    SALARY_COL: 'RM5,000 ke atas',
+    TIME_TO_JOB_COL: '3 - 6 bulan',
+}
+LOW = {
+    JOB_TYPE_COL: 'Tidak bekerja',
+    EMPLOYMENT_STATUS_COL: 'Pekerja ekonomi gig (contoh: Grab, freelancer, Shopee seller)',
+    SECTOR_COL: 'Ekonomi Gig & Freelancing',
+    INDUSTRY_COL: 'Ekonomi Gig & Freelancing',
+    SALARY_COL: 'Kurang daripada RM1,500',
+    TIME_TO_JOB_COL: 'Lebih dari 1 tahun',
+}
+
+
+def _df():
+    df = pd.DataFrame([HIGH, LOW, HIGH, LOW, {**HIGH, JOB_TYPE_COL: None}])
+    df['field'] = ['IT', 'IT', 'Bisnes', 'Bisnes', None]
+    df['year'] = [2023, 2023, 2023, 2024, 2024]
+    return df
+
+
+def test_row_scores_match_the_row_rules():
+    df = _df()
+    scores = score_rows(df)
+
+    assert scores['job_alignment'].tolist() == df.apply(_score_job_alignment, axis=1).tolist()
+    assert scores['entrepreneurial_impact'].tolist() == df.apply(_score_entrepreneurial, axis=1).tolist()
+    assert scores['total'].tolist()[:2] == [10, 1]
+
+
+def test_breakdown_groups_one_and_two_dimensions():
+    df = _df()
+    scores = score_rows(df)
+
+    by_field = {g['group']['field']: g for g in quality_breakdown(scores, {'field': df['field']})}
+    assert sorted(by_field) == ['Bisnes', 'IT']
+    assert by_field['IT']['total'] == 2
+    assert by_field['IT']['average_score'] == 5.5
+    assert by_field['IT']['bands'] == {'high': 1, 'medium': 0, 'low': 1}
+    assert by_field['IT']['criteria']['salary_progression']['distribution'] == {'2': 1, '1': 0, '0': 1}
+
+    cells = quality_breakdown(scores, {'field': df['field'], 'year': df['year']})
+    assert [(g['group']['field'], g['group']['year'], g['total']) for g in cells] == [
+        ('Bisnes', 2023, 1), ('Bisnes', 2024, 1), ('IT', 2023, 2)]
+
+
+def test_rubric_simulation_reweights_cached_scores():
+    df = _df()
+    matrix = score_matrix(score_rows(df))
+
+    baseline = simulate_rubric(matrix)
+    assert baseline['bands'] == baseline['baseline_bands']
+    assert baseline['bands']['high']['count'] == 2
+
+    # Without job alignment the two high-scoring graduates drop to 8 points
+    result = simulate_rubric(matrix, {'job_alignment': 0}, high_min=9)
+    assert result['max_score'] == 10.0
+    assert result['bands']['high']['count'] == 0
+    assert result['transitions']['high'] == {'high': 0, 'medium': 2, 'low': 0}
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+
+from models.data_processor import DataProcessor
+from models.normalize import normalize_dataset
+from models.query_backends import PandasQueryBackend, ParquetQueryBackend, QueryBackend, table_records
+from models.storage import SQLiteQueryBackend, SurveyDatabase
+
+YEAR_COL = 'Tahun graduasi anda?'
+GENDER_COL = 'Jantina anda?'
+FIELD_COL = 'Bidang pengajian utama anda?'
+
+
+def _df():
+    return normalize_dataset(pd.DataFrame({
+        YEAR_COL: [2022, 2023, 2023, 2024, 2024, 2024],
+        GENDER_COL: ['Lelaki', 'Perempuan', 'Perempuan', 'Lelaki', 'Perempuan', None],
+        FIELD_COL: ['IT', 'Perakaunan', 'IT', 'IT', 'Perakaunan', 'Undang-undang'],
+    }))
+
+
+def _backends(tmp_path):
+    df = _df()
+    database = SurveyDatabase(str(tmp_path / 'survey.db'))
+    database.ingest(df)
+    backends = [PandasQueryBackend.for_frame(df), SQLiteQueryBackend(database)]
+    try:
+        parquet = ParquetQueryBackend(str(tmp_path / 'survey.parquet'))
+    except RuntimeError:
+        pass
+    else:
+        parquet.sync(df)
+        backends.append(parquet)
+    return backends
+
+
+def test_backends_answer_the_same_queries(tmp_path):
+    filters = {YEAR_COL: ['2023', '2024'], GENDER_COL: ['Perempuan']}
+    results = []
+    for backend in _backends(tmp_path):
+        results.append((
+            backend.count(filters),
+            backend.value_counts(FIELD_COL, filters),
+            backend.crosstab(FIELD_COL, GENDER_COL).to_dict(),
+            backend.paginate(filters, page=1, per_page=1, columns=[FIELD_COL]),
+            backend.paginate({}, page=2, per_page=2, search='it'),
+        ))
+
+    assert results[0][0] == 3
+    assert results[0][1] == {'Perakaunan': 2, 'IT': 1}
+    assert results[0][3]['data'] == [{FIELD_COL: 'Perakaunan'}]
+    assert results[0][3]['pagination']['pages'] == 3
+    for result in results[1:]:
+        assert result == results[0]
+
+
+def test_data_processor_queries_its_backend(tmp_path):
+    df = _df()
+    database = SurveyDatabase(str(tmp_path / 'survey.db'))
+    database.ingest(df)
+
+    pandas_processor = DataProcessor(df).apply_filters({YEAR_COL: ['2024']})
+    sql_processor = DataProcessor(df, SQLiteQueryBackend(database)).apply_filters({YEAR_COL: ['2024']})
+
+    assert sql_processor.filters == {YEAR_COL: ['2024']}
+    for chart in ('bar', 'pie'):
+        assert sql_processor.get_chart_data(chart, FIELD_COL) == pandas_processor.get_chart_data(chart, FIELD_COL)
+    assert sql_processor.get_table_data(1, 10) == pandas_processor.get_table_data(1, 10)
+    assert sql_processor.export_data('csv') == pandas_processor.export_data('csv')
+    assert sql_processor.get_summary_stats()['total_records'] == 3
+
+
+def test_parquet_backend_needs_pyarrow(tmp_path):
+    pytest.importorskip('pyarrow')
+    backend = ParquetQueryBackend(str(tmp_path / 'survey.parquet'))
+    backend.sync(_df())
+
+    assert backend.count() == 6
+    assert backend.value_counts(GENDER_COL, {YEAR_COL: ['2024']}) == {'Lelaki': 1, 'Perempuan': 1}
+
+
+def test_incomplete_backend_fails_when_created():
+    class CountOnly(QueryBackend):
+        def count(self, filters=None):
+            return 0
+
+    with pytest.raises(TypeError):
+        CountOnly()
+
+
+def test_table_rows_with_missing_years_and_scale_answers_serialise():
+    likert_col = 'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?'
+    df = normalize_dataset(pd.DataFrame({YEAR_COL: [2022, None], likert_col: [5, None], GENDER_COL: ['Lelaki', None]}))
+
+    assert table_records(df) == [
+        {YEAR_COL: 2022, likert_col: 5, GENDER_COL: 'Lelaki'},
+        {YEAR_COL: '', likert_col: '', GENDER_COL: ''},
+    ]
+    page = PandasQueryBackend.for_frame(df).paginate()
+    assert page['data'][1] == {YEAR_COL: None, likert_col: None, GENDER_COL: None}
@@ -0,0 +1,52 @@
+import pandas as pd
+from flask import Flask, jsonify, request
+
+import models.registry as registry_module
+from models.dataset import LazyDataProcessor, get_store
+from models.registry import DatasetRegistry, init_app as init_datasets
+from models.schema import _schemas, get_schema
+
+GENDER_COL = 'Jantina anda?'
+
+
+def _frame(rows):
+    return pd.DataFrame({GENDER_COL: ['Lelaki', 'Perempuan'] * (rows // 2)})
+
+
+def test_least_recently_used_dataset_is_evicted_with_its_caches():
+    paths = {name: f'test-registry-{name}.xlsx' for name in ('default', 'a', 'b', 'c')}
+    size = _frame(1000).memory_usage(deep=True).sum()
+    registry = DatasetRegistry(paths, 'default', memory_budget_mb=size * 3.5 / 1024 / 1024)
+
+    for name in ('default', 'a', 'b'):
+        registry.store(paths[name]).publish(_frame(1000))
+    get_schema(paths['b'])
+    registry.store(paths['a'])
+
+    # A fourth frame goes over budget: 'b' is the least recently used
+    registry.store(paths['c']).publish(_frame(1000))
+
+    status = {entry['id']: entry for entry in registry.status()['datasets']}
+    assert {name: entry['loaded'] for name, entry in status.items()} == {
+        'default': True, 'a': True, 'b': False, 'c': True}
+    assert registry.status()['evictions'] == 1
+    assert paths['b'] not in _schemas
+
+
+def test_dataset_argument_selects_the_store(monkeypatch):
+    monkeypatch.setattr(registry_module, '_registry', None)
+    get_store('test-registry-other.xlsx').publish(_frame(4))
+    app = Flask(__name__)
+    app.config['DATASETS'] = {'other': 'test-registry-other.xlsx'}
+    init_datasets(app)
+    processor = LazyDataProcessor()
+
+    @app.route('/api/rows')
+    def rows():
+        return jsonify({'rows': len(processor.df), 'args': sorted(request.args)})
+
+    client = app.test_client()
+    assert client.get(f'/api/rows?dataset=other&{GENDER_COL}=Lelaki').get_json() == {'rows': 4, 'args': [GENDER_COL]}
+    response = client.get('/api/rows?dataset=missing')
+    assert response.status_code == 404
+    assert response.get_json()['datasets'] == ['other', 'questionnaire']
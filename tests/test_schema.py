@@ -0,0 +1,64 @@
+import pandas as pd
+
+from models.dataset import get_store
+from models.graduate_quality import SALARY_COL
+from models.schema import SchemaResolver, canonical_columns, get_schema
+
+
+def test_resolves_header_variants_between_snapshots():
+    schema = SchemaResolver([
+        'Tahun graduasi anda? ',
+        'Sejauh mana Kemahiran Komunikasi  mempengaruhi kebolehpasaran anda?',
+        'Jika Tidak, apakah sebab utama?',
+        SALARY_COL,
+    ])
+
+    assert schema['graduation_year'] == 'Tahun graduasi anda? '
+    assert schema['communication_impact'].startswith('Sejauh mana Kemahiran Komunikasi')
+    assert schema['internship_skip_reason'] == 'Jika Tidak, apakah sebab utama?'
+    assert schema['current_salary'] == SALARY_COL
+    assert schema.get('gender') is None
+    assert 'gender' in schema.missing
+
+
+def test_schema_is_cached_per_dataset_version():
+    path = 'test-schema.xlsx'
+    store = get_store(path)
+    store.publish(pd.DataFrame(columns=['Jantina anda?']))
+    first = get_schema(path)
+    assert get_schema(path) is first
+
+    store.publish(pd.DataFrame(columns=['Jantina anda? ', 'Umur anda?']))
+    second = get_schema(path)
+    assert second is not first
+    # Loaded frames are aligned to the canonical headers
+    assert second['gender'] == 'Jantina anda?'
+    assert second['age'] == 'Umur anda?'
+
+
+def test_survey_versions_are_aligned_to_canonical_headers():
+    renames = canonical_columns([
+        'Institusi pendidikan MARA yang anda hadiri? ',
+        'Sejauh mana Kemahiran Komunikasi  mempengaruhi kebolehpasaran anda?',
+        'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig? ',
+        'Jika Tidak, apakah sebab utama?',
+        'Pekerjaan  bapa anda ',
+    ])
+
+    assert list(renames.values()) == [
+        'Institusi pendidikan MARA yang anda hadiri?',
+        'Sejauh mana kemahiran komunikasi mempengaruhi kebolehpasaran anda?',
+        'Apakah sebab utama anda memilih untuk bekerja dalam ekonomi gig?',
+        'Jika tidak menjalani internship, apakah sebab utama?',
+        'Pekerjaan bapa anda',
+    ]
+
+
+def test_snapshot_without_internship_question_keeps_out_of_field_reason():
+    out_of_field = 'Apakah sebab utama jika anda tidak bekerja dalam bidang pengajian?'
+    columns = [out_of_field, 'Adakah anda menjalani internship/praktikal sebelum tamat pengajian?']
+    schema = SchemaResolver(columns)
+
+    assert schema['out_of_field_reason'] == out_of_field
+    assert schema.get('internship_skip_reason') is None
+    assert canonical_columns(columns)[out_of_field] == out_of_field
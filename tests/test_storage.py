@@ -0,0 +1,118 @@
+import pandas as pd
+from flask import Flask
+
+from models.data_processor import DataProcessor
+from models.dataset import get_store
+from models.normalize import normalize_dataset
+from models.query_backends import init_app as init_query_backend
+from models.storage import SQLiteQueryBackend, SurveyDatabase, main, split_options
+
+YEAR_COL = 'Tahun graduasi anda?'
+GENDER_COL = 'Jantina anda?'
+SKILLS_COL = 'Kemahiran tambahan manakah yang paling banyak diminta oleh majikan semasa temu duga?'
+
+
+def _df():
+    return pd.DataFrame({
+        YEAR_COL: [2022, 2023, 2023, '2024', None],
+        GENDER_COL: ['Lelaki', 'Perempuan', 'Perempuan', 'Lelaki', None],
+        SKILLS_COL: [
+            'Kemahiran komunikasi, Kemahiran pengaturcaraan (Python, SQL, Java)',
+            'Kemahiran komunikasi',
+            None,
+            'Analisis data dan penyelidikan, Kemahiran komunikasi',
+            '',
+        ],
+    })
+
+
+def test_split_options_keeps_commas_inside_parentheses():
+    assert split_options('A, B (x, y), A', ',') == ['A', 'B (x, y)']
+    assert split_options('Latihan; Pengalaman', ';') == ['Latihan', 'Pengalaman']
+    assert split_options(None, ',') == []
+
+
+def test_sql_counts_match_pandas_filters(tmp_path):
+    df = _df()
+    database = SurveyDatabase(str(tmp_path / 'survey.db'))
+    assert database.ingest(df) == 1
+    backend = SQLiteQueryBackend(database)
+    processor = DataProcessor(normalize_dataset(df))
+
+    for filters in ({}, {YEAR_COL: ['2023', '2024.0']}, {GENDER_COL: ['Lelaki'], 'unknown': ['x']}):
+        filtered = processor.apply_filters(filters).filtered_df
+        assert backend.count(filters) == len(filtered)
+        assert backend.value_counts(GENDER_COL, filters) == filtered[GENDER_COL].value_counts().to_dict()
+
+    assert backend.value_counts(SKILLS_COL, options=True) == {
+        'Kemahiran komunikasi': 3,
+        'Analisis data dan penyelidikan': 1,
+        'Kemahiran pengaturcaraan (Python, SQL, Java)': 1,
+    }
+    assert backend.crosstab(GENDER_COL, YEAR_COL).loc['Perempuan', 2023] == 2
+
+    rows = backend.rows({GENDER_COL: ['Lelaki']}, columns=[YEAR_COL])
+    assert str(rows[YEAR_COL].dtype) == 'Int16'
+    assert rows[YEAR_COL].tolist() == [2022, 2024]
+
+
+def test_ingest_and_append_leave_the_callers_frame_untouched(tmp_path):
+    df = _df().rename(columns={YEAR_COL: YEAR_COL + ' '})
+    df.loc[4, YEAR_COL + ' '] = 'tidak ingat'
+    added = df.copy()
+    database = SurveyDatabase(str(tmp_path / 'survey.db'))
+    database.ingest(df)
+    database.append(added)
+
+    for frame in (df, added):
+        assert list(frame.columns)[0] == YEAR_COL + ' '
+        assert frame[YEAR_COL + ' '].tolist() == [2022, 2023, 2023, '2024', 'tidak ingat']
+        assert frame.attrs == {}
+    assert SQLiteQueryBackend(database).count() == 5
+
+
+def test_reingest_replaces_rows_and_bumps_version(tmp_path):
+    database = SurveyDatabase(str(tmp_path / 'survey.db'))
+    database.ingest(_df())
+    version = database.ingest_chunks([_df().iloc[:2], _df().iloc[2:3]])
+
+    assert version == 2
+    assert len(database) == 3
+    assert SQLiteQueryBackend(database).count({GENDER_COL: ['Perempuan']}) == 2
+
+
+def test_append_inserts_only_new_responses(tmp_path):
+    df = _df()
+    database = SurveyDatabase(str(tmp_path / 'survey.db'))
+    database.ingest(df.iloc[:3])
+
+    # Two rows already stored, one repeated inside the batch, two new
+    version, added = database.append(pd.concat([df.iloc[1:], df.iloc[[4]]]))
+
+    assert (version, added) == (2, 2)
+    assert len(database) == 5
+    assert database.append(df) == (2, 0)
+    assert SQLiteQueryBackend(database).count({YEAR_COL: ['2024']}) == 1
+
+
+def test_cli_append_reaches_the_app_and_survives_a_reload(tmp_path):
+    survey, weekly = tmp_path / 'survey.csv', tmp_path / 'weekly.csv'
+    _df().iloc[:3].to_csv(survey, index=False)
+    _df().iloc[2:].to_csv(weekly, index=False)
+    url = f"sqlite:///{tmp_path / 'survey.db'}"
+    app = Flask(__name__)
+    backend = init_query_backend(app, str(survey), SQLiteQueryBackend(SurveyDatabase.from_url(url)))
+    store = get_store(str(survey))
+    assert len(store.get().df) == 3 and backend.count() == 3
+
+    # The export repeats one stored response and adds two
+    assert main([str(weekly), '--database-url', url, '--append']) == 0
+    app.test_client().get('/')
+    assert len(store.df) == backend.count() == 5
+
+    # Reloading the unchanged survey file keeps the appended responses
+    store.reload()
+    assert len(store.df) == 5
+    restarted = SQLiteQueryBackend(SurveyDatabase.from_url(url))
+    assert restarted.count() == 5
+    assert restarted.count({GENDER_COL: ['Lelaki']}) == len(store.df[store.df[GENDER_COL] == 'Lelaki'])
@@ -0,0 +1,49 @@
+from flask import Flask, jsonify
+
+from models.trace import TRACE_HEADER, TRACE_KEY, get_trace, init_app, trace, trace_enabled
+
+
+def _app():
+    app = Flask(__name__)
+    init_app(app)
+    calls = []
+
+    @app.route('/chart')
+    def chart():
+        trace('expensive', value=lambda: calls.append('evaluated') or len(calls))
+        return jsonify({'labels': ['a'], 'enabled': trace_enabled()})
+
+    return app, calls
+
+
+def test_trace_is_noop_without_flag():
+    app, calls = _app()
+    response = app.test_client().get('/chart')
+    payload = response.get_json()
+
+    assert TRACE_KEY not in payload
+    assert payload['enabled'] is False
+    assert calls == []
+
+
+def test_trace_attached_when_header_set():
+    app, calls = _app()
+    response = app.test_client().get('/chart', headers={TRACE_HEADER: '1'})
+    payload = response.get_json()
+
+    assert payload['labels'] == ['a']
+    assert payload[TRACE_KEY]['endpoint'] == 'chart'
+    assert payload[TRACE_KEY]['events'][0]['msg'] == 'expensive'
+    assert payload[TRACE_KEY]['events'][0]['value'] == 1
+    assert calls == ['evaluated']
+
+
+def test_trace_enabled_by_query_flag():
+    app, _ = _app()
+    payload = app.test_client().get('/chart?_trace=1').get_json()
+    assert payload['enabled'] is True
+
+
+def test_trace_outside_request_is_ignored():
+    trace('no request', value=lambda: 1 / 0)
+    assert get_trace() == []
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from werkzeug.datastructures import MultiDict
+
+from models.facets import FacetIndex
+from models.normalize import normalize_dataset
+from models.trends import EncodedMetric, trend_table
+
+YEAR_COL = 'Tahun graduasi anda?'
+GENDER_COL = 'Jantina anda?'
+
+
+def test_every_metric_is_counted_per_year():
+    index = FacetIndex(normalize_dataset(pd.DataFrame({
+        YEAR_COL: [2023, 2022, 2023, 2022, None, 2022],
+        GENDER_COL: ['Lelaki', 'Perempuan', 'Perempuan', 'Perempuan', 'Lelaki', 'Lelaki'],
+    })))
+    metrics = {
+        'employment': EncodedMetric(np.array([0, 0, 1, -1, 0, 1], dtype=np.int8), ['Employed', 'Not employed']),
+        'quality_band': EncodedMetric(np.array([2, 0, 1, 1, 0, 0], dtype=np.int8), ['high', 'medium', 'low']),
+    }
+
+    result = trend_table(metrics, index, YEAR_COL)
+    # Years in ascending order; the row without a year is left out
+    assert result['years'] == [2022, 2023]
+    assert result['graduates'] == [3, 2]
+    employment = result['metrics']['employment']
+    assert employment['answered'] == [2, 2]
+    assert employment['counts'] == {'Employed': [1, 1], 'Not employed': [1, 1]}
+    assert employment['rate'] == [50.0, 50.0]
+    assert result['metrics']['quality_band']['counts'] == {'high': [2, 0], 'medium': [1, 1], 'low': [0, 1]}
+    assert 'rate' not in result['metrics']['quality_band']
+
+    filtered = trend_table(metrics, index, YEAR_COL, MultiDict([(GENDER_COL, 'Perempuan')]), ['employment'])
+    assert list(filtered['metrics']) == ['employment']
+    assert filtered['graduates'] == [2, 1]
+    assert filtered['metrics']['employment']['counts'] == {'Employed': [1, 0], 'Not employed': [0, 1]}
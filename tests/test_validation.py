@@ -0,0 +1,41 @@
+import pandas as pd
+
+from models.normalize import normalize_dataset
+from models.validation import validate_dataset
+
+YEAR_COL = 'Tahun graduasi anda?'
+GENDER_COL = 'Jantina anda?'
+SALARY_COL = 'Berapakah julat gaji bulanan anda sekarang?'
+LIKERT_COL = 'Sejauh mana kemahiran teknikal mempengaruhi kebolehpasaran anda?'
+
+
+def _report():
+    return validate_dataset(normalize_dataset(pd.DataFrame({
+        YEAR_COL: [2022, 'Graduasi 2023', 'tidak ingat', 2023],
+        GENDER_COL: ['Lelaki', 'Perempuan ', 'L', 'L'],
+        SALARY_COL: ['RM1,500 - RM2,999', 'Tiada gaji', None, 'RM5,000 ke atas'],
+        LIKERT_COL: [5, '4 - Tinggi', 9, 1],
+    })))
+
+
+def test_null_rates_and_unknown_values():
+    columns = _report()['columns']
+
+    # Unparseable years become <NA> at load; the raw answer is still reported
+    assert columns[YEAR_COL]['nulls'] == 1
+    assert columns[YEAR_COL]['domain'] == 'year'
+    assert columns[YEAR_COL]['unknown_values'] == {'tidak ingat': 1}
+    assert columns[GENDER_COL]['unknown_values'] == {'L': 2}
+    assert columns[SALARY_COL]['unknown_values'] == {'Tiada gaji': 1}
+    assert columns[SALARY_COL]['null_rate'] == 25.0
+    assert columns[LIKERT_COL]['unknown_values'] == {'9': 1}
+    assert columns[LIKERT_COL]['unknown_rows'] == 1
+
+
+def test_missing_expected_columns_are_issues():
+    report = _report()
+
+    assert not report['valid']
+    assert 'institution' in report['dashboards']['demografi']['missing']
+    assert 'gender: 1 unknown value(s) in 2 row(s)' in report['issues']
+    assert 'graduation_year: 1 unknown value(s) in 1 row(s)' in report['issues']